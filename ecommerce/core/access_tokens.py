@@ -0,0 +1,114 @@
+"""
+Acquisition of the OAuth 2.0 access tokens of the sites' service users.
+
+Tokens are cached until they expire. Shortly before a token expires it becomes stale: it is still returned,
+while a single caller, across all processes sharing the cache, requests a new token in the background. Only
+when no valid token is cached do callers wait for a new one, which is then also requested by a single caller.
+"""
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from edx_rest_api_client.client import EdxRestApiClient
+
+from ecommerce.core.cache_utils import get_or_set_cached
+
+logger = logging.getLogger(__name__)
+
+
+def _refresh_margin(expires_at):
+    """ Returns the number of seconds before the expiration of a token during which it is refreshed. """
+    return int(min(settings.ACCESS_TOKEN_REFRESH_MARGIN, max(0, expires_at - time.time()) / 2))
+
+
+class AccessTokenManager(object):
+    """ Retrieves, and caches, the access token of a site's service user. """
+
+    def __init__(self, site_configuration):
+        self.site_configuration = site_configuration
+
+    @property
+    def cache_key(self):
+        return 'siteconfiguration_access_token:{}'.format(self.site_configuration.id)
+
+    def _metric_key(self, name):
+        return 'siteconfiguration_access_token_metrics:{}:{}'.format(self.site_configuration.id, name)
+
+    def _increment_metric(self, name, delta=1):
+        key = self._metric_key(name)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # The counter has been evicted since it was added.
+            cache.set(key, delta, None)
+
+    def get_access_token(self):
+        """
+        Returns a valid access token.
+
+        Returns:
+            str: JWT access token
+        """
+        access_token, __ = get_or_set_cached(
+            self.cache_key,
+            self.refresh,
+            timeout=lambda token: max(1, int(token[1] - time.time()) - _refresh_margin(token[1])),
+            stale_timeout=lambda token: _refresh_margin(token[1]),
+            jitter=False
+        )
+        return access_token
+
+    def refresh(self):
+        """
+        Requests a new access token from the OAuth 2.0 provider, using the site's OAuth credentials and the
+        client credentials grant.
+
+        Returns:
+            tuple: The JWT access token, and the time at which it expires, as a timestamp.
+        """
+        oauth_settings = self.site_configuration.oauth_settings
+        start = time.time()
+        try:
+            access_token, expiration_datetime = EdxRestApiClient.get_oauth_access_token(
+                '{root}/access_token'.format(root=self.site_configuration.oauth2_provider_url),
+                oauth_settings['SOCIAL_AUTH_EDX_OIDC_KEY'],
+                oauth_settings['SOCIAL_AUTH_EDX_OIDC_SECRET'],
+                token_type='jwt'
+            )
+        except Exception:
+            self._increment_metric('failures')
+            logger.exception(
+                'Failed to retrieve an access token for site configuration [%d].', self.site_configuration.id
+            )
+            raise
+
+        latency = time.time() - start
+        self._increment_metric('refreshes')
+        self._increment_metric('latency_ms', int(latency * 1000))
+        logger.info(
+            'Retrieved an access token for site configuration [%d] in [%.3f] seconds.',
+            self.site_configuration.id, latency
+        )
+
+        expires_in = (expiration_datetime - datetime.datetime.utcnow()).total_seconds()
+        return access_token, time.time() + expires_in
+
+    def get_metrics(self):
+        """
+        Returns the metrics of the token refreshes of all processes sharing the cache.
+
+        Returns:
+            dict: The number of refreshes, the number of failures, and the average latency of refreshes,
+                in seconds.
+        """
+        names = ('refreshes', 'failures', 'latency_ms')
+        values = cache.get_many([self._metric_key(name) for name in names])
+        refreshes, failures, latency_ms = [values.get(self._metric_key(name), 0) for name in names]
+        return {
+            'refreshes': refreshes,
+            'failures': failures,
+            'average_latency': latency_ms / 1000.0 / refreshes if refreshes else None,
+        }
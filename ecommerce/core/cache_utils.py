@@ -0,0 +1,221 @@
+"""
+Caching of responses from remote services.
+
+Values are stored under their cache key as-is, alongside two markers:
+
+* a freshness marker, which expires after the cache timeout. Once it has expired the value is stale: it is
+  still returned, while a single caller refreshes it in the background.
+* a not-found marker, recording that the remote service responded with a 404.
+
+Cache misses are coalesced, so that only one caller per key requests the value from the remote service while
+the others wait for it to be cached.
+"""
+from contextlib import contextmanager
+import logging
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from slumber.exceptions import HttpNotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Cache timeouts are randomly shortened or lengthened by up to this fraction, so that keys
+# cached at the same time do not all expire at the same time.
+CACHE_TIMEOUT_JITTER = 0.1
+
+# Maximum number of seconds a value may take to be fetched by the caller holding the fetch lock.
+FETCH_LOCK_TIMEOUT = 30
+
+# Number of seconds callers wait for the value being fetched by another process, and how often they check for it.
+FETCH_WAIT_TIMEOUT = 5
+FETCH_WAIT_INTERVAL = 0.1
+
+_key_locks = {}
+_key_locks_lock = threading.Lock()
+
+
+def _fresh_key(key):
+    return '{}:fresh'.format(key)
+
+
+def _not_found_key(key):
+    return '{}:not_found'.format(key)
+
+
+def _lock_key(key):
+    return '{}:lock'.format(key)
+
+
+def _jitter(timeout):
+    """ Returns the timeout, randomly adjusted by up to CACHE_TIMEOUT_JITTER. """
+    return max(1, int(timeout * random.uniform(1 - CACHE_TIMEOUT_JITTER, 1 + CACHE_TIMEOUT_JITTER)))
+
+
+@contextmanager
+def _key_lock(key):
+    """ Serializes the threads of this process working on the same cache key. """
+    with _key_locks_lock:
+        lock = _key_locks.setdefault(key, [threading.Lock(), 0])
+        lock[1] += 1
+
+    try:
+        with lock[0]:
+            yield
+    finally:
+        with _key_locks_lock:
+            lock[1] -= 1
+            if not lock[1]:
+                del _key_locks[key]
+
+
+def _acquire_fetch_lock(key):
+    """ Returns a token identifying the caller as the holder of the key's fetch lock, or None if it is held. """
+    token = uuid.uuid4().hex
+    return token if cache.add(_lock_key(key), token, FETCH_LOCK_TIMEOUT) else None
+
+
+def _release_fetch_lock(key, token):
+    """ Releases the key's fetch lock, unless it expired and has since been acquired by another caller. """
+    if token and cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def _run_in_background(func):
+    thread = threading.Thread(target=func)
+    thread.daemon = True
+    thread.start()
+
+
+def _get_entry(key):
+    """
+    Returns the cached value for the key, and whether it is fresh.
+
+    Raises:
+        HttpNotFoundError: If the remote service responded with a 404 for the key.
+    """
+    values, fresh_keys, not_found_keys = get_cached_many([key])
+    if not_found_keys:
+        raise HttpNotFoundError('The remote service responded with a 404 for [{}].'.format(key))
+    return values.get(key), key in fresh_keys
+
+
+def _fetch(key, fetch, lock_token, timeout, stale_timeout, not_found_timeout, jitter):
+    """ Fetches the value for the key from the remote service, caches it, and releases the fetch lock. """
+    try:
+        try:
+            value = fetch()
+        except HttpNotFoundError:
+            cache.set(_not_found_key(key), True, _jitter(not_found_timeout))
+            raise
+
+        if callable(timeout):
+            timeout = timeout(value)
+        if callable(stale_timeout):
+            stale_timeout = stale_timeout(value)
+
+        # The value is cached before the lock is released, so that waiting callers do not fetch it again.
+        set_cached_many({key: value}, timeout, stale_timeout, jitter=jitter)
+        return value
+    finally:
+        _release_fetch_lock(key, lock_token)
+
+
+def get_or_set_cached(key, fetch, timeout, stale_timeout=None, not_found_timeout=None, jitter=True):
+    """
+    Returns the cached value for the key, fetching and caching it if necessary.
+
+    Stale values are returned immediately, and refreshed in the background by a single caller. On a cache
+    miss a single caller fetches the value; concurrent callers wait for it to be cached.
+
+    Arguments:
+        key (str): Cache key.
+        fetch (callable): Returns the value from the remote service.
+        timeout (int or callable): Number of seconds for which the value is fresh, or a callable returning it
+            given the fetched value.
+        stale_timeout (int or callable): Number of seconds after `timeout` during which the stale value is
+            returned, or a callable returning it given the fetched value. Defaults to settings.CACHE_STALE_TIMEOUT.
+        not_found_timeout (int): Number of seconds for which 404 responses are cached.
+            Defaults to settings.CACHE_NOT_FOUND_TIMEOUT.
+        jitter (bool): Whether `timeout` is randomly adjusted. Values which must not outlive `timeout` (e.g.
+            tokens which expire) should not be.
+
+    Returns:
+        The value returned by `fetch`.
+
+    Raises:
+        HttpNotFoundError: If the remote service responded, or recently responded, with a 404.
+        Other exceptions raised by `fetch`.
+    """
+    stale_timeout = settings.CACHE_STALE_TIMEOUT if stale_timeout is None else stale_timeout
+    not_found_timeout = settings.CACHE_NOT_FOUND_TIMEOUT if not_found_timeout is None else not_found_timeout
+
+    value, fresh = _get_entry(key)
+    if value is not None:
+        lock_token = None if fresh else _acquire_fetch_lock(key)
+        if lock_token:
+            def _refresh():
+                try:
+                    _fetch(key, fetch, lock_token, timeout, stale_timeout, not_found_timeout, jitter)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception('Failed to refresh the cached value for [%s].', key)
+
+            _run_in_background(_refresh)
+        return value
+
+    with _key_lock(key):
+        deadline = time.time() + FETCH_WAIT_TIMEOUT
+        while True:
+            value, __ = _get_entry(key)
+            if value is not None:
+                return value
+
+            # Fetch the value if no other process is fetching it, or if it is taking too long to do so.
+            lock_token = _acquire_fetch_lock(key)
+            if lock_token or time.time() >= deadline:
+                return _fetch(key, fetch, lock_token, timeout, stale_timeout, not_found_timeout, jitter)
+
+            time.sleep(FETCH_WAIT_INTERVAL)
+
+
+def get_cached_many(keys):
+    """
+    Returns the values cached for several keys by get_or_set_cached, with a single cache lookup.
+
+    Arguments:
+        keys (iterable): Cache keys.
+
+    Returns:
+        tuple: The cached values keyed by cache key, the set of keys whose values are fresh, and the set of keys
+            for which the remote service recently responded with a 404.
+    """
+    keys = list(keys)
+    entries = cache.get_many([name for key in keys for name in (key, _fresh_key(key), _not_found_key(key))])
+    values = {key: entries[key] for key in keys if entries.get(key) is not None}
+    fresh_keys = set(key for key in keys if _fresh_key(key) in entries)
+    not_found_keys = set(key for key in keys if entries.get(_not_found_key(key)))
+    return values, fresh_keys, not_found_keys
+
+
+def set_cached_many(values, timeout, stale_timeout=None, jitter=True):
+    """
+    Caches several fresh values at once, in the format read by get_or_set_cached.
+
+    Arguments:
+        values (dict): Values keyed by cache key.
+        timeout (int): Number of seconds for which the values are fresh.
+        stale_timeout (int): Number of seconds after `timeout` during which the stale values are returned.
+            Defaults to settings.CACHE_STALE_TIMEOUT.
+        jitter (bool): Whether `timeout` is randomly adjusted.
+    """
+    stale_timeout = settings.CACHE_STALE_TIMEOUT if stale_timeout is None else stale_timeout
+    if jitter:
+        timeout = _jitter(timeout)
+
+    cache.set_many(values, timeout + stale_timeout)
+    cache.set_many({_fresh_key(key): True for key in values}, timeout)
+    # Values found since the remote service responded with a 404 replace the not-found markers.
+    cache.delete_many([_not_found_key(key) for key in values])
@@ -1,3 +1,6 @@
+from requests.exceptions import ConnectionError
+
+
 class MissingRequestError(Exception):
     """ Raised when the current request is missing from threadlocal storage """
     pass
@@ -6,3 +9,8 @@ class MissingRequestError(Exception):
 class SiteConfigurationError(Exception):
     """ Raised when SiteConfiguration is invalid. """
     pass
+
+
+class CircuitOpenError(ConnectionError):
+    """ Raised when a request is not sent, as the circuit to its upstream is open. """
+    pass
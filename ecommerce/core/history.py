@@ -0,0 +1,139 @@
+""" Helpers for the history of models tracked by django-simple-history. """
+from __future__ import unicode_literals
+
+from django.db import connections
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+
+
+def create_history(instances, history_type):
+    """
+    Creates the history records of instances written with bulk queries, which do not send the model signals
+    django-simple-history relies on.
+
+    Arguments:
+        instances (list): Saved instances of a single model with history.
+        history_type (str): '+' for created instances, '~' for updated ones.
+    """
+    if not instances:
+        return
+
+    history_model = type(instances[0]).history.model
+    history_date = timezone.now()
+    history_user = getattr(getattr(HistoricalRecords.thread, 'request', None), 'user', None)
+    if history_user is not None and not history_user.is_authenticated():
+        history_user = None
+
+    fields = type(instances[0])._meta.fields  # pylint: disable=protected-access
+    history_model.objects.bulk_create([
+        history_model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            **{field.attname: getattr(instance, field.attname) for field in fields}
+        )
+        for instance in instances
+    ])
+
+
+def bulk_create_with_history(model, instances, unique_fields):
+    """
+    Inserts instances with a single query, and records their history.
+
+    Some databases do not return the IDs of rows inserted in bulk, so the instances are read back, using
+    fields that are unique together, before their history is recorded.
+
+    Arguments:
+        model (Model): Model of the instances, which has history.
+        instances (list): Unsaved instances.
+        unique_fields (tuple): Names of fields whose values identify an instance.
+    """
+    if not instances:
+        return
+
+    now = timezone.now()
+    for instance in instances:
+        for field in model._meta.concrete_fields:  # pylint: disable=protected-access
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                setattr(instance, field.attname, now)
+    model.objects.bulk_create(instances)
+
+    def _key(instance):
+        return tuple(getattr(instance, field) for field in unique_fields)
+
+    keys = set(_key(instance) for instance in instances)
+    created = {
+        _key(instance): instance
+        for instance in model.objects.filter(**{
+            '{}__in'.format(field): set(getattr(instance, field) for instance in instances)
+            for field in unique_fields
+        })
+        if _key(instance) in keys
+    }
+    for instance in instances:
+        instance.id = created[_key(instance)].id
+    create_history(instances, '+')
+
+
+def bulk_update(model, instances, fields, batch_size=None):
+    """
+    Updates the given fields of instances, without recording their history.
+
+    Each batch of instances is updated with a single query, which sets every field with a CASE expression
+    over the primary keys of the batch. Fields set on each save, e.g. date_updated, are set to the current
+    date/time, as they would be by saving the instances.
+
+    Arguments:
+        model (Model): Model of the instances.
+        instances (iterable): Saved instances.
+        fields (list): Names or attribute names of the fields to update.
+        batch_size (int): Maximum number of instances updated by a single query. The number is also limited by
+            the number of parameters the database accepts in a query.
+
+    Returns:
+        list: The updated instances.
+    """
+    instances = list(instances)
+    if not instances:
+        return instances
+
+    opts = model._meta  # pylint: disable=protected-access
+    fields = [opts.get_field(name) for name in fields]
+    auto_now_fields = [
+        field for field in opts.concrete_fields if getattr(field, 'auto_now', False) and field not in fields
+    ]
+    now = timezone.now()
+    for instance in instances:
+        for field in auto_now_fields:
+            setattr(instance, field.attname, now)
+    fields += auto_now_fields
+
+    # Each instance adds its primary key, and its primary key and value for each field, to the parameters of the query.
+    connection = connections[model.objects.db]
+    max_batch_size = max(connection.ops.bulk_batch_size([None] * (2 * len(fields) + 1), instances), 1)
+    batch_size = min(batch_size, max_batch_size) if batch_size else max_batch_size
+    for start in range(0, len(instances), batch_size):
+        batch = instances[start:start + batch_size]
+        model.objects.filter(pk__in=[instance.pk for instance in batch]).update(**{
+            field.attname: Case(
+                *[When(pk=instance.pk, then=Value(getattr(instance, field.attname), output_field=field))
+                  for instance in batch],
+                output_field=field
+            )
+            for field in fields
+        })
+    return instances
+
+
+def bulk_update_with_history(model, instances, fields, batch_size=None):
+    """
+    Updates the given fields of instances, as bulk_update does, and records their history.
+
+    Arguments:
+        model (Model): Model of the instances, which has history.
+        instances (iterable): Saved instances.
+        fields (list): Names or attribute names of the fields to update.
+        batch_size (int): Maximum number of instances updated by a single query.
+    """
+    create_history(bulk_update(model, instances, fields, batch_size=batch_size), '~')
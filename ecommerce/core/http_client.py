@@ -0,0 +1,229 @@
+"""
+Client for the HTTP requests sent to other services.
+
+All sessions send their requests through the same adapter, which keeps a pool of keep-alive connections per
+host, shared by all the threads of the process.
+
+Each host is an upstream, with its own circuit breaker and metrics. Once
+settings.HTTP_CLIENT_CIRCUIT_BREAKER_THRESHOLD consecutive requests to an upstream have failed, whether with a
+connection error, a timeout (after their retries) or a 5xx response, the circuit is open: requests are rejected
+without being sent for settings.HTTP_CLIENT_CIRCUIT_BREAKER_RESET_TIMEOUT seconds. A single request is then let
+through, closing the circuit if it succeeds.
+
+Requests with an idempotent method failing with a connection error or a timeout are retried, with an exponential
+backoff. Responses, including 5xx ones, are always returned to the caller.
+"""
+from collections import defaultdict
+import logging
+import threading
+import time
+from urlparse import urlparse
+
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+from ecommerce.core.exceptions import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = ('DELETE', 'GET', 'HEAD', 'OPTIONS', 'PUT', 'TRACE')
+
+_adapter = None
+_adapter_lock = threading.Lock()
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+_metrics = defaultdict(lambda: defaultdict(int))
+_metrics_lock = threading.Lock()
+
+
+def _get_adapter():
+    global _adapter  # pylint: disable=global-statement
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = HTTPAdapter(
+                pool_connections=settings.HTTP_CLIENT_POOL_CONNECTIONS,
+                pool_maxsize=settings.HTTP_CLIENT_POOL_SIZE
+            )
+        return _adapter
+
+
+def _record(upstream, **counts):
+    with _metrics_lock:
+        for name, value in counts.items():
+            _metrics[upstream][name] += value
+
+
+class CircuitBreaker(object):
+    """ Stops requests from being sent to an upstream which keeps failing. """
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow_request(self):
+        """ Returns True if a request may be sent to the upstream. """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+
+            if time.time() - self.opened_at >= settings.HTTP_CLIENT_CIRCUIT_BREAKER_RESET_TIMEOUT:
+                # Let a single request through, to find out whether the upstream has recovered.
+                self.opened_at = time.time()
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info('Closing the circuit to [%s].', self.upstream)
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= settings.HTTP_CLIENT_CIRCUIT_BREAKER_THRESHOLD:
+                if self.opened_at is None:
+                    logger.warning('Opening the circuit to [%s] after [%d] consecutive failures.',
+                                   self.upstream, self.failures)
+                    _record(self.upstream, circuit_opened=1)
+                self.opened_at = time.time()
+
+
+def get_circuit_breaker(upstream):
+    """ Returns the circuit breaker of the upstream. """
+    with _circuit_breakers_lock:
+        circuit_breaker = _circuit_breakers.get(upstream)
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker(upstream)
+            _circuit_breakers[upstream] = circuit_breaker
+        return circuit_breaker
+
+
+def reset():
+    """ Closes all circuits, and discards all metrics. """
+    with _circuit_breakers_lock:
+        _circuit_breakers.clear()
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def get_metrics():
+    """
+    Returns the metrics of the requests sent by this process, per upstream.
+
+    Returns:
+        dict: For each upstream, the number of requests sent, of requests which failed, of requests retried,
+            of requests rejected while the circuit was open, and of times the circuit was opened; the average
+            latency of the requests sent, in seconds; and whether the circuit is open.
+    """
+    with _metrics_lock:
+        metrics = {upstream: dict(counts) for upstream, counts in _metrics.items()}
+
+    for upstream, counts in metrics.items():
+        latency_ms = counts.pop('latency_ms', 0)
+        for name in ('requests', 'failures', 'retries', 'rejected', 'circuit_opened'):
+            counts.setdefault(name, 0)
+        counts['average_latency'] = latency_ms / 1000.0 / counts['requests'] if counts['requests'] else None
+        counts['circuit_open'] = get_circuit_breaker(upstream).is_open
+
+    return metrics
+
+
+class HttpSession(requests.Session):
+    """
+    Session sending its requests through the shared connection pools, guarded by the upstreams' circuit breakers.
+    """
+
+    def __init__(self, timeout=None, max_retries=None, retry_backoff=None, server_errors_fail=True):
+        """
+        Keyword Arguments:
+            timeout (float): Number of seconds after which requests time out, unless another timeout is given
+                for the request. Defaults to settings.HTTP_CLIENT_TIMEOUT.
+            max_retries (int): Number of times requests with an idempotent method are retried after a connection
+                error or a timeout. Defaults to settings.HTTP_CLIENT_MAX_RETRIES.
+            retry_backoff (float): Number of seconds to wait before the first retry. The delay doubles with each
+                retry. Defaults to settings.HTTP_CLIENT_RETRY_BACKOFF.
+            server_errors_fail (bool): Whether 5xx responses count as failures, towards opening the circuit. Services
+                reporting expected errors with a 5xx status (e.g. SOAP faults) should not be counted.
+        """
+        super(HttpSession, self).__init__()
+        adapter = _get_adapter()
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        # N.B. EdxRestApiClient sets the timeout of the sessions it is given.
+        self.timeout = timeout or settings.HTTP_CLIENT_TIMEOUT
+        self.max_retries = settings.HTTP_CLIENT_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = settings.HTTP_CLIENT_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.server_errors_fail = server_errors_fail
+
+    def close(self):
+        # The adapter, and its connections, are shared with the other sessions.
+        pass
+
+    def request(self, method, url, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Sends a request.
+
+        Raises:
+            CircuitOpenError: If the circuit to the upstream is open.
+            ConnectionError, Timeout: If the request, and its retries, failed.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        upstream = urlparse(url).netloc
+        circuit_breaker = get_circuit_breaker(upstream)
+        max_retries = self.max_retries if method.upper() in IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        while True:
+            if not circuit_breaker.allow_request():
+                _record(upstream, rejected=1)
+                raise CircuitOpenError('The circuit to [{}] is open.'.format(upstream))
+
+            start = time.time()
+            try:
+                response = super(HttpSession, self).request(method, url, **kwargs)
+            except (ConnectionError, Timeout):
+                _record(upstream, requests=1, failures=1, latency_ms=int((time.time() - start) * 1000))
+                if attempt >= max_retries:
+                    # The circuit breaker counts requests, rather than their attempts.
+                    circuit_breaker.record_failure()
+                    raise
+            else:
+                failed = self.server_errors_fail and response.status_code >= 500
+                if failed:
+                    circuit_breaker.record_failure()
+                else:
+                    circuit_breaker.record_success()
+                _record(upstream, requests=1, failures=int(failed), latency_ms=int((time.time() - start) * 1000))
+                return response
+
+            _record(upstream, retries=1)
+            time.sleep(self.retry_backoff * 2 ** attempt)
+            attempt += 1
+
+
+def get_session(timeout=None, max_retries=None, retry_backoff=None, server_errors_fail=True):
+    """
+    Returns a session for sending requests to other services.
+
+    Sessions are cheap: they share their connections. Any authentication set on a session only applies to it.
+
+    Keyword Arguments:
+        See HttpSession.
+
+    Returns:
+        HttpSession
+    """
+    return HttpSession(
+        timeout=timeout, max_retries=max_retries, retry_backoff=retry_backoff, server_errors_fail=server_errors_fail
+    )
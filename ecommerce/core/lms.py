@@ -0,0 +1,202 @@
+"""
+Clients for the LMS APIs called on behalf of users.
+
+The clients send their requests through the shared HTTP client, and time out after settings.LMS_API_TIMEOUT
+seconds unless told otherwise.
+
+A user's account details, enrollments and verification status are cached for settings.LMS_USER_CACHE_TIMEOUT
+seconds. All of them are discarded when the user places an order, which may enroll the user in courses.
+"""
+import hashlib
+import logging
+from multiprocessing.pool import ThreadPool
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from edx_rest_api_client.client import EdxRestApiClient
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberBaseException
+
+from ecommerce.core.http_client import get_session
+
+logger = logging.getLogger(__name__)
+
+
+def get_lms_api_client(site_configuration, path, access_token, timeout=None, **kwargs):
+    """
+    Returns a client for an API of the site's LMS.
+
+    Arguments:
+        site_configuration (SiteConfiguration or SiteConfigurationSnapshot): Configuration of the site.
+        path (str): Path of the API, relative to the root of the LMS.
+        access_token (str): OAuth access token the requests are authenticated with.
+        timeout (int): Number of seconds after which requests time out. Defaults to settings.LMS_API_TIMEOUT.
+        **kwargs: Passed on to EdxRestApiClient.
+
+    Returns:
+        EdxRestApiClient
+    """
+    return EdxRestApiClient(
+        site_configuration.build_lms_url(path),
+        oauth_access_token=access_token,
+        session=get_session(),
+        timeout=timeout or settings.LMS_API_TIMEOUT,
+        **kwargs
+    )
+
+
+def _cache_version_key(username):
+    return hashlib.md5('lms_user_cache_version:{}'.format(username).encode('utf-8')).hexdigest()
+
+
+def invalidate_user_cache(username):
+    """ Discards the results of the LMS lookups cached for the user, on all sites. """
+    cache.set(_cache_version_key(username), uuid.uuid4().hex, settings.LMS_USER_CACHE_TIMEOUT)
+
+
+class LmsUserClient(object):
+    """
+    Looks up a user's details in the LMS of a site.
+
+    The results of the lookups are kept by the client for its lifetime, which should not exceed that of
+    the request it is used for. Failed lookups are logged, and their exception is raised again whenever
+    they are repeated.
+    """
+
+    def __init__(self, site_configuration, user, timeout=None):
+        """
+        Arguments:
+            site_configuration (SiteConfiguration or SiteConfigurationSnapshot): Configuration of the site.
+            user (User): The user whose details are looked up.
+            timeout (int): Number of seconds after which requests time out. Defaults to settings.LMS_API_TIMEOUT.
+        """
+        self.site_configuration = site_configuration
+        self.username = user.username
+        # Retrieved here, as lookups may be performed by threads without access to the database.
+        self.access_token = user.access_token
+        self.timeout = timeout
+        self._cache_version = None
+        self._results = {}
+        self._errors = {}
+
+    def _get_api(self, path, **kwargs):
+        return get_lms_api_client(self.site_configuration, path, self.access_token, timeout=self.timeout, **kwargs)
+
+    def _get_cache_version(self):
+        if self._cache_version is None:
+            key = _cache_version_key(self.username)
+            version = cache.get(key)
+            if version is None:
+                cache.add(key, uuid.uuid4().hex, settings.LMS_USER_CACHE_TIMEOUT)
+                version = cache.get(key)
+            self._cache_version = version
+        return self._cache_version
+
+    def _get_cache_key(self, lookup, args):
+        key = 'lms_user:{}:{}:{}:{}:{}'.format(
+            self.site_configuration.id, self.username, self._get_cache_version(), lookup, ','.join(args)
+        )
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def _lookup(self, lookup, args, fetch, cached=True):
+        """
+        Returns the result of a lookup, performing it if it has not been performed by this client yet.
+
+        Arguments:
+            lookup (str): Name of the lookup.
+            args (tuple): Arguments of the lookup.
+            fetch (callable): Retrieves the result from the LMS.
+            cached (bool): Whether the result is cached for settings.LMS_USER_CACHE_TIMEOUT seconds.
+
+        Raises:
+            ConnectionError, SlumberBaseException and Timeout for failures in establishing a
+            connection with the LMS API endpoint.
+        """
+        result_key = (lookup,) + args
+        if result_key in self._errors:
+            raise self._errors[result_key]
+
+        if result_key not in self._results:
+            cache_key = self._get_cache_key(lookup, args) if cached else None
+            result = cache.get(cache_key) if cached else None
+            if result is None:
+                try:
+                    result = fetch()
+                except (ConnectionError, SlumberBaseException, Timeout) as exc:
+                    logger.exception(
+                        'Failed to retrieve the %s of [%s] from the LMS, with arguments %s.',
+                        lookup, self.username, args
+                    )
+                    self._errors[result_key] = exc
+                    raise
+                if cached:
+                    cache.set(cache_key, result, settings.LMS_USER_CACHE_TIMEOUT)
+            self._results[result_key] = result
+
+        return self._results[result_key]
+
+    def get_account(self):
+        """ Returns the account details of the user, as a dict. """
+        return self._lookup(
+            'account details', (),
+            lambda: self._get_api('/api/user/v1', append_slash=False).accounts(self.username).get()
+        )
+
+    def get_enrollment(self, course_key):
+        """ Returns the enrollment of the user in the course, as a dict which is empty if the user never enrolled. """
+        return self._lookup(
+            'enrollment', (course_key,),
+            lambda: self._get_api('/api/enrollment/v1', append_slash=False).enrollment(
+                ','.join([self.username, course_key])
+            ).get() or {}
+        )
+
+    def is_enrolled(self, course_key, mode):
+        """ Returns True if the user is actively enrolled in the course, in the given mode. """
+        enrollment = self.get_enrollment(course_key)
+        return bool(enrollment.get('mode') == mode and enrollment.get('is_active'))
+
+    def get_verification_status(self):
+        """ Returns the status of the verification of the user's identity, as a dict. """
+        return self._lookup(
+            'verification status', (),
+            lambda: self._get_api('/api/user/v1/').accounts(self.username).verification_status().get()
+        )
+
+    def get_credit_eligibility(self, course_key):
+        """ Returns the list of the user's eligibilities for credit in the course, which is empty if none. """
+        return self._lookup(
+            'credit eligibility', (course_key,),
+            lambda: self._get_api('/api/credit/v1/').eligibility().get(username=self.username, course_key=course_key),
+            cached=False
+        )
+
+    def prefetch(self, *lookups):
+        """
+        Performs several lookups concurrently, so that they return immediately when called afterwards.
+
+        Failures are not raised until the failed lookup is called.
+
+        Arguments:
+            *lookups (tuple): The name of a lookup method of the client, followed by its arguments,
+                e.g. prefetch(('get_account',), ('get_enrollment', course_key)).
+        """
+        if not lookups:
+            return
+
+        # Resolved before starting the threads, which then only wait on the LMS.
+        self._get_cache_version()
+
+        def _prefetch(lookup):
+            try:
+                getattr(self, lookup[0])(*lookup[1:])
+            except (ConnectionError, SlumberBaseException, Timeout):
+                pass
+
+        pool = ThreadPool(len(lookups))
+        try:
+            pool.map(_prefetch, lookups)
+        finally:
+            pool.close()
+            pool.join()
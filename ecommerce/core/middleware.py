@@ -0,0 +1,36 @@
+"""
+Middleware for the core app
+
+Note:
+    With ATOMIC_REQUESTS enabled the view's transaction has been committed by the time process_response
+    is called.
+"""
+from ecommerce.core.models import refresh_site_configurations
+from ecommerce.core.version_stamps import discard_pending_version_stamps, flush_pending_version_stamps
+
+
+class SiteConfigurationMiddleware(object):
+    """
+    Middleware that discards the Site cache and the site configuration snapshots of the process if a site
+    configuration has been saved by another process since they were built.
+
+    Note:
+        This middleware MUST appear BEFORE CurrentSiteMiddleware, which reads the Site cache.
+    """
+
+    def process_request(self, request):  # pylint: disable=unused-argument
+        refresh_site_configurations()
+
+
+class VersionStampMiddleware(object):
+    """
+    Middleware that stamps again the resources modified while processing the request, once its transaction
+    has been committed.
+    """
+
+    def process_request(self, request):  # pylint: disable=unused-argument
+        discard_pending_version_stamps()
+
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        flush_pending_version_stamps()
+        return response
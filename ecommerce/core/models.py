@@ -1,23 +1,25 @@
-import datetime
 import logging
+import threading
 from urlparse import urljoin
 
-from analytics import Client as SegmentClient
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.sites.models import Site
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 from edx_rest_api_client.client import EdxRestApiClient
 from jsonfield.fields import JSONField
-from requests.exceptions import ConnectionError, Timeout
-from slumber.exceptions import SlumberBaseException
+from threadlocals.threadlocals import get_current_request
 
-from ecommerce.core.url_utils import get_lms_url
+from ecommerce.core.access_tokens import AccessTokenManager
+from ecommerce.core.exceptions import MissingRequestError
+from ecommerce.core.http_client import get_session
+from ecommerce.core.lms import LmsUserClient
+from ecommerce.core.version_stamps import bump_version_stamps, get_version_stamps
 from ecommerce.courses.utils import mode_for_seat
+from ecommerce.extensions.analytics.dispatcher import get_segment_client
 from ecommerce.extensions.payment.exceptions import ProcessorNotFoundError
 from ecommerce.extensions.payment.helpers import get_processor_class_by_name, get_processor_class
 
@@ -231,15 +233,23 @@ class SiteConfiguration(models.Model):
         if not exclude or 'client_side_payment_processor' not in exclude:
             self._clean_client_side_payment_processor()
 
-    @cached_property
+    @property
     def segment_client(self):
-        return SegmentClient(self.segment_key, debug=settings.DEBUG)
+        return get_segment_client(self.segment_key)
 
     def save(self, *args, **kwargs):
         # Clear Site cache upon SiteConfiguration changed
         Site.objects.clear_cache()
         super(SiteConfiguration, self).save(*args, **kwargs)
 
+        # Other processes discard their snapshots and Site cache once they see the new version stamp.
+        bump_version_stamps(SiteConfiguration)
+
+    def delete(self, *args, **kwargs):
+        Site.objects.clear_cache()
+        super(SiteConfiguration, self).delete(*args, **kwargs)
+        bump_version_stamps(SiteConfiguration)
+
     def build_ecommerce_url(self, path=''):
         """
         Returns path joined with the appropriate ecommerce URL root for the current site.
@@ -290,29 +300,13 @@ class SiteConfiguration(models.Model):
         """ Returns an access token for this site's service user.
 
         The access token is retrieved using the current site's OAuth credentials and the client credentials grant.
-        The token is cached for the lifetime of the token, as specified by the OAuth provider's response. The token
-        type is JWT.
+        The token is cached for the lifetime of the token, as specified by the OAuth provider's response, and
+        refreshed in the background shortly before it expires. The token type is JWT.
 
         Returns:
             str: JWT access token
         """
-        key = 'siteconfiguration_access_token_{}'.format(self.id)
-        access_token = cache.get(key)
-
-        # pylint: disable=unsubscriptable-object
-        if not access_token:
-            url = '{root}/access_token'.format(root=self.oauth2_provider_url)
-            access_token, expiration_datetime = EdxRestApiClient.get_oauth_access_token(
-                url,
-                self.oauth_settings['SOCIAL_AUTH_EDX_OIDC_KEY'],
-                self.oauth_settings['SOCIAL_AUTH_EDX_OIDC_SECRET'],
-                token_type='jwt'
-            )
-
-            expires = (expiration_datetime - datetime.datetime.utcnow()).seconds
-            cache.set(key, access_token, expires)
-
-        return access_token
+        return AccessTokenManager(self).get_access_token()
 
     @cached_property
     def course_catalog_api_client(self):
@@ -323,7 +317,132 @@ class SiteConfiguration(models.Model):
             EdxRestApiClient: The client to access the Course Catalog service.
         """
 
-        return EdxRestApiClient(settings.COURSE_CATALOG_API_URL, jwt=self.access_token)
+        return EdxRestApiClient(settings.COURSE_CATALOG_API_URL, jwt=self.access_token, session=get_session())
+
+
+class SiteConfigurationSnapshot(object):
+    """
+    Immutable snapshot of a site's configuration, and of the values derived from it.
+
+    Snapshots are built once per process, by get_site_configuration_snapshot, so that reading the configuration
+    of the current site does not query the database.
+    """
+
+    def __init__(self, site_configuration):
+        payment_processors_set = frozenset(site_configuration.payment_processors_set)
+        all_processors = site_configuration._all_payment_processors()  # pylint: disable=protected-access
+
+        missing_processor_configurations = {name for name in payment_processors_set if name} - {
+            processor.NAME for processor in all_processors
+        }
+        if missing_processor_configurations:
+            log.warning(
+                'Unknown payment processors [%s] are configured for site %s',
+                ', '.join(missing_processor_configurations), site_configuration.site_id
+            )
+
+        partner = site_configuration.partner
+        self.__dict__.update({
+            'id': site_configuration.id,
+            'site_id': site_configuration.site_id,
+            'domain': site_configuration.site.domain,
+            'partner_id': site_configuration.partner_id,
+            '_partner_model': type(partner),
+            '_partner_db': partner._state.db,  # pylint: disable=protected-access
+            '_partner_fields': tuple(
+                (field.attname, getattr(partner, field.attname))
+                for field in partner._meta.concrete_fields  # pylint: disable=protected-access
+            ),
+            'lms_url_root': site_configuration.lms_url_root,
+            'ecommerce_url_root': site_configuration.build_ecommerce_url(),
+            'commerce_api_url': site_configuration.commerce_api_url,
+            'student_dashboard_url': site_configuration.student_dashboard_url,
+            'enrollment_api_url': site_configuration.enrollment_api_url,
+            'lms_heartbeat_url': site_configuration.lms_heartbeat_url,
+            'oauth2_provider_url': site_configuration.oauth2_provider_url,
+            'payment_processors_set': payment_processors_set,
+            'payment_processor_classes': tuple(
+                processor for processor in all_processors if processor.NAME in payment_processors_set
+            ),
+            'client_side_payment_processor_class': site_configuration.get_client_side_payment_processor_class(),
+            'from_email': site_configuration.get_from_email(),
+            'segment_key': site_configuration.segment_key,
+            'segment_client': site_configuration.segment_client,
+        })
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Site configuration snapshots are immutable.')
+
+    @property
+    def partner(self):
+        """
+        Returns the partner of the site.
+
+        Snapshots are shared by the threads of the process, so each call returns a new Partner instance, built from
+        the values of the partner's fields when the snapshot was built.
+        """
+        names, values = zip(*self._partner_fields)
+        return self._partner_model.from_db(self._partner_db, names, values)
+
+    def build_ecommerce_url(self, path=''):
+        """ Returns path joined with the ecommerce URL root of the site. """
+        return urljoin(self.ecommerce_url_root, path)
+
+    def build_lms_url(self, path=''):
+        """ Returns path joined with the LMS URL root of the site. """
+        return urljoin(self.lms_url_root, path)
+
+    def get_payment_processors(self):
+        """ Returns the payment processor classes enabled for the site. """
+        return [processor for processor in self.payment_processor_classes if processor.is_enabled()]
+
+
+# Snapshots of the site configurations built by this process, keyed by site ID, and the version stamp
+# of SiteConfiguration they were built at.
+_snapshots = {'version': None, 'sites': {}}
+_snapshots_lock = threading.Lock()
+
+
+def refresh_site_configurations():
+    """
+    Discards the site configuration snapshots and the Site cache of this process if a site configuration,
+    site or partner has been saved since they were built.
+    """
+    version = get_version_stamps([SiteConfiguration])[SiteConfiguration]
+    with _snapshots_lock:
+        if version != _snapshots['version']:
+            Site.objects.clear_cache()
+            _snapshots['sites'] = {}
+            _snapshots['version'] = version
+
+
+def get_site_configuration_snapshot(site):
+    """
+    Returns the snapshot of the configuration of the given site.
+
+    Arguments:
+        site (Site)
+
+    Returns:
+        SiteConfigurationSnapshot
+
+    Raises:
+        SiteConfiguration.DoesNotExist: If the site is not configured.
+    """
+    refresh_site_configurations()
+
+    with _snapshots_lock:
+        snapshots = _snapshots['sites']
+        snapshot = snapshots.get(site.id)
+
+    if snapshot is None:
+        # The snapshot is built without holding the lock, since it reads from the database. If the snapshots
+        # were discarded in the meantime, it is added to those discarded.
+        snapshot = SiteConfigurationSnapshot(site.siteconfiguration)
+        with _snapshots_lock:
+            snapshot = snapshots.setdefault(site.id, snapshot)
+
+    return snapshot
 
 
 class User(AbstractUser):
@@ -347,6 +466,27 @@ class User(AbstractUser):
     def get_full_name(self):
         return self.full_name or super(User, self).get_full_name()
 
+    def get_lms_client(self, site=None):
+        """
+        Returns a client looking up the user's details in the LMS of a site.
+
+        Arguments:
+            site (Site): The site whose LMS is called. Defaults to the site of the current request.
+
+        Returns:
+            LmsUserClient
+
+        Raises:
+            MissingRequestError: If no site is given, and the current request is not in threadlocal storage.
+        """
+        if site is None:
+            request = get_current_request()
+            if not request:
+                raise MissingRequestError
+            site = request.site
+
+        return LmsUserClient(get_site_configuration_snapshot(site), self)
+
     def is_user_already_enrolled(self, request, seat):
         """
         Check if a user is already enrolled in the course.
@@ -364,26 +504,7 @@ class User(AbstractUser):
             ConnectionError, SlumberBaseException and Timeout for failures in establishing a
             connection with the LMS enrollment API endpoint.
         """
-        course_key = seat.attr.course_key
-        try:
-            api = EdxRestApiClient(
-                request.site.siteconfiguration.build_lms_url('/api/enrollment/v1'),
-                oauth_access_token=self.access_token,
-                append_slash=False
-            )
-            status = api.enrollment(','.join([self.username, course_key])).get()
-        except (ConnectionError, SlumberBaseException, Timeout):
-            log.exception(
-                'Failed to retrieve enrollment details for [%s] in course [%s]',
-                self.username,
-                course_key
-            )
-            raise
-
-        seat_type = mode_for_seat(seat)
-        if status and status.get('mode') == seat_type and status.get('is_active'):
-            return True
-        return False
+        return self.get_lms_client(request.site).is_enrolled(seat.flat_attr.course_key, mode_for_seat(seat))
 
     def account_details(self, request):
         """ Returns the account details from LMS.
@@ -398,20 +519,7 @@ class User(AbstractUser):
             ConnectionError, SlumberBaseException and Timeout for failures in establishing a
             connection with the LMS account API endpoint.
         """
-        try:
-            api = EdxRestApiClient(
-                request.site.siteconfiguration.build_lms_url('/api/user/v1'),
-                oauth_access_token=self.access_token,
-                append_slash=False
-            )
-            response = api.accounts(self.username).get()
-            return response
-        except (ConnectionError, SlumberBaseException, Timeout):
-            log.exception(
-                'Failed to retrieve account details for [%s]',
-                self.username
-            )
-            raise
+        return self.get_lms_client(request.site).get_account()
 
     def is_eligible_for_credit(self, course_key):
         """
@@ -429,24 +537,7 @@ class User(AbstractUser):
             ConnectionError, SlumberBaseException and Timeout for failures in establishing a
             connection with the LMS eligibility API endpoint.
         """
-        query_strings = {
-            'username': self.username,
-            'course_key': course_key
-        }
-        try:
-            api = EdxRestApiClient(
-                get_lms_url('api/credit/v1/'),
-                oauth_access_token=self.access_token
-            )
-            response = api.eligibility().get(**query_strings)
-        except (ConnectionError, SlumberBaseException, Timeout):  # pragma: no cover
-            log.exception(
-                'Failed to retrieve eligibility details for [%s] in course [%s]',
-                self.username,
-                course_key
-            )
-            raise
-        return response
+        return self.get_lms_client().get_credit_eligibility(course_key)
 
     def is_verified(self):
         """
@@ -460,19 +551,7 @@ class User(AbstractUser):
             ConnectionError, SlumberBaseException and Timeout for failures in
             establishing a connection with the LMS verification status API endpoint.
         """
-        try:
-            api = EdxRestApiClient(
-                get_lms_url('api/user/v1/'),
-                oauth_access_token=self.access_token
-            )
-            response = api.accounts(self.username).verification_status().get()
-            return response.get('is_verified', False)
-        except (ConnectionError, SlumberBaseException, Timeout):  # pragma: no cover
-            log.exception(
-                'Failed to retrieve verification status details for [%s]',
-                self.username
-            )
-            raise
+        return self.get_lms_client().get_verification_status().get('is_verified', False)
 
 
 class Client(User):
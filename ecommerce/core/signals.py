@@ -0,0 +1,25 @@
+from django.contrib.sites.models import Site
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from oscar.core.loading import get_class, get_model
+
+from ecommerce.core.lms import invalidate_user_cache
+from ecommerce.core.models import SiteConfiguration
+from ecommerce.core.version_stamps import bump_version_stamps
+
+Partner = get_model('partner', 'Partner')
+post_checkout = get_class('checkout.signals', 'post_checkout')
+
+
+@receiver(post_save, sender=Site, dispatch_uid='core.refresh_site_configurations_on_site_save')
+@receiver(post_delete, sender=Site, dispatch_uid='core.refresh_site_configurations_on_site_delete')
+@receiver(post_save, sender=Partner, dispatch_uid='core.refresh_site_configurations_on_partner_save')
+def refresh_site_configurations(sender, **kwargs):  # pylint: disable=unused-argument
+    """ Have all processes rebuild their site configuration snapshots, which include the site and partner. """
+    bump_version_stamps(SiteConfiguration)
+
+
+@receiver(post_checkout, dispatch_uid='core.invalidate_lms_user_cache')
+def invalidate_lms_user_cache(sender, order=None, **kwargs):  # pylint: disable=unused-argument
+    """ Discard the user's cached LMS details, as the order may have enrolled the user in courses. """
+    invalidate_user_cache(order.user.username)
@@ -0,0 +1,73 @@
+import datetime
+
+from django.core.cache import cache
+import mock
+
+from ecommerce.core import cache_utils
+from ecommerce.core.access_tokens import AccessTokenManager
+from ecommerce.core.cache_utils import set_cached_many
+from ecommerce.tests.testcases import TestCase
+
+
+class AccessTokenManagerTests(TestCase):
+    """ Tests for AccessTokenManager. """
+
+    def setUp(self):
+        super(AccessTokenManagerTests, self).setUp()
+        cache.clear()
+        self.manager = AccessTokenManager(self.site.siteconfiguration)
+
+    def mock_get_oauth_access_token(self, access_token='abc123', expires_in=3600, side_effect=None):
+        expiration_datetime = datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
+        return mock.patch(
+            'ecommerce.core.access_tokens.EdxRestApiClient.get_oauth_access_token',
+            return_value=(access_token, expiration_datetime),
+            side_effect=side_effect
+        )
+
+    def test_get_access_token(self):
+        """ Verify the token is retrieved once, and cached. """
+        with self.mock_get_oauth_access_token() as mock_get_oauth_access_token:
+            self.assertEqual(self.manager.get_access_token(), 'abc123')
+            self.assertEqual(self.site.siteconfiguration.access_token, 'abc123')
+            self.assertEqual(mock_get_oauth_access_token.call_count, 1)
+
+        metrics = self.manager.get_metrics()
+        self.assertEqual(metrics['refreshes'], 1)
+        self.assertEqual(metrics['failures'], 0)
+        self.assertIsNotNone(metrics['average_latency'])
+
+    def test_stale_access_token(self):
+        """ Verify tokens about to expire are returned while a single caller refreshes them in the background. """
+        set_cached_many({self.manager.cache_key: ('old', 0)}, 60, 60)
+        cache.delete('{}:fresh'.format(self.manager.cache_key))
+
+        with self.mock_get_oauth_access_token() as mock_get_oauth_access_token:
+            with mock.patch.object(cache_utils, '_run_in_background') as mock_run_in_background:
+                self.assertEqual(self.manager.get_access_token(), 'old')
+                self.assertEqual(self.manager.get_access_token(), 'old')
+                self.assertEqual(mock_run_in_background.call_count, 1)
+                self.assertFalse(mock_get_oauth_access_token.called)
+                mock_run_in_background.call_args[0][0]()
+
+            self.assertEqual(self.manager.get_access_token(), 'abc123')
+            self.assertEqual(mock_get_oauth_access_token.call_count, 1)
+
+    def test_refresh_margin(self):
+        """ Verify tokens become stale before they expire, and are not cached beyond their expiration. """
+        with self.mock_get_oauth_access_token(expires_in=3600):
+            with mock.patch.object(cache_utils, 'set_cached_many') as mock_set_cached_many:
+                self.manager.get_access_token()
+
+        timeout, stale_timeout = mock_set_cached_many.call_args[0][1:]
+        self.assertEqual(stale_timeout, 300)
+        self.assertLessEqual(timeout + stale_timeout, 3600)
+        self.assertFalse(mock_set_cached_many.call_args[1]['jitter'])
+
+    def test_refresh_failure(self):
+        """ Verify failures to retrieve a token are raised, and counted. """
+        with self.mock_get_oauth_access_token(side_effect=Exception):
+            with self.assertRaises(Exception):
+                self.manager.get_access_token()
+
+        self.assertEqual(self.manager.get_metrics(), {'refreshes': 0, 'failures': 1, 'average_latency': None})
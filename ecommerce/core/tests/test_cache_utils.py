@@ -0,0 +1,130 @@
+import threading
+import time
+
+from django.core.cache import cache
+import mock
+from slumber.exceptions import HttpNotFoundError
+
+from ecommerce.core import cache_utils
+from ecommerce.core.cache_utils import get_or_set_cached, set_cached_many
+from ecommerce.tests.testcases import TestCase
+
+CACHE_KEY = 'test-key'
+
+
+class GetOrSetCachedTests(TestCase):
+    """ Tests for get_or_set_cached. """
+
+    def setUp(self):
+        super(GetOrSetCachedTests, self).setUp()
+        cache.clear()
+        self.fetch = mock.Mock(return_value='fetched')
+
+    def test_cache_miss(self):
+        """ Verify values are fetched on a cache miss, and read from the cache afterwards. """
+        self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'fetched')
+        self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'fetched')
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(cache.get(CACHE_KEY), 'fetched')
+
+    def test_stale_value(self):
+        """ Verify stale values are returned while a single caller refreshes them in the background. """
+        set_cached_many({CACHE_KEY: 'stale'}, 60)
+        cache.delete('{}:fresh'.format(CACHE_KEY))
+
+        with mock.patch.object(cache_utils, '_run_in_background') as mock_run_in_background:
+            self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'stale')
+            self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'stale')
+
+            # Only the first caller refreshes the value.
+            self.assertEqual(mock_run_in_background.call_count, 1)
+            self.assertFalse(self.fetch.called)
+            mock_run_in_background.call_args[0][0]()
+
+        self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'fetched')
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_stale_value_refresh_failure(self):
+        """ Verify stale values are kept if they cannot be refreshed. """
+        set_cached_many({CACHE_KEY: 'stale'}, 60)
+        cache.delete('{}:fresh'.format(CACHE_KEY))
+        self.fetch.side_effect = Exception
+
+        with mock.patch.object(cache_utils, '_run_in_background', lambda func: func()):
+            self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'stale')
+            self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'stale')
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_not_found(self):
+        """ Verify 404 responses are cached. """
+        self.fetch.side_effect = HttpNotFoundError
+
+        for __ in range(2):
+            with self.assertRaises(HttpNotFoundError):
+                get_or_set_cached(CACHE_KEY, self.fetch, 60)
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_concurrent_cache_miss(self):
+        """ Verify concurrent callers wait for the value fetched by a single caller. """
+        fetching = threading.Event()
+        release = threading.Event()
+
+        def _fetch():
+            fetching.set()
+            release.wait(5)
+            return 'fetched'
+
+        fetch = mock.Mock(side_effect=_fetch)
+        results = []
+
+        def _get():
+            results.append(get_or_set_cached(CACHE_KEY, fetch, 60))
+
+        threads = [threading.Thread(target=_get) for __ in range(3)]
+        threads[0].start()
+        fetching.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+
+        # The value is only returned once the other callers are waiting for it.
+        while cache_utils._key_locks[CACHE_KEY][1] < len(threads):  # pylint: disable=protected-access
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['fetched'] * 3)
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_fetch_lock_held(self):
+        """ Verify callers fetch the value themselves if another process takes too long to do so. """
+        cache.set('{}:lock'.format(CACHE_KEY), 'other')
+
+        with mock.patch.object(cache_utils, 'FETCH_WAIT_TIMEOUT', 0):
+            self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'fetched')
+
+        # The lock is released by the process holding it.
+        self.assertEqual(cache.get('{}:lock'.format(CACHE_KEY)), 'other')
+
+    def test_fetch_lock_released(self):
+        """ Verify the fetch lock is released once the value is cached, or the fetch fails. """
+        def _fetch():
+            self.assertIsNotNone(cache.get('{}:lock'.format(CACHE_KEY)))
+            return 'fetched'
+
+        get_or_set_cached(CACHE_KEY, _fetch, 60)
+        self.assertIsNone(cache.get('{}:lock'.format(CACHE_KEY)))
+
+        self.fetch.side_effect = Exception
+        with self.assertRaises(Exception):
+            get_or_set_cached('other-key', self.fetch, 60)
+        self.assertIsNone(cache.get('other-key:lock'))
+
+    def test_not_found_replaced(self):
+        """ Verify values cached since the remote service responded with a 404 are returned. """
+        self.fetch.side_effect = HttpNotFoundError
+        with self.assertRaises(HttpNotFoundError):
+            get_or_set_cached(CACHE_KEY, self.fetch, 60)
+
+        set_cached_many({CACHE_KEY: 'found'}, 60)
+        self.assertEqual(get_or_set_cached(CACHE_KEY, self.fetch, 60), 'found')
@@ -0,0 +1,126 @@
+from django.test import override_settings
+import mock
+from requests import Response
+from requests.exceptions import ConnectionError, Timeout
+
+from ecommerce.core import http_client
+from ecommerce.core.exceptions import CircuitOpenError
+from ecommerce.core.http_client import get_metrics, get_session
+from ecommerce.tests.testcases import TestCase
+
+UPSTREAM = 'lms.testserver.fake'
+URL = 'http://{}/api/'.format(UPSTREAM)
+
+
+def build_response(status_code):
+    response = Response()
+    response.status_code = status_code
+    return response
+
+
+@override_settings(HTTP_CLIENT_MAX_RETRIES=2, HTTP_CLIENT_CIRCUIT_BREAKER_THRESHOLD=3)
+class HttpClientTests(TestCase):
+    """ Tests for the shared HTTP client. """
+
+    def mock_request(self, *results):
+        return mock.patch('requests.Session.request', side_effect=results)
+
+    def test_connection_pool(self):
+        """ Verify sessions share their connection pools, and have a default timeout. """
+        session = get_session()
+        self.assertIs(session.get_adapter('http://'), get_session().get_adapter('https://'))
+
+        with self.mock_request(build_response(200)) as mock_request:
+            session.get(URL)
+        self.assertEqual(mock_request.call_args[1]['timeout'], 5)
+
+    def test_retries(self):
+        """ Verify idempotent requests are retried after connection errors and timeouts, and others are not. """
+        with self.mock_request(ConnectionError, Timeout, build_response(200)) as mock_request:
+            self.assertEqual(get_session().get(URL).status_code, 200)
+            self.assertEqual(mock_request.call_count, 3)
+
+        with self.mock_request(Timeout, build_response(200)) as mock_request:
+            with self.assertRaises(Timeout):
+                get_session().post(URL)
+            self.assertEqual(mock_request.call_count, 1)
+
+        with self.mock_request(build_response(503), build_response(200)) as mock_request:
+            self.assertEqual(get_session().get(URL).status_code, 503)
+            self.assertEqual(mock_request.call_count, 1)
+
+        metrics = get_metrics()[UPSTREAM]
+        self.assertEqual(metrics['requests'], 5)
+        self.assertEqual(metrics['failures'], 4)
+        self.assertEqual(metrics['retries'], 2)
+        self.assertIsNotNone(metrics['average_latency'])
+
+    def test_circuit_breaker(self):
+        """ Verify requests are rejected once too many have failed, until a request succeeds after a delay. """
+        session = get_session(max_retries=0)
+        with self.mock_request(ConnectionError, build_response(500), Timeout) as mock_request:
+            for __ in range(3):
+                with self.assertRaises(Exception):
+                    response = session.get(URL)
+                    response.raise_for_status()
+
+            with self.assertRaises(CircuitOpenError):
+                session.get(URL)
+            self.assertEqual(mock_request.call_count, 3)
+
+        # Requests to other upstreams are still sent.
+        with self.mock_request(build_response(200)):
+            session.get('http://catalog.testserver.fake/api/')
+
+        opened_at = http_client.get_circuit_breaker(UPSTREAM).opened_at
+        with mock.patch('time.time', return_value=opened_at + 30):
+            with self.mock_request(build_response(200), build_response(200)) as mock_request:
+                session.get(URL)
+                session.get(URL)
+                self.assertEqual(mock_request.call_count, 2)
+
+        metrics = get_metrics()[UPSTREAM]
+        self.assertEqual(metrics['rejected'], 1)
+        self.assertEqual(metrics['circuit_opened'], 1)
+        self.assertFalse(metrics['circuit_open'])
+
+    def test_circuit_breaker_trial_failure(self):
+        """ Verify a single request is let through after the delay, and the circuit opened again if it fails. """
+        session = get_session(max_retries=0)
+        with self.mock_request(*[ConnectionError] * 4) as mock_request:
+            for __ in range(3):
+                with self.assertRaises(ConnectionError):
+                    session.get(URL)
+
+            opened_at = http_client.get_circuit_breaker(UPSTREAM).opened_at
+            with mock.patch('time.time', return_value=opened_at + 30):
+                with self.assertRaises(ConnectionError):
+                    session.get(URL)
+                with self.assertRaises(CircuitOpenError):
+                    session.get(URL)
+            self.assertEqual(mock_request.call_count, 4)
+
+        self.assertTrue(get_metrics()[UPSTREAM]['circuit_open'])
+
+    def test_circuit_breaker_retries(self):
+        """ Verify a request counts as a single failure, however many times it was retried. """
+        with self.mock_request(*[ConnectionError] * 6) as mock_request:
+            for __ in range(2):
+                with self.assertRaises(ConnectionError):
+                    get_session().get(URL)
+            self.assertEqual(mock_request.call_count, 6)
+
+        self.assertEqual(http_client.get_circuit_breaker(UPSTREAM).failures, 2)
+        self.assertFalse(get_metrics()[UPSTREAM]['circuit_open'])
+
+    def test_server_errors_not_failures(self):
+        """ Verify 5xx responses do not open the circuit of sessions for which they are not failures. """
+        session = get_session(server_errors_fail=False)
+        with self.mock_request(*[build_response(500)] * 4) as mock_request:
+            for __ in range(4):
+                self.assertEqual(session.post(URL).status_code, 500)
+            self.assertEqual(mock_request.call_count, 4)
+
+        metrics = get_metrics()[UPSTREAM]
+        self.assertEqual(metrics['failures'], 0)
+        self.assertFalse(metrics['circuit_open'])
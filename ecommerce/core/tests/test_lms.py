@@ -0,0 +1,77 @@
+import httpretty
+import mock
+from django.core.cache import cache
+from oscar.core.loading import get_class
+from oscar.test import factories
+from requests.exceptions import ConnectionError
+
+from ecommerce.core.lms import LmsUserClient, get_lms_api_client
+from ecommerce.tests.mixins import LmsApiMockMixin
+from ecommerce.tests.testcases import TestCase
+
+post_checkout = get_class('checkout.signals', 'post_checkout')
+
+
+class LmsUserClientTests(LmsApiMockMixin, TestCase):
+    """ Tests for LmsUserClient. """
+    course_key = 'course-v1:test+test+test'
+
+    def setUp(self):
+        super(LmsUserClientTests, self).setUp()
+        cache.clear()
+        self.user = self.create_user()
+
+    def get_client(self):
+        return LmsUserClient(self.site.siteconfiguration, self.user)
+
+    def test_connection_pool(self):
+        """ Verify the clients of a site share a connection pool, and time out. """
+        api = get_lms_api_client(self.site.siteconfiguration, '/api/user/v1', 'abc123')
+        other_api = get_lms_api_client(self.site.siteconfiguration, '/api/enrollment/v1', 'def456')
+        session = api._store['session']  # pylint: disable=protected-access
+        other_session = other_api._store['session']  # pylint: disable=protected-access
+        self.assertIs(session.get_adapter('http://'), other_session.get_adapter('https://'))
+        self.assertEqual(session.timeout, 5)
+        self.assertNotEqual(session.auth.token, other_session.auth.token)
+
+    @httpretty.activate
+    def test_cached_lookups(self):
+        """ Verify the results of lookups are cached, and only requested once. """
+        self.mock_account_api(self.request, self.user.username, data={'is_active': True})
+        self.mock_enrollment_api(self.request, self.user, self.course_key, mode='verified')
+
+        for __ in range(2):
+            client = self.get_client()
+            self.assertEqual(client.get_account(), {'is_active': True})
+            self.assertTrue(client.is_enrolled(self.course_key, 'verified'))
+            self.assertFalse(client.is_enrolled(self.course_key, 'audit'))
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
+    @httpretty.activate
+    def test_post_checkout_invalidation(self):
+        """ Verify the cached results of lookups are discarded when the user places an order. """
+        self.mock_enrollment_api(self.request, self.user, self.course_key, is_active=False, mode='verified')
+        self.assertFalse(self.get_client().is_enrolled(self.course_key, 'verified'))
+
+        order = factories.create_order(user=self.user)
+        post_checkout.send(sender=self, order=order)
+
+        self.mock_enrollment_api(self.request, self.user, self.course_key, is_active=True, mode='verified')
+        self.assertTrue(self.get_client().is_enrolled(self.course_key, 'verified'))
+
+    @httpretty.activate
+    def test_prefetch(self):
+        """ Verify prefetched lookups return without further requests, and failures are raised when called. """
+        self.mock_account_api(self.request, self.user.username, data={'is_active': True})
+        self.mock_enrollment_api_error(self.request, self.user, self.course_key, ConnectionError)
+
+        client = self.get_client()
+        with mock.patch('ecommerce.core.lms.logger') as mock_logger:
+            client.prefetch(('get_account',), ('get_enrollment', self.course_key))
+            self.assertEqual(mock_logger.exception.call_count, 1)
+        requests_made = len(httpretty.httpretty.latest_requests)
+
+        self.assertEqual(client.get_account(), {'is_active': True})
+        with self.assertRaises(ConnectionError):
+            client.get_enrollment(self.course_key)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), requests_made)
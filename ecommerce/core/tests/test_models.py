@@ -8,8 +8,12 @@ from django.test import override_settings
 from edx_rest_api_client.auth import SuppliedJwtAuth
 from requests.exceptions import ConnectionError
 
-from ecommerce.core.models import BusinessClient, User, SiteConfiguration, validate_configuration
+from ecommerce.core.models import (
+    BusinessClient, User, SiteConfiguration, SiteConfigurationSnapshot, get_site_configuration_snapshot,
+    refresh_site_configurations, validate_configuration
+)
 from ecommerce.core.tests import toggle_switch
+from ecommerce.core.version_stamps import bump_version_stamps
 from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.extensions.payment.tests.processors import DummyProcessor, AnotherDummyProcessor
 from ecommerce.tests.factories import SiteConfigurationFactory
@@ -329,6 +333,72 @@ class SiteConfigurationTests(TestCase):
         self.assertEqual(client_auth.token, token)
 
 
+class SiteConfigurationSnapshotTests(TestCase):
+    """ Tests for site configuration snapshots. """
+
+    def test_snapshot(self):
+        """ Verify the snapshot holds the configuration of the site, and the values derived from it. """
+        site_configuration = self.site.siteconfiguration
+        snapshot = get_site_configuration_snapshot(self.site)
+
+        self.assertEqual(snapshot.partner, site_configuration.partner)
+        self.assertEqual(snapshot.partner.short_code, site_configuration.partner.short_code)
+        self.assertIsNot(snapshot.partner, snapshot.partner)
+        self.assertEqual(snapshot.build_lms_url('/dashboard'), site_configuration.build_lms_url('/dashboard'))
+        self.assertEqual(snapshot.build_ecommerce_url('/basket/'), site_configuration.build_ecommerce_url('/basket/'))
+        self.assertEqual(snapshot.oauth2_provider_url, site_configuration.oauth2_provider_url)
+        self.assertEqual(snapshot.payment_processors_set, site_configuration.payment_processors_set)
+        self.assertEqual(snapshot.get_payment_processors(), site_configuration.get_payment_processors())
+        self.assertEqual(snapshot.from_email, site_configuration.get_from_email())
+
+        with self.assertRaises(AttributeError):
+            snapshot.lms_url_root = 'http://example.com'
+
+    def test_snapshot_cached(self):
+        """ Verify snapshots are built once, and rebuilt when a site configuration is saved. """
+        # As done by SiteConfigurationMiddleware, before the site of the request is read.
+        refresh_site_configurations()
+        site = Site.objects.get_current()
+        snapshot = get_site_configuration_snapshot(site)
+
+        # The site is read from the Site cache, and the snapshot from that of the process.
+        with self.assertNumQueries(0):
+            self.assertIs(get_site_configuration_snapshot(Site.objects.get_current()), snapshot)
+
+        site_configuration = site.siteconfiguration
+        site_configuration.lms_url_root = 'http://lms.example.com'
+        site_configuration.save()
+        snapshot = get_site_configuration_snapshot(Site.objects.get(id=self.site.id))
+        self.assertEqual(snapshot.build_lms_url('/dashboard'), 'http://lms.example.com/dashboard')
+
+    def test_snapshot_refreshed_by_other_processes(self):
+        """ Verify the snapshots and the Site cache are discarded when another process saves a site configuration. """
+        snapshot = get_site_configuration_snapshot(Site.objects.get_current())
+
+        SiteConfiguration.objects.filter(site=self.site).update(lms_url_root='http://lms.example.com')
+        self.assertIs(get_site_configuration_snapshot(Site.objects.get_current()), snapshot)
+
+        # Saves made by other processes bump the version stamp shared through the cache.
+        bump_version_stamps(SiteConfiguration)
+        snapshot = get_site_configuration_snapshot(Site.objects.get_current())
+        self.assertEqual(snapshot.lms_url_root, 'http://lms.example.com')
+
+    def test_snapshot_discarded_while_built(self):
+        """ Verify a snapshot built while the snapshots are discarded is not kept. """
+        refresh_site_configurations()
+        site = Site.objects.get_current()
+        build_snapshot = SiteConfigurationSnapshot
+
+        def discard_and_build(site_configuration):
+            bump_version_stamps(SiteConfiguration)
+            refresh_site_configurations()
+            return build_snapshot(site_configuration)
+
+        with mock.patch('ecommerce.core.models.SiteConfigurationSnapshot', side_effect=discard_and_build):
+            snapshot = get_site_configuration_snapshot(site)
+        self.assertIsNot(get_site_configuration_snapshot(site), snapshot)
+
+
 class HelperMethodTests(TestCase):
     """ Tests helper methods in models.py """
 
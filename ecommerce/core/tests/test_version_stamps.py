@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import RequestFactory
+import mock
+
+from ecommerce.core.middleware import VersionStampMiddleware
+from ecommerce.core.version_stamps import bump_version_stamps, get_version_stamps
+from ecommerce.courses.models import Course
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
+from ecommerce.tests.testcases import TestCase
+
+
+class VersionStampsTests(CourseCatalogTestMixin, TestCase):
+    """ Tests for the version stamps of API resources. """
+
+    def setUp(self):
+        super(VersionStampsTests, self).setUp()
+        cache.clear()
+
+    def test_get_version_stamps(self):
+        """ Verify missing stamps are initialized, and kept until they are bumped. """
+        with mock.patch('time.time', return_value=100.0):
+            self.assertEqual(get_version_stamps([Course]), {Course: 100.0})
+
+        with mock.patch('time.time', return_value=200.0):
+            self.assertEqual(get_version_stamps([Course]), {Course: 100.0})
+            bump_version_stamps(Course)
+            self.assertEqual(get_version_stamps([Course]), {Course: 200.0})
+
+    def test_signals(self):
+        """ Verify the stamps are bumped when instances are saved or deleted. """
+        stamp = get_version_stamps([Course])[Course]
+        course = CourseFactory()
+        self.assertGreater(get_version_stamps([Course])[Course], stamp)
+
+        stamp = get_version_stamps([Course])[Course]
+        course.delete()
+        self.assertGreater(get_version_stamps([Course])[Course], stamp)
+
+    def test_middleware(self):
+        """ Verify the stamps bumped within the request's transaction are bumped again once it is committed. """
+        middleware = VersionStampMiddleware()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+
+        # Tests run within a transaction.
+        with mock.patch('time.time', return_value=100.0):
+            bump_version_stamps(Course)
+
+        with mock.patch('time.time', return_value=200.0):
+            middleware.process_response(request, None)
+        self.assertEqual(get_version_stamps([Course]), {Course: 200.0})
+
+        # Stamps are only bumped again once.
+        with mock.patch('time.time', return_value=300.0):
+            middleware.process_response(request, None)
+        self.assertEqual(get_version_stamps([Course]), {Course: 200.0})
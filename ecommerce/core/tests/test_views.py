@@ -20,7 +20,7 @@ LOGGER_NAME = 'ecommerce.core.views'
 User = get_user_model()
 
 
-@mock.patch('requests.get')
+@mock.patch('requests.Session.request')
 class HealthTests(TestCase):
     """Tests of the health endpoint."""
 
@@ -6,7 +6,7 @@ from ecommerce.core.exceptions import MissingRequestError
 
 
 def _get_site_configuration():
-    """ Retrieve the SiteConfiguration from the current request from the global thread.
+    """ Retrieve the snapshot of the SiteConfiguration of the current request from the global thread.
 
     Notes:
         This is a stopgap. Do NOT use this with any expectation that it will remain in place.
@@ -18,7 +18,9 @@ def _get_site_configuration():
     request = get_current_request()
 
     if request:
-        return request.site.siteconfiguration
+        # Imported here, as the models module depends on this one.
+        from ecommerce.core.models import get_site_configuration_snapshot
+        return get_site_configuration_snapshot(request.site)
 
     raise MissingRequestError
 
@@ -0,0 +1,72 @@
+"""
+Version stamps of the resources served by the API.
+
+Each resource, identified by its model, has a version stamp stored in the cache: the time at which an instance
+of the model was last created, updated or deleted. API responses are identified by the stamps of the resources
+they are built from, which are used to derive their ETag and Last-Modified headers and to key the response cache.
+
+Stamps bumped while a transaction is open are bumped again by VersionStampMiddleware once the request's
+transaction has been committed, so that responses built by other requests from the data committed before
+are not identified by the new stamps.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+
+_pending = threading.local()
+
+
+def _version_stamp_key(model):
+    # pylint: disable=protected-access
+    return 'version_stamp:{}.{}'.format(model._meta.app_label, model._meta.model_name)
+
+
+def get_version_stamps(models):
+    """
+    Returns the version stamps of the given models.
+
+    Models whose stamp is not cached, e.g. because it has been evicted, are stamped with the current time.
+
+    Arguments:
+        models (iterable): Model classes.
+
+    Returns:
+        dict: Version stamps, as timestamps, keyed by model.
+    """
+    keys = {model: _version_stamp_key(model) for model in models}
+    stamps = cache.get_many(keys.values())
+
+    for key in keys.values():
+        if key not in stamps:
+            cache.add(key, time.time(), None)
+            stamps[key] = cache.get(key)
+
+    return {model: stamps[key] for model, key in keys.items()}
+
+
+def _set_version_stamps(models):
+    cache.set_many({_version_stamp_key(model): time.time() for model in models}, None)
+
+
+def bump_version_stamps(*models):
+    """ Stamps the given models with the current time, and again once the open transaction, if any, is committed. """
+    _set_version_stamps(models)
+
+    if connection.in_atomic_block:
+        if not hasattr(_pending, 'models'):
+            _pending.models = set()
+        _pending.models.update(models)
+
+
+def discard_pending_version_stamps():
+    """ Forgets the models waiting to be stamped again. """
+    _pending.__dict__.pop('models', None)
+
+
+def flush_pending_version_stamps():
+    """ Stamps again the models stamped while the transaction which has since been committed was open. """
+    models = _pending.__dict__.pop('models', None)
+    if models:
+        _set_version_stamps(models)
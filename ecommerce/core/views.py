@@ -14,6 +14,7 @@ from django.utils.decorators import method_decorator
 from django.views.generic import View
 
 from ecommerce.core.constants import Status, UnavailabilityMessage
+from ecommerce.core.http_client import get_session
 from ecommerce.core.url_utils import get_lms_heartbeat_url
 
 logger = logging.getLogger(__name__)
@@ -52,7 +53,8 @@ def health(_):
         database_status = Status.UNAVAILABLE
 
     try:
-        response = requests.get(get_lms_heartbeat_url(), timeout=1)
+        # The heartbeat is not retried, so that the check stays fast.
+        response = get_session(max_retries=0).get(get_lms_heartbeat_url(), timeout=1)
 
         if response.status_code == 200:
             lms_status = Status.OK
@@ -0,0 +1,39 @@
+import httpretty
+
+from ecommerce.core.tests.decorators import mock_course_catalog_api_client
+from ecommerce.coupons.tests.mixins import CourseCatalogMockMixin
+from ecommerce.coupons.utils import get_range_catalog_query_results
+from ecommerce.courses.models import CatalogCourseRun
+from ecommerce.courses.tests.factories import CatalogCourseRunSyncFactory, CourseFactory
+from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
+from ecommerce.tests.testcases import TestCase
+
+
+@httpretty.activate
+@mock_course_catalog_api_client
+class GetRangeCatalogQueryResultsTests(CourseCatalogTestMixin, CourseCatalogMockMixin, TestCase):
+    """ Tests for get_range_catalog_query_results. """
+
+    def setUp(self):
+        super(GetRangeCatalogQueryResultsTests, self).setUp()
+        self.course = CourseFactory()
+        self.course_info = {'key': self.course.id, 'title': 'Mirrored title'}
+        CatalogCourseRun.objects.create(partner=self.partner, key=self.course.id, data=self.course_info)
+        CatalogCourseRunSyncFactory(partner=self.partner)
+
+    def test_mirrored_course_runs(self):
+        """ Verify queries selecting mirrored course runs by key are evaluated against the mirror. """
+        response = get_range_catalog_query_results(20, 'key:{}'.format(self.course.id), self.site)
+
+        self.assertEqual(response, {'count': 1, 'next': None, 'previous': None, 'results': [self.course_info]})
+        self.assertFalse(httpretty.has_request())
+
+    def test_unmirrored_course_runs(self):
+        """ Verify queries selecting course runs that have not been mirrored are sent to the catalog service. """
+        query = 'key:({} OR course-v1:test+test+test)'.format(self.course.id)
+        self.mock_dynamic_catalog_course_runs_api(query=query)
+
+        response = get_range_catalog_query_results(20, query, self.site)
+
+        self.assertEqual(response['results'][0]['key'], 'test')
+        self.assertTrue(httpretty.has_request())
@@ -2,9 +2,11 @@
 import hashlib
 
 from django.conf import settings
-from django.core.cache import cache
 from oscar.core.loading import get_model
 
+from ecommerce.core.cache_utils import get_or_set_cached
+from ecommerce.courses.utils import get_course_runs_from_mirror, parse_course_run_keys_query
+
 Product = get_model('catalogue', 'Product')
 
 
@@ -21,19 +23,50 @@ def get_range_catalog_query_results(limit, query, site, offset=None):
     Returns:
         dict: Query seach results received from Course Catalog API
     """
+    response = _get_range_catalog_query_results_from_mirror(limit, query, site, offset)
+    if response:
+        return response
+
     partner_code = site.siteconfiguration.partner.short_code
     cache_key = 'course_runs_{}_{}_{}_{}'.format(query, limit, offset, partner_code)
     cache_hash = hashlib.md5(cache_key).hexdigest()
-    response = cache.get(cache_hash)
-    if not response:
-        response = site.siteconfiguration.course_catalog_api_client.course_runs.get(
+    return get_or_set_cached(
+        cache_hash,
+        lambda: site.siteconfiguration.course_catalog_api_client.course_runs.get(
             limit=limit,
             offset=offset,
             q=query,
             partner=partner_code
-        )
-        cache.set(cache_hash, response, settings.COURSES_API_CACHE_TIMEOUT)
-    return response
+        ),
+        settings.COURSES_API_CACHE_TIMEOUT
+    )
+
+
+def _get_range_catalog_query_results_from_mirror(limit, query, site, offset):
+    """
+    Evaluate a catalog query against the local mirror of the catalog service.
+
+    Only queries selecting course runs by key, whose course runs have all been mirrored and fit
+    on the first page of results, are evaluated locally.
+
+    Returns:
+        dict: Query search results in the format of the Course Catalog API, or None if the
+        query must be evaluated by the Course Catalog service.
+    """
+    course_keys = parse_course_run_keys_query(query)
+    if course_keys is None or int(offset or 0) or len(set(course_keys)) > int(limit):
+        return None
+
+    course_runs = get_course_runs_from_mirror(site, course_keys)
+    if len(course_runs) != len(set(course_keys)):
+        return None
+
+    return {
+        'count': len(course_runs),
+        'next': None,
+        'previous': None,
+        'results': [course_runs[course_key] for course_key in sorted(course_runs)],
+    }
 
 
 def prepare_course_seat_types(course_seat_types):
@@ -18,6 +18,7 @@ from oscar.core.loading import get_class, get_model
 from ecommerce.core.url_utils import get_ecommerce_url
 from ecommerce.core.views import StaffOnlyMixin
 from ecommerce.coupons.decorators import login_required_for_credit
+from ecommerce.courses.utils import mode_for_seat
 from ecommerce.extensions.api import exceptions
 from ecommerce.extensions.basket.utils import prepare_basket
 from ecommerce.extensions.checkout.mixins import EdxOrderPlacementMixin
@@ -157,12 +158,16 @@ class CouponRedeemView(EdxOrderPlacementMixin, View):
         if not voucher.offers.first().is_email_valid(request.user.email):
             return render(request, template_name, {'error': _('You are not eligible to use this coupon.')})
 
-        if not request.user.account_details(request)['is_active']:
+        # Retrieve the user's account details and enrollment concurrently.
+        lms_client = request.user.get_lms_client(request.site)
+        lms_client.prefetch(('get_account',), ('get_enrollment', product.flat_attr.course_key))
+
+        if not lms_client.get_account()['is_active']:
             return render(request, template_name, {
                 'error': _('You need to activate your account in order to redeem this coupon.')
             })
 
-        if request.user.is_user_already_enrolled(request, product):
+        if lms_client.is_enrolled(product.flat_attr.course_key, mode_for_seat(product)):
             return render(request, template_name, {'error': _('You are already enrolled in the course.')})
 
         basket = prepare_basket(request, product, voucher)
@@ -1,15 +1,22 @@
 """ This command publish the courses to LMS."""
 from __future__ import unicode_literals
+from itertools import chain
 import logging
 from optparse import make_option
 import os
 
+from dateutil.parser import parse
 from django.core.management import BaseCommand, CommandError
+from oscar.core.loading import get_model
 
+from ecommerce.core.models import SiteConfiguration
 from ecommerce.courses.models import Course
+from ecommerce.courses.publishers import BulkLMSPublisher
 
 
 logger = logging.getLogger(__name__)
+Product = get_model('catalogue', 'Product')
+StockRecord = get_model('partner', 'StockRecord')
 
 
 class Command(BaseCommand):
@@ -24,6 +31,59 @@ class Command(BaseCommand):
             default=None,
             help='Path to file to read courses from.'
         ),
+        make_option(
+            '--partner',
+            action='store',
+            dest='partner',
+            default=None,
+            help='Short code of the partner whose courses are published.'
+        ),
+        make_option(
+            '--modified_since',
+            action='store',
+            dest='modified_since',
+            default=None,
+            help='Only publish the courses, seats or prices modified on or after this date/time.'
+        ),
+        make_option(
+            '--bulk',
+            action='store_true',
+            dest='bulk',
+            default=False,
+            help='Publish the courses concurrently, using the site of the partner given with --partner.'
+        ),
+        make_option(
+            '--workers',
+            action='store',
+            dest='workers',
+            type=int,
+            default=8,
+            help='Number of courses published concurrently in bulk mode.'
+        ),
+        make_option(
+            '--rate_limit',
+            action='store',
+            dest='rate_limit',
+            type=float,
+            default=None,
+            help='Maximum number of requests sent to LMS per second in bulk mode.'
+        ),
+        make_option(
+            '--max_retries',
+            action='store',
+            dest='max_retries',
+            type=int,
+            default=3,
+            help='Number of times requests failing with a transient error are retried in bulk mode.'
+        ),
+        make_option(
+            '--batch_size',
+            action='store',
+            dest='batch_size',
+            type=int,
+            default=100,
+            help='Number of courses whose seats are loaded at a time in bulk mode.'
+        ),
     )
 
     ch = logging.StreamHandler()
@@ -31,33 +91,112 @@ class Command(BaseCommand):
     logger.addHandler(ch)
 
     def handle(self, *args, **options):
-        failed = 0
-        course_ids_file = options['course_ids_file']
-        if not course_ids_file or not os.path.exists(course_ids_file):
-            raise CommandError("Pass the correct absolute path to course ids file as --course_ids_file argument.")
-
-        with open(course_ids_file, 'r') as file_handler:
-            course_ids = file_handler.readlines()
-            total_courses = len(course_ids)
-            logger.info("Publishing %d courses.", total_courses)
-            for index, course_id in enumerate(course_ids, start=1):
-                try:
-                    course_id = course_id.strip()
-                    course = Course.objects.get(id=course_id)
-                    publishing_error = course.publish_to_lms()
-                    if publishing_error:
-                        failed += 1
-                        logger.error(
-                            u"(%d/%d) Failed to publish %s: %s", index, total_courses, course_id, publishing_error
-                        )
-                    else:
-                        logger.info(u"(%d/%d) Successfully published %s.", index, total_courses, course_id)
-                except Course.DoesNotExist:
-                    failed += 1
-                    logger.error(
-                        u"(%d/%d) Failed to publish %s: Course does not exist.", index, total_courses, course_id
-                    )
+        course_ids = self.get_course_ids(options)
+        site_configuration = self.get_site_configuration(options['partner']) if options['bulk'] else None
+        total_courses = len(course_ids)
+        logger.info("Publishing %d courses.", total_courses)
+
+        if site_configuration:
+            results = self.publish_bulk(course_ids, site_configuration, options)
+        else:
+            results = self.publish(course_ids)
+
+        failed = []
+        for index, (course_id, publishing_error) in enumerate(results, start=1):
+            if publishing_error:
+                failed.append(course_id)
+                logger.error(
+                    u"(%d/%d) Failed to publish %s: %s", index, total_courses, course_id, publishing_error
+                )
+            else:
+                logger.info(u"(%d/%d) Successfully published %s.", index, total_courses, course_id)
+
         if failed:
-            logger.error("Completed publishing courses. %d of %d failed.", failed, total_courses)
+            logger.error("Completed publishing courses. %d of %d failed.", len(failed), total_courses)
+            if options['bulk']:
+                logger.error(u"Failed to publish the following courses: %s", ', '.join(failed))
         else:
             logger.info("All %d courses successfully published.", total_courses)
+
+    def get_course_ids(self, options):
+        """
+        Returns the IDs of the courses to publish, read from the course IDs file, and narrowed down
+        to the courses of the partner and modified since the given date/time, if any.
+        """
+        course_ids_file = options['course_ids_file']
+        partner = options['partner']
+        modified_since = options['modified_since']
+
+        if course_ids_file or not (partner or modified_since):
+            if not course_ids_file or not os.path.exists(course_ids_file):
+                raise CommandError(
+                    "Pass the correct absolute path to course ids file as --course_ids_file argument."
+                )
+
+            with open(course_ids_file, 'r') as file_handler:
+                course_ids = [course_id.strip() for course_id in file_handler.readlines()]
+        else:
+            course_ids = list(Course.objects.order_by('id').values_list('id', flat=True))
+
+        if partner:
+            partner_course_ids = set(Course.objects.filter(
+                products__stockrecords__partner__short_code=partner
+            ).values_list('id', flat=True))
+            course_ids = [course_id for course_id in course_ids if course_id in partner_course_ids]
+
+        if modified_since:
+            try:
+                modified_since = parse(modified_since)
+            except ValueError:
+                raise CommandError('[{}] is not a valid date/time.'.format(modified_since))
+
+            modified_course_ids = set(Course.history.filter(
+                history_date__gte=modified_since
+            ).values_list('id', flat=True))
+            modified_course_ids.update(Product.objects.filter(
+                date_updated__gte=modified_since
+            ).values_list('course_id', flat=True))
+            modified_course_ids.update(StockRecord.objects.filter(
+                date_updated__gte=modified_since
+            ).values_list('product__course_id', flat=True))
+            course_ids = [course_id for course_id in course_ids if course_id in modified_course_ids]
+
+        return course_ids
+
+    def publish(self, course_ids):
+        """ Publishes the courses one at a time, yielding the ID of each course and its publishing error. """
+        for course_id in course_ids:
+            try:
+                course = Course.objects.get(id=course_id)
+            except Course.DoesNotExist:
+                yield course_id, 'Course does not exist.'
+                continue
+
+            yield course_id, course.publish_to_lms()
+
+    def get_site_configuration(self, partner):
+        """ Returns the configuration of the partner's site, whose LMS the courses are published to in bulk mode. """
+        if not partner:
+            raise CommandError('Pass the short code of the partner whose site is published to as --partner argument.')
+
+        site_configuration = SiteConfiguration.objects.filter(partner__short_code=partner).first()
+        if not site_configuration:
+            raise CommandError('No site is configured for partner [{}].'.format(partner))
+
+        return site_configuration
+
+    def publish_bulk(self, course_ids, site_configuration, options):
+        """ Publishes the courses concurrently, yielding the ID of each course and its publishing error. """
+        courses = Course.objects.in_bulk(course_ids)
+        missing = [(course_id, 'Course does not exist.') for course_id in course_ids if course_id not in courses]
+
+        publisher = BulkLMSPublisher(
+            site_configuration,
+            workers=options['workers'],
+            rate_limit=options['rate_limit'],
+            max_retries=options['max_retries'],
+            batch_size=options['batch_size']
+        )
+        found = [courses[course_id] for course_id in course_ids if course_id in courses]
+        for result in chain(missing, publisher.publish(found)):
+            yield result
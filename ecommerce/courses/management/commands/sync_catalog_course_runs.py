@@ -0,0 +1,140 @@
+""" Synchronizes the local mirror of course run metadata with the Course Catalog service. """
+from __future__ import unicode_literals
+import datetime
+import logging
+
+from dateutil.parser import parse
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberBaseException
+
+from ecommerce.core.models import SiteConfiguration
+from ecommerce.courses.models import CatalogCourseRun, CatalogCourseRunSync
+
+logger = logging.getLogger(__name__)
+
+# Elasticsearch query selecting the course runs modified on or after the given date/time.
+MODIFIED_SINCE_QUERY = 'modified:[{} TO *]'
+
+# Course runs modified shortly before the start of the last synchronization are pulled again, in case the clock of the
+# Course Catalog service is behind.
+MODIFIED_SINCE_OVERLAP = datetime.timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = 'Synchronize the local mirror of course run metadata with the Course Catalog service.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full',
+                            action='store_true',
+                            dest='full',
+                            default=False,
+                            help='Pull all course runs, instead of those modified since the last synchronization.')
+        parser.add_argument('--page-size',
+                            action='store',
+                            dest='page_size',
+                            type=int,
+                            default=100,
+                            help='Number of course runs requested from the Course Catalog service at a time.')
+
+    def handle(self, *args, **options):
+        failed_partners = []
+        synced_partner_ids = set()
+
+        # Several sites may share a partner; each partner's course runs only need to be pulled once.
+        for site_configuration in SiteConfiguration.objects.select_related('partner').order_by('id'):
+            partner = site_configuration.partner
+            if partner.id in synced_partner_ids:
+                continue
+            synced_partner_ids.add(partner.id)
+
+            try:
+                count = self.sync_partner(site_configuration, options['full'], options['page_size'])
+                logger.info('Synchronized [%d] course runs for partner [%s].', count, partner.short_code)
+            except (ConnectionError, SlumberBaseException, Timeout):
+                logger.exception('Failed to synchronize course runs for partner [%s].', partner.short_code)
+                failed_partners.append(partner.short_code)
+
+        if failed_partners:
+            raise CommandError('Failed to synchronize course runs for partners [{}].'.format(
+                ', '.join(failed_partners)))
+
+    def sync_partner(self, site_configuration, full, page_size):
+        """
+        Pull the partner's course runs from the Course Catalog service into the local mirror.
+
+        Unless a full synchronization is requested, only the course runs modified since the start of the last
+        completed synchronization are pulled. A full synchronization also deletes the mirrored course runs which
+        the Course Catalog service no longer returns.
+
+        The synchronization is only recorded once all course runs have been pulled, so that an interrupted one is
+        resumed from the previous checkpoint by the next run.
+
+        Returns:
+            int: Number of course runs pulled.
+        """
+        partner = site_configuration.partner
+        querystring = {'partner': partner.short_code, 'limit': page_size}
+        started = timezone.now()
+
+        checkpoint = CatalogCourseRunSync.objects.filter(partner=partner).first()
+        if checkpoint and not full:
+            modified_since = checkpoint.started - MODIFIED_SINCE_OVERLAP
+            querystring['q'] = MODIFIED_SINCE_QUERY.format(modified_since.strftime('%Y-%m-%dT%H:%M:%SZ'))
+        else:
+            full = True
+
+        api = site_configuration.course_catalog_api_client
+        count = 0
+        offset = 0
+        while True:
+            response = api.course_runs.get(offset=offset, **querystring)
+            results = response['results']
+            self.save_course_runs(partner, results)
+            count += len(results)
+
+            if not response.get('next') or not results:
+                break
+            offset += len(results)
+
+        with transaction.atomic():
+            if full:
+                # Every course run returned was saved during this synchronization.
+                deleted = CatalogCourseRun.objects.filter(partner=partner, synced__lt=started)
+                logger.info('Deleting [%d] course runs no longer returned for partner [%s].',
+                            deleted.count(), partner.short_code)
+                deleted.delete()
+
+            CatalogCourseRunSync.objects.update_or_create(
+                partner=partner, defaults={'started': started, 'completed': timezone.now()}
+            )
+
+        return count
+
+    def save_course_runs(self, partner, results):
+        """ Create or update the mirrored course runs from a page of Course Catalog service results. """
+        existing = {
+            course_run.key: course_run
+            for course_run in CatalogCourseRun.objects.filter(
+                partner=partner, key__in=[result['key'] for result in results]
+            )
+        }
+        to_create = []
+
+        with transaction.atomic():
+            for result in results:
+                modified = parse(result['modified']) if result.get('modified') else None
+                course_run = existing.get(result['key'])
+                if course_run:
+                    course_run.data = result
+                    course_run.modified = modified
+                    course_run.save()
+                else:
+                    to_create.append(
+                        CatalogCourseRun(partner=partner, key=result['key'], data=result, modified=modified)
+                    )
+
+            if to_create:
+                CatalogCourseRun.objects.bulk_create(to_create)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partner', '0010_auto_20161025_1446'),
+        ('courses', '0004_auto_20150803_1406'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogCourseRun',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('key', models.CharField(max_length=255, verbose_name='Course run key')),
+                ('data', jsonfield.fields.JSONField(help_text='Course run data, as returned by the Course Catalog service.')),
+                ('modified', models.DateTimeField(help_text='Date/time on which the course run was last modified in the Course Catalog service.', null=True, db_index=True, blank=True)),
+                ('synced', models.DateTimeField(auto_now=True)),
+                ('partner', models.ForeignKey(related_name='catalog_course_runs', to='partner.Partner')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='catalogcourserun',
+            unique_together=set([('partner', 'key')]),
+        ),
+    ]
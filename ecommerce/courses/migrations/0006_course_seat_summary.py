@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import jsonfield.fields
+
+from ecommerce.courses.utils import summarize_seats
+
+
+def populate_seat_summaries(apps, schema_editor):
+    """ Populate the type and seat summary of existing courses from their seats. """
+    Course = apps.get_model('courses', 'Course')
+    Product = apps.get_model('catalogue', 'Product')
+
+    seats = Product.objects.filter(
+        parent__course__isnull=False,
+        parent__product_class__slug='seat',
+        parent__structure='parent'
+    ).select_related('parent').prefetch_related('stockrecords').order_by('-date_created')
+
+    course_seats = {}
+    for seat in seats:
+        course_seats.setdefault(seat.parent.course_id, []).append((seat, seat.attribute_snapshot or {}))
+
+    for course_id, seats_of_course in course_seats.items():
+        course_type, seat_summary = summarize_seats(seats_of_course)
+        Course.objects.filter(id=course_id).update(course_type=course_type, seat_summary=seat_summary)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0022_catalog_fingerprint'),
+        ('courses', '0005_catalogcourserun'),
+        ('partner', '0010_auto_20161025_1446'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='course_type',
+            field=models.CharField(default='audit', help_text='Denormalized type of the course, based on the types of its seats.', max_length=32, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='seat_summary',
+            field=jsonfield.fields.JSONField(default=list, help_text='Denormalized SKU, mode, price and expiration date of the seats of the course.', editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalcourse',
+            name='course_type',
+            field=models.CharField(default='audit', help_text='Denormalized type of the course, based on the types of its seats.', max_length=32, editable=False),
+        ),
+        migrations.AddField(
+            model_name='historicalcourse',
+            name='seat_summary',
+            field=jsonfield.fields.JSONField(default=list, help_text='Denormalized SKU, mode, price and expiration date of the seats of the course.', editable=False, blank=True),
+        ),
+        migrations.RunPython(populate_seat_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partner', '0010_auto_20161025_1446'),
+        ('courses', '0006_course_seat_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogCourseRunSync',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('started', models.DateTimeField(help_text='Date/time on which the last completed synchronization started. Course runs modified in the Course Catalog service since then are pulled by the next synchronization.')),
+                ('completed', models.DateTimeField(help_text='Date/time on which the last synchronization completed.')),
+                ('partner', models.OneToOneField(related_name='catalog_course_run_sync', to='partner.Partner')),
+            ],
+        ),
+    ]
@@ -1,10 +1,13 @@
 from __future__ import unicode_literals
+import hashlib
 import logging
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models, transaction
-from django.db.models import Q, Count
+from django.db.models import Count
 from django.utils.translation import ugettext_lazy as _
+from jsonfield.fields import JSONField
 from oscar.core.loading import get_model
 from simple_history.models import HistoricalRecords
 import waffle
@@ -14,7 +17,11 @@ from ecommerce.core.constants import (
     ENROLLMENT_CODE_SEAT_TYPES,
     ENROLLMENT_CODE_SWITCH
 )
+from ecommerce.core.history import bulk_create_with_history, bulk_update_with_history
+from ecommerce.core.version_stamps import bump_version_stamps
 from ecommerce.courses.publishers import LMSPublisher
+from ecommerce.courses.utils import summarize_seats
+from ecommerce.extensions.catalogue.models import FLAT_ATTRIBUTE_CODES
 from ecommerce.extensions.catalogue.utils import generate_sku
 
 logger = logging.getLogger(__name__)
@@ -22,10 +29,179 @@ Category = get_model('catalogue', 'Category')
 Partner = get_model('partner', 'Partner')
 Product = get_model('catalogue', 'Product')
 ProductCategory = get_model('catalogue', 'ProductCategory')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
 ProductClass = get_model('catalogue', 'ProductClass')
 StockRecord = get_model('partner', 'StockRecord')
 
 
+class _CourseSeatWriter(object):
+    """
+    Creates or updates the seats of a course, and writes the rows which differ from those requested in bulk.
+
+    The existing seats, with their attribute values and stock records, are loaded with a single prefetch when the
+    writer is created. Requested seats are compared with them, and the rows to write are collected until save()
+    is called.
+    """
+
+    def __init__(self, course, partner):
+        self.course = course
+        self.partner = partner
+        self.parent = Product.objects.select_related('product_class').get(
+            course=course, product_class__slug='seat', structure=Product.PARENT
+        )
+        self.attributes = {attribute.code: attribute for attribute in self.parent.product_class.attributes.all()}
+
+        self.seats = {}
+        self.attribute_values = {}
+        self.stock_records = {}
+        for seat in self.parent.children.prefetch_related('stockrecords', 'attribute_values__attribute'):
+            values = {value.attribute.code: value for value in seat.attribute_values.all()}
+            self.attribute_values[seat.id] = values
+            self.stock_records[seat.id] = next(
+                (stock_record for stock_record in seat.stockrecords.all() if stock_record.partner_id == partner.id),
+                None
+            )
+            self.seats.setdefault(self.seat_key(
+                getattr(values.get('certificate_type'), 'value', ''),
+                getattr(values.get('id_verification_required'), 'value', None),
+                getattr(values.get('credit_provider'), 'value', None)
+            ), seat)
+
+        self.products_to_update = {}
+        self.values_to_create = []
+        self.values_to_update = {}
+        self.values_to_delete = {}
+        self.stock_records_to_create = []
+        self.stock_records_to_update = {}
+
+    @staticmethod
+    def seat_key(certificate_type, id_verification_required, credit_provider):
+        """ Returns the key identifying a seat among the seats of a course. """
+        return certificate_type or '', id_verification_required, credit_provider or None
+
+    def create_or_update_seat(self, certificate_type, id_verification_required, price, credit_provider=None,
+                              expires=None, credit_hours=None):
+        """ Creates the seat product if it does not exist, and collects its rows which differ from those requested. """
+        seat = self._get_or_create_product(certificate_type, id_verification_required, credit_provider, expires)
+
+        requested_values = {'course_key': unicode(self.course.id), 'id_verification_required': id_verification_required}
+        if certificate_type:
+            requested_values['certificate_type'] = certificate_type
+        if credit_provider:
+            requested_values['credit_provider'] = credit_provider
+        if credit_hours:
+            requested_values['credit_hours'] = credit_hours
+        self._set_attribute_values(seat, requested_values)
+
+        self._set_stock_record(seat, price)
+        return seat
+
+    def _get_or_create_product(self, certificate_type, id_verification_required, credit_provider, expires):
+        fields = {
+            'course_id': self.course.id,
+            'structure': Product.CHILD,
+            'parent_id': self.parent.id,
+            'is_discountable': True,
+            'title': self.course.get_course_seat_name(certificate_type, id_verification_required),
+            'expires': expires,
+        }
+
+        key = self.seat_key(certificate_type, id_verification_required, credit_provider)
+        seat = self.seats.get(key)
+        if seat:
+            logger.info(
+                'Retrieved course seat child product with certificate type [%s] for [%s] from database.',
+                certificate_type,
+                self.course.id
+            )
+            for name, value in fields.items():
+                if getattr(seat, name) != value:
+                    setattr(seat, name, value)
+                    self.products_to_update[seat.id] = seat
+        else:
+            logger.info(
+                'Course seat product with certificate type [%s] for [%s] does not exist. Creating a new instance.',
+                certificate_type,
+                self.course.id
+            )
+            seat = Product(**fields)
+            seat.save()
+            self.seats[key] = seat
+            self.attribute_values[seat.id] = {}
+            self.stock_records[seat.id] = None
+
+        return seat
+
+    def _set_attribute_values(self, seat, requested_values):
+        values = self.attribute_values[seat.id]
+
+        # If a ProductAttribute is saved with a value of None or the empty string, the ProductAttribute is deleted.
+        # As a consequence, Seats derived from a migrated "audit" mode do not have a certificate_type attribute.
+        if 'certificate_type' not in requested_values and 'certificate_type' in values:
+            value_obj = values.pop('certificate_type')
+            seat.attr.certificate_type = ''
+            if value_obj.id:
+                self.values_to_update.pop(value_obj.id, None)
+                self.values_to_delete[value_obj.id] = value_obj
+            else:
+                self.values_to_create.remove(value_obj)
+
+        for code, value in requested_values.items():
+            value_obj = values.get(code)
+            if value_obj is None:
+                value_obj = ProductAttributeValue(product=seat, attribute=self.attributes[code])
+                value_obj.value = value
+                values[code] = value_obj
+                self.values_to_create.append(value_obj)
+            elif value_obj.value != value:
+                value_obj.value = value
+                if value_obj.id:
+                    self.values_to_update[value_obj.id] = value_obj
+
+        for code, value_obj in values.items():
+            setattr(seat.attr, code, value_obj.value)
+
+        snapshot = {code: value.value for code, value in values.items() if code in FLAT_ATTRIBUTE_CODES}
+        if snapshot != seat.attribute_snapshot:
+            seat.attribute_snapshot = snapshot
+            self.products_to_update[seat.id] = seat
+
+    def _set_stock_record(self, seat, price):
+        stock_record = self.stock_records[seat.id]
+        if stock_record is None:
+            stock_record = StockRecord(product=seat, partner=self.partner,
+                                       partner_sku=generate_sku(seat, self.partner))
+            self.stock_records[seat.id] = stock_record
+            self.stock_records_to_create.append(stock_record)
+
+        if stock_record.price_excl_tax != price or stock_record.price_currency != settings.OSCAR_DEFAULT_CURRENCY:
+            stock_record.price_excl_tax = price
+            stock_record.price_currency = settings.OSCAR_DEFAULT_CURRENCY
+            if stock_record.id:
+                self.stock_records_to_update[stock_record.id] = stock_record
+
+    def save(self):
+        """ Writes the collected rows, with a query per model and kind of write. """
+        bulk_update_with_history(Product, self.products_to_update.values(), [
+            'title', 'expires', 'is_discountable', 'course_id', 'parent_id', 'structure', 'attribute_snapshot'
+        ])
+        bulk_create_with_history(ProductAttributeValue, self.values_to_create, ('product_id', 'attribute_id'))
+        bulk_update_with_history(ProductAttributeValue, self.values_to_update.values(), [
+            'value_{}'.format(attribute.type) for attribute in self.attributes.values()
+        ])
+        if self.values_to_delete:
+            ProductAttributeValue.objects.filter(id__in=self.values_to_delete.keys()).delete()
+        bulk_create_with_history(StockRecord, self.stock_records_to_create, ('partner_id', 'partner_sku'))
+        bulk_update_with_history(StockRecord, self.stock_records_to_update.values(),
+                                 ['price_excl_tax', 'price_currency'])
+
+        # Bulk queries do not send the signals bumping the version stamps of the API resources.
+        if self.products_to_update or self.values_to_create or self.values_to_update:
+            bump_version_stamps(Product)
+        if self.stock_records_to_create or self.stock_records_to_update:
+            bump_version_stamps(StockRecord)
+
+
 class Course(models.Model):
     id = models.CharField(null=False, max_length=255, primary_key=True, verbose_name='ID')
     name = models.CharField(null=False, max_length=255)
@@ -36,6 +212,18 @@ class Course(models.Model):
     )
     history = HistoricalRecords()
     thumbnail_url = models.URLField(null=True, blank=True)
+    course_type = models.CharField(
+        max_length=32,
+        default='audit',
+        editable=False,
+        help_text=_('Denormalized type of the course, based on the types of its seats.')
+    )
+    seat_summary = JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text=_('Denormalized SKU, mode, price and expiration date of the seats of the course.')
+    )
 
     def __unicode__(self):
         return unicode(self.id)
@@ -87,15 +275,19 @@ class Course(models.Model):
     @property
     def type(self):
         """ Returns the type of the course (based on the available seat types). """
-        seat_types = [getattr(seat.attr, 'certificate_type', '').lower() for seat in self.seat_products]
-        if 'credit' in seat_types:
-            return 'credit'
-        elif 'professional' in seat_types or 'no-id-professional' in seat_types:
-            return 'professional'
-        elif 'verified' in seat_types:
-            return 'verified'
-        else:
-            return 'audit'
+        return self.course_type
+
+    def update_seat_summary(self):
+        """
+        Recomputes the course type and the seat summary from the seats of the course, and stores them
+        if they have changed.
+        """
+        course_type, seat_summary = summarize_seats((seat, vars(seat.flat_attr)) for seat in self.seat_products)
+        if course_type != self.course_type or seat_summary != self.seat_summary:
+            self.course_type = course_type
+            self.seat_summary = seat_summary
+            Course.objects.filter(id=self.id).update(course_type=course_type, seat_summary=seat_summary)
+            bump_version_stamps(Course)
 
     @property
     def parent_seat_product(self):
@@ -105,7 +297,11 @@ class Course(models.Model):
     @property
     def seat_products(self):
         """ Returns a queryset of course seat Products related to this course. """
-        return self.parent_seat_product.children.all().prefetch_related('stockrecords')
+        return Product.objects.filter(
+            parent__course=self,
+            parent__product_class__slug='seat',
+            parent__structure=Product.PARENT
+        ).prefetch_related('stockrecords')
 
     def get_course_seat_name(self, certificate_type, id_verification_required):
         """ Returns the name for a course seat. """
@@ -150,115 +346,102 @@ class Course(models.Model):
         Returns:
             Product:  The seat that has been created or updated.
         """
-        certificate_type = certificate_type.lower()
-        course_id = unicode(self.id)
+        return self.create_or_update_seats(
+            [{
+                'certificate_type': certificate_type,
+                'id_verification_required': id_verification_required,
+                'price': price,
+                'credit_provider': credit_provider,
+                'expires': expires,
+                'credit_hours': credit_hours,
+                'create_enrollment_code': create_enrollment_code,
+            }],
+            partner,
+            remove_stale_modes=remove_stale_modes
+        )[0]
 
-        if certificate_type == self.certificate_type_for_mode('audit'):
-            # Yields a match if attribute names do not include 'certificate_type'.
-            certificate_type_query = ~Q(attributes__name='certificate_type')
-        else:
-            # Yields a match if attribute with name 'certificate_type' matches provided value.
-            certificate_type_query = Q(
-                attributes__name='certificate_type',
-                attribute_values__value_text=certificate_type
-            )
+    def create_or_update_seats(self, seats, partner, remove_stale_modes=True):
+        """
+        Creates or updates several course seat products at once.
 
-        id_verification_required_query = Q(
-            attributes__name='id_verification_required',
-            attribute_values__value_boolean=id_verification_required
-        )
+        The existing seats, with their attribute values and stock records, are loaded with a single
+        prefetch and compared with the requested seats. Only the rows that differ are written: attribute
+        values and stock records are inserted in bulk, and existing rows are only updated if they changed.
 
-        if credit_provider is None:
-            # Yields a match if attribute names do not include 'credit_provider'.
-            credit_provider_query = ~Q(attributes__name='credit_provider')
-        else:
-            # Yields a match if attribute with name 'credit_provider' matches provided value.
-            credit_provider_query = Q(
-                attributes__name='credit_provider',
-                attribute_values__value_text=credit_provider
-            )
+        Arguments:
+            seats (list): Dicts holding the arguments of create_or_update_seat for each seat, i.e.
+                certificate_type, id_verification_required and price, and optionally credit_provider,
+                expires, credit_hours and create_enrollment_code.
+            partner(Partner): Site partner.
 
-        seats = self.seat_products.filter(certificate_type_query)
-        try:
-            seat = seats.filter(
-                id_verification_required_query
-            ).get(
-                credit_provider_query
-            )
+        Optional arguments:
+            remove_stale_modes(bool): Remove stale modes.
 
-            logger.info(
-                'Retrieved course seat child product with certificate type [%s] for [%s] from database.',
-                certificate_type,
-                course_id
-            )
-        except Product.DoesNotExist:
-            seat = Product()
-            logger.info(
-                'Course seat product with certificate type [%s] for [%s] does not exist. Instantiated a new instance.',
+        Returns:
+            list: The seats that have been created or updated, in the order of `seats`.
+        """
+        writer = _CourseSeatWriter(self, partner)
+        products = []
+        enrollment_code_seat = None
+        for data in seats:
+            certificate_type = data['certificate_type'].lower()
+            products.append(writer.create_or_update_seat(
                 certificate_type,
-                course_id
+                data['id_verification_required'],
+                data['price'],
+                credit_provider=data.get('credit_provider'),
+                expires=data.get('expires'),
+                credit_hours=data.get('credit_hours')
+            ))
+
+            if data.get('create_enrollment_code') and \
+                    certificate_type in ENROLLMENT_CODE_SEAT_TYPES and \
+                    waffle.switch_is_active(ENROLLMENT_CODE_SWITCH):
+                # The course has a single enrollment code, for the last seat requesting one.
+                enrollment_code_seat = (certificate_type, data['id_verification_required'], data['price'])
+        writer.save()
+
+        if enrollment_code_seat:
+            self._create_or_update_enrollment_code(
+                enrollment_code_seat[0], enrollment_code_seat[1], partner, enrollment_code_seat[2]
             )
 
-        seat.course = self
-        seat.structure = Product.CHILD
-        seat.parent = self.parent_seat_product
-        seat.is_discountable = True
-        seat.title = self.get_course_seat_name(certificate_type, id_verification_required)
-        seat.expires = expires
-
-        # If a ProductAttribute is saved with a value of None or the empty string, the ProductAttribute is deleted.
-        # As a consequence, Seats derived from a migrated "audit" mode do not have a certificate_type attribute.
-        seat.attr.certificate_type = certificate_type
-        seat.attr.course_key = course_id
-        seat.attr.id_verification_required = id_verification_required
-        if waffle.switch_is_active(ENROLLMENT_CODE_SWITCH) and \
-                certificate_type in ENROLLMENT_CODE_SEAT_TYPES and \
-                create_enrollment_code:
-            self._create_or_update_enrollment_code(certificate_type, id_verification_required, partner, price)
-
-        if credit_provider:
-            seat.attr.credit_provider = credit_provider
-
-        if credit_hours:
-            seat.attr.credit_hours = credit_hours
-
-        seat.save()
-
-        try:
-            stock_record = StockRecord.objects.get(product=seat, partner=partner)
-            logger.info(
-                'Retrieved course seat product stock record with certificate type [%s] for [%s] from database.',
-                certificate_type,
-                course_id
-            )
-        except StockRecord.DoesNotExist:
-            partner_sku = generate_sku(seat, partner)
-            stock_record = StockRecord(product=seat, partner=partner, partner_sku=partner_sku)
-            logger.info(
-                'Course seat product stock record with certificate type [%s] for [%s] does not exist. '
-                'Instantiated a new instance.',
-                certificate_type,
-                course_id
-            )
+        if remove_stale_modes:
+            self._remove_stale_seats(products, writer.attribute_values)
 
-        stock_record.price_excl_tax = price
-        stock_record.price_currency = settings.OSCAR_DEFAULT_CURRENCY
-        stock_record.save()
+        self._update_sibling_skus()
+        self.update_seat_summary()
 
-        if remove_stale_modes and self.certificate_type_for_mode(certificate_type) == 'professional':
-            id_verification_required_query = Q(
-                attributes__name='id_verification_required',
-                attribute_values__value_boolean=not id_verification_required
-            )
+        return products
 
-            # Delete seats with a different verification requirement, assuming the seats
-            # have not been purchased.
-            seats.annotate(orders=Count('line')).filter(
-                id_verification_required_query,
-                orders=0
-            ).delete()
+    def _remove_stale_seats(self, requested_seats, attribute_values):
+        """
+        Deletes professional seats whose verification requirement differs from the requested professional seats,
+        assuming the seats have not been purchased.
 
-        return seat
+        Arguments:
+            requested_seats (list): The seats that have been created or updated.
+            attribute_values (dict): Attribute values of all the seats of the course, keyed by seat ID and
+                attribute code.
+        """
+        requested_seat_ids = set(seat.id for seat in requested_seats)
+        stale_seat_ids = []
+        for requested_seat in requested_seats:
+            requested_values = attribute_values[requested_seat.id]
+            certificate_type = getattr(requested_values.get('certificate_type'), 'value', '')
+            if self.certificate_type_for_mode(certificate_type) != 'professional':
+                continue
+
+            id_verification_required = requested_values['id_verification_required'].value
+            for seat_id, values in attribute_values.items():
+                if seat_id not in requested_seat_ids and \
+                        getattr(values.get('certificate_type'), 'value', '') == certificate_type and \
+                        getattr(values.get('id_verification_required'), 'value', None) == \
+                        (not id_verification_required):
+                    stale_seat_ids.append(seat_id)
+
+        if stale_seat_ids:
+            Product.objects.filter(id__in=stale_seat_ids).annotate(orders=Count('line')).filter(orders=0).delete()
 
     @property
     def enrollment_code_product(self):
@@ -317,3 +500,122 @@ class Course(models.Model):
         stock_record.save()
 
         return enrollment_code
+
+    @staticmethod
+    def _sibling_skus_cache_key(course_id):
+        return hashlib.md5('course_sibling_skus_{}'.format(course_id).encode('utf-8')).hexdigest()
+
+    def _update_sibling_skus(self):
+        """
+        Computes and caches the partner SKUs that link this course's seats to its enrollment code.
+
+        The cached SKUs are discarded whenever the course's products, or their stock records or attribute values,
+        are saved or deleted one at a time. The products written in bulk by create_or_update_seats are followed
+        by a call to this method.
+
+        A seat and an enrollment code are siblings if the seat's certificate type matches the enrollment
+        code's seat type. The result is a dict with the enrollment code SKU (or None) and a mapping of
+        product IDs to the partner SKU of their sibling.
+
+        Returns:
+            dict
+        """
+        sibling_skus = {
+            'enrollment_code_sku': None,
+            'siblings': {},
+        }
+
+        enrollment_code = self.enrollment_code_product
+        if enrollment_code:
+            enrollment_code_stock_record = enrollment_code.stockrecords.first()
+            seat_type = getattr(enrollment_code.flat_attr, 'seat_type', None)
+
+            if enrollment_code_stock_record:
+                enrollment_code_sku = enrollment_code_stock_record.partner_sku
+                sibling_skus['enrollment_code_sku'] = enrollment_code_sku
+
+                for seat in self.seat_products:
+                    seat_stock_records = list(seat.stockrecords.all())
+                    if not (seat_type and seat_stock_records):
+                        continue
+
+                    if getattr(seat.flat_attr, 'certificate_type', None) == seat_type:
+                        sibling_skus['siblings'][seat.id] = enrollment_code_sku
+                        sibling_skus['siblings'].setdefault(enrollment_code.id, seat_stock_records[0].partner_sku)
+
+        cache.set(self._sibling_skus_cache_key(self.id), sibling_skus, settings.COURSE_SIBLING_SKUS_CACHE_TIMEOUT)
+        return sibling_skus
+
+    @classmethod
+    def invalidate_sibling_skus(cls, course_id):
+        """ Discards the cached sibling SKUs of the course, so that they are computed again when next read. """
+        cache.delete(cls._sibling_skus_cache_key(course_id))
+
+    @property
+    def sibling_skus(self):
+        """ Returns the cached seat/enrollment code sibling SKUs for this course, computing them if necessary. """
+        sibling_skus = cache.get(self._sibling_skus_cache_key(self.id))
+        if sibling_skus is None:
+            sibling_skus = self._update_sibling_skus()
+        return sibling_skus
+
+    @classmethod
+    def get_sibling_sku(cls, product):
+        """
+        Returns the partner SKU of the product to switch to from the given seat or enrollment code.
+
+        Seats are paired with the enrollment code of their course, and vice versa. The lookup is a
+        single cache read; the course is only loaded if the cached data is missing.
+
+        Arguments:
+            product (Product): Seat or enrollment code product.
+
+        Returns:
+            str: Partner SKU of the sibling product, or None if the product has no sibling.
+        """
+        if not product.course_id:
+            return None
+
+        sibling_skus = cache.get(cls._sibling_skus_cache_key(product.course_id))
+        if sibling_skus is None:
+            sibling_skus = product.course.sibling_skus
+        return sibling_skus['siblings'].get(product.id)
+
+
+class CatalogCourseRun(models.Model):
+    """
+    Local mirror of the course run metadata published by the Course Catalog service for a partner.
+
+    The mirror is populated by the sync_catalog_course_runs management command, and read before
+    falling back to the Course Catalog service so that request-time catalog calls are the exception.
+    A partner's mirror is only read while its last completed synchronization is recent enough.
+    """
+    partner = models.ForeignKey('partner.Partner', related_name='catalog_course_runs')
+    key = models.CharField(max_length=255, verbose_name='Course run key')
+    data = JSONField(help_text=_('Course run data, as returned by the Course Catalog service.'))
+    modified = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text=_('Date/time on which the course run was last modified in the Course Catalog service.')
+    )
+    synced = models.DateTimeField(auto_now=True)
+
+    class Meta(object):
+        unique_together = ('partner', 'key')
+
+    def __unicode__(self):
+        return unicode(self.key)
+
+
+class CatalogCourseRunSync(models.Model):
+    """ Checkpoint of the last completed synchronization of a partner's mirror of course runs. """
+    partner = models.OneToOneField('partner.Partner', related_name='catalog_course_run_sync')
+    started = models.DateTimeField(
+        help_text=_('Date/time on which the last completed synchronization started. Course runs modified in the '
+                    'Course Catalog service since then are pulled by the next synchronization.')
+    )
+    completed = models.DateTimeField(help_text=_('Date/time on which the last synchronization completed.'))
+
+    def __unicode__(self):
+        return unicode(self.partner)
@@ -1,15 +1,20 @@
 from __future__ import unicode_literals
+from multiprocessing.pool import ThreadPool
 import json
 import logging
+import threading
+import time
 
 from django.conf import settings
+from django.db.models import F
 from django.utils.translation import ugettext_lazy as _
 from edx_rest_api_client.client import EdxRestApiClient
 from edx_rest_api_client.exceptions import SlumberHttpBaseException
 from oscar.core.loading import get_model
-import requests
+from requests.exceptions import ConnectionError, Timeout
 
 from ecommerce.core.constants import ENROLLMENT_CODE_SEAT_TYPES
+from ecommerce.core.http_client import get_session
 from ecommerce.core.url_utils import get_lms_url, get_lms_commerce_api_url
 from ecommerce.courses.utils import mode_for_seat
 
@@ -17,12 +22,48 @@ logger = logging.getLogger(__name__)
 Product = get_model('catalogue', 'Product')
 StockRecord = get_model('partner', 'StockRecord')
 
+# Statuses of LMS responses indicating a transient failure, after which the request is retried.
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter(object):
+    """ Spaces out the calls to `wait` made by several threads, so that at most `rate` calls return per second. """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_call = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.time()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+
+        if delay > 0:
+            time.sleep(delay)
+
 
 class LMSPublisher(object):
     timeout = settings.COMMERCE_API_TIMEOUT
 
+    def __init__(self, session=None, rate_limiter=None, max_retries=0, retry_backoff=1):
+        """
+        Keyword Arguments:
+            session (requests.Session): Session used to send requests to the LMS. By default a session of the
+                shared HTTP client, which leaves retries to the publisher.
+            rate_limiter (RateLimiter): Limits the rate at which requests are sent to the LMS.
+            max_retries (int): Number of times requests failing with a transient error are retried.
+            retry_backoff (float): Number of seconds to wait before the first retry. The delay doubles with
+                each retry.
+        """
+        self.session = session or get_session(max_retries=0)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
     def get_seat_expiration(self, seat):
-        if not seat.expires or 'professional' in getattr(seat.attr, 'certificate_type', ''):
+        if not seat.expires or 'professional' in getattr(seat.flat_attr, 'certificate_type', ''):
             return None
 
         return seat.expires.isoformat()
@@ -31,14 +72,23 @@ class LMSPublisher(object):
         return course.verification_deadline.isoformat() if course.verification_deadline else None
 
     def serialize_seat_for_commerce_api(self, seat):
-        """ Serializes a course seat product to a dict that can be further serialized to JSON. """
-        stock_record = seat.stockrecords.first()
+        """
+        Serializes a course seat product to a dict that can be further serialized to JSON.
+
+        Returns None for seats without a stock record, which have no SKU or price to publish.
+        """
+        # The stock records are read with all() rather than first(), so that prefetched stock records are used.
+        stock_records = seat.stockrecords.all()
+        if not stock_records:
+            logger.warning(
+                'Seat [%d] of course [%s] has no stock record, and is not published.', seat.id, seat.course_id
+            )
+            return None
+        stock_record = min(stock_records, key=lambda stock_record: stock_record.id)
 
         bulk_sku = None
-        if getattr(seat.attr, 'certificate_type', '') in ENROLLMENT_CODE_SEAT_TYPES:
-            enrollment_code = seat.course.enrollment_code_product
-            if enrollment_code:
-                bulk_sku = enrollment_code.stockrecords.first().partner_sku
+        if getattr(seat.flat_attr, 'certificate_type', '') in ENROLLMENT_CODE_SEAT_TYPES:
+            bulk_sku = seat.course.sibling_skus['enrollment_code_sku']
 
         return {
             'name': mode_for_seat(seat),
@@ -49,13 +99,14 @@ class LMSPublisher(object):
             'expires': self.get_seat_expiration(seat),
         }
 
-    def _publish_creditcourse(self, course_id, access_token):
+    def _publish_creditcourse(self, course_id, access_token, credit_api_url=None):
         """Creates or updates a CreditCourse object on the LMS."""
 
         api = EdxRestApiClient(
-            get_lms_url('api/credit/v1/'),
+            credit_api_url or get_lms_url('api/credit/v1/'),
             oauth_access_token=access_token,
-            timeout=self.timeout
+            timeout=self.timeout,
+            session=self.session
         )
 
         data = {
@@ -63,9 +114,62 @@ class LMSPublisher(object):
             'enabled': True
         }
 
-        api.courses(course_id).put(data)
+        self._request(lambda: api.courses(course_id).put(data))
+
+    def _request(self, send):
+        """
+        Sends a request to the LMS, retrying transient failures up to `max_retries` times.
+
+        Arguments:
+            send (callable): Sends the request, and returns the response.
+
+        Returns:
+            The value returned by `send`.
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.wait()
 
-    def publish(self, course, access_token=None):
+            try:
+                response = send()
+            except (ConnectionError, Timeout):
+                if attempt >= self.max_retries:
+                    raise
+            except SlumberHttpBaseException as e:
+                if attempt >= self.max_retries or e.response.status_code not in RETRY_STATUS_CODES:
+                    raise
+            else:
+                if attempt >= self.max_retries or getattr(response, 'status_code', None) not in RETRY_STATUS_CODES:
+                    return response
+
+            time.sleep(self.retry_backoff * 2 ** attempt)
+            attempt += 1
+
+    def serialize_course(self, course, seats=None):
+        """
+        Serializes a course to a dict that can be further serialized to JSON, and sent to the Commerce API.
+
+        Arguments:
+            course (Course): Course to be serialized.
+
+        Keyword Arguments:
+            seats (iterable): Seats of the course, if they have already been loaded. Defaults to the
+                course's seat products.
+
+        Returns:
+            dict
+        """
+        seats = course.seat_products if seats is None else seats
+        modes = [self.serialize_seat_for_commerce_api(seat) for seat in seats]
+        return {
+            'id': course.id,
+            'name': course.name,
+            'verification_deadline': self.get_course_verification_deadline(course),
+            'modes': [mode for mode in modes if mode is not None],
+        }
+
+    def publish(self, course, access_token=None, seats=None):
         """ Publish course commerce data to LMS.
 
         Uses the Commerce API to publish course modes, prices, and SKUs to LMS. Uses
@@ -76,29 +180,39 @@ class LMSPublisher(object):
 
         Keyword Arguments:
             access_token (str): Access token used when publishing CreditCourse data to the LMS.
+            seats (iterable): Seats of the course, if they have already been loaded.
 
         Returns:
             None, if publish operation succeeded; otherwise, error message.
         """
-
-        course_id = course.id
-        error_message = _(u'Failed to publish commerce data for {course_id} to LMS.').format(
-            course_id=course_id
-        )
-
         commerce_api_url = get_lms_commerce_api_url()
         if not commerce_api_url:
             logger.error('Commerce API URL is not set. Commerce data will not be published!')
-            return error_message
+            return self._get_error_message(course.id)
+
+        return self.send(self.serialize_course(course, seats=seats), commerce_api_url, access_token=access_token)
 
-        name = course.name
-        verification_deadline = self.get_course_verification_deadline(course)
-        modes = [self.serialize_seat_for_commerce_api(seat) for seat in course.seat_products]
+    def send(self, data, commerce_api_url, access_token=None, credit_api_url=None):
+        """ Send serialized course commerce data to LMS.
 
-        has_credit = 'credit' in [mode['name'] for mode in modes]
+        Arguments:
+            data (dict): Course serialized by `serialize_course`.
+            commerce_api_url (str): Root URL of the Commerce API.
+
+        Keyword Arguments:
+            access_token (str): Access token used when publishing CreditCourse data to the LMS.
+            credit_api_url (str): Root URL of the Credit API. Defaults to the URL of the current site's LMS.
+
+        Returns:
+            None, if publish operation succeeded; otherwise, error message.
+        """
+        course_id = data['id']
+        error_message = self._get_error_message(course_id)
+
+        has_credit = 'credit' in [mode['name'] for mode in data['modes']]
         if has_credit:
             try:
-                self._publish_creditcourse(course_id, access_token)
+                self._publish_creditcourse(course_id, access_token, credit_api_url=credit_api_url)
                 logger.info(u'Successfully published CreditCourse for [%s] to LMS.', course_id)
             except SlumberHttpBaseException as e:
                 # Note that %r is used to log the repr() of the response content, which may sometimes
@@ -115,13 +229,6 @@ class LMSPublisher(object):
                 logger.exception(u'Failed to publish CreditCourse for [%s] to LMS.', course_id)
                 return error_message
 
-        data = {
-            'id': course_id,
-            'name': name,
-            'verification_deadline': verification_deadline,
-            'modes': modes,
-        }
-
         url = '{}/courses/{}/'.format(commerce_api_url.rstrip('/'), course_id)
 
         headers = {
@@ -130,7 +237,9 @@ class LMSPublisher(object):
         }
 
         try:
-            response = requests.put(url, data=json.dumps(data), headers=headers, timeout=self.timeout)
+            response = self._request(
+                lambda: self.session.put(url, data=json.dumps(data), headers=headers, timeout=self.timeout)
+            )
             status_code = response.status_code
             if status_code in (200, 201):
                 logger.info(u'Successfully published commerce data for [%s].', course_id)
@@ -146,6 +255,9 @@ class LMSPublisher(object):
 
         return error_message
 
+    def _get_error_message(self, course_id):
+        return _(u'Failed to publish commerce data for {course_id} to LMS.').format(course_id=course_id)
+
     def _parse_error(self, response, default_error_message):
         """When validation errors occur during publication, the LMS is expected
          to return an error message.
@@ -176,3 +288,92 @@ class LMSPublisher(object):
             return ' '.join([default_error_message, message])
         else:
             return default_error_message
+
+
+class BulkLMSPublisher(object):
+    """
+    Publishes the commerce data of many courses to the LMS.
+
+    The seats of a batch of courses are loaded with a few queries, and the courses are then sent
+    concurrently by a bounded pool of workers sharing the pooled HTTP client. Database access
+    is confined to the calling thread.
+    """
+
+    def __init__(self, site_configuration, workers=8, rate_limit=None, max_retries=3, batch_size=100):
+        """
+        Arguments:
+            site_configuration (SiteConfiguration): Configuration of the site whose LMS is published to.
+
+        Keyword Arguments:
+            workers (int): Number of courses sent concurrently.
+            rate_limit (float): Maximum number of requests sent per second.
+            max_retries (int): Number of times requests failing with a transient error are retried.
+            batch_size (int): Number of courses whose seats are loaded at a time.
+        """
+        self.site_configuration = site_configuration
+        self.workers = workers
+        self.batch_size = batch_size
+
+        self.publisher = LMSPublisher(
+            rate_limiter=RateLimiter(rate_limit) if rate_limit else None,
+            max_retries=max_retries
+        )
+
+    def get_seats(self, courses):
+        """
+        Returns the seats of the given courses, with their stock records.
+
+        Returns:
+            dict: Lists of seats keyed by course ID.
+        """
+        courses = {course.id: course for course in courses}
+        seats = {course_id: [] for course_id in courses}
+        queryset = Product.objects.filter(
+            parent__course_id__in=courses.keys(),
+            parent__product_class__slug='seat',
+            parent__structure=Product.PARENT
+        ).annotate(
+            parent_course_id=F('parent__course_id')
+        ).prefetch_related('stockrecords')
+
+        for seat in queryset:
+            # Avoid a query when the seat's course is used to look up the enrollment code SKU.
+            seat.course = courses[seat.parent_course_id]
+            seats[seat.parent_course_id].append(seat)
+
+        return seats
+
+    def publish(self, courses, access_token=None):
+        """
+        Publishes the courses to LMS.
+
+        Arguments:
+            courses (list): Courses to be published.
+
+        Keyword Arguments:
+            access_token (str): Access token used when publishing CreditCourse data to the LMS.
+
+        Yields:
+            tuple: The ID of each course, in the order of `courses`, and None if the course was published;
+                otherwise, the error message.
+        """
+        commerce_api_url = self.site_configuration.commerce_api_url
+        credit_api_url = self.site_configuration.build_lms_url('api/credit/v1/')
+
+        def _send(data):
+            return data['id'], self.publisher.send(
+                data, commerce_api_url, access_token=access_token, credit_api_url=credit_api_url
+            )
+
+        pool = ThreadPool(self.workers)
+        try:
+            for start in range(0, len(courses), self.batch_size):
+                batch = courses[start:start + self.batch_size]
+                seats = self.get_seats(batch)
+                serialized = [self.publisher.serialize_course(course, seats=seats[course.id]) for course in batch]
+
+                for result in pool.imap(_send, serialized):
+                    yield result
+        finally:
+            pool.close()
+            pool.join()
@@ -1,9 +1,10 @@
 from __future__ import unicode_literals
 
+from django.utils import timezone
 import factory
 from factory.fuzzy import FuzzyText
 
-from ecommerce.courses.models import Course
+from ecommerce.courses.models import CatalogCourseRunSync, Course
 
 
 class CourseFactory(factory.DjangoModelFactory):
@@ -12,3 +13,11 @@ class CourseFactory(factory.DjangoModelFactory):
 
     id = FuzzyText(prefix='course-v1:test-org+course+')
     name = FuzzyText(prefix='course-name-')
+
+
+class CatalogCourseRunSyncFactory(factory.DjangoModelFactory):
+    class Meta(object):
+        model = CatalogCourseRunSync
+
+    started = factory.LazyAttribute(lambda sync: timezone.now())
+    completed = factory.LazyAttribute(lambda sync: timezone.now())
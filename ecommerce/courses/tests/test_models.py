@@ -1,9 +1,13 @@
+import datetime
+
 import ddt
 from django.conf import settings
+from django.core.cache import cache
 import mock
 from oscar.core.loading import get_model
-from oscar.test.factories import create_order
+from oscar.test.factories import create_order, create_product, create_stockrecord
 from oscar.test.newfactories import BasketFactory
+import pytz
 
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME, ENROLLMENT_CODE_SWITCH
 from ecommerce.core.tests import toggle_switch
@@ -14,6 +18,7 @@ from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.tests.testcases import TestCase
 
 Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
 ProductClass = get_model('catalogue', 'ProductClass')
 StockRecord = get_model('partner', 'StockRecord')
 
@@ -134,6 +139,114 @@ class CourseTests(CourseCatalogTestMixin, TestCase):
         seat = course.seat_products[0]
         self.assert_course_seat_valid(seat, course, certificate_type, id_verification_required, price)
 
+    def test_create_or_update_seats(self):
+        """ Verify the method creates or updates several seats at once. """
+        course = CourseFactory()
+        seats = [
+            {'certificate_type': 'audit', 'id_verification_required': False, 'price': 0},
+            {'certificate_type': 'verified', 'id_verification_required': True, 'price': 10},
+            {'certificate_type': 'credit', 'id_verification_required': True, 'price': 100, 'credit_provider': 'MIT',
+             'credit_hours': 2},
+        ]
+
+        products = course.create_or_update_seats(seats, self.partner)
+        self.assertEqual(course.products.count(), 4)
+        self.assertEqual(len(products), 3)
+        self.assert_course_seat_valid(products[0], course, 'audit', False, 0)
+        self.assert_course_seat_valid(products[1], course, 'verified', True, 10)
+        self.assert_course_seat_valid(products[2], course, 'credit', True, 100, credit_provider='MIT',
+                                      credit_hours=2)
+        self.assertEqual(Product.objects.get(id=products[2].id).attribute_snapshot['credit_hours'], 2)
+
+        date_updated = StockRecord.objects.get(product=products[1]).date_updated
+        seats[1]['price'] = 20
+        seats[2]['credit_hours'] = 3
+        updated = course.create_or_update_seats(seats, self.partner)
+        self.assertEqual(course.products.count(), 4)
+        self.assertEqual([product.id for product in updated], [product.id for product in products])
+        self.assert_course_seat_valid(updated[1], course, 'verified', True, 20)
+        self.assert_course_seat_valid(updated[2], course, 'credit', True, 100, credit_provider='MIT',
+                                      credit_hours=3)
+        self.assertEqual(Product.objects.get(id=products[2].id).attribute_snapshot['credit_hours'], 3)
+
+        # History is recorded, and the modification date set, for the rows written in bulk.
+        stock_record = StockRecord.objects.get(product=products[1])
+        self.assertEqual(
+            [record.price_excl_tax for record in stock_record.history.order_by('history_id')], [10, 20]
+        )
+        self.assertGreater(stock_record.date_updated, date_updated)
+
+    def test_create_or_update_seats_single_update(self):
+        """ Verify the changed rows of each model are updated with a single query. """
+        course = CourseFactory()
+        seats = [
+            {'certificate_type': 'honor', 'id_verification_required': False, 'price': 0},
+            {'certificate_type': 'verified', 'id_verification_required': True, 'price': 10},
+        ]
+        products = course.create_or_update_seats(seats, self.partner)
+        for index, seat in enumerate(seats):
+            seat['price'] += 5
+            seat['expires'] = datetime.datetime(2017, 1, index + 1, tzinfo=pytz.UTC)
+
+        with mock.patch.object(Product.objects, 'filter', wraps=Product.objects.filter) as mock_product_filter, \
+                mock.patch.object(StockRecord.objects, 'filter', wraps=StockRecord.objects.filter) as mock_filter:
+            course.create_or_update_seats(seats, self.partner)
+        self.assertEqual(
+            len([call for call in mock_product_filter.call_args_list if 'pk__in' in call[1]]), 1
+        )
+        self.assertEqual(len([call for call in mock_filter.call_args_list if 'pk__in' in call[1]]), 1)
+
+        self.assertEqual([StockRecord.objects.get(product=product).price_excl_tax for product in products], [5, 15])
+        self.assertEqual([Product.objects.get(id=product.id).expires.day for product in products], [1, 2])
+
+    def test_create_or_update_seat_empty_certificate_type(self):
+        """ Verify an empty certificate type attribute is deleted, as saving it empty through Oscar does. """
+        course = CourseFactory()
+        seat = course.create_or_update_seat('', False, 0, self.partner)
+        ProductAttributeValue.objects.create(
+            product=seat, attribute=self.seat_product_class.attributes.get(code='certificate_type'), value_text=''
+        )
+
+        seat = course.create_or_update_seat('', False, 0, self.partner)
+        self.assertFalse(seat.attribute_values.filter(attribute__code='certificate_type').exists())
+        self.assertNotIn('certificate_type', Product.objects.get(id=seat.id).attribute_snapshot)
+        self.assert_course_seat_valid(seat, course, '', False, 0)
+
+    def test_create_or_update_seats_enrollment_code(self):
+        """ Verify a single enrollment code is created, for the last seat requesting one, and paired with it. """
+        course = CourseFactory()
+        toggle_switch(ENROLLMENT_CODE_SWITCH, True)
+        __, professional_seat = course.create_or_update_seats([
+            {'certificate_type': 'verified', 'id_verification_required': True, 'price': 10,
+             'create_enrollment_code': True},
+            {'certificate_type': 'professional', 'id_verification_required': True, 'price': 100,
+             'create_enrollment_code': True},
+        ], self.partner)
+
+        enrollment_code = Product.objects.get(product_class__name=ENROLLMENT_CODE_PRODUCT_CLASS_NAME)
+        self.assertEqual(enrollment_code, course.enrollment_code_product)
+        self.assertEqual(enrollment_code.attr.seat_type, 'professional')
+        stock_record = StockRecord.objects.get(product=enrollment_code)
+        self.assertEqual(stock_record.price_excl_tax, 100)
+        self.assertEqual(Course.get_sibling_sku(professional_seat), stock_record.partner_sku)
+        self.assertEqual(Course.get_sibling_sku(enrollment_code), professional_seat.stockrecords.first().partner_sku)
+
+    def test_create_or_update_seats_unchanged(self):
+        """ Verify seats which have not changed are not written to the database. """
+        course = CourseFactory()
+        seats = [
+            {'certificate_type': 'honor', 'id_verification_required': False, 'price': 0},
+            {'certificate_type': 'verified', 'id_verification_required': True, 'price': 10},
+        ]
+        course.create_or_update_seats(seats, self.partner)
+        history_count = Product.history.count()
+
+        # Load the parent seat, its attributes, the seats with their attribute values and stock records,
+        # re-compute the sibling SKUs, and re-compute the seat summary.
+        with self.assertNumQueries(9):
+            course.create_or_update_seats(seats, self.partner)
+        self.assertEqual(Product.history.count(), history_count)
+
     def test_create_seat_with_enrollment_code(self):
         """Verify an enrollment code product is created."""
         course = CourseFactory()
@@ -157,6 +270,41 @@ class CourseTests(CourseCatalogTestMixin, TestCase):
         self.assertEqual(stock_record.price_currency, settings.OSCAR_DEFAULT_CURRENCY)
         self.assertEqual(stock_record.partner, self.partner)
 
+    def test_sibling_skus(self):
+        """ Verify the seat and enrollment code SKUs are paired when the seat is created. """
+        course = CourseFactory()
+        toggle_switch(ENROLLMENT_CODE_SWITCH, True)
+        audit_seat = course.create_or_update_seat('audit', False, 0, self.partner)
+        seat = course.create_or_update_seat('verified', False, 10, self.partner, create_enrollment_code=True)
+        enrollment_code = course.enrollment_code_product
+        seat_sku = StockRecord.objects.get(product=seat).partner_sku
+        enrollment_code_sku = StockRecord.objects.get(product=enrollment_code).partner_sku
+
+        with self.assertNumQueries(0):
+            self.assertEqual(Course.get_sibling_sku(seat), enrollment_code_sku)
+            self.assertEqual(Course.get_sibling_sku(enrollment_code), seat_sku)
+            self.assertIsNone(Course.get_sibling_sku(audit_seat))
+
+        # The pairing should be recomputed if it is missing from the cache.
+        cache.clear()
+        self.assertEqual(course.sibling_skus['enrollment_code_sku'], enrollment_code_sku)
+        self.assertEqual(Course.get_sibling_sku(seat), enrollment_code_sku)
+
+        # The pairing should be recomputed once the products or their stock records change.
+        stock_record = StockRecord.objects.get(product=enrollment_code)
+        stock_record.partner_sku = 'NEW-SKU'
+        stock_record.save()
+        self.assertEqual(Course.get_sibling_sku(seat), 'NEW-SKU')
+
+        value = seat.attribute_values.get(attribute__code='certificate_type')
+        value.value = 'honor'
+        value.save()
+        self.assertIsNone(Course.get_sibling_sku(Product.objects.get(id=seat.id)))
+
+        enrollment_code.delete()
+        self.assertIsNone(Course.get_sibling_sku(audit_seat))
+        self.assertIsNone(course.sibling_skus['enrollment_code_sku'])
+
     def test_create_credit_seats(self):
         """Verify that the model's seat creation method allows the creation of multiple credit seats."""
         course = Course.objects.create(id='a/b/c', name='Test Course')
@@ -277,7 +425,9 @@ class CourseTests(CourseCatalogTestMixin, TestCase):
         seat = course.create_or_update_seat('professional', True, 100, self.partner)
         self.assertEqual(course.type, 'professional')
 
+        # The type is stored on the course when the seat is deleted.
         seat.delete()
+        course = Course.objects.get(id=course.id)
         self.assertEqual(course.type, 'verified')
         course.create_or_update_seat('no-id-professional', False, 100, self.partner)
         self.assertEqual(course.type, 'professional')
@@ -285,6 +435,97 @@ class CourseTests(CourseCatalogTestMixin, TestCase):
         course.create_or_update_seat('credit', True, 1000, self.partner, credit_provider='SMU')
         self.assertEqual(course.type, 'credit')
 
+    def test_seat_summary(self):
+        """ Verify the seat summary is kept in sync with the seats of the course. """
+        course = CourseFactory()
+        self.assertEqual(course.seat_summary, [])
+
+        seat = course.create_or_update_seat('verified', True, 10, self.partner)
+        stock_record = seat.stockrecords.first()
+        expected = [{
+            'id': seat.id,
+            'sku': stock_record.partner_sku,
+            'mode': 'verified',
+            'price': '10.00',
+            'currency': stock_record.price_currency,
+            'expires': None,
+        }]
+        self.assertEqual(course.seat_summary, expected)
+        self.assertEqual(Course.objects.get(id=course.id).seat_summary, expected)
+
+        stock_record.price_excl_tax = 20
+        stock_record.save()
+        expected[0]['price'] = '20.00'
+        self.assertEqual(Course.objects.get(id=course.id).seat_summary, expected)
+
+        seat.delete()
+        course = Course.objects.get(id=course.id)
+        self.assertEqual(course.seat_summary, [])
+        self.assertEqual(course.type, 'audit')
+
+    def test_seat_summary_attributes(self):
+        """ Verify the seat summary is updated once the attribute values of seats are saved. """
+        course = CourseFactory()
+        seat = course.create_or_update_seat('verified', True, 10, self.partner)
+
+        # Oscar saves the attribute values after the product.
+        seat = Product.objects.get(id=seat.id)
+        seat.attr.certificate_type = 'professional'
+        seat.save()
+        course = Course.objects.get(id=course.id)
+        self.assertEqual(course.seat_summary[0]['mode'], 'professional')
+        self.assertEqual(course.type, 'professional')
+
+        value = seat.attribute_values.get(attribute__code='certificate_type')
+        value.value = 'credit'
+        value.save()
+        course = Course.objects.get(id=course.id)
+        self.assertEqual(course.seat_summary[0]['mode'], 'credit')
+        self.assertEqual(course.type, 'credit')
+
+    def test_seat_summary_unchanged_seat(self):
+        """ Verify the seat summary is only recomputed when a saved seat changes fields which it summarizes. """
+        course = CourseFactory()
+        seat = Product.objects.get(id=course.create_or_update_seat('verified', True, 10, self.partner).id)
+
+        with mock.patch.object(Course, 'update_seat_summary') as mock_update_seat_summary:
+            seat.title = 'New title'
+            seat.save()
+            self.assertFalse(mock_update_seat_summary.called)
+
+            seat.expires = datetime.datetime(2017, 1, 1, tzinfo=pytz.UTC)
+            seat.save()
+            self.assertEqual(mock_update_seat_summary.call_count, 1)
+
+            seat.save()
+            self.assertEqual(mock_update_seat_summary.call_count, 1)
+
+    def test_seat_summary_unchanged_stock_record(self):
+        """ Verify the seat summary is only recomputed when a saved stock record changes its SKU or price. """
+        course = CourseFactory()
+        seat = course.create_or_update_seat('verified', True, 10, self.partner)
+        stock_record = StockRecord.objects.get(product=seat)
+
+        with mock.patch.object(Course, 'update_seat_summary') as mock_update_seat_summary:
+            stock_record.num_in_stock = 10
+            stock_record.save()
+            self.assertFalse(mock_update_seat_summary.called)
+
+            stock_record.price_excl_tax = 20
+            stock_record.save()
+            self.assertEqual(mock_update_seat_summary.call_count, 1)
+
+    def test_seat_summary_other_stock_records(self):
+        """ Verify saving the stock records of products which are not seats does not query courses. """
+        stock_record = create_stockrecord(create_product())
+        stock_record.price_excl_tax = 20
+
+        # The product is cached, so the only queries are the update, its history and Oscar's stock alert check.
+        with mock.patch.object(Course, 'update_seat_summary') as mock_update_seat_summary:
+            with self.assertNumQueries(3):
+                stock_record.save()
+        self.assertFalse(mock_update_seat_summary.called)
+
     def test_enrollment_code_seat_type_filter(self):
         """ Verify that the ENROLLMENT_CODE_SEAT_TYPES constant is properly applied during seat creation """
         toggle_switch(ENROLLMENT_CODE_SWITCH, True)
@@ -8,6 +8,7 @@ import tempfile
 
 import ddt
 from django.core.management import call_command, CommandError
+import httpretty
 import mock
 from mock import call
 from testfixtures import LogCapture
@@ -168,3 +169,71 @@ class PublishCoursesToLMSTests(CourseCatalogTestMixin, TransactionTestCase):
 
         mock_publish.assert_called_once_with()
         os.remove(unicode_file)
+
+    def test_course_selection(self):
+        """ Verify courses can be selected by partner and modification date, without a course IDs file. """
+        self.course.create_or_update_seat('verified', True, 50, self.partner)
+        CourseFactory()
+
+        with mock.patch.object(Course, 'publish_to_lms', autospec=True) as mock_publish:
+            mock_publish.return_value = None
+            call_command('publish_to_lms', partner=self.partner.short_code)
+            self.assertListEqual(mock_publish.call_args_list, [call(self.course)])
+
+            mock_publish.reset_mock()
+            call_command('publish_to_lms', modified_since='2100-01-01')
+            self.assertFalse(mock_publish.called)
+
+    @ddt.data(None, 'fake')
+    def test_bulk_publish_without_site(self, partner):
+        """ Verify bulk publication requires the partner of a site. """
+        with self.assertRaises(CommandError):
+            call_command('publish_to_lms', course_ids_file=self.tmp_file_path, bulk=True, partner=partner)
+
+    @httpretty.activate
+    def test_bulk_publish(self):
+        """ Verify courses are published concurrently, and failures are reported. """
+        self.course.create_or_update_seat('verified', True, 50, self.partner)
+        second_course = CourseFactory()
+        second_course.create_or_update_seat('verified', True, 50, self.partner)
+        self.create_course_ids_file(self.tmp_file_path, [self.course.id, second_course.id])
+
+        commerce_api_url = self.site.siteconfiguration.commerce_api_url.rstrip('/')
+        httpretty.register_uri(httpretty.PUT, '{}/courses/{}/'.format(commerce_api_url, self.course.id), status=200)
+        httpretty.register_uri(httpretty.PUT, '{}/courses/{}/'.format(commerce_api_url, second_course.id), status=400)
+
+        expected = (
+            (
+                LOGGER_NAME,
+                "INFO",
+                "Publishing 2 courses."
+            ),
+            (
+                LOGGER_NAME,
+                "INFO",
+                u"(1/2) Successfully published {}.".format(self.course.id)
+            ),
+            (
+                LOGGER_NAME,
+                "ERROR",
+                u"(2/2) Failed to publish {0}: Failed to publish commerce data for {0} to LMS.".format(
+                    second_course.id
+                )
+            ),
+            (
+                LOGGER_NAME,
+                "ERROR",
+                "Completed publishing courses. 1 of 2 failed."
+            ),
+            (
+                LOGGER_NAME,
+                "ERROR",
+                u"Failed to publish the following courses: {}".format(second_course.id)
+            )
+        )
+        with LogCapture(LOGGER_NAME) as lc:
+            call_command(
+                'publish_to_lms', course_ids_file=self.tmp_file_path, bulk=True, partner=self.partner.short_code,
+                max_retries=0
+            )
+            lc.check(*expected)
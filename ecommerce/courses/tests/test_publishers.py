@@ -12,7 +12,7 @@ from testfixtures import LogCapture
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME, ENROLLMENT_CODE_SWITCH
 from ecommerce.core.url_utils import get_lms_url, get_lms_commerce_api_url
 from ecommerce.core.tests import toggle_switch
-from ecommerce.courses.publishers import LMSPublisher
+from ecommerce.courses.publishers import BulkLMSPublisher, LMSPublisher, RateLimiter
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.tests.testcases import TestCase
@@ -71,7 +71,7 @@ class LMSPublisherTests(CourseCatalogTestMixin, TestCase):
     def test_api_exception(self):
         """ If an exception is raised when communicating with the Commerce API, an ERROR message should be logged. """
         error = 'time out error'
-        with mock.patch('requests.put', side_effect=Timeout(error)):
+        with mock.patch('requests.Session.request', side_effect=Timeout(error)):
             with LogCapture(LOGGER_NAME) as l:
                 response = self.publisher.publish(self.course)
                 l.check(
@@ -139,6 +139,28 @@ class LMSPublisherTests(CourseCatalogTestMixin, TestCase):
         }
         self.assertDictEqual(actual, expected)
 
+    @httpretty.activate
+    def test_api_retry(self):
+        """ Verify requests failing with a transient error are retried. """
+        url = '{}/courses/{}/'.format(get_lms_commerce_api_url().rstrip('/'), self.course.id)
+        httpretty.register_uri(httpretty.PUT, url, responses=[
+            httpretty.Response(body='{}', status=503, content_type=JSON),
+            httpretty.Response(body='{}', status=200, content_type=JSON),
+        ])
+
+        publisher = LMSPublisher(max_retries=1, retry_backoff=0)
+        self.assertIsNone(publisher.publish(self.course))
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
+    @httpretty.activate
+    def test_api_retries_exhausted(self):
+        """ Verify the publication fails once the retries are exhausted. """
+        self._mock_commerce_api(503)
+
+        publisher = LMSPublisher(max_retries=2, retry_backoff=0)
+        self.assertEqual(publisher.publish(self.course), self.error_message)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 3)
+
     def test_serialize_seat_for_commerce_api(self):
         """ The method should convert a seat to a JSON-serializable dict consumable by the Commerce API. """
         # Grab the verified seat
@@ -205,6 +227,16 @@ class LMSPublisherTests(CourseCatalogTestMixin, TestCase):
         }
         self.assertDictEqual(actual, expected)
 
+    def test_serialize_seat_without_stock_record(self):
+        """ Verify seats without a stock record are not serialized, nor published with their course. """
+        seat = self.course.create_or_update_seat('honor', False, 0, self.partner)
+        seat.stockrecords.all().delete()
+
+        self.assertIsNone(self.publisher.serialize_seat_for_commerce_api(seat))
+        modes = [mode['name'] for mode in self.publisher.serialize_course(self.course)['modes']]
+        self.assertNotIn('honor', modes)
+        self.assertEqual(len(modes), len(self.course.seat_products) - 1)
+
     def attempt_credit_publication(self, api_status):
         """
         Sets up a credit seat and attempts to publish it to LMS.
@@ -263,3 +295,56 @@ class LMSPublisherTests(CourseCatalogTestMixin, TestCase):
             self.assertEqual(api_response, " ".join([self.error_message, expected_error_msg]))
         else:
             self.assertEqual(api_response, self.error_message, expected_error_msg)
+
+
+@override_settings(EDX_API_KEY=EDX_API_KEY)
+class BulkLMSPublisherTests(CourseCatalogTestMixin, TestCase):
+    def setUp(self):
+        super(BulkLMSPublisherTests, self).setUp()
+        self.courses = [CourseFactory(), CourseFactory()]
+        for course in self.courses:
+            course.create_or_update_seat('verified', True, 50, self.partner)
+        self.publisher = BulkLMSPublisher(self.site.siteconfiguration, workers=2, max_retries=0, batch_size=1)
+
+    def mock_commerce_api(self, course, status):
+        url = '{}/courses/{}/'.format(self.site.siteconfiguration.commerce_api_url.rstrip('/'), course.id)
+        httpretty.register_uri(httpretty.PUT, url, status=status, body='{}', content_type=JSON)
+
+    @httpretty.activate
+    def test_publish(self):
+        """ Verify the courses are published, and the result of each publication is returned in order. """
+        self.mock_commerce_api(self.courses[0], 200)
+        self.mock_commerce_api(self.courses[1], 400)
+
+        results = list(self.publisher.publish(self.courses))
+        self.assertEqual([course_id for course_id, __ in results], [course.id for course in self.courses])
+        self.assertIsNone(results[0][1])
+        self.assertEqual(results[1][1], u'Failed to publish commerce data for {} to LMS.'.format(self.courses[1].id))
+
+        bodies = {json.loads(request.body)['id']: json.loads(request.body)
+                  for request in httpretty.httpretty.latest_requests}
+        expected = LMSPublisher().serialize_course(self.courses[0])
+        self.assertDictEqual(bodies[self.courses[0].id], json.loads(json.dumps(expected)))
+
+    def test_get_seats(self):
+        """ Verify the seats of a batch of courses are loaded, with their stock records, in two queries. """
+        with self.assertNumQueries(2):
+            seats = self.publisher.get_seats(self.courses)
+            for course in self.courses:
+                self.assertEqual(len(seats[course.id]), 1)
+                seat = seats[course.id][0]
+                self.assertEqual(seat.course, course)
+                self.assertEqual(seat.stockrecords.all()[0].price_excl_tax, 50)
+
+
+class RateLimiterTests(TestCase):
+    def test_wait(self):
+        """ Verify calls are spaced out by the interval corresponding to the rate. """
+        rate_limiter = RateLimiter(2)
+        with mock.patch('time.time', return_value=100):
+            with mock.patch('time.sleep') as mock_sleep:
+                rate_limiter.wait()
+                self.assertFalse(mock_sleep.called)
+
+                rate_limiter.wait()
+                mock_sleep.assert_called_once_with(0.5)
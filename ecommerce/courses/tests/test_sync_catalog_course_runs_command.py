@@ -0,0 +1,125 @@
+from __future__ import unicode_literals
+import datetime
+import json
+
+from django.conf import settings
+from django.core.management import call_command, CommandError
+import httpretty
+import pytz
+
+from ecommerce.core.tests.decorators import mock_course_catalog_api_client
+from ecommerce.courses.models import CatalogCourseRun, CatalogCourseRunSync
+from ecommerce.courses.tests.factories import CatalogCourseRunSyncFactory
+from ecommerce.tests.testcases import TestCase
+
+
+@httpretty.activate
+@mock_course_catalog_api_client
+class SyncCatalogCourseRunsCommandTests(TestCase):
+    """ Tests for the sync_catalog_course_runs management command. """
+    command = 'sync_catalog_course_runs'
+
+    def mock_course_runs_api(self, pages):
+        """ Register the course runs endpoint, returning the given pages of results in order. """
+        responses = [
+            httpretty.Response(body=json.dumps({
+                'count': sum(len(page) for page in pages),
+                'next': 'path/to/next/page' if index < len(pages) - 1 else None,
+                'results': page,
+            }), content_type='application/json')
+            for index, page in enumerate(pages)
+        ]
+        httpretty.register_uri(
+            httpretty.GET, '{}course_runs/'.format(settings.COURSE_CATALOG_API_URL), responses=responses
+        )
+
+    def get_course_run(self, key, title, modified):
+        return {'key': key, 'title': title, 'modified': modified}
+
+    def test_full_sync(self):
+        """ Verify all pages of course runs are mirrored. """
+        course_runs = [
+            self.get_course_run('course-v1:a+b+c', 'First', '2016-10-01T00:00:00Z'),
+            self.get_course_run('course-v1:d+e+f', 'Second', '2016-10-02T00:00:00Z'),
+        ]
+        self.mock_course_runs_api([course_runs[:1], course_runs[1:]])
+
+        call_command(self.command, page_size=1)
+
+        mirrored = CatalogCourseRun.objects.filter(partner=self.partner).order_by('key')
+        self.assertEqual([course_run.data for course_run in mirrored], course_runs)
+        self.assertEqual(mirrored[1].modified, datetime.datetime(2016, 10, 2, tzinfo=pytz.UTC))
+
+        querystring = httpretty.last_request().querystring
+        self.assertEqual(querystring['partner'], [self.partner.short_code])
+        self.assertEqual(querystring['offset'], ['1'])
+        self.assertNotIn('q', querystring)
+        self.assertTrue(CatalogCourseRunSync.objects.filter(partner=self.partner).exists())
+
+    def test_full_sync_deletes_missing(self):
+        """ Verify a full synchronization deletes the mirrored course runs no longer returned. """
+        for key in ('course-v1:a+b+c', 'course-v1:d+e+f'):
+            CatalogCourseRun.objects.create(partner=self.partner, key=key, data={'key': key})
+        CatalogCourseRunSyncFactory(partner=self.partner)
+        self.mock_course_runs_api([[self.get_course_run('course-v1:a+b+c', 'First', '2016-10-01T00:00:00Z')]])
+
+        call_command(self.command)
+        self.assertEqual(CatalogCourseRun.objects.filter(partner=self.partner).count(), 2)
+
+        call_command(self.command, full=True)
+        self.assertEqual(list(CatalogCourseRun.objects.filter(partner=self.partner).values_list('key', flat=True)),
+                         ['course-v1:a+b+c'])
+
+    def test_incremental_sync(self):
+        """ Verify only course runs modified since the start of the last synchronization are pulled and updated. """
+        checkpoint = CatalogCourseRunSyncFactory(
+            partner=self.partner, started=datetime.datetime(2016, 10, 2, 0, 5, tzinfo=pytz.UTC)
+        )
+        CatalogCourseRun.objects.create(
+            partner=self.partner,
+            key='course-v1:a+b+c',
+            data=self.get_course_run('course-v1:a+b+c', 'Old', '2016-10-01T00:00:00Z'),
+            modified=datetime.datetime(2016, 10, 1, tzinfo=pytz.UTC)
+        )
+        updated = self.get_course_run('course-v1:a+b+c', 'New', '2016-10-03T00:00:00Z')
+        self.mock_course_runs_api([[updated]])
+
+        call_command(self.command)
+
+        self.assertEqual(CatalogCourseRun.objects.get(partner=self.partner, key='course-v1:a+b+c').data, updated)
+        self.assertEqual(httpretty.last_request().querystring['q'], ['modified:[2016-10-02T00:00:00Z TO *]'])
+        self.assertGreater(CatalogCourseRunSync.objects.get(partner=self.partner).started, checkpoint.started)
+
+        call_command(self.command, full=True)
+        self.assertNotIn('q', httpretty.last_request().querystring)
+
+    def test_catalog_failure(self):
+        """ Verify the command fails if the course runs could not be pulled. """
+        httpretty.register_uri(
+            httpretty.GET, '{}course_runs/'.format(settings.COURSE_CATALOG_API_URL), status=500
+        )
+
+        with self.assertRaises(CommandError):
+            call_command(self.command)
+        self.assertFalse(CatalogCourseRun.objects.exists())
+        self.assertFalse(CatalogCourseRunSync.objects.exists())
+
+    def test_interrupted_sync(self):
+        """ Verify a synchronization interrupted after some pages is not recorded, nor deletes course runs. """
+        CatalogCourseRun.objects.create(partner=self.partner, key='course-v1:d+e+f', data={'key': 'course-v1:d+e+f'})
+        checkpoint = CatalogCourseRunSyncFactory(partner=self.partner)
+        httpretty.register_uri(
+            httpretty.GET, '{}course_runs/'.format(settings.COURSE_CATALOG_API_URL), responses=[
+                httpretty.Response(body=json.dumps({
+                    'next': 'path/to/next/page',
+                    'results': [self.get_course_run('course-v1:a+b+c', 'First', '2016-10-01T00:00:00Z')],
+                }), content_type='application/json'),
+                httpretty.Response(body='', status=500),
+            ]
+        )
+
+        with self.assertRaises(CommandError):
+            call_command(self.command, full=True)
+
+        self.assertEqual(CatalogCourseRunSync.objects.get(partner=self.partner).started, checkpoint.started)
+        self.assertEqual(CatalogCourseRun.objects.filter(partner=self.partner).count(), 2)
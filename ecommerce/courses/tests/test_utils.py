@@ -1,18 +1,25 @@
+import datetime
 import hashlib
 
 import ddt
 import httpretty
+import mock
 
+from django.conf import settings
 from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
 
+from ecommerce.core.cache_utils import set_cached_many
 from ecommerce.core.constants import ENROLLMENT_CODE_SWITCH
 from ecommerce.core.tests import toggle_switch
 from ecommerce.core.tests.decorators import mock_course_catalog_api_client
 from ecommerce.coupons.tests.mixins import CourseCatalogMockMixin
-from ecommerce.courses.models import Course
-from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.courses.models import CatalogCourseRun, Course
+from ecommerce.courses.tests.factories import CatalogCourseRunSyncFactory, CourseFactory
 from ecommerce.courses.utils import (
-    get_certificate_type_display_value, get_course_info_from_catalog, mode_for_seat
+    get_certificate_type_display_value, get_course_info_from_catalog, get_course_info_from_catalog_many,
+    mode_for_seat, parse_course_run_keys_query
 )
 from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.tests.testcases import TestCase
@@ -60,6 +67,114 @@ class UtilsTests(CourseCatalogTestMixin, CourseCatalogMockMixin, TestCase):
         cached_course = cache.get(cache_hash)
         self.assertEqual(cached_course, response)
 
+    @mock_course_catalog_api_client
+    def test_get_course_info_from_catalog_many(self):
+        """ Verify cached courses are read from the cache and the remaining courses are retrieved and cached. """
+        cached_course = CourseFactory()
+        uncached_course = CourseFactory()
+        partner_short_code = self.site.siteconfiguration.partner.short_code
+        cached_info = {'title': 'Cached title'}
+        set_cached_many({
+            hashlib.md5('courses_api_detail_{}{}'.format(cached_course.id, partner_short_code)).hexdigest(): cached_info
+        }, 60)
+        self.mock_dynamic_catalog_single_course_runs_api(uncached_course)
+
+        response = get_course_info_from_catalog_many(self.request.site, [cached_course.id, uncached_course.id])
+
+        self.assertEqual(response[cached_course.id], cached_info)
+        self.assertEqual(response[uncached_course.id]['title'], uncached_course.name)
+
+        cache_hash = hashlib.md5('courses_api_detail_{}{}'.format(uncached_course.id, partner_short_code)).hexdigest()
+        self.assertEqual(cache.get(cache_hash), response[uncached_course.id])
+
+    @mock_course_catalog_api_client
+    def test_get_course_info_from_catalog_many_stale(self):
+        """ Verify stale cached courses are returned, and refreshed in the background. """
+        course = CourseFactory()
+        cached_info = {'title': 'Stale title'}
+        partner_short_code = self.site.siteconfiguration.partner.short_code
+        # Without its freshness marker, the cached value is stale.
+        cache.set(hashlib.md5('courses_api_detail_{}{}'.format(course.id, partner_short_code)).hexdigest(), cached_info)
+        self.mock_dynamic_catalog_single_course_runs_api(course)
+
+        with mock.patch('ecommerce.core.cache_utils._run_in_background') as mock_run_in_background:
+            response = get_course_info_from_catalog_many(self.request.site, [course.id])
+
+        self.assertEqual(response, {course.id: cached_info})
+        self.assertEqual(mock_run_in_background.call_count, 1)
+
+    @mock_course_catalog_api_client
+    def test_get_course_info_from_catalog_many_not_found(self):
+        """ Verify courses the catalog service recently responded with a 404 for are omitted, without a request. """
+        course = CourseFactory()
+        httpretty.register_uri(
+            httpretty.GET,
+            '{}course_runs/{}/'.format(settings.COURSE_CATALOG_API_URL, course.id),
+            status=404
+        )
+
+        self.assertEqual(get_course_info_from_catalog_many(self.request.site, [course.id]), {})
+        request_count = len(httpretty.httpretty.latest_requests)
+        self.assertEqual(get_course_info_from_catalog_many(self.request.site, [course.id]), {})
+        self.assertEqual(len(httpretty.httpretty.latest_requests), request_count)
+
+    def test_get_course_info_from_mirror(self):
+        """ Verify mirrored course runs are read from the mirror, without contacting the catalog service. """
+        course = CourseFactory()
+        course_info = {'key': course.id, 'title': 'Mirrored title'}
+        CatalogCourseRun.objects.create(partner=self.partner, key=course.id, data=course_info)
+        CatalogCourseRunSyncFactory(partner=self.partner)
+
+        self.assertEqual(get_course_info_from_catalog(self.request.site, course.id), course_info)
+        self.assertEqual(get_course_info_from_catalog_many(self.request.site, [course.id]), {course.id: course_info})
+        self.assertFalse(httpretty.has_request())
+
+    @mock_course_catalog_api_client
+    @override_settings(COURSE_CATALOG_MIRROR_MAX_AGE=3600)
+    def test_get_course_info_from_stale_mirror(self):
+        """ Verify the mirror is not read unless it was synchronized recently, and the catalog service is used. """
+        course = CourseFactory()
+        CatalogCourseRun.objects.create(partner=self.partner, key=course.id, data={'title': 'Mirrored title'})
+        self.mock_dynamic_catalog_single_course_runs_api(course)
+        self.assertEqual(get_course_info_from_catalog(self.request.site, course.id)['title'], course.name)
+
+        CatalogCourseRunSyncFactory(partner=self.partner, started=timezone.now() - datetime.timedelta(hours=2))
+        self.assertEqual(get_course_info_from_catalog_many(self.request.site, [course.id])[course.id]['title'],
+                         course.name)
+
+    @mock_course_catalog_api_client
+    def test_get_course_info_from_catalog_many_with_mirror(self):
+        """ Verify course runs missing from the mirror are retrieved from the catalog service. """
+        mirrored_course = CourseFactory()
+        unmirrored_course = CourseFactory()
+        mirrored_info = {'key': mirrored_course.id, 'title': 'Mirrored title'}
+        CatalogCourseRun.objects.create(partner=self.partner, key=mirrored_course.id, data=mirrored_info)
+        CatalogCourseRunSyncFactory(partner=self.partner)
+        self.mock_dynamic_catalog_single_course_runs_api(unmirrored_course)
+
+        response = get_course_info_from_catalog_many(self.request.site, [mirrored_course.id, unmirrored_course.id])
+
+        self.assertEqual(response[mirrored_course.id], mirrored_info)
+        self.assertEqual(response[unmirrored_course.id]['title'], unmirrored_course.name)
+
+    @ddt.data(
+        ('key:course-v1:a+b+c', ['course-v1:a+b+c']),
+        ('key:course-v1\\:a+b+c', ['course-v1:a+b+c']),
+        ('key:"course-v1:a+b+c"', ['course-v1:a+b+c']),
+        ('key:(course-v1:a+b+c OR course-v1:d+e+f)', ['course-v1:a+b+c', 'course-v1:d+e+f']),
+        ('key:course-v1:a+b+c OR key:course-v1:d+e+f', ['course-v1:a+b+c', 'course-v1:d+e+f']),
+        ('*:*', None),
+        ('key:*', None),
+        ('key:course-v1:a+b* OR key:course-v1:d+e+f', None),
+        ('key:course-v1:a+b+c AND org:edX', None),
+        ('org:edX', None),
+        ('', None),
+    )
+    @ddt.unpack
+    def test_parse_course_run_keys_query(self, query, expected):
+        """ Verify course run keys are only extracted from queries selecting course runs by key. """
+        self.assertEqual(parse_course_run_keys_query(query), expected)
+
     @ddt.data(
         ('honor', 'Honor'),
         ('verified', 'Verified'),
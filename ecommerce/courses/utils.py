@@ -1,8 +1,16 @@
+import datetime
 import hashlib
+from multiprocessing.pool import ThreadPool
+import re
 
 from django.conf import settings
-from django.core.cache import cache
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
+from oscar.core.loading import get_model
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberBaseException
+
+from ecommerce.core.cache_utils import get_cached_many, get_or_set_cached
 
 
 def mode_for_seat(product):
@@ -12,25 +20,205 @@ def mode_for_seat(product):
     bulk purchase "enrollment code" product variant of the single-seat product, so we attempt
     to locate the 'seat_type' attribute in its place.
     """
-    mode = getattr(product.attr, 'certificate_type', getattr(product.attr, 'seat_type', None))
+    return mode_for_attributes(vars(product.flat_attr))
+
+
+def mode_for_attributes(attributes):
+    """ Returns the enrollment mode of a product with the given flat attribute values, keyed by code. """
+    mode = attributes.get('certificate_type', attributes.get('seat_type'))
     if not mode:
         return 'audit'
-    if mode == 'professional' and not getattr(product.attr, 'id_verification_required', False):
+    if mode == 'professional' and not attributes.get('id_verification_required', False):
         return 'no-id-professional'
     return mode
 
 
+def course_type_for_seat_types(seat_types):
+    """ Returns the type of a course with seats of the given certificate types. """
+    if 'credit' in seat_types:
+        return 'credit'
+    elif 'professional' in seat_types or 'no-id-professional' in seat_types:
+        return 'professional'
+    elif 'verified' in seat_types:
+        return 'verified'
+    else:
+        return 'audit'
+
+
+def summarize_seats(seats):
+    """
+    Returns the type of a course, and the summary of its seats, from the given seats.
+
+    Also used by migrations, with historical models, so the seats are described by their flat attribute values.
+
+    Arguments:
+        seats (iterable): (seat, attributes) tuples, where the seat's stock records have been prefetched, and
+            attributes is a dict of the seat's flat attribute values.
+
+    Returns:
+        tuple: The course type, and the list of seat summaries.
+    """
+    seat_types = []
+    seat_summary = []
+    for seat, attributes in seats:
+        seat_types.append((attributes.get('certificate_type') or '').lower())
+
+        stock_records = sorted(seat.stockrecords.all(), key=lambda stock_record: stock_record.id)
+        stock_record = stock_records[0] if stock_records else None
+        seat_summary.append({
+            'id': seat.id,
+            'sku': stock_record.partner_sku if stock_record else None,
+            'mode': mode_for_attributes(attributes),
+            'price': unicode(stock_record.price_excl_tax) if stock_record else None,
+            'currency': stock_record.price_currency if stock_record else None,
+            'expires': seat.expires.isoformat() if seat.expires else None,
+        })
+
+    return course_type_for_seat_types(seat_types), seat_summary
+
+
+def _get_course_info_cache_key(course_key, partner_short_code):
+    """ Returns the cache key under which the catalog data for the given course run is stored. """
+    cache_key = 'courses_api_detail_{}{}'.format(course_key, partner_short_code)
+    return hashlib.md5(cache_key).hexdigest()
+
+
+# Catalog queries that only select course runs by key, e.g. "key:(course-v1:a+b+c OR course-v1:d+e+f)".
+_COURSE_RUN_KEY_CLAUSE_PATTERN = re.compile(r'key:(?:\((?P<keys>[^()]+)\)|(?P<key>"[^"]+"|[^\s()]+))')
+_QUERY_OPERATOR_PATTERN = re.compile(r'\s+OR\s+')
+
+
+def get_course_runs_from_mirror(site, course_keys):
+    """
+    Get course information for several course runs from the local mirror of the catalog service.
+
+    Arguments:
+        site (Site): Site whose partner's course runs are read.
+        course_keys (iterable): Course run keys to retrieve.
+
+    Returns:
+        dict: Course run data keyed by course key. Course runs that have not been mirrored are omitted, as are all
+        course runs if the partner's mirror has not been synchronized within settings.COURSE_CATALOG_MIRROR_MAX_AGE.
+    """
+    CatalogCourseRun = get_model('courses', 'CatalogCourseRun')
+    synced_since = timezone.now() - datetime.timedelta(seconds=settings.COURSE_CATALOG_MIRROR_MAX_AGE)
+    course_runs = CatalogCourseRun.objects.filter(
+        partner_id=site.siteconfiguration.partner_id,
+        partner__catalog_course_run_sync__started__gte=synced_since,
+        key__in=[unicode(course_key) for course_key in course_keys]
+    ).only('key', 'data')
+    return {course_run.key: course_run.data for course_run in course_runs}
+
+
+def parse_course_run_keys_query(query):
+    """
+    Extract the course run keys selected by a catalog query that only filters on course run keys.
+
+    Such queries can be evaluated locally. Queries using any other field, operator or wildcard
+    must be evaluated by the Course Catalog service.
+
+    Arguments:
+        query (str): Elasticsearch query string, e.g. "key:(course-v1:a+b+c OR course-v1:d+e+f)".
+
+    Returns:
+        list: Course run keys selected by the query, or None if the query cannot be evaluated locally.
+    """
+    course_keys = []
+
+    def _collect(match):
+        values = match.group('keys') or match.group('key')
+        course_keys.extend(_QUERY_OPERATOR_PATTERN.split(values.strip()))
+        return ' '
+
+    remainder = _COURSE_RUN_KEY_CLAUSE_PATTERN.sub(_collect, query or '')
+    if not course_keys or _QUERY_OPERATOR_PATTERN.sub(' ', ' {} '.format(remainder)).strip():
+        return None
+
+    course_keys = [course_key.strip('"').replace('\\', '') for course_key in course_keys]
+    if any(not course_key or re.search(r'[\s*?"]', course_key) for course_key in course_keys):
+        return None
+    return course_keys
+
+
 def get_course_info_from_catalog(site, course_key):
-    """ Get course information from catalog service and cache """
+    """ Get course information from the catalog mirror, falling back to the catalog service and cache """
+    course_run = get_course_runs_from_mirror(site, [course_key]).get(unicode(course_key))
+    if course_run:
+        return course_run
+
     api = site.siteconfiguration.course_catalog_api_client
     partner_short_code = site.siteconfiguration.partner.short_code
-    cache_key = 'courses_api_detail_{}{}'.format(course_key, partner_short_code)
-    cache_hash = hashlib.md5(cache_key).hexdigest()
-    course_run = cache.get(cache_hash)
-    if not course_run:  # pragma: no cover
-        course_run = api.course_runs(course_key).get(partner=partner_short_code)
-        cache.set(cache_hash, course_run, settings.COURSES_API_CACHE_TIMEOUT)
-    return course_run
+    return get_or_set_cached(
+        _get_course_info_cache_key(course_key, partner_short_code),
+        lambda: api.course_runs(course_key).get(partner=partner_short_code),
+        settings.COURSES_API_CACHE_TIMEOUT
+    )
+
+
+def get_course_info_from_catalog_many(site, course_keys):
+    """
+    Get course information for several course runs from the catalog mirror, catalog service and cache.
+
+    Mirrored course runs are read with a single query, and cached course runs with a single cache
+    lookup. The remaining course runs, and those whose cached data is stale, are read with
+    get_or_set_cached from concurrent threads, so the cost of a cold cache is a single round trip
+    to the Course Catalog service regardless of the number of course runs.
+
+    Arguments:
+        site (Site): Site whose catalog API client and partner are used.
+        course_keys (iterable): Course run keys to retrieve.
+
+    Returns:
+        dict: Course run data keyed by the string form of each course key. Course runs that
+        could not be retrieved from the Course Catalog service are omitted.
+    """
+    course_keys = [unicode(course_key) for course_key in course_keys]
+    course_runs = get_course_runs_from_mirror(site, course_keys)
+
+    partner_short_code = site.siteconfiguration.partner.short_code
+    cache_hashes = {}
+    for course_key in course_keys:
+        if course_key not in course_runs:
+            cache_hashes[course_key] = _get_course_info_cache_key(course_key, partner_short_code)
+
+    if not cache_hashes:
+        return course_runs
+
+    cached, fresh_hashes, not_found_hashes = get_cached_many(cache_hashes.values())
+    missing_keys = []
+    for course_key, cache_hash in cache_hashes.items():
+        if cache_hash in fresh_hashes and cache_hash in cached:
+            course_runs[course_key] = cached[cache_hash]
+        elif cache_hash not in not_found_hashes:
+            missing_keys.append(course_key)
+
+    if not missing_keys:
+        return course_runs
+
+    api = site.siteconfiguration.course_catalog_api_client
+
+    def _get(course_key):
+        try:
+            return course_key, get_or_set_cached(
+                cache_hashes[course_key],
+                lambda: api.course_runs(course_key).get(partner=partner_short_code),
+                settings.COURSES_API_CACHE_TIMEOUT
+            )
+        except (ConnectionError, SlumberBaseException, Timeout):
+            return course_key, None
+
+    pool = ThreadPool(min(len(missing_keys), settings.COURSES_API_MAX_CONCURRENT_REQUESTS))
+    try:
+        results = pool.map(_get, missing_keys)
+    finally:
+        pool.close()
+        pool.join()
+
+    for course_key, course_run in results:
+        if course_run is not None:
+            course_runs[course_key] = course_run
+
+    return course_runs
 
 
 def get_certificate_type_display_value(certificate_type):
@@ -12,6 +12,7 @@ from edx_rest_api_client.client import EdxRestApiClient
 from requests import Timeout
 from slumber.exceptions import SlumberBaseException
 
+from ecommerce.core.http_client import get_session
 from ecommerce.core.url_utils import get_lms_url
 from ecommerce.core.views import StaffOnlyMixin
 from ecommerce.extensions.partner.shortcuts import get_partner_for_site
@@ -49,7 +50,8 @@ class CourseAppView(StaffOnlyMixin, TemplateView):
             try:
                 credit_api = EdxRestApiClient(
                     get_lms_url('/api/credit/v1/'),
-                    oauth_access_token=self.request.user.access_token
+                    oauth_access_token=self.request.user.access_token,
+                    session=get_session()
                 )
                 credit_providers = credit_api.providers.get()
                 credit_providers.sort(key=lambda provider: provider['display_name'])
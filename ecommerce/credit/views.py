@@ -13,6 +13,7 @@ from edx_rest_api_client.client import EdxRestApiClient
 from oscar.core.loading import get_model
 from slumber.exceptions import SlumberHttpBaseException
 
+from ecommerce.core.http_client import get_session
 from ecommerce.core.url_utils import get_lms_url
 from ecommerce.courses.models import Course
 from ecommerce.extensions.analytics.utils import prepare_analytics_data
@@ -51,7 +52,7 @@ class Checkout(TemplateView):
         credit_seats = []
 
         for seat in course.seat_products:
-            if getattr(seat.attr, 'certificate_type', None) != self.CREDIT_MODE:
+            if getattr(seat.flat_attr, 'certificate_type', None) != self.CREDIT_MODE:
                 continue
 
             purchase_info = strategy.fetch_for_product(seat)
@@ -157,10 +158,10 @@ class Checkout(TemplateView):
                 else:
                     new_price = stockrecord.price_excl_tax - discount_value
                 new_price = '{0:.2f}'.format(new_price)
-            providers_dict[seat.attr.credit_provider].update({
+            providers_dict[seat.flat_attr.credit_provider].update({
                 'price': stockrecord.price_excl_tax,
                 'sku': stockrecord.partner_sku,
-                'credit_hours': seat.attr.credit_hours,
+                'credit_hours': seat.flat_attr.credit_hours,
                 'discount': discount,
                 'new_price': new_price
             })
@@ -177,7 +178,9 @@ class Checkout(TemplateView):
             Response from LMS as json, containing list of providers.
         """
 
-        provider_ids = ",".join([seat.attr.credit_provider for seat in credit_seats if seat.attr.credit_provider])
+        provider_ids = ",".join(
+            [seat.flat_attr.credit_provider for seat in credit_seats if seat.flat_attr.credit_provider]
+        )
 
         try:
             return self.credit_api_client.providers.get(provider_ids=provider_ids)
@@ -191,5 +194,6 @@ class Checkout(TemplateView):
 
         return EdxRestApiClient(
             get_lms_url('api/credit/v1/'),
-            oauth_access_token=self.request.user.access_token
+            oauth_access_token=self.request.user.access_token,
+            session=get_session()
         )
@@ -0,0 +1,125 @@
+"""
+Structured, asynchronous audit log.
+
+Audit events are logged by audit_log as records carrying the name and fields of the event. AuditLogHandler queues
+records on the thread logging them, and a background thread writes them, in batches, to a target handler (e.g. a
+file or syslog), formatted as JSON by AuditEventFormatter.
+
+The queue is bounded. When it is full, logging a record blocks for at most put_timeout seconds, after which the
+record is dropped.
+"""
+from __future__ import absolute_import
+
+from datetime import datetime
+import json
+import logging
+import Queue
+import threading
+
+from django.utils.module_loading import import_string
+
+from ecommerce.extensions.analytics.worker import BackgroundWorker
+
+_STOP = object()
+
+
+class AuditEventFormatter(logging.Formatter):
+    """ Formats records as JSON objects, with the name and fields of audit events as separate keys. """
+
+    def format(self, record):
+        data = {
+            'timestamp': datetime.utcfromtimestamp(record.created).isoformat() + 'Z',
+            'logger': record.name,
+            'level': record.levelname,
+            'process': record.process,
+        }
+
+        event = getattr(record, 'audit_event', None)
+        if event is None:
+            data['message'] = record.getMessage()
+        else:
+            data['event'] = event
+            data['fields'] = record.audit_fields
+
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(data, default=unicode, sort_keys=True)
+
+
+class AuditLogHandler(logging.Handler):
+    """ Writes records to a target handler, in batches, from a background thread. """
+
+    def __init__(self, target, queue_size=10000, batch_size=100, put_timeout=0.1, level=logging.NOTSET):
+        """
+        Arguments:
+            target (dict): Configuration of the handler the records are written to. The 'class' key is the dotted
+                path of the handler class; the other keys are passed to its constructor.
+
+        Keyword Arguments:
+            queue_size (int): Maximum number of records waiting to be written.
+            batch_size (int): Maximum number of records written at once.
+            put_timeout (float): Maximum number of seconds to wait for room in the queue, before dropping a record.
+        """
+        super(AuditLogHandler, self).__init__(level)
+        target = dict(target)
+        self.target = import_string(target.pop('class'))(**target)
+        # Records are formatted by this handler.
+        self.target.setFormatter(logging.Formatter('%(message)s'))
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._worker = BackgroundWorker(self._run, 'audit-log-writer', queue_size)
+
+    def emit(self, record):
+        try:
+            self._worker.ensure_started().put(record, timeout=self.put_timeout)
+        except Queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _write(self, batch):
+        for record in batch:
+            try:
+                # The record may be handled by other handlers too, so a formatted copy is written.
+                self.target.handle(logging.makeLogRecord(
+                    dict(record.__dict__, msg=self.format(record), args=None, exc_info=None, exc_text=None)
+                ))
+            except Exception:  # pylint: disable=broad-except
+                self.handleError(record)
+        self.target.flush()
+
+    def _run(self, queue):
+        stopping = False
+        while not stopping:
+            batch = [queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                except Queue.Empty:
+                    break
+
+            if _STOP in batch:
+                stopping = True
+                batch = [record for record in batch if record is not _STOP]
+
+            try:
+                self._write(batch)
+            finally:
+                for __ in range(len(batch) + int(stopping)):
+                    queue.task_done()
+
+    def flush(self):
+        """ Blocks until all the queued records have been written. """
+        if self._worker.started and self._worker.thread.is_alive():
+            self._worker.queue.join()
+
+    def close(self):
+        """ Writes the queued records, and stops the background thread. """
+        if self._worker.started and self._worker.thread.is_alive():
+            self._worker.queue.put(_STOP)
+            self._worker.thread.join()
+            self._worker.reset()
+        self.target.close()
+        super(AuditLogHandler, self).close()
@@ -0,0 +1,276 @@
+"""
+Delivery of analytics events to Segment.
+
+Events are added to a bounded queue shared by all the threads of the process, and sent to Segment in batches by
+a background thread, so that tracking an event never waits on Segment. Batches are sent once they hold
+settings.SEGMENT_EVENT_BATCH_SIZE events, or settings.SEGMENT_EVENT_FLUSH_INTERVAL seconds after their first
+event was queued.
+
+When the queue is full, events are appended to the file at settings.SEGMENT_EVENT_SPILL_PATH, and queued again
+once the queue has room. If no spill file is configured they are dropped. The queue is drained when the process
+exits, for up to settings.SEGMENT_EVENT_SHUTDOWN_TIMEOUT seconds.
+"""
+from __future__ import absolute_import
+
+from collections import defaultdict
+from datetime import datetime
+import atexit
+import fcntl
+import json
+import logging
+import Queue
+import threading
+import time
+
+from analytics import Client
+from analytics.request import DatetimeSerializer
+from dateutil.tz import tzutc
+from django.conf import settings
+
+from ecommerce.core.http_client import get_session
+from ecommerce.extensions.analytics.worker import BackgroundWorker
+
+logger = logging.getLogger(__name__)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class EventDispatcher(object):
+    """ Sends the analytics events of the process to Segment, in batches, from a background thread. """
+
+    def __init__(self, max_queue_size, batch_size, flush_interval, spill_path=None):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self._metrics = defaultdict(int)
+        self._metrics_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stopping = False
+        self._worker = BackgroundWorker(
+            self._run, 'segment-event-dispatcher', max_queue_size, on_start=self._reset_stopping
+        )
+
+    def _reset_stopping(self):
+        self._stopping = False
+
+    def _increment(self, name, value):
+        with self._metrics_lock:
+            self._metrics[name] += value
+
+    def enqueue(self, write_key, message):
+        """
+        Queues an event, to be sent to Segment.
+
+        Arguments:
+            write_key (str): Segment write key of the site the event belongs to.
+            message (dict): The event, as built by the Segment client.
+
+        Returns:
+            bool: False if the event was dropped.
+        """
+        try:
+            self._worker.ensure_started().put_nowait((write_key, message))
+        except Queue.Full:
+            return self._spill([(write_key, message)])
+
+        self._increment('enqueued', 1)
+        return True
+
+    def _spill(self, events):
+        if not self.spill_path:
+            self._increment('dropped', len(events))
+            logger.warning('The Segment event queue is full. Dropping [%d] events.', len(events))
+            return False
+
+        try:
+            with self._spill_lock, open(self.spill_path, 'a') as spill_file:
+                fcntl.flock(spill_file, fcntl.LOCK_EX)
+                for event in events:
+                    spill_file.write(json.dumps(event, cls=DatetimeSerializer) + '\n')
+        except (IOError, OSError):
+            self._increment('dropped', len(events))
+            logger.exception('Failed to spill [%d] Segment events to [%s].', len(events), self.spill_path)
+            return False
+
+        self._increment('spilled', len(events))
+        return True
+
+    def _restore_spilled(self):
+        """ Queues the spilled events again, if the queue is less than half full. """
+        queue = self._worker.queue
+        if not self.spill_path or queue.qsize() > self.max_queue_size / 2:
+            return
+
+        try:
+            with self._spill_lock, open(self.spill_path, 'r+') as spill_file:
+                fcntl.flock(spill_file, fcntl.LOCK_EX)
+                lines = spill_file.readlines()
+                spill_file.seek(0)
+                spill_file.truncate()
+        except (IOError, OSError):
+            # Nothing has been spilled.
+            return
+
+        overflow = []
+        for line in lines:
+            event = tuple(json.loads(line))
+            try:
+                queue.put_nowait(event)
+            except Queue.Full:
+                overflow.append(event)
+
+        self._increment('restored', len(lines) - len(overflow))
+        if overflow:
+            self._spill(overflow)
+
+    def _next_batch(self, queue):
+        """ Returns the next batch of events, waiting for it to fill up for at most flush_interval seconds. """
+        try:
+            batch = [queue.get(timeout=self.flush_interval)]
+        except Queue.Empty:
+            return []
+
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = 0 if self._stopping else deadline - time.time()
+            try:
+                batch.append(queue.get(timeout=timeout) if timeout > 0 else queue.get_nowait())
+            except Queue.Empty:
+                break
+
+        return batch
+
+    def _send(self, batch):
+        messages = defaultdict(list)
+        for write_key, message in batch:
+            messages[write_key].append(message)
+
+        session = get_session(timeout=settings.SEGMENT_API_TIMEOUT)
+        for write_key, write_key_messages in messages.items():
+            data = {
+                'batch': write_key_messages,
+                'sentAt': datetime.utcnow().replace(tzinfo=tzutc()).isoformat(),
+            }
+            try:
+                response = session.post(
+                    settings.SEGMENT_API_URL,
+                    data=json.dumps(data, cls=DatetimeSerializer),
+                    auth=(write_key, ''),
+                    headers={'Content-Type': 'application/json'}
+                )
+                response.raise_for_status()
+            except Exception:  # pylint: disable=broad-except
+                self._increment('failed', len(write_key_messages))
+                logger.exception('Failed to send [%d] events to Segment.', len(write_key_messages))
+            else:
+                self._increment('sent', len(write_key_messages))
+
+    def _run(self, queue):
+        while not (self._stopping and queue.empty()):
+            batch = self._next_batch(queue)
+            try:
+                if batch:
+                    self._send(batch)
+                self._restore_spilled()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Failed to dispatch Segment events.')
+            finally:
+                for __ in batch:
+                    queue.task_done()
+
+    def flush(self):
+        """ Blocks until all the queued events have been sent. """
+        if self._worker.started and self._worker.thread.is_alive():
+            self._worker.queue.join()
+
+    def shutdown(self, timeout=None):
+        """
+        Sends the queued events, and stops the background thread.
+
+        Events queued once the thread has stopped start a new one.
+
+        Arguments:
+            timeout (float): Maximum number of seconds to wait for the events to be sent.
+        """
+        if not self._worker.started:
+            return
+
+        self._stopping = True
+        self._worker.thread.join(timeout)
+        if self._worker.thread.is_alive():
+            logger.warning('Stopped waiting for [%d] Segment events to be sent.', self._worker.queue.qsize())
+        else:
+            self._worker.reset()
+
+    def get_metrics(self):
+        """
+        Returns the metrics of the dispatcher.
+
+        Returns:
+            dict: The number of events queued, waiting to be sent; the size of the queue; and the number of events
+                enqueued, sent, which failed to be sent, spilled, restored from the spill file, and dropped.
+        """
+        with self._metrics_lock:
+            metrics = {name: self._metrics[name] for name in ('enqueued', 'sent', 'failed', 'spilled', 'restored',
+                                                              'dropped')}
+        metrics['queue_depth'] = self._worker.queue.qsize() if self._worker.started else 0
+        metrics['max_queue_size'] = self.max_queue_size
+        return metrics
+
+
+def get_dispatcher():
+    """ Returns the event dispatcher of the process. """
+    global _dispatcher  # pylint: disable=global-statement
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = EventDispatcher(
+                settings.SEGMENT_EVENT_QUEUE_SIZE,
+                settings.SEGMENT_EVENT_BATCH_SIZE,
+                settings.SEGMENT_EVENT_FLUSH_INTERVAL,
+                spill_path=settings.SEGMENT_EVENT_SPILL_PATH
+            )
+            atexit.register(_dispatcher.shutdown, settings.SEGMENT_EVENT_SHUTDOWN_TIMEOUT)
+        return _dispatcher
+
+
+class _DispatcherQueue(object):
+    """ Stands in for the queue of a Segment client, handing the client's events to the dispatcher. """
+
+    def __init__(self, write_key):
+        self.write_key = write_key
+
+    def full(self):
+        # Overflowing events are handled by the dispatcher.
+        return False
+
+    def put(self, message):
+        get_dispatcher().enqueue(self.write_key, message)
+
+
+class SegmentClient(Client):
+    """ Segment client whose events are sent by the event dispatcher of the process. """
+
+    def __init__(self, write_key):
+        # The client's own consumer thread is not started.
+        super(SegmentClient, self).__init__(write_key, debug=settings.DEBUG, send=False)
+        self.queue = _DispatcherQueue(write_key)
+
+    def flush(self):
+        get_dispatcher().flush()
+
+    def join(self):
+        get_dispatcher().shutdown()
+
+
+def get_segment_client(write_key):
+    """ Returns the Segment client of the process for the write key. """
+    with _clients_lock:
+        client = _clients.get(write_key)
+        if client is None:
+            client = SegmentClient(write_key)
+            _clients[write_key] = client
+        return client
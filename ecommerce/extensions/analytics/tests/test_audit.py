@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+
+import mock
+from testfixtures import LogCapture
+
+from ecommerce.extensions.analytics.audit import AuditEventFormatter, AuditLogHandler
+from ecommerce.extensions.analytics.utils import audit_log
+from ecommerce.tests.testcases import TestCase
+
+LOGGER_NAME = 'ecommerce.audit'
+
+
+class RecordingHandler(logging.Handler):
+    """ Keeps the records it handles. """
+
+    def __init__(self):
+        super(RecordingHandler, self).__init__()
+        self.buffer = []
+
+    def emit(self, record):
+        self.buffer.append(record)
+
+
+class AuditLogTests(TestCase):
+    """ Tests for the audit log handler and formatter. """
+
+    def create_handler(self, **kwargs):
+        handler = AuditLogHandler({'class': '{}.RecordingHandler'.format(__name__)}, **kwargs)
+        handler.setFormatter(AuditEventFormatter())
+        self.addCleanup(handler.close)
+        return handler
+
+    def log_audit_event(self, handler, name, **kwargs):
+        with LogCapture(LOGGER_NAME) as log_capture:
+            audit_log(name, **kwargs)
+        for record in log_capture.records:
+            handler.handle(record)
+        return log_capture
+
+    def test_audit_log(self):
+        """ Verify audit events are logged with their key-value message, and as structured data. """
+        handler = self.create_handler()
+        log_capture = self.log_audit_event(handler, 'refund_created', refund_id=1, amount='10.00')
+        log_capture.check((LOGGER_NAME, 'INFO', 'refund_created: amount="10.00", refund_id="1"'))
+
+        handler.flush()
+        data = json.loads(handler.target.buffer[0].getMessage())
+        self.assertEqual(data['event'], 'refund_created')
+        self.assertEqual(data['fields'], {'amount': '10.00', 'refund_id': 1})
+        self.assertEqual(data['level'], 'INFO')
+
+    def test_other_records(self):
+        """ Verify records which are not audit events are written with their message. """
+        handler = self.create_handler()
+        record = logging.makeLogRecord({'name': LOGGER_NAME, 'levelname': 'ERROR', 'msg': 'Failed [%d].', 'args': (1,)})
+        handler.handle(record)
+        handler.flush()
+
+        data = json.loads(handler.target.buffer[0].getMessage())
+        self.assertEqual(data['message'], 'Failed [1].')
+        self.assertNotIn('event', data)
+
+    def test_written_off_thread(self):
+        """ Verify records are written by the background thread, in batches. """
+        handler = self.create_handler(batch_size=2)
+        with mock.patch.object(handler, '_write', wraps=handler._write) as mock_write:  # pylint: disable=protected-access
+            for index in range(3):
+                self.log_audit_event(handler, 'event_{}'.format(index))
+            handler.flush()
+
+        self.assertEqual(len(handler.target.buffer), 3)
+        self.assertTrue(all(len(call[0][0]) <= 2 for call in mock_write.call_args_list))
+
+    def test_full_queue(self):
+        """ Verify records are dropped after waiting for room in a full queue. """
+        handler = self.create_handler(queue_size=1, put_timeout=0.01)
+        written = threading.Event()
+        release = threading.Event()
+
+        def blocking_write(batch):  # pylint: disable=unused-argument
+            written.set()
+            release.wait()
+
+        with mock.patch.object(handler, '_write', side_effect=blocking_write):
+            self.log_audit_event(handler, 'first')
+            written.wait()
+            self.log_audit_event(handler, 'second')
+            self.log_audit_event(handler, 'third')
+            release.set()
+            handler.flush()
+
+        self.assertEqual(handler.dropped, 1)
+
+    def test_close(self):
+        """ Verify the queued records are written when the handler is closed. """
+        handler = self.create_handler()
+        target = handler.target
+        self.log_audit_event(handler, 'event')
+        with mock.patch.object(target, 'close') as mock_close:
+            handler.close()
+
+        self.assertEqual(len(target.buffer), 1)
+        self.assertTrue(mock_close.called)
+        self.assertFalse(handler._worker.thread.is_alive())  # pylint: disable=protected-access
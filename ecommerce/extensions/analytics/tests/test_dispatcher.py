@@ -0,0 +1,143 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+import httpretty
+import mock
+
+from ecommerce.core.models import SiteConfiguration
+from ecommerce.extensions.analytics.dispatcher import EventDispatcher, SegmentClient
+from ecommerce.tests.testcases import TestCase
+
+
+class EventDispatcherTests(TestCase):
+    """ Tests for EventDispatcher. """
+
+    def setUp(self):
+        super(EventDispatcherTests, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def create_dispatcher(self, *args, **kwargs):
+        dispatcher = EventDispatcher(*args, **kwargs)
+        self.addCleanup(dispatcher.shutdown)
+        return dispatcher
+
+    def mock_segment_api(self, status=200):
+        httpretty.register_uri(httpretty.POST, settings.SEGMENT_API_URL, status=status, body='{}')
+
+    def get_sent_batches(self):
+        return [json.loads(request.body) for request in httpretty.httpretty.latest_requests]
+
+    @httpretty.activate
+    def test_batches(self):
+        """ Verify events are sent in batches, per write key. """
+        self.mock_segment_api()
+        dispatcher = self.create_dispatcher(10, 2, 0.1)
+        for event in ('a', 'b', 'c'):
+            self.assertTrue(dispatcher.enqueue('key', {'event': event}))
+        dispatcher.enqueue('other-key', {'event': 'd'})
+        dispatcher.flush()
+
+        events = [[message['event'] for message in batch['batch']] for batch in self.get_sent_batches()]
+        self.assertEqual(sorted(events), [['a', 'b'], ['c'], ['d']])
+
+        metrics = dispatcher.get_metrics()
+        self.assertEqual(metrics['enqueued'], 4)
+        self.assertEqual(metrics['sent'], 4)
+        self.assertEqual(metrics['queue_depth'], 0)
+
+    @httpretty.activate
+    def test_send_failure(self):
+        """ Verify events Segment fails to accept are counted, and do not stop the dispatcher. """
+        self.mock_segment_api(status=400)
+        dispatcher = self.create_dispatcher(10, 10, 0.1)
+        dispatcher.enqueue('key', {'event': 'a'})
+        dispatcher.flush()
+
+        self.mock_segment_api()
+        dispatcher.enqueue('key', {'event': 'b'})
+        dispatcher.flush()
+
+        metrics = dispatcher.get_metrics()
+        self.assertEqual(metrics['failed'], 1)
+        self.assertEqual(metrics['sent'], 1)
+
+    @mock.patch.object(EventDispatcher, '_run', mock.Mock())
+    def test_full_queue(self):
+        """ Verify events are dropped when the queue is full, and no spill file is configured. """
+        dispatcher = EventDispatcher(1, 10, 0.1)
+        self.assertTrue(dispatcher.enqueue('key', {'event': 'a'}))
+        self.assertFalse(dispatcher.enqueue('key', {'event': 'b'}))
+
+        metrics = dispatcher.get_metrics()
+        self.assertEqual(metrics['dropped'], 1)
+        self.assertEqual(metrics['queue_depth'], 1)
+
+    @mock.patch.object(EventDispatcher, '_run', mock.Mock())
+    def test_spill(self):
+        """ Verify events are spilled to disk when the queue is full, and queued again once it has room. """
+        dispatcher = EventDispatcher(2, 10, 0.1, spill_path=os.path.join(self.tmp_dir, 'events'))
+        for event in ('a', 'b', 'c', 'd'):
+            self.assertTrue(dispatcher.enqueue('key', {'event': event}))
+        self.assertEqual(dispatcher.get_metrics()['spilled'], 2)
+
+        # The queue has no room.
+        dispatcher._restore_spilled()  # pylint: disable=protected-access
+        self.assertEqual(dispatcher.get_metrics()['restored'], 0)
+
+        queue = dispatcher._worker.queue  # pylint: disable=protected-access
+        queue.get_nowait()
+        queue.get_nowait()
+        dispatcher._restore_spilled()  # pylint: disable=protected-access
+
+        self.assertEqual([queue.get_nowait(), queue.get_nowait()], [('key', {'event': 'c'}), ('key', {'event': 'd'})])
+        metrics = dispatcher.get_metrics()
+        self.assertEqual(metrics['restored'], 2)
+        self.assertEqual(metrics['dropped'], 0)
+
+    @httpretty.activate
+    def test_shutdown(self):
+        """ Verify the queued events are sent on shutdown. """
+        self.mock_segment_api()
+        dispatcher = EventDispatcher(10, 10, 1)
+        dispatcher.enqueue('key', {'event': 'a'})
+        dispatcher.shutdown(timeout=5)
+
+        self.assertEqual(dispatcher.get_metrics()['sent'], 1)
+        self.assertFalse(dispatcher._worker.thread.is_alive())  # pylint: disable=protected-access
+
+    @httpretty.activate
+    def test_enqueue_after_shutdown(self):
+        """ Verify events queued after shutdown are sent by a new background thread. """
+        self.mock_segment_api()
+        dispatcher = self.create_dispatcher(10, 10, 1)
+        dispatcher.enqueue('key', {'event': 'a'})
+        dispatcher.shutdown(timeout=5)
+
+        dispatcher.enqueue('key', {'event': 'b'})
+        dispatcher.flush()
+        self.assertEqual(dispatcher.get_metrics()['sent'], 2)
+        self.assertTrue(dispatcher._worker.thread.is_alive())  # pylint: disable=protected-access
+
+
+class SegmentClientTests(TestCase):
+    """ Tests for SegmentClient. """
+
+    def test_track(self):
+        """ Verify events are handed to the dispatcher. """
+        client = SegmentClient('key')
+        with mock.patch('ecommerce.extensions.analytics.dispatcher.get_dispatcher') as mock_get_dispatcher:
+            client.track('user-id', 'Completed Order', {'total': '10.00'})
+
+        write_key, message = mock_get_dispatcher.return_value.enqueue.call_args[0]
+        self.assertEqual(write_key, 'key')
+        self.assertEqual(message['event'], 'Completed Order')
+        self.assertEqual(message['userId'], 'user-id')
+
+    def test_shared_client(self):
+        """ Verify site configurations with the same write key share a client. """
+        site_configuration = SiteConfiguration.objects.get(id=self.site.siteconfiguration.id)
+        self.assertIs(site_configuration.segment_client, self.site.siteconfiguration.segment_client)
@@ -6,6 +6,8 @@ from threadlocals.threadlocals import get_current_request
 
 
 logger = logging.getLogger(__name__)
+# Audit events have a logger of their own, so that they can be routed to the audit log without other messages.
+audit_logger = logging.getLogger('ecommerce.audit')
 
 
 def is_segment_configured():
@@ -68,6 +70,10 @@ def audit_log(name, **kwargs):
     key-value pair syntax to make it easier to extract fields when parsing the application's
     logs.
 
+    The name and fields of the event are also attached to the log record, as its audit_event and
+    audit_fields attributes, for AuditLogHandler to write them as structured data. The message is
+    only formatted if a handler needs it.
+
     This function is variadic, accepting a variable number of keyword arguments.
 
     Arguments:
@@ -80,12 +86,19 @@ def audit_log(name, **kwargs):
     Returns:
         None
     """
-    # Joins sorted keyword argument keys and values with an "=", wraps each value
-    # in quotes, and separates each pair with a comma and a space.
-    payload = u', '.join([u'{k}="{v}"'.format(k=k, v=v) for k, v in sorted(kwargs.items())])
-    message = u'{name}: {payload}'.format(name=name, payload=payload)
+    audit_logger.info(u'%s: %s', name, _AuditPayload(kwargs), extra={'audit_event': name, 'audit_fields': kwargs})
+
+
+class _AuditPayload(object):
+    """ Formats the fields of an audit event, when the log message is formatted. """
+
+    def __init__(self, fields):
+        self.fields = fields
 
-    logger.info(message)
+    def __unicode__(self):
+        # Joins sorted keyword argument keys and values with an "=", wraps each value
+        # in quotes, and separates each pair with a comma and a space.
+        return u', '.join([u'{k}="{v}"'.format(k=k, v=v) for k, v in sorted(self.fields.items())])
 
 
 def prepare_analytics_data(user, segment_key, course_id=None):
@@ -0,0 +1,60 @@
+"""
+Bounded queues consumed by a background thread, so that the threads adding to them never wait on slow outputs.
+"""
+from __future__ import absolute_import
+
+import os
+import Queue
+import threading
+
+
+class BackgroundWorker(object):
+    """
+    A bounded queue, and the background thread consuming it.
+
+    The queue and thread are created on first use by each process, since those of a parent process are not usable
+    by forked processes.
+    """
+
+    def __init__(self, run, name, max_queue_size, on_start=None):
+        """
+        Arguments:
+            run (callable): Consumes the queue, which it is passed, on the background thread.
+            name (str): Name of the background thread.
+            max_queue_size (int): Maximum number of items in the queue.
+
+        Keyword Arguments:
+            on_start (callable): Called before the background thread is started.
+        """
+        self.run = run
+        self.name = name
+        self.max_queue_size = max_queue_size
+        self.on_start = on_start
+        self.queue = None
+        self.thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        """ Whether the queue and thread were created by this process, and have not been stopped since. """
+        return self._pid == os.getpid()
+
+    def ensure_started(self):
+        """ Creates the queue and starts the thread, unless this process already did. Returns the queue. """
+        if not self.started:
+            with self._lock:
+                if not self.started:
+                    if self.on_start:
+                        self.on_start()
+                    self.queue = Queue.Queue(self.max_queue_size)
+                    self.thread = threading.Thread(target=self.run, args=(self.queue,), name=self.name)
+                    self.thread.daemon = True
+                    self.thread.start()
+                    self._pid = os.getpid()
+        return self.queue
+
+    def reset(self):
+        """ Forgets the queue and thread, once the thread has stopped, so that they are created again on next use. """
+        with self._lock:
+            self._pid = None
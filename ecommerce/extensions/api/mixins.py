@@ -0,0 +1,105 @@
+"""Mixins for API views."""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from ecommerce.core.version_stamps import get_version_stamps
+
+
+class VersionedResponseMixin(object):
+    """
+    Serves the list and retrieve actions of a viewset conditionally.
+
+    The ETag and Last-Modified headers of the responses are derived from the version stamps of the models
+    they are built from. Requests whose If-None-Match or If-Modified-Since header matches are answered with
+    a 304 response without querying the serializer, and other responses are cached, keyed on the versions.
+    """
+    versioned_models = ()
+
+    # If set, the versions also change every given number of seconds, for responses which depend on the time
+    # (e.g. the availability of products, which expire).
+    version_lifetime = None
+
+    # Whether the responses depend on the user, e.g. on whether vouchers are available to them, in which case the
+    # versions also identify the user.
+    vary_on_user = False
+
+    def get_versioned_models(self):
+        """ Returns the models the responses are built from. """
+        return self.versioned_models
+
+    def list(self, request, *args, **kwargs):
+        return self.get_versioned_response(
+            super(VersionedResponseMixin, self).list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_versioned_response(
+            super(VersionedResponseMixin, self).retrieve, request, *args, **kwargs
+        )
+
+    def get_versioned_response(self, view_method, request, *args, **kwargs):
+        # The browsable API displays the user, so its responses cannot be shared.
+        if request.accepted_renderer.format == 'api':
+            return view_method(request, *args, **kwargs)
+
+        stamps = get_version_stamps(self.get_versioned_models())
+        last_modified = max(stamps.values())
+        if self.version_lifetime:
+            last_modified = max(last_modified, time.time() // self.version_lifetime * self.version_lifetime)
+
+        # The URL identifies the site, the resource and the query parameters.
+        version = hashlib.md5(repr((
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+            sorted(stamps.values()),
+            last_modified,
+            request.user.pk if self.vary_on_user else None,
+        ))).hexdigest()
+
+        if self.is_not_modified(request, version, last_modified):
+            not_modified_response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            return self.add_version_headers(not_modified_response, version, last_modified)
+
+        cache_key = 'api_response:{}'.format(version)
+        cached_response = cache.get(cache_key)
+        if cached_response is None:
+            response = view_method(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                # The rendered content is cached, as the serialized data cannot be pickled.
+                response = self.finalize_response(request, response, *args, **kwargs)
+                response.render()
+                cache.set(
+                    cache_key, (response.content, response['Content-Type']), settings.API_RESPONSE_CACHE_TIMEOUT
+                )
+        else:
+            content, content_type = cached_response
+            response = HttpResponse(content, content_type=content_type)
+
+        return self.add_version_headers(response, version, last_modified)
+
+    def add_version_headers(self, response, version, last_modified):
+        """ Sets the headers identifying the version of the response, and returns the response. """
+        response['ETag'] = quote_etag(version)
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def is_not_modified(self, request, version, last_modified):
+        """ Returns whether the client's copy of the response, identified by the request's headers, is current. """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            try:
+                etags = parse_etags(if_none_match)
+            except ValueError:
+                return False
+            return version in etags or '*' in etags
+
+        # Last-Modified has a resolution of one second, so If-Modified-Since is only used if If-None-Match is not.
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+        return if_modified_since is not None and int(last_modified) <= if_modified_since
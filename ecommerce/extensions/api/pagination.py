@@ -1,4 +1,68 @@
+import base64
+import binascii
+from collections import OrderedDict
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_keyset_position_filter(ordering, position):
+    """
+    Returns the filter selecting the results which come after a position, in a keyset ordering.
+
+    Arguments:
+        ordering (tuple): Fields ordering the results, prefixed with '-' for descending order.
+        position (list): Values of the ordering fields at the position.
+
+    Returns:
+        Q
+    """
+    position_filter = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = '{}__lt' if field.startswith('-') else '{}__gt'
+        after = Q(**{lookup.format(name): position[index]})
+        for previous_field, value in zip(ordering[:index], position):
+            after &= Q(**{previous_field.lstrip('-'): value})
+        position_filter |= after
+    return position_filter
+
+
+def get_keyset_position(instance, ordering):
+    """ Returns the position of an instance, in a keyset ordering. """
+    return [getattr(instance, field.lstrip('-')) for field in ordering]
+
+
+def encode_keyset_cursor(position):
+    """ Returns a cursor encoding the position. """
+    # Values are kept as text, which the database fields convert back when filtering.
+    return base64.urlsafe_b64encode(json.dumps([unicode(value) for value in position]))
+
+
+def decode_keyset_cursor(cursor, ordering):
+    """
+    Returns the position encoded in a cursor, or None for the first page.
+
+    Raises:
+        ValueError: If the cursor does not encode a position in the ordering.
+    """
+    if not cursor:
+        return None
+
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (TypeError, ValueError, UnicodeError, binascii.Error):
+        raise ValueError('Invalid cursor [{}].'.format(cursor))
+
+    if not isinstance(position, list) or len(position) != len(ordering):
+        raise ValueError('Invalid cursor [{}].'.format(cursor))
+
+    return position
 
 
 class PageNumberPagination(pagination.PageNumberPagination):
@@ -7,3 +71,79 @@ class PageNumberPagination(pagination.PageNumberPagination):
     # NOTE (CCB): This is a hack, necessary until the frontend
     # can properly follow our paginated lists.
     max_page_size = 10000
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page number pagination, with opt-in keyset pagination.
+
+    Requests with a cursor parameter (empty for the first page) are paginated by keyset: the results are ordered
+    by the view's keyset_ordering, and each page starts after the last result of the previous page. Unlike page
+    numbers, the cost of a page does not grow with its depth. The results are not counted, unless the count
+    parameter is true.
+
+    keyset_ordering must identify the results uniquely, e.g. by ending with the primary key.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_keyset_ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor.'
+
+    # State of the page being paginated, set by paginate_queryset.
+    keyset = False
+    request = None
+    count = None
+    next_position = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.keyset = False
+            return super(KeysetPagination, self).paginate_queryset(queryset, request, view=view)
+
+        self.keyset = True
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = getattr(view, 'keyset_ordering', self.default_keyset_ordering)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+
+        queryset = queryset.order_by(*ordering)
+        try:
+            position = decode_keyset_cursor(request.query_params[self.cursor_query_param], ordering)
+            if position:
+                queryset = queryset.filter(get_keyset_position_filter(ordering, position))
+        except (ValidationError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # One more result is fetched, to find out whether there is a next page.
+        results = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            last = results[-1]
+            self.next_position = get_keyset_position(last, ordering)
+
+        return results
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super(KeysetPagination, self).get_next_link()
+
+        if self.next_position is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_keyset_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super(KeysetPagination, self).get_paginated_response(data)
+
+        response_data = OrderedDict()
+        if self.count is not None:
+            response_data['count'] = self.count
+        response_data['next'] = self.get_next_link()
+        response_data['results'] = data
+        return Response(response_data)
@@ -275,6 +275,7 @@ class CourseSerializer(serializers.HyperlinkedModelSerializer):
     products = ProductSerializer(many=True)
     products_url = serializers.SerializerMethodField()
     last_edited = serializers.SerializerMethodField()
+    seats = serializers.ReadOnlyField(source='seat_summary')
 
     def __init__(self, *args, **kwargs):
         super(CourseSerializer, self).__init__(*args, **kwargs)
@@ -294,8 +295,10 @@ class CourseSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta(object):
         model = Course
-        fields = ('id', 'url', 'name', 'verification_deadline', 'type', 'products_url', 'last_edited', 'products')
-        read_only_fields = ('type', 'products')
+        fields = (
+            'id', 'url', 'name', 'verification_deadline', 'type', 'seats', 'products_url', 'last_edited', 'products'
+        )
+        read_only_fields = ('type', 'seats', 'products')
         extra_kwargs = {
             'url': {'view_name': COURSE_DETAIL_VIEW}
         }
@@ -378,33 +381,29 @@ class AtomicPublicationSerializer(serializers.Serializer):  # pylint: disable=ab
                 course.verification_deadline = course_verification_deadline
                 course.save()
 
+                seats = []
                 for product in products:
                     attrs = self._flatten(product['attribute_values'])
 
                     # Extract arguments required for Seat creation, deserializing as necessary.
-                    certificate_type = attrs.get('certificate_type', '')
                     create_enrollment_code = product['course'].get('create_enrollment_code') and \
                         self.context['request'].site.siteconfiguration.enable_enrollment_codes
-                    id_verification_required = attrs['id_verification_required']
-                    price = Decimal(product['price'])
 
                     # Extract arguments which are optional for Seat creation, deserializing as necessary.
                     expires = product.get('expires')
-                    expires = parse(expires) if expires else None
-                    credit_provider = attrs.get('credit_provider')
                     credit_hours = attrs.get('credit_hours')
-                    credit_hours = int(credit_hours) if credit_hours else None
-
-                    course.create_or_update_seat(
-                        certificate_type,
-                        id_verification_required,
-                        price,
-                        partner,
-                        expires=expires,
-                        credit_provider=credit_provider,
-                        credit_hours=credit_hours,
-                        create_enrollment_code=create_enrollment_code
-                    )
+
+                    seats.append({
+                        'certificate_type': attrs.get('certificate_type', ''),
+                        'id_verification_required': attrs['id_verification_required'],
+                        'price': Decimal(product['price']),
+                        'expires': parse(expires) if expires else None,
+                        'credit_provider': attrs.get('credit_provider'),
+                        'credit_hours': int(credit_hours) if credit_hours else None,
+                        'create_enrollment_code': create_enrollment_code,
+                    })
+
+                course.create_or_update_seats(seats, partner)
 
                 resp_message = course.publish_to_lms(access_token=self.access_token)
                 published = (resp_message is None)
@@ -478,6 +477,12 @@ class VoucherSerializer(serializers.ModelSerializer):
 
     def get_is_available_to_user(self, obj):
         request = self.context.get('request')
+        applications = getattr(obj, '_prefetched_objects_cache', {}).get('applications')
+        if applications is not None and obj.usage == Voucher.ONCE_PER_CUSTOMER and request.user.is_authenticated():
+            # Answered from the prefetched applications, rather than with a query per voucher.
+            if any(application.user_id == request.user.id for application in applications):
+                return False, _('You have already used this voucher in a previous order')
+            return True, ''
         return obj.is_available_to_user(user=request.user)
 
     def get_benefit(self, obj):
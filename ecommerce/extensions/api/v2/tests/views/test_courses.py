@@ -13,6 +13,7 @@ from ecommerce.core.constants import ISO_8601_FORMAT
 from ecommerce.core.tests import toggle_switch
 from ecommerce.courses.models import Course
 from ecommerce.courses.publishers import LMSPublisher
+from ecommerce.extensions.api.serializers import CourseSerializer
 from ecommerce.extensions.api.v2.tests.views import JSON_CONTENT_TYPE, ProductSerializerMixin
 from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.tests.testcases import TestCase
@@ -48,6 +49,7 @@ class CourseViewSetTests(ProductSerializerMixin, CourseCatalogTestMixin, TestCas
             'name': course.name,
             'verification_deadline': course.verification_deadline,
             'type': course.type,
+            'seats': course.seat_summary,
             'url': self.get_full_url(reverse('api:v2:course-detail', kwargs={'pk': course.id})),
             'products_url': products_url,
             'last_edited': last_edited
@@ -149,6 +151,35 @@ class CourseViewSetTests(ProductSerializerMixin, CourseCatalogTestMixin, TestCas
         self.assertEqual(response.status_code, 200)
         self.assertDictEqual(json.loads(response.content), self.serialize_course(self.course, include_products=True))
 
+    def test_conditional_retrieve(self):
+        """ Verify the view serves conditional requests, based on the version stamps of courses. """
+        path = reverse('api:v2:course-detail', kwargs={'pk': self.course.id})
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+
+        with mock.patch.object(CourseSerializer, 'to_representation') as mock_to_representation:
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+
+            response = self.client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 304)
+
+            # Responses are cached until the courses are modified.
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertDictEqual(json.loads(response.content), self.serialize_course(self.course))
+            self.assertFalse(mock_to_representation.called)
+
+        self.course.name = 'Something awesome!'
+        self.course.save()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertDictEqual(json.loads(response.content), self.serialize_course(self.course))
+
     def test_update(self):
         """ Verify the view updates the information of existing courses. """
         course_id = self.course.id
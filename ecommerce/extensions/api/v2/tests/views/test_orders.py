@@ -9,20 +9,24 @@ from django.test import override_settings, RequestFactory
 from oscar.core.loading import get_model
 from oscar.test import factories
 
+from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.api.serializers import OrderSerializer
 from ecommerce.extensions.api.tests.test_authentication import AccessTokenMixin
 from ecommerce.extensions.api.v2.tests.views import OrderDetailViewTestMixin
+from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.extensions.fulfillment.signals import SHIPPING_EVENT_NAME
 from ecommerce.extensions.fulfillment.status import ORDER
+from ecommerce.extensions.test.factories import prepare_voucher
 from ecommerce.tests.mixins import ThrottlingMixin
 from ecommerce.tests.testcases import TestCase
 
 Order = get_model('order', 'Order')
 ShippingEventType = get_model('order', 'ShippingEventType')
+Voucher = get_model('voucher', 'Voucher')
 
 
 @ddt.ddt
-class OrderListViewTests(AccessTokenMixin, ThrottlingMixin, TestCase):
+class OrderListViewTests(AccessTokenMixin, CourseCatalogTestMixin, ThrottlingMixin, TestCase):
     def setUp(self):
         super(OrderListViewTests, self).setUp()
         self.path = reverse('api:v2:order-list')
@@ -90,6 +94,77 @@ class OrderListViewTests(AccessTokenMixin, ThrottlingMixin, TestCase):
         self.assertEqual(content['count'], 1)
         self.assertEqual(content['results'][0]['number'], unicode(order.number))
 
+    def test_keyset_pagination(self):
+        """ Verify orders can be paged through by keyset, in reverse chronological order, without being counted. """
+        orders = [factories.create_order(user=self.user) for __ in range(5)]
+        # Orders placed at the same time are ordered by ID.
+        Order.objects.filter(id__in=[order.id for order in orders[:2]]).update(date_placed=orders[0].date_placed)
+        orders = Order.objects.filter(id__in=[order.id for order in orders])
+        expected = [order.number for order in sorted(orders, key=lambda order: (order.date_placed, order.id))]
+        expected.reverse()
+
+        numbers = []
+        url = '{}?cursor=&page_size=2'.format(self.path)
+        while url:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.token)
+            self.assertEqual(response.status_code, 200)
+            content = json.loads(response.content)
+            self.assertNotIn('count', content)
+            numbers += [order['number'] for order in content['results']]
+            url = content['next']
+
+        self.assertEqual(numbers, expected)
+
+        response = self.client.get(self.path, {'cursor': '', 'count': 'true'}, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(json.loads(response.content)['count'], 5)
+
+    def create_order_with_relations(self, seat, offer, source_type, code, usage):
+        """ Creates an order for a course seat, bought with a voucher, with a billing address and a payment source. """
+        basket = factories.create_basket(empty=True)
+        basket.add_product(seat)
+        voucher = factories.VoucherFactory(code=code, usage=usage)
+        voucher.offers.add(offer)
+        basket.vouchers.add(voucher)
+        order = factories.create_order(user=self.user, basket=basket, billing_address=factories.BillingAddressFactory())
+        factories.SourceFactory(order=order, source_type=source_type)
+        return order
+
+    @ddt.data(1, 20)
+    def test_query_budget(self, num_orders):
+        """ Verify a page of orders is listed with a fixed number of queries, whatever the number of orders. """
+        seat = CourseFactory().create_or_update_seat('verified', True, 50, self.partner)
+        voucher, __ = prepare_voucher(_range=factories.RangeFactory(products=[seat]))
+        source_type = factories.SourceTypeFactory()
+        for index in range(num_orders):
+            usage = (Voucher.SINGLE_USE, Voucher.ONCE_PER_CUSTOMER)[index % 2]
+            self.create_order_with_relations(seat, voucher.offers.first(), source_type, 'CODE{}'.format(index), usage)
+
+        with self.assertNumQueries(21):
+            response = self.client.get(self.path, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(len(json.loads(response.content)['results']), num_orders)
+
+    def test_prefetched_voucher_availability(self):
+        """ Verify the availability of vouchers read from the prefetched applications matches the voucher's own. """
+        seat = CourseFactory().create_or_update_seat('verified', True, 50, self.partner)
+        voucher, __ = prepare_voucher(_range=factories.RangeFactory(products=[seat]))
+        order = self.create_order_with_relations(
+            seat, voucher.offers.first(), factories.SourceTypeFactory(), 'CODE', Voucher.ONCE_PER_CUSTOMER
+        )
+        order_voucher = order.basket.vouchers.first()
+        order_voucher.record_usage(order, self.user)
+
+        response = self.client.get(self.path, HTTP_AUTHORIZATION=self.token)
+        is_available_to_user = json.loads(response.content)['results'][0]['vouchers'][0]['is_available_to_user']
+        self.assertEqual(is_available_to_user, list(order_voucher.is_available_to_user(user=self.user)))
+        self.assertFalse(is_available_to_user[0])
+
+    @ddt.data('invalid', 'WyJhIiwgImIiXQ==')
+    def test_keyset_pagination_invalid_cursor(self, cursor):
+        """ Verify requests with an invalid cursor are answered with a 404. """
+        factories.create_order(user=self.user)
+        response = self.client.get(self.path, {'cursor': cursor}, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(response.status_code, 404)
+
     @ddt.unpack
     @ddt.data(
         (True, True),
@@ -259,6 +334,50 @@ class OrderFulfillViewTests(TestCase):
         self.assertEqual(500, response.status_code)
 
 
+@ddt.ddt
+class OrderExportViewTests(TestCase):
+    path = reverse('api:v2:orders:export')
+
+    def setUp(self):
+        super(OrderExportViewTests, self).setUp()
+        self.user = self.create_user(is_staff=True)
+        self.client.login(username=self.user.username, password=self.password)
+        self.order = factories.create_order(user=self.user)
+
+    def test_staff_only(self):
+        """ Verify only staff users can export orders. """
+        user = self.create_user()
+        self.client.login(username=user.username, password=self.password)
+        self.assertEqual(self.client.get(self.path).status_code, 403)
+
+    @ddt.unpack
+    @ddt.data(
+        ({}, 'application/x-ndjson'),
+        ({'output': 'csv'}, 'text/csv'),
+    )
+    def test_export(self, params, content_type):
+        """ Verify the orders are streamed in the requested format. """
+        response = self.client.get(self.path, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], content_type)
+        self.assertIn(str(self.order.number), ''.join(response.streaming_content))
+
+    def test_date_range(self):
+        """ Verify only the orders placed in the date range are exported. """
+        placed = self.order.date_placed
+        response = self.client.get(self.path, {'start_date': placed.date().isoformat()})
+        self.assertEqual(len(list(response.streaming_content)), 1)
+
+        response = self.client.get(self.path, {'end_date': placed.date().isoformat()})
+        self.assertEqual(list(response.streaming_content), [])
+
+    @ddt.data({'output': 'xml'}, {'start_date': 'yesterday'})
+    def test_invalid_parameters(self, params):
+        """ Verify requests with an invalid format or date are answered with a 400. """
+        self.assertEqual(self.client.get(self.path, params).status_code, 400)
+
+
 class OrderDetailViewTests(OrderDetailViewTestMixin, TestCase):
     @property
     def url(self):
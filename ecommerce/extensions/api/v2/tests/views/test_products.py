@@ -7,6 +7,7 @@ import pytz
 from django.core.urlresolvers import reverse
 from django.test import RequestFactory
 from oscar.core.loading import get_model
+from oscar.test import factories
 
 from ecommerce.coupons.tests.mixins import CouponMixin
 from ecommerce.courses.models import Course
@@ -20,6 +21,7 @@ Catalog = get_model('catalogue', 'Catalog')
 Product = get_model('catalogue', 'Product')
 ProductClass = get_model('catalogue', 'ProductClass')
 Voucher = get_model('voucher', 'Voucher')
+VoucherApplication = get_model('voucher', 'VoucherApplication')
 
 
 class ProductViewSetBase(ProductSerializerMixin, CourseCatalogTestMixin, TestCase):
@@ -157,6 +159,27 @@ class ProductViewSetCouponTests(CouponMixin, ProductViewSetBase):
         self.assertEqual(voucher['benefit']['type'], Benefit.PERCENTAGE)
         self.assertEqual(voucher['benefit']['value'], 100.0)
 
+    def test_coupon_voucher_availability(self):
+        """Verify cached responses are not shared between users, and are refreshed when vouchers are applied."""
+        coupon = self.create_coupon()
+        voucher = coupon.attr.coupon_vouchers.vouchers.first()
+        voucher.usage = Voucher.ONCE_PER_CUSTOMER
+        voucher.save()
+        url = reverse('api:v2:product-detail', kwargs={'pk': coupon.id})
+
+        def is_available_to_user():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return json.loads(response.content)['attribute_values'][0]['value'][0]['is_available_to_user'][0]
+
+        self.assertTrue(is_available_to_user())
+        VoucherApplication.objects.create(voucher=voucher, user=self.user, order=factories.create_order())
+        self.assertFalse(is_available_to_user())
+
+        other_user = self.create_user(is_staff=True)
+        self.client.login(username=other_user.username, password=self.password)
+        self.assertTrue(is_available_to_user())
+
     def test_product_filtering(self):
         """Verify products are filtered."""
         self.create_coupon()
@@ -2,6 +2,7 @@ import json
 
 import ddt
 from django.core.urlresolvers import reverse
+from django.test import override_settings
 import httpretty
 import mock
 from oscar.core.loading import get_model
@@ -11,7 +12,7 @@ from rest_framework import status
 from ecommerce.extensions.api.serializers import RefundSerializer
 from ecommerce.extensions.api.tests.test_authentication import AccessTokenMixin
 from ecommerce.extensions.api.v2.tests.views import JSON_CONTENT_TYPE
-from ecommerce.extensions.refund.status import REFUND_LINE
+from ecommerce.extensions.refund.status import REFUND, REFUND_LINE
 from ecommerce.extensions.refund.tests.factories import RefundLineFactory, RefundFactory
 from ecommerce.extensions.refund.tests.mixins import RefundTestMixin
 from ecommerce.tests.mixins import JwtMixin, ThrottlingMixin
@@ -243,3 +244,60 @@ class RefundProcessViewTests(ThrottlingMixin, TestCase):
             response = self.put(decision)
             self.assertEqual(response.status_code, 500)
             self.assertEqual(response.data, RefundSerializer(self.refund).data)
+
+
+@ddt.ddt
+@override_settings(REFUND_PROCESSING_WORKERS=1)
+class RefundBulkProcessViewTests(RefundTestMixin, ThrottlingMixin, TestCase):
+    path = reverse('api:v2:refunds:bulk_process')
+
+    def setUp(self):
+        super(RefundBulkProcessViewTests, self).setUp()
+        self.user = self.create_user(is_staff=True)
+        self.client.login(username=self.user.username, password=self.password)
+        self.refunds = [self.create_refund() for __ in range(3)]
+
+    def post(self, **data):
+        return self.client.post(self.path, json.dumps(data), JSON_CONTENT_TYPE)
+
+    def test_staff_only(self):
+        """ The view should only be accessible to staff users. """
+        user = self.create_user(is_staff=False)
+        self.client.login(username=user.username, password=self.password)
+        response = self.post()
+        self.assertEqual(response.status_code, 403)
+
+    @ddt.data({'action': 'reject'}, {'start_date': 'not-a-date'}, {'limit': 'all'})
+    def test_invalid_parameters(self, data):
+        """ The view should return HTTP 400 if a parameter is invalid. """
+        response = self.post(**data)
+        self.assertEqual(response.status_code, 400)
+
+    @ddt.data(('approve', True), ('approve_payment_only', False))
+    @ddt.unpack
+    def test_success(self, action, revoke_fulfillment):
+        """ The view should process the refunds after the given one, up to the limit, and return their outcomes. """
+        with mock.patch.object(Refund, 'approve', return_value=True) as mock_approve:
+            response = self.post(action=action, limit=1, after=self.refunds[0].id)
+
+        mock_approve.assert_called_once_with(revoke_fulfillment=revoke_fulfillment)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([outcome['refund_id'] for outcome in response.data['outcomes']], [self.refunds[1].id])
+        self.assertTrue(response.data['outcomes'][0]['succeeded'])
+        self.assertEqual(response.data['last_refund_id'], self.refunds[1].id)
+        self.assertEqual(response.data['remaining'], 1)
+
+    def test_no_refunds(self):
+        """ The view should return no outcomes if no refunds match the filter. """
+        response = self.post(statuses=[REFUND.DENIED])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'outcomes': [], 'last_refund_id': 0, 'remaining': 0})
+
+    @override_settings(REFUND_BULK_PROCESSING_LIMIT=2)
+    def test_limit(self):
+        """ The view should process at most REFUND_BULK_PROCESSING_LIMIT refunds. """
+        with mock.patch.object(Refund, 'approve', return_value=True):
+            response = self.post(limit=10)
+
+        self.assertEqual(len(response.data['outcomes']), 2)
+        self.assertEqual(response.data['remaining'], 1)
@@ -38,6 +38,10 @@ BASKET_URLS = [
     ),
 ]
 
+ORDER_URLS = [
+    url(r'^export/$', order_views.OrderExportView.as_view(), name='export'),
+]
+
 PAYMENT_URLS = [
     url(r'^processors/$', payment_views.PaymentProcessorListView.as_view(),
         name='list_processors'),
@@ -45,6 +49,7 @@ PAYMENT_URLS = [
 
 REFUND_URLS = [
     url(r'^$', refund_views.RefundCreateView.as_view(), name='create'),
+    url(r'^process/$', refund_views.RefundBulkProcessView.as_view(), name='bulk_process'),
     url(r'^(?P<pk>[\d]+)/process/$', refund_views.RefundProcessView.as_view(), name='process'),
 ]
 
@@ -74,6 +79,7 @@ urlpatterns = [
     url(r'^baskets/', include(BASKET_URLS, namespace='baskets')),
     url(r'^checkout/$', include(CHECKOUT_URLS, namespace='checkout')),
     url(r'^coupons/', include(COUPON_URLS, namespace='coupons')),
+    url(r'^orders/', include(ORDER_URLS, namespace='orders')),
     url(r'^payment/', include(PAYMENT_URLS, namespace='payment')),
     url(r'^providers/', include(PROVIDER_URLS, namespace='providers')),
     url(r'^publication/', include(ATOMIC_PUBLICATION_URLS, namespace='publication')),
@@ -13,6 +13,7 @@ from slumber.exceptions import SlumberBaseException
 from ecommerce.core.constants import DEFAULT_CATALOG_PAGE_SIZE
 from ecommerce.coupons.utils import get_range_catalog_query_results
 from ecommerce.extensions.api import serializers
+from ecommerce.extensions.api.mixins import VersionedResponseMixin
 
 
 Catalog = get_model('catalogue', 'Catalog')
@@ -20,7 +21,8 @@ Product = get_model('catalogue', 'Product')
 logger = logging.getLogger(__name__)
 
 
-class CatalogViewSet(NestedViewSetMixin, ReadOnlyModelViewSet):
+class CatalogViewSet(VersionedResponseMixin, NestedViewSetMixin, ReadOnlyModelViewSet):
+    versioned_models = (Catalog,)
     queryset = Catalog.objects.all()
     serializer_class = serializers.CatalogSerializer
     permission_classes = (IsAuthenticated, IsAdminUser,)
@@ -13,6 +13,7 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from ecommerce.core.models import BusinessClient
+from ecommerce.core.version_stamps import bump_version_stamps
 from ecommerce.coupons.utils import prepare_course_seat_types
 from ecommerce.extensions.api import data as data_api
 from ecommerce.extensions.api.filters import ProductFilter
@@ -240,6 +241,7 @@ class CouponViewSet(EdxOrderPlacementMixin, viewsets.ModelViewSet):
         coupon_price = request.data.get('price')
         if coupon_price:
             StockRecord.objects.filter(product=coupon).update(price_excl_tax=coupon_price)
+            bump_version_stamps(StockRecord)
 
         note = request.data.get('note')
         if note is not None:
@@ -9,14 +9,17 @@ import waffle
 
 from ecommerce.core.constants import COURSE_ID_REGEX
 from ecommerce.courses.models import Course
+from ecommerce.extensions.api.mixins import VersionedResponseMixin
 from ecommerce.extensions.api.v2.views import NonDestroyableModelViewSet
+from ecommerce.extensions.api.v2.views.products import ProductViewSet
 from ecommerce.extensions.api import serializers
 
 Product = get_model('catalogue', 'Product')
 ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+StockRecord = get_model('partner', 'StockRecord')
 
 
-class CourseViewSet(NonDestroyableModelViewSet):
+class CourseViewSet(VersionedResponseMixin, NonDestroyableModelViewSet):
     product_attribute_value_prefetch = Prefetch(
         'products__attribute_values',
         queryset=ProductAttributeValue.objects.select_related('attribute').all()
@@ -27,12 +30,34 @@ class CourseViewSet(NonDestroyableModelViewSet):
         queryset=Product.objects.select_related('parent__product_class').all()
     )
     lookup_value_regex = COURSE_ID_REGEX
-    queryset = Course.objects.all().prefetch_related(
-        products_prefetch, product_attribute_value_prefetch, 'products__stockrecords'
-    ).all()
+    queryset = Course.objects.all()
     serializer_class = serializers.CourseSerializer
     permission_classes = (IsAuthenticated, IsAdminUser,)
 
+    @property
+    def include_products(self):
+        return bool(self.request.GET.get('include_products', False))
+
+    @property
+    def version_lifetime(self):
+        return ProductViewSet.version_lifetime if self.include_products else None
+
+    def get_versioned_models(self):
+        if self.include_products:
+            return Course, Product, StockRecord
+        return Course,
+
+    def get_queryset(self):
+        queryset = super(CourseViewSet, self).get_queryset()
+
+        # The course type and seats are stored on the course, so products are only loaded if requested.
+        if self.include_products:
+            queryset = queryset.prefetch_related(
+                self.products_prefetch, self.product_attribute_value_prefetch, 'products__stockrecords'
+            )
+
+        return queryset
+
     def list(self, request, *args, **kwargs):
         """
         List all courses.
@@ -63,7 +88,7 @@ class CourseViewSet(NonDestroyableModelViewSet):
 
     def get_serializer_context(self):
         context = super(CourseViewSet, self).get_serializer_context()
-        context['include_products'] = bool(self.request.GET.get('include_products', False))
+        context['include_products'] = self.include_products
         return context
 
     @detail_route(methods=['post'])
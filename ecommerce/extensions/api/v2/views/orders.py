@@ -1,21 +1,29 @@
 """HTTP endpoints for interacting with orders."""
 import logging
 
+from dateutil.parser import parse
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from oscar.core.loading import get_model, get_class
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import detail_route
 from rest_framework.exceptions import PermissionDenied
-from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, DjangoModelPermissions
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.filters import OrderFilter
+from ecommerce.extensions.api.pagination import KeysetPagination
 from ecommerce.extensions.api.permissions import IsStaffOrOwner
 from ecommerce.extensions.api.throttles import ServiceUserThrottle
+from ecommerce.extensions.order.exports import export_csv, export_ndjson, iter_orders
 
 
 logger = logging.getLogger(__name__)
 
+Line = get_model('order', 'Line')
 Order = get_model('order', 'Order')
 
 
@@ -27,6 +35,26 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
     throttle_classes = (ServiceUserThrottle,)
     filter_backends = (filters.DjangoFilterBackend,)
     filter_class = OrderFilter
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date_placed', '-id')
+
+    def get_queryset(self):
+        queryset = super(OrderViewSet, self).get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+
+        # Fetch everything OrderSerializer reads up front, rather than with queries per order, line and voucher.
+        return queryset.select_related('basket', 'billing_address__country', 'user').prefetch_related(
+            Prefetch('lines', queryset=Line.objects.select_related('product__parent__product_class',
+                                                                   'product__product_class')),
+            'lines__attributes',
+            'lines__product__stockrecords',
+            'lines__product__attribute_values__attribute',
+            'sources__source_type',
+            'discounts',
+            'basket__vouchers__applications',
+            'basket__vouchers__offers__benefit',
+        )
 
     def filter_queryset(self, queryset):
         queryset = super(OrderViewSet, self).filter_queryset(queryset)
@@ -61,3 +89,43 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
 
         serializer = self.get_serializer(order)
         return Response(serializer.data)
+
+
+class OrderExportView(APIView):
+    """
+    Streams the orders placed in a date range, with their lines, payment sources, discounts and vouchers.
+
+    The start_date (inclusive) and end_date (exclusive) query parameters take ISO 8601 dates or datetimes, in
+    UTC unless specified. Orders are exported as newline-delimited JSON, one order per line, or as CSV, one line
+    per row, if the output query parameter is csv.
+    """
+    permission_classes = (IsAuthenticated, IsAdminUser,)
+    exporters = {
+        'csv': (export_csv, 'text/csv', 'csv'),
+        'ndjson': (export_ndjson, 'application/x-ndjson', 'ndjson'),
+    }
+
+    def get(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in self.exporters:
+            return Response({'output': 'Must be one of [{}].'.format(', '.join(sorted(self.exporters)))},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        dates = {}
+        for param in ('start_date', 'end_date'):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    date = parse(value)
+                except (TypeError, ValueError):
+                    return Response({param: 'Must be an ISO 8601 date.'}, status=status.HTTP_400_BAD_REQUEST)
+                dates[param] = date if timezone.is_aware(date) else timezone.make_aware(date, timezone.utc)
+
+        exporter, content_type, extension = self.exporters[output]
+        # The orders are read, and written, a chunk at a time, as the response is sent.
+        response = StreamingHttpResponse(
+            exporter(iter_orders(start=dates.get('start_date'), end=dates.get('end_date'))),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = 'attachment; filename=orders.{}'.format(extension)
+        return response
@@ -4,12 +4,14 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
 from ecommerce.extensions.api import serializers
+from ecommerce.extensions.api.mixins import VersionedResponseMixin
 
 
 Partner = get_model('partner', 'Partner')
 
 
-class PartnerViewSet(viewsets.ReadOnlyModelViewSet):
+class PartnerViewSet(VersionedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    versioned_models = (Partner,)
     queryset = Partner.objects.all()
     serializer_class = serializers.PartnerSerializer
     permission_classes = (IsAuthenticated, IsAdminUser,)
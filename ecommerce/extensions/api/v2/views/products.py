@@ -6,14 +6,24 @@ from rest_framework_extensions.mixins import NestedViewSetMixin
 
 from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.filters import ProductFilter
+from ecommerce.extensions.api.mixins import VersionedResponseMixin
+from ecommerce.extensions.api.pagination import KeysetPagination
 from ecommerce.extensions.api.v2.views import NonDestroyableModelViewSet
 
 Product = get_model('catalogue', 'Product')
+StockRecord = get_model('partner', 'StockRecord')
+Voucher = get_model('voucher', 'Voucher')
 
 
-class ProductViewSet(NestedViewSetMixin, NonDestroyableModelViewSet):
+class ProductViewSet(VersionedResponseMixin, NestedViewSetMixin, NonDestroyableModelViewSet):
+    # Coupons are serialized with their vouchers, and whether each is available to the user.
+    versioned_models = (Product, StockRecord, Voucher)
+    # Products become unavailable once they expire.
+    version_lifetime = 60
+    vary_on_user = True
     queryset = Product.objects.all()
     serializer_class = serializers.ProductSerializer
     filter_backends = (filters.DjangoFilterBackend,)
     filter_class = ProductFilter
+    pagination_class = KeysetPagination
     permission_classes = (IsAuthenticated, IsAdminUser,)
@@ -1,15 +1,22 @@
 """HTTP endpoints for interacting with refunds."""
+from dateutil.parser import parse
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from oscar.core.loading import get_model
 from rest_framework import status, generics
 from rest_framework.exceptions import ParseError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.exceptions import BadRequestException
 from ecommerce.extensions.api.permissions import CanActForUser
 from ecommerce.extensions.refund.api import find_orders_associated_with_course, create_refunds
+from ecommerce.extensions.refund.processing import BulkRefundProcessor, DEFAULT_STATUSES, get_refunds
 
 
 Refund = get_model('refund', 'Refund')
@@ -105,3 +112,70 @@ class RefundProcessView(generics.UpdateAPIView):
         http_status = status.HTTP_200_OK if result else status.HTTP_500_INTERNAL_SERVER_ERROR
         serializer = self.get_serializer(refund)
         return Response(serializer.data, status=http_status)
+
+
+class RefundBulkProcessView(APIView):
+    """Approve the refunds matching a filter, e.g. those of a cancelled course.
+
+    The refunds are selected by the optional course_id, start_date and end_date (ISO 8601 dates, in UTC unless
+    specified, bounding the creation date of the refunds) and statuses (defaulting to open) parameters. The action
+    parameter is approve (the default) or approve_payment_only.
+
+    At most limit (and no more than settings.REFUND_BULK_PROCESSING_LIMIT) refunds are processed per request, in
+    order of ID, starting after the refund ID given as the after parameter. The view returns HTTP status 200, the
+    outcome of each refund processed, the ID of the last one (to be passed as after to the next request) and the
+    number of refunds remaining after it. Processed refunds leave the statuses selected, so a run which is
+    interrupted is resumed by repeating the requests from the start. Refunds processed by an overlapping run are
+    skipped, and reported as such in their outcome.
+
+    Only staff users are permitted to use this view.
+    """
+    permission_classes = (IsAuthenticated, IsAdminUser,)
+    actions = {
+        'approve': True,
+        'approve_payment_only': False,
+    }
+
+    # Disable atomicity for the view, so that each refund is committed as soon as it is processed, like it is when
+    # refunds are processed concurrently or by the process_refunds command.
+    @method_decorator(transaction.non_atomic_requests)
+    def dispatch(self, request, *args, **kwargs):
+        return super(RefundBulkProcessView, self).dispatch(request, *args, **kwargs)
+
+    def post(self, request):
+        action = request.data.get('action', 'approve').lower()
+        if action not in self.actions:
+            raise ParseError('The action [{}] is not valid.'.format(action))
+
+        dates = {}
+        for param in ('start_date', 'end_date'):
+            value = request.data.get(param)
+            if value:
+                try:
+                    date = parse(value)
+                except (TypeError, ValueError):
+                    raise ParseError('The {} [{}] is not an ISO 8601 date.'.format(param, value))
+                dates[param] = date if timezone.is_aware(date) else timezone.make_aware(date, timezone.utc)
+
+        try:
+            limit = min(int(request.data.get('limit', settings.REFUND_BULK_PROCESSING_LIMIT)),
+                        settings.REFUND_BULK_PROCESSING_LIMIT)
+            after = int(request.data.get('after', 0))
+        except (TypeError, ValueError):
+            raise ParseError('The limit and after parameters must be integers.')
+
+        refunds = get_refunds(
+            course_id=request.data.get('course_id'),
+            start=dates.get('start_date'),
+            end=dates.get('end_date'),
+            statuses=request.data.get('statuses') or DEFAULT_STATUSES
+        ).filter(id__gt=after)
+
+        batch = list(refunds[:max(limit, 0)])
+        outcomes = BulkRefundProcessor(revoke_fulfillment=self.actions[action]).process(batch)
+        last_refund_id = batch[-1].id if batch else after
+        return Response({
+            'outcomes': outcomes,
+            'last_refund_id': last_refund_id,
+            'remaining': refunds.filter(id__gt=last_refund_id).count(),
+        })
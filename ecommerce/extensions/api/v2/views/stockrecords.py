@@ -4,11 +4,13 @@ from rest_framework.permissions import DjangoModelPermissionsOrAnonReadOnly
 from rest_framework.response import Response
 
 from ecommerce.extensions.api import serializers
+from ecommerce.extensions.api.mixins import VersionedResponseMixin
 
 StockRecord = get_model('partner', 'StockRecord')
 
 
-class StockRecordViewSet(viewsets.ModelViewSet):
+class StockRecordViewSet(VersionedResponseMixin, viewsets.ModelViewSet):
+    versioned_models = (StockRecord,)
     permission_classes = (DjangoModelPermissionsOrAnonReadOnly,)
     serializer_class = serializers.StockRecordSerializer
     queryset = StockRecord.objects.all()
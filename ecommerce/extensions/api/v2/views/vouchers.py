@@ -19,6 +19,7 @@ from ecommerce.courses.models import Course
 from ecommerce.courses.utils import get_course_info_from_catalog
 from ecommerce.coupons.utils import get_range_catalog_query_results
 from ecommerce.extensions.api import serializers
+from ecommerce.extensions.api.pagination import KeysetPagination
 from ecommerce.extensions.api.permissions import IsOffersOrIsAuthenticatedAndStaff
 from ecommerce.extensions.api.v2.views import NonDestroyableModelViewSet
 
@@ -49,6 +50,7 @@ class VoucherViewSet(NonDestroyableModelViewSet):
     permission_classes = (IsOffersOrIsAuthenticatedAndStaff, )
     filter_backends = (filters.DjangoFilterBackend, )
     filter_class = VoucherFilter
+    pagination_class = KeysetPagination
 
     @action(is_for_list=True, methods=['get'], endpoint='offers')
     def offers(self, request):
@@ -277,7 +279,7 @@ class VoucherViewSet(NonDestroyableModelViewSet):
             'multiple_credit_providers': multiple_credit_providers,
             'organization': CourseKey.from_string(course.id).org,
             'credit_provider_price': credit_provider_price,
-            'seat_type': product.attr.certificate_type,
+            'seat_type': product.flat_attr.certificate_type,
             'stockrecords': serializers.StockRecordSerializer(stock_record).data,
             'title': course.name,
             'voucher_end_date': voucher.end_datetime
@@ -16,6 +16,7 @@ from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.extensions.partner.models import StockRecord
 from ecommerce.extensions.test.factories import prepare_voucher
 from ecommerce.referrals.models import Referral
+from ecommerce.referrals.utils import flush_referral_attributions
 from ecommerce.tests.factories import SiteConfigurationFactory
 from ecommerce.tests.testcases import TestCase
 
@@ -119,12 +120,26 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
             basket = prepare_basket(self.request, product)
             mock_attr_method.assert_called_with(basket, self.request)
 
+    def test_attribute_cookie_data_deferred(self):
+        """ Verify the referral is not persisted until the buffered attributions are flushed. """
+        self.request.COOKIES['affiliate_id'] = 'test_affiliate'
+        basket = BasketFactory(owner=self.request.user, site=self.request.site)
+        self.assertIsNotNone(self.request.site.siteconfiguration)
+
+        with self.assertNumQueries(0):
+            attribute_cookie_data(basket, self.request)
+
+        self.assertFalse(Referral.objects.filter(basket_id=basket.id).exists())
+        flush_referral_attributions(self.request)
+        self.assertTrue(Referral.objects.filter(basket_id=basket.id).exists())
+
     def test_attribute_cookie_data_affiliate_cookie_lifecycle(self):
         """ Verify a basket is returned and referral captured. """
         affiliate_id = 'test_affiliate'
         self.request.COOKIES['affiliate_id'] = affiliate_id
         basket = BasketFactory(owner=self.request.user, site=self.request.site)
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test affiliate id from cookie saved in referral
         referral = Referral.objects.get(basket_id=basket.id)
@@ -134,6 +149,7 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
         new_affiliate_id = 'new_affiliate'
         self.request.COOKIES['affiliate_id'] = new_affiliate_id
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test new affiliate id saved
         referral = Referral.objects.get(basket_id=basket.id)
@@ -142,6 +158,7 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
         # expire cookie
         del self.request.COOKIES['affiliate_id']
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test referral record is deleted when no cookie set
         with self.assertRaises(Referral.DoesNotExist):
@@ -169,6 +186,7 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
         self.request.COOKIES['test.edx.utm'] = json.dumps(utm_cookie)
         basket = BasketFactory(owner=self.request.user, site=self.request.site)
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test utm data from cookie saved in referral
         referral = Referral.objects.get(basket_id=basket.id)
@@ -198,6 +216,7 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
         }
         self.request.COOKIES['test.edx.utm'] = json.dumps(new_utm_cookie)
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test new utm data saved
         referral = Referral.objects.get(basket_id=basket.id)
@@ -211,6 +230,7 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
         # expire cookie
         del self.request.COOKIES['test.edx.utm']
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test referral record is deleted when no cookie set
         with self.assertRaises(Referral.DoesNotExist):
@@ -240,6 +260,7 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
         self.request.COOKIES['affiliate_id'] = affiliate_id
         basket = BasketFactory(owner=self.request.user, site=self.request.site)
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test affiliate id & UTM data from cookie saved in referral
         referral = Referral.objects.get(basket_id=basket.id)
@@ -255,6 +276,7 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
         # expire 1 cookie
         del self.request.COOKIES['test.edx.utm']
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test affiliate id still saved in referral but utm data removed
         referral = Referral.objects.get(basket_id=basket.id)
@@ -269,6 +291,7 @@ class BasketUtilsTests(CourseCatalogTestMixin, TestCase):
         # expire other cookie
         del self.request.COOKIES['affiliate_id']
         attribute_cookie_data(basket, self.request)
+        flush_referral_attributions(self.request)
 
         # test referral record is deleted when no cookies are set
         with self.assertRaises(Referral.DoesNotExist):
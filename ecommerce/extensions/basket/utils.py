@@ -8,11 +8,12 @@ from oscar.core.loading import get_class, get_model
 import pytz
 
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME, SEAT_PRODUCT_CLASS_NAME
+from ecommerce.courses.models import Course
 from ecommerce.referrals.models import Referral
+from ecommerce.referrals.utils import get_referral_attribution_buffer
 
 Applicator = get_class('offer.utils', 'Applicator')
 Basket = get_model('basket', 'Basket')
-StockRecord = get_model('partner', 'StockRecord')
 
 logger = logging.getLogger(__name__)
 
@@ -59,65 +60,39 @@ def get_basket_switch_data(product):
 
     if product_class_name == ENROLLMENT_CODE_PRODUCT_CLASS_NAME:
         switch_link_text = _('Click here to just purchase an enrollment for yourself')
-        structure = 'child'
     elif product_class_name == SEAT_PRODUCT_CLASS_NAME:
         switch_link_text = _('Click here to purchase multiple seats in this course')
-        structure = 'standalone'
-
-    stock_records = StockRecord.objects.filter(
-        product__course_id=product.course_id,
-        product__structure=structure
-    )
-
-    # Determine the proper partner SKU to embed in the single/multiple basket switch link
-    # The logic here is a little confusing.  "Seat" products have "certificate_type" attributes, and
-    # "Enrollment Code" products have "seat_type" attributes.  If the basket is in single-purchase
-    # mode, we are working with a Seat product and must present the 'buy multiple' switch link and
-    # SKU from the corresponding Enrollment Code product.  If the basket is in multi-purchase mode,
-    # we are working with an Enrollment Code product and must present the 'buy single' switch link
-    # and SKU from the corresponding Seat product.
-    partner_sku = None
-    product_cert_type = getattr(product.attr, 'certificate_type', None)
-    product_seat_type = getattr(product.attr, 'seat_type', None)
-    for stock_record in stock_records:
-        stock_record_cert_type = getattr(stock_record.product.attr, 'certificate_type', None)
-        stock_record_seat_type = getattr(stock_record.product.attr, 'seat_type', None)
-        if (product_seat_type and product_seat_type == stock_record_cert_type) or \
-           (product_cert_type and product_cert_type == stock_record_seat_type):
-            partner_sku = stock_record.partner_sku
-            break
+
+    # Determine the proper partner SKU to embed in the single/multiple basket switch link. If the basket is in
+    # single-purchase mode, we are working with a Seat product and must present the 'buy multiple' switch link and
+    # SKU from the corresponding Enrollment Code product. If the basket is in multi-purchase mode, we are working
+    # with an Enrollment Code product and must present the 'buy single' switch link and SKU from the corresponding
+    # Seat product. The pairing is precomputed when the seats and enrollment code are created.
+    partner_sku = Course.get_sibling_sku(product)
     return switch_link_text, partner_sku
 
 
 def attribute_cookie_data(basket, request):
+    """
+    Attribute the basket to the affiliate and UTM data found in the request cookies.
+
+    The attribution is buffered on the request and persisted once the request has been processed
+    (see ReferralAttributionMiddleware), so no referral queries are made here.
+    """
     try:
-        referral = _referral_from_basket_site(basket, request.site)
+        attributes = dict.fromkeys(Referral.ATTRIBUTION_ATTRIBUTES)
 
-        _record_affiliate_basket_attribution(referral, request)
-        _record_utm_basket_attribution(referral, request)
+        _record_affiliate_basket_attribution(attributes, request)
+        _record_utm_basket_attribution(attributes, request)
 
-        # Save the record if any attribution attributes are set on it.
-        if any([getattr(referral, attribute) for attribute in Referral.ATTRIBUTION_ATTRIBUTES]):
-            referral.save()
-        # Clean up the record if no attribution attributes are set and it exists in the DB.
-        elif referral.pk:
-            referral.delete()
-        # Otherwise we can ignore the instantiated but unsaved referral
+        get_referral_attribution_buffer(request).add(basket, request.site, attributes)
 
     # Don't let attribution errors prevent users from creating baskets
     except:  # pylint: disable=broad-except, bare-except
         logger.exception('Error while attributing cookies to basket.')
 
 
-def _referral_from_basket_site(basket, site):
-    try:
-        referral = Referral.objects.get(basket=basket, site=site)
-    except Referral.DoesNotExist:
-        referral = Referral(basket=basket, site=site)
-    return referral
-
-
-def _record_affiliate_basket_attribution(referral, request):
+def _record_affiliate_basket_attribution(attributes, request):
     """
       Attribute this user's basket to the referring affiliate, if applicable.
     """
@@ -127,10 +102,10 @@ def _record_affiliate_basket_attribution(referral, request):
     # affiliate_id = request.COOKIES.get(affiliate_cookie_name)
 
     affiliate_id = request.COOKIES.get(settings.AFFILIATE_COOKIE_KEY, "")
-    referral.affiliate_id = affiliate_id
+    attributes['affiliate_id'] = affiliate_id
 
 
-def _record_utm_basket_attribution(referral, request):
+def _record_utm_basket_attribution(attributes, request):
     """
       Attribute this user's basket to UTM data, if applicable.
     """
@@ -139,7 +114,7 @@ def _record_utm_basket_attribution(referral, request):
     utm = json.loads(utm_cookie)
 
     for attr_name in ['utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content']:
-        setattr(referral, attr_name, utm.get(attr_name, ""))
+        attributes[attr_name] = utm.get(attr_name, "")
 
     created_at_unixtime = utm.get('created_at')
     if created_at_unixtime:
@@ -150,4 +125,4 @@ def _record_utm_basket_attribution(referral, request):
     else:
         created_at_datetime = None
 
-    referral.utm_created_at = created_at_datetime
+    attributes['utm_created_at'] = created_at_datetime
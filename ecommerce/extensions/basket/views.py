@@ -14,7 +14,9 @@ from slumber.exceptions import SlumberBaseException
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME, SEAT_PRODUCT_CLASS_NAME
 from ecommerce.core.exceptions import SiteConfigurationError
 from ecommerce.core.url_utils import get_lms_url
-from ecommerce.courses.utils import get_certificate_type_display_value, get_course_info_from_catalog, mode_for_seat
+from ecommerce.courses.utils import (
+    get_certificate_type_display_value, get_course_info_from_catalog_many, mode_for_seat
+)
 from ecommerce.extensions.analytics.utils import prepare_analytics_data
 from ecommerce.extensions.basket.utils import prepare_basket, get_basket_switch_data
 from ecommerce.extensions.offer.utils import format_benefit_value
@@ -66,7 +68,7 @@ class BasketSingleItemView(View):
                         'User [%s] attempted to repurchase the [%s] seat of course [%s]',
                         request.user.username,
                         mode_for_seat(product),
-                        product.attr.course_key
+                        product.flat_attr.course_key
                     )
                     msg = _('You are already enrolled in {course}.').format(course=product.course.name)
                     return HttpResponseBadRequest(msg)
@@ -91,11 +93,45 @@ class BasketSummaryView(BasketView):
         """
         seat_type = None
         if product.get_product_class().name == SEAT_PRODUCT_CLASS_NAME:
-            seat_type = get_certificate_type_display_value(product.attr.certificate_type)
+            seat_type = get_certificate_type_display_value(product.flat_attr.certificate_type)
         elif product.get_product_class().name == ENROLLMENT_CODE_PRODUCT_CLASS_NAME:
-            seat_type = get_certificate_type_display_value(product.attr.seat_type)
+            seat_type = get_certificate_type_display_value(product.flat_attr.seat_type)
         return seat_type
 
+    def _get_courses_data(self, lines):
+        """
+        Returns the catalog data of the course of each line.
+
+        The catalog data for all lines is retrieved at once, rather than making a round trip per line.
+
+        Returns:
+            list of dict: The key, name, image URL and short description of the course of each line.
+        """
+        course_keys = [CourseKey.from_string(line.product.flat_attr.course_key) for line in lines]
+        courses = get_course_info_from_catalog_many(self.request.site, course_keys) if course_keys else {}
+
+        courses_data = []
+        for course_key in course_keys:
+            course_data = {
+                'course_key': course_key,
+                'course_name': None,
+                'image_url': None,
+                'course_short_description': None,
+            }
+            course = courses.get(unicode(course_key))
+            if course is not None:
+                try:
+                    course_data['image_url'] = course['image']['src']
+                except (KeyError, TypeError):
+                    course_data['image_url'] = ''
+                course_data['course_short_description'] = course.get('short_description', '')
+                course_data['course_name'] = course.get('title', '')
+            else:
+                logger.error('Failed to retrieve data from Catalog Service for course [%s].', course_key)
+            courses_data.append(course_data)
+
+        return courses_data
+
     def get_context_data(self, **kwargs):
         context = super(BasketSummaryView, self).get_context_data(**kwargs)
         formset = context.get('formset', [])
@@ -107,22 +143,8 @@ class BasketSummaryView(BasketView):
         site = self.request.site
         site_configuration = site.siteconfiguration
 
-        for line in lines:
-            course_key = CourseKey.from_string(line.product.attr.course_key)
-            course_name = None
-            image_url = None
-            short_description = None
-            try:
-                course = get_course_info_from_catalog(self.request.site, course_key)
-                try:
-                    image_url = course['image']['src']
-                except (KeyError, TypeError):
-                    image_url = ''
-                short_description = course.get('short_description', '')
-                course_name = course.get('title', '')
-            except (ConnectionError, SlumberBaseException, Timeout):
-                logger.exception('Failed to retrieve data from Catalog Service for course [%s].', course_key)
-
+        for line, course_data in zip(lines, self._get_courses_data(lines)):
+            course_key = course_data['course_key']
             if self.request.site.siteconfiguration.enable_enrollment_codes:
                 # Get variables for the switch link that toggles from enrollment codes and seat.
                 switch_link_text, partner_sku = get_basket_switch_data(line.product)
@@ -139,16 +161,13 @@ class BasketSummaryView(BasketView):
             else:
                 benefit_value = None
 
-            lines_data.append({
-                'seat_type': self._determine_seat_type(line.product),
-                'course_name': course_name,
-                'course_key': course_key,
-                'image_url': image_url,
-                'course_short_description': short_description,
-                'benefit_value': benefit_value,
-                'enrollment_code': line.product.get_product_class().name == ENROLLMENT_CODE_PRODUCT_CLASS_NAME,
-                'line': line,
-            })
+            lines_data.append(dict(
+                course_data,
+                seat_type=self._determine_seat_type(line.product),
+                benefit_value=benefit_value,
+                enrollment_code=line.product.get_product_class().name == ENROLLMENT_CODE_PRODUCT_CLASS_NAME,
+                line=line
+            ))
 
             user = self.request.user
             context.update({
@@ -180,8 +199,8 @@ class BasketSummaryView(BasketView):
 
             # Check product attributes to determine if ID verification is required for this basket
             try:
-                is_verification_required = line.product.attr.id_verification_required \
-                    and line.product.attr.certificate_type != 'credit'
+                is_verification_required = line.product.flat_attr.id_verification_required \
+                    and line.product.flat_attr.certificate_type != 'credit'
             except AttributeError:
                 pass
 
@@ -1,39 +1,44 @@
 from __future__ import unicode_literals
+from multiprocessing.pool import ThreadPool
 import logging
 from optparse import make_option
+import os
+import traceback
 
 from dateutil.parser import parse
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.core.management import BaseCommand
 from django.db import transaction
-import requests
 import waffle
 
+from ecommerce.core.http_client import get_session
 from ecommerce.courses.models import Course
 
 
 logger = logging.getLogger(__name__)
 
 
-class MigratedCourse(object):
-    def __init__(self, course_id, site_domain):
-        self.course, _created = Course.objects.get_or_create(id=course_id)
-        self.site_configuration = Site.objects.get(domain=site_domain).siteconfiguration
+class LMSCourseLoader(object):
+    """ Retrieves the name, verification deadline and modes of courses from the LMS. """
 
-    def load_from_lms(self, access_token):
+    def __init__(self, site_configuration, session=None, pool=None):
         """
-        Loads course products from the LMS.
-
-        Loaded data is NOT persisted until the save() method is called.
+        Arguments:
+            site_configuration (SiteConfiguration): Configuration of the site whose LMS is queried.
+
+        Keyword Arguments:
+            session (requests.Session): Session used to send requests to the LMS. Defaults to a session of
+                the shared HTTP client.
+            pool (ThreadPool): If given, modes are retrieved from the Enrollment API by this pool, concurrently
+                with the course name and verification deadline.
         """
-        name, verification_deadline, modes = self._retrieve_data_from_lms(access_token)
+        self.site_configuration = site_configuration
+        self.session = session or get_session()
+        self.pool = pool
 
-        self.course.name = name
-        self.course.verification_deadline = verification_deadline
-        self.course.save()
-
-        self._get_products(modes)
+    def _get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
 
     def _build_lms_url(self, path):
         # We avoid using urljoin here because it URL-encodes the path, and some LMS APIs
@@ -41,12 +46,12 @@ class MigratedCourse(object):
         host = self.site_configuration.lms_url_root.strip('/')
         return '{host}/{path}'.format(host=host, path=path)
 
-    def _query_commerce_api(self, headers):
+    def _query_commerce_api(self, course_id, headers):
         """Get course name and verification deadline from the Commerce API."""
-        url = '{}/courses/{}/'.format(self._build_lms_url('api/commerce/v1'), self.course.id)
+        url = '{}/courses/{}/'.format(self._build_lms_url('api/commerce/v1'), course_id)
         timeout = settings.COMMERCE_API_TIMEOUT
 
-        response = requests.get(url, headers=headers, timeout=timeout)
+        response = self._get(url, headers=headers, timeout=timeout)
         if response.status_code != 200:
             raise Exception('Unable to retrieve course name and verification deadline: [{status}] - {body}'.format(
                 status=response.status_code,
@@ -58,7 +63,7 @@ class MigratedCourse(object):
 
         course_name = data.get('name')
         if course_name is None:
-            message = u'Unable to retrieve course name for {}.'.format(self.course.id)
+            message = u'Unable to retrieve course name for {}.'.format(course_id)
             logger.error(message)
             raise Exception(message)
 
@@ -67,15 +72,15 @@ class MigratedCourse(object):
 
         return course_name.strip(), course_verification_deadline
 
-    def _query_course_structure_api(self, access_token):
+    def _query_course_structure_api(self, course_id, access_token):
         """Get course name from the Course Structure API."""
         headers = {
             'Accept': 'application/json',
             'Authorization': 'Bearer ' + access_token
         }
 
-        url = self._build_lms_url('api/course_structure/v0/courses/{}/'.format(self.course.id))
-        response = requests.get(url, headers=headers)
+        url = self._build_lms_url('api/course_structure/v0/courses/{}/'.format(course_id))
+        response = self._get(url, headers=headers)
 
         if response.status_code != 200:
             raise Exception('Unable to retrieve course name: [{status}] - {body}'.format(
@@ -88,7 +93,7 @@ class MigratedCourse(object):
 
         course_name = data.get('name')
         if course_name is None:
-            message = u'Aborting migration. No name is available for {}.'.format(self.course.id)
+            message = u'Aborting migration. No name is available for {}.'.format(course_id)
             logger.error(message)
             raise Exception(message)
 
@@ -98,10 +103,10 @@ class MigratedCourse(object):
 
         return course_name.strip(), course_verification_deadline
 
-    def _query_enrollment_api(self, headers):
+    def _query_enrollment_api(self, course_id, headers):
         """Get modes and pricing from Enrollment API."""
-        url = self._build_lms_url('api/enrollment/v1/course/{}?include_expired=1'.format(self.course.id))
-        response = requests.get(url, headers=headers)
+        url = self._build_lms_url('api/enrollment/v1/course/{}?include_expired=1'.format(course_id))
+        response = self._get(url, headers=headers)
 
         if response.status_code != 200:
             raise Exception('Unable to retrieve course modes: [{status}] - {body}'.format(
@@ -113,9 +118,15 @@ class MigratedCourse(object):
         logger.debug(data)
         return data['course_modes']
 
-    def _retrieve_data_from_lms(self, access_token):
+    def retrieve(self, course_id, access_token):
         """
         Retrieves the course name and modes from the LMS.
+
+        The Course Structure API is only queried if the Commerce API fails, since it is a fallback for the
+        course name; the Enrollment API is queried concurrently with both if the loader has a pool.
+
+        Returns:
+            tuple: Course name, verification deadline and modes.
         """
         headers = {
             'Accept': 'application/json',
@@ -123,19 +134,46 @@ class MigratedCourse(object):
             'X-Edx-Api-Key': settings.EDX_API_KEY
         }
 
+        modes = self.pool.apply_async(self._query_enrollment_api, (course_id, headers)) if self.pool else None
+
         try:
-            course_name, course_verification_deadline = self._query_commerce_api(headers)
+            course_name, course_verification_deadline = self._query_commerce_api(course_id, headers)
         except Exception as e:  # pylint: disable=broad-except
             logger.warning(
                 u"Calling Commerce API failed with: [%s]. Falling back to Course Structure API.",
                 e.message
             )
-            course_name, course_verification_deadline = self._query_course_structure_api(access_token)
+            course_name, course_verification_deadline = self._query_course_structure_api(course_id, access_token)
 
-        modes = self._query_enrollment_api(headers)
+        modes = modes.get() if modes else self._query_enrollment_api(course_id, headers)
 
         return course_name, course_verification_deadline, modes
 
+
+class MigratedCourse(object):
+    def __init__(self, course_id, site_domain):
+        self.course, _created = Course.objects.get_or_create(id=course_id)
+        self.site_configuration = Site.objects.get(domain=site_domain).siteconfiguration
+        self.loader = LMSCourseLoader(self.site_configuration)
+
+    def load_from_lms(self, access_token, data=None):
+        """
+        Loads course products from the LMS.
+
+        Loaded data is NOT persisted until the save() method is called.
+
+        Keyword Arguments:
+            data (tuple): Course name, verification deadline and modes, if they have already been
+                retrieved with LMSCourseLoader.retrieve.
+        """
+        name, verification_deadline, modes = data or self.loader.retrieve(self.course.id, access_token)
+
+        self.course.name = name
+        self.course.verification_deadline = verification_deadline
+        self.course.save()
+
+        self._get_products(modes)
+
     def _get_products(self, modes):
         """ Creates/updates course seat products. """
         for mode in modes:
@@ -170,12 +208,27 @@ class Command(BaseCommand):
                     dest='site_domain',
                     default=None,
                     help='Domain for the ecommerce site providing the course.'),
+        make_option('--workers',
+                    action='store',
+                    dest='workers',
+                    type=int,
+                    default=1,
+                    help='Number of courses retrieved from the LMS concurrently. By default courses are '
+                         'migrated one at a time.'),
+        make_option('--checkpoint',
+                    action='store',
+                    dest='checkpoint',
+                    default=None,
+                    help='Path to a file listing the courses already migrated, which are skipped. '
+                         'The courses saved to the database are appended to it.'),
     )
 
     def handle(self, *args, **options):
-        course_ids = args
+        course_ids = [unicode(course_id) for course_id in args]
         access_token = options.get('access_token')
         site_domain = options.get('site_domain')
+        workers = options.get('workers') or 1
+        checkpoint = options.get('checkpoint')
         if not access_token:
             logger.error('Courses cannot be migrated if no access token is supplied.')
             return
@@ -184,40 +237,89 @@ class Command(BaseCommand):
             logger.error('Courses cannot be migrated without providing a site domain.')
             return
 
-        for course_id in course_ids:
-            course_id = unicode(course_id)
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as checkpoint_file:
+                migrated_course_ids = set(line.strip() for line in checkpoint_file)
+
+            logger.info('Skipping [%d] courses already migrated according to [%s].',
+                        len(migrated_course_ids), checkpoint)
+            course_ids = [course_id for course_id in course_ids if course_id not in migrated_course_ids]
+
+        if workers == 1:
+            for course_id in course_ids:
+                self.migrate(course_id, site_domain, access_token, options, checkpoint)
+            return
+
+        # Courses are retrieved from the LMS concurrently, but saved one at a time by this thread, so that
+        # worker threads never access the database.
+        site_configuration = Site.objects.get(domain=site_domain).siteconfiguration
+        course_pool = ThreadPool(workers)
+        enrollment_pool = ThreadPool(workers)
+        loader = LMSCourseLoader(site_configuration, pool=enrollment_pool)
+
+        def _retrieve(course_id):
+            # The traceback is formatted by the worker thread, since it is lost once the exception is handled.
             try:
-                with transaction.atomic():
-                    migrated_course = MigratedCourse(course_id, site_domain)
-                    migrated_course.load_from_lms(access_token)
-
-                    course = migrated_course.course
-                    msg = 'Retrieved info for {0} ({1}):\n'.format(course.id, course.name)
-                    msg += '\t(cert. type, verified?, price, SKU, slug, expires)\n'
-
-                    for seat in course.seat_products:
-                        stock_record = seat.stockrecords.first()
-                        data = (
-                            getattr(seat.attr, 'certificate_type', ''),
-                            seat.attr.id_verification_required,
-                            '{0} {1}'.format(stock_record.price_currency, stock_record.price_excl_tax),
-                            stock_record.partner_sku,
-                            seat.slug,
-                            seat.expires
-                        )
-                        msg += '\t{}\n'.format(data)
-
-                    logger.info(msg)
-
-                    if options.get('commit', False):
-                        logger.info('Course [%s] was saved to the database.', course.id)
-                        if waffle.switch_is_active('publish_course_modes_to_lms'):
-                            course.publish_to_lms(access_token=access_token)
-                        else:
-                            logger.info('Data was not published to LMS because the switch '
-                                        '[publish_course_modes_to_lms] is disabled.')
-                    else:
-                        logger.info('Course [%s] was NOT saved to the database.', course.id)
-                        raise Exception('Forced rollback.')
+                return course_id, loader.retrieve(course_id, access_token), None
             except Exception:  # pylint: disable=broad-except
-                logger.exception('Failed to migrate [%s]!', course_id)
+                return course_id, None, traceback.format_exc()
+
+        try:
+            for course_id, data, error in course_pool.imap_unordered(_retrieve, course_ids):
+                if error:
+                    logger.error('Failed to migrate [%s]!\n%s', course_id, error)
+                    continue
+
+                self.migrate(course_id, site_domain, access_token, options, checkpoint, lms_data=data)
+        finally:
+            for pool in (course_pool, enrollment_pool):
+                pool.close()
+                pool.join()
+
+    def migrate(self, course_id, site_domain, access_token, options, checkpoint, lms_data=None):
+        """
+        Migrates a course, and records it to the checkpoint file if the migrated data was saved.
+
+        Keyword Arguments:
+            lms_data (tuple): Data already retrieved from the LMS for the course.
+        """
+        try:
+            with transaction.atomic():
+                migrated_course = MigratedCourse(course_id, site_domain)
+                migrated_course.load_from_lms(access_token, data=lms_data)
+
+                course = migrated_course.course
+                msg = 'Retrieved info for {0} ({1}):\n'.format(course.id, course.name)
+                msg += '\t(cert. type, verified?, price, SKU, slug, expires)\n'
+
+                for seat in course.seat_products:
+                    stock_record = seat.stockrecords.first()
+                    data = (
+                        getattr(seat.attr, 'certificate_type', ''),
+                        seat.attr.id_verification_required,
+                        '{0} {1}'.format(stock_record.price_currency, stock_record.price_excl_tax),
+                        stock_record.partner_sku,
+                        seat.slug,
+                        seat.expires
+                    )
+                    msg += '\t{}\n'.format(data)
+
+                logger.info(msg)
+
+                if options.get('commit', False):
+                    logger.info('Course [%s] was saved to the database.', course.id)
+                    if waffle.switch_is_active('publish_course_modes_to_lms'):
+                        course.publish_to_lms(access_token=access_token)
+                    else:
+                        logger.info('Data was not published to LMS because the switch '
+                                    '[publish_course_modes_to_lms] is disabled.')
+                else:
+                    logger.info('Course [%s] was NOT saved to the database.', course.id)
+                    raise Exception('Forced rollback.')
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Failed to migrate [%s]!', course_id)
+            return
+
+        if checkpoint:
+            with open(checkpoint, 'a') as checkpoint_file:
+                checkpoint_file.write('{}\n'.format(course_id))
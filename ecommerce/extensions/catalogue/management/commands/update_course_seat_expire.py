@@ -1,18 +1,29 @@
 from __future__ import unicode_literals
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+import json
 import logging
+import os
 import time
 from optparse import make_option
 
 from dateutil import parser
 from django.core.management import BaseCommand, CommandError
+from django.db.models import F
+from django.utils import timezone
 from edx_rest_api_client.client import EdxRestApiClient
+from oscar.core.loading import get_model
 from slumber.exceptions import HttpClientError
 
+from ecommerce.core.history import bulk_update, bulk_update_with_history
+from ecommerce.core.http_client import get_session
 from ecommerce.core.url_utils import get_lms_url
+from ecommerce.core.version_stamps import bump_version_stamps
 from ecommerce.courses.models import Course
 
 
 logger = logging.getLogger(__name__)
+Product = get_model('catalogue', 'Product')
 
 
 class Command(BaseCommand):
@@ -26,6 +37,24 @@ class Command(BaseCommand):
                     default=False,
                     help='Save the data to the database. If this is not set, '
                          'expires date will not be updated'),
+        make_option('--page_size',
+                    action='store',
+                    dest='page_size',
+                    type=int,
+                    default=100,
+                    help='Number of courses requested from the LMS Course API at a time.'),
+        make_option('--workers',
+                    action='store',
+                    dest='workers',
+                    type=int,
+                    default=4,
+                    help='Number of pages requested from the LMS Course API concurrently.'),
+        make_option('--checkpoint',
+                    action='store',
+                    dest='checkpoint',
+                    default=None,
+                    help='Path to a file recording the pages already retrieved from the LMS Course API, '
+                         'from which an interrupted run is resumed.'),
     )
 
     ch = logging.StreamHandler()
@@ -34,71 +63,158 @@ class Command(BaseCommand):
     enrollment_date_not_found = set()
     pause_time = 5
     max_tries = 5
+    seats_to_update = ['honor', 'audit', 'no-id-professional', 'professional']
+    # Number of seats updated by a single query.
+    update_chunk_size = 500
 
     def handle(self, *args, **options):
-        seats_to_update = ['honor', 'audit', 'no-id-professional', 'professional']
         save_to_db = options.get('commit', False)
-        courses_enrollment_info = self._get_courses_enrollment_info()
+        courses_enrollment_info = self._get_courses_enrollment_info(
+            page_size=options.get('page_size', 100),
+            workers=options.get('workers', 4),
+            checkpoint=options.get('checkpoint')
+        )
 
         if not courses_enrollment_info:
             msg = 'No course enrollment information found.'
             logger.error(msg)
             raise CommandError(msg)
 
-        courses = Course.objects.all().order_by('id')
-        logger.info('[%d] courses found for update.', courses.count())
+        course_ids = Course.objects.order_by('id').values_list('id', flat=True)
+        logger.info('[%d] courses found for update.', len(course_ids))
 
-        for course in courses:
-            enrollment_end_date = courses_enrollment_info.get(course.id)
+        expires_by_course = {}
+        for course_id in course_ids:
+            enrollment_end_date = courses_enrollment_info.get(course_id)
 
             # Only proceed if course enrollment information is present
             if not enrollment_end_date:
-                logger.error('Enrollment missing for course [%s]', course.id)
+                logger.error('Enrollment missing for course [%s]', course_id)
                 continue
 
-            if save_to_db:
-                course_seats = course.seat_products.filter(
-                    attributes__name='certificate_type',
-                    attribute_values__value_text__in=seats_to_update
-                )
-                expires = parser.parse(enrollment_end_date)
-                course_seats.update(expires=expires)
-                logger.info(
-                    'Updated expiration date for [%s] seats: [%s]',
-                    course.id,
-                    ', '.join([str(seat.id) for seat in course_seats]),
-                )
-
-    def _get_courses_enrollment_info(self):
+            expires = parser.parse(enrollment_end_date)
+            if timezone.is_naive(expires):
+                expires = timezone.make_aware(expires, timezone.utc)
+            expires_by_course[course_id] = expires
+
+        if save_to_db:
+            updated_seats = self._update_seats(expires_by_course)
+            for course_id in course_ids:
+                # Courses whose seats already expire on their enrollment end date have no updated seats.
+                if updated_seats.get(course_id):
+                    logger.info(
+                        'Updated expiration date for [%s] seats: [%s]',
+                        course_id,
+                        ', '.join([str(seat_id) for seat_id in updated_seats[course_id]]),
+                    )
+
+        if options.get('checkpoint') and os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+
+    def _update_seats(self, expires_by_course):
+        """
+        Sets the expiration date of the seats of the given courses.
+
+        The seats are read with a single query. Those whose expiration date differs are updated in chunks,
+        each chunk with a single query, and their history is recorded. The seat summaries of the courses
+        are then updated in chunks in the same way.
+
+        Arguments:
+            expires_by_course (dict): Expiration dates keyed by course ID.
+
+        Returns:
+            dict: IDs of the updated seats, keyed by course ID.
+        """
+        seats = Product.objects.filter(
+            parent__course_id__in=expires_by_course.keys(),
+            parent__product_class__slug='seat',
+            parent__structure=Product.PARENT,
+            attributes__name='certificate_type',
+            attribute_values__value_text__in=self.seats_to_update
+        ).annotate(parent_course_id=F('parent__course_id')).distinct()
+
+        updated_seats = defaultdict(list)
+        seats_to_update = []
+        for seat in seats:
+            expires = expires_by_course[seat.parent_course_id]
+            if seat.expires != expires:
+                seat.expires = expires
+                updated_seats[seat.parent_course_id].append(seat.id)
+                seats_to_update.append(seat)
+
+        bulk_update_with_history(Product, seats_to_update, ['expires'], batch_size=self.update_chunk_size)
+
+        # Queryset updates do not send the signals keeping the seat summaries of courses in sync with their seats,
+        # nor those bumping the version stamps of the API resources. As with those signals, the history of the
+        # courses is not recorded for their seat summaries.
+        courses = list(Course.objects.filter(id__in=updated_seats.keys()).only('id', 'seat_summary'))
+        for course in courses:
+            seat_ids = set(updated_seats[course.id])
+            for seat in course.seat_summary:
+                if seat['id'] in seat_ids:
+                    seat['expires'] = expires_by_course[course.id].isoformat()
+        bulk_update(Course, courses, ['seat_summary'], batch_size=self.update_chunk_size)
+
+        if seats_to_update:
+            bump_version_stamps(Course, Product)
+
+        return updated_seats
+
+    def _get_courses_enrollment_info(self, page_size=100, workers=4, checkpoint=None):
         """
         Retrieve the enrollment information for all the courses.
 
+        The first page is retrieved to learn the number of pages; the remaining pages are then retrieved
+        concurrently. If a checkpoint file is given, the information retrieved is saved to it after each
+        page, and the pages it already holds are not retrieved again.
+
         Returns:
             Dictionary representing the key-value pair (course_key, enrollment_end) of course.
         """
-        def _parse_response(api_response):
-            response_data = api_response.get('results', [])
+        api = EdxRestApiClient(get_lms_url('api/courses/v1/'), session=get_session())
+
+        state = self._load_checkpoint(checkpoint, page_size)
 
-            # Map course_id with enrollment end date.
-            courses_enrollment = dict(
+        def _save_page(page, response):
+            state['pages'].append(page)
+            state['next'] = bool(response['pagination'].get('next'))
+            state['courses'].update(
                 (course_info['course_id'], course_info['enrollment_end'])
-                for course_info in response_data
+                for course_info in response.get('results', [])
             )
-            return courses_enrollment, api_response['pagination'].get('next', None)
+            if checkpoint:
+                self._save_checkpoint(checkpoint, state)
 
-        querystring = {'page_size': 50}
-        api = EdxRestApiClient(get_lms_url('api/courses/v1/'))
-        course_enrollments = {}
+        if 1 not in state['pages']:
+            response = self._get_page(api, 1, page_size)
+            state['num_pages'] = response['pagination'].get('num_pages')
+            _save_page(1, response)
 
-        page = 0
+        if state['num_pages']:
+            pages = [page for page in range(2, state['num_pages'] + 1) if page not in state['pages']]
+            pool = ThreadPool(workers)
+            try:
+                for page, response in pool.imap_unordered(lambda page: (page, self._get_page(api, page, page_size)),
+                                                          pages):
+                    _save_page(page, response)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            # Without the number of pages, follow the links to the next page one at a time.
+            page = max(state['pages'])
+            while state['next']:
+                page += 1
+                _save_page(page, self._get_page(api, page, page_size))
+
+        return state['courses']
+
+    def _get_page(self, api, page, page_size):
+        """ Retrieves a page of courses, pausing and retrying when the API calls are rate-limited. """
         throttling_attempts = 0
-        next_page = True
-        while next_page:
-            page += 1
-            querystring['page'] = page
+        while True:
             try:
-                response = api.courses().get(**querystring)
-                throttling_attempts = 0
+                return api.courses().get(page=page, page_size=page_size)
             except HttpClientError as exc:
                 # this is a known limitation; If we get HTTP429, we need to pause execution for a few seconds
                 # before re-requesting the data. raise any other errors
@@ -108,12 +224,26 @@ class Command(BaseCommand):
                         self.pause_time
                     )
                     time.sleep(self.pause_time)
-                    page -= 1
                     throttling_attempts += 1
                     logger.info('Retrying [%d]...', throttling_attempts)
-                    continue
                 else:
                     raise
-            enrollment_info, next_page = _parse_response(response)
-            course_enrollments.update(enrollment_info)
-        return course_enrollments
+
+    def _load_checkpoint(self, checkpoint, page_size):
+        """ Returns the state saved to the checkpoint file, if it was saved with the same page size. """
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as checkpoint_file:
+                saved_state = json.load(checkpoint_file)
+
+            if saved_state.get('page_size') == page_size:
+                logger.info('Resuming from [%d] pages saved to [%s].', len(saved_state['pages']), checkpoint)
+                return saved_state
+
+        return {'page_size': page_size, 'num_pages': None, 'next': False, 'pages': [], 'courses': {}}
+
+    def _save_checkpoint(self, checkpoint, state):
+        """ Atomically replaces the checkpoint file with the given state. """
+        temp_path = '{}.tmp'.format(checkpoint)
+        with open(temp_path, 'w') as checkpoint_file:
+            json.dump(state, checkpoint_file)
+        os.rename(temp_path, checkpoint)
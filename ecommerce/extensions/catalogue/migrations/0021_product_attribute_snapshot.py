@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.db import migrations
+import jsonfield.fields
+
+FLAT_ATTRIBUTE_CODES = (
+    'certificate_type',
+    'course_key',
+    'credit_hours',
+    'credit_provider',
+    'id_verification_required',
+    'seat_type',
+)
+
+
+def populate_attribute_snapshots(apps, schema_editor):
+    """ Populate the attribute snapshot of existing products from their attribute values. """
+    Product = apps.get_model('catalogue', 'Product')
+    ProductAttributeValue = apps.get_model('catalogue', 'ProductAttributeValue')
+
+    snapshots = defaultdict(dict)
+    values = ProductAttributeValue.objects.filter(attribute__code__in=FLAT_ATTRIBUTE_CODES).values_list(
+        'product_id', 'attribute__code', 'attribute__type', 'value_text', 'value_boolean', 'value_integer'
+    )
+    for product_id, code, attribute_type, value_text, value_boolean, value_integer in values.iterator():
+        value = {'text': value_text, 'boolean': value_boolean, 'integer': value_integer}.get(attribute_type)
+        if value is not None:
+            snapshots[product_id][code] = value
+
+    Product.objects.update(attribute_snapshot={})
+    for product_id, snapshot in snapshots.items():
+        Product.objects.filter(id=product_id).update(attribute_snapshot=snapshot)
+
+
+def clear_attribute_snapshots(apps, schema_editor):
+    Product = apps.get_model('catalogue', 'Product')
+    Product.objects.update(attribute_snapshot=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0020_auto_20161025_1446'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalproduct',
+            name='attribute_snapshot',
+            field=jsonfield.fields.JSONField(help_text='Denormalized values of the attributes most frequently read from this product.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='attribute_snapshot',
+            field=jsonfield.fields.JSONField(help_text='Denormalized values of the attributes most frequently read from this product.', null=True, editable=False, blank=True),
+        ),
+        migrations.RunPython(populate_attribute_snapshots, clear_attribute_snapshots),
+    ]
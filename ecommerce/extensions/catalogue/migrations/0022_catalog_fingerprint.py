@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import defaultdict
+from hashlib import md5
+
+from django.db import migrations, models
+
+
+def populate_fingerprints(apps, schema_editor):
+    """ Populate the fingerprint of existing catalogs from their partner and stock records. """
+    Catalog = apps.get_model('catalogue', 'Catalog')
+
+    stock_record_ids = defaultdict(list)
+    for catalog_id, stock_record_id in Catalog.stock_records.through.objects.values_list('catalog_id', 'stockrecord_id'):
+        stock_record_ids[catalog_id].append(stock_record_id)
+
+    for catalog_id, partner_id in Catalog.objects.values_list('id', 'partner_id'):
+        ids = ','.join(str(stock_record_id) for stock_record_id in sorted(set(stock_record_ids[catalog_id])))
+        fingerprint = md5('{}:{}'.format(partner_id, ids)).hexdigest()
+        Catalog.objects.filter(id=catalog_id).update(fingerprint=fingerprint)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0021_product_attribute_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalog',
+            name='fingerprint',
+            field=models.CharField(help_text='Hash of the partner and stock records of this catalog.', max_length=32, editable=False, db_index=True, blank=True),
+        ),
+        migrations.RunPython(populate_fingerprints, migrations.RunPython.noop),
+    ]
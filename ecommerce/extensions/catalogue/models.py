@@ -1,16 +1,136 @@
+from hashlib import md5
+import threading
+
 # noinspection PyUnresolvedReferences
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
+from jsonfield.fields import JSONField
 from oscar.apps.catalogue.abstract_models import AbstractProduct, AbstractProductAttributeValue
 from simple_history.models import HistoricalRecords
 
+# Attributes read on hot paths, whose values are denormalized onto the product.
+FLAT_ATTRIBUTE_CODES = (
+    'certificate_type',
+    'course_key',
+    'credit_hours',
+    'credit_provider',
+    'id_verification_required',
+    'seat_type',
+)
+
+
+# Number of products each thread is saving. Oscar saves the attribute values of products along with them.
+_product_saves = threading.local()
+
+
+def is_saving_product():
+    """ Returns whether the current thread is saving a product, and the attribute values saved with it. """
+    return getattr(_product_saves, 'depth', 0) > 0
+
+
+class FlatProductAttributes(object):
+    """
+    Read-only access to a product's denormalized attribute values.
+
+    As with Oscar's attribute container, reading an attribute that has no value raises AttributeError.
+    """
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
 
 class Product(AbstractProduct):
     course = models.ForeignKey('courses.Course', null=True, blank=True, related_name='products')
     expires = models.DateTimeField(null=True, blank=True,
                                    help_text=_('Last date/time on which this product can be purchased.'))
+    attribute_snapshot = JSONField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('Denormalized values of the attributes most frequently read from this product.')
+    )
     history = HistoricalRecords()
 
+    # Fields read by the seat summary of the product's course, besides the attribute snapshot.
+    SEAT_SUMMARY_FIELDS = ('course_id', 'parent_id', 'structure', 'expires')
+    # Values of SEAT_SUMMARY_FIELDS when the product was loaded or last saved. None for new products.
+    _seat_summary_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        product = super(Product, cls).from_db(db, field_names, values)  # pylint: disable=bad-super-call
+        if all(name in field_names for name in cls.SEAT_SUMMARY_FIELDS):
+            product.seat_summary_fields_changed()
+        return product
+
+    def save(self, *args, **kwargs):
+        _product_saves.depth = getattr(_product_saves, 'depth', 0) + 1
+        try:
+            super(Product, self).save(*args, **kwargs)  # pylint: disable=bad-super-call
+        finally:
+            _product_saves.depth -= 1
+        snapshot_changed = self.update_attribute_snapshot()
+        # The seat summary is read from the snapshot, so it is only updated once the attribute values are saved.
+        if self.seat_summary_fields_changed() or snapshot_changed:
+            self.update_course_seat_summary()
+
+    def seat_summary_fields_changed(self):
+        """ Returns whether SEAT_SUMMARY_FIELDS changed since the product was loaded, or since this was last called. """
+        values = tuple(getattr(self, name) for name in self.SEAT_SUMMARY_FIELDS)
+        changed = values != self._seat_summary_values
+        self._seat_summary_values = values
+        return changed
+
+    def update_attribute_snapshot(self):
+        """
+        Synchronizes the attribute snapshot with the attribute values stored in the database.
+
+        Returns:
+            bool: Whether the snapshot changed.
+        """
+        values = self.attribute_values.filter(attribute__code__in=FLAT_ATTRIBUTE_CODES).select_related('attribute')
+        snapshot = {value.attribute.code: value.value for value in values}
+
+        if snapshot != self.attribute_snapshot:
+            self.attribute_snapshot = snapshot
+            Product.objects.filter(pk=self.pk).update(attribute_snapshot=snapshot)
+            return True
+        return False
+
+    def update_course_seat_summary(self):
+        """ Synchronizes the seat summary of the product's course, if the product is one of its seats. """
+        if self.course_id and self.structure == self.CHILD:
+            self.course.update_seat_summary()
+
+    @property
+    def flat_attr(self):
+        """
+        Returns the values of the attributes in FLAT_ATTRIBUTE_CODES without querying the attribute values.
+
+        Use this instead of `attr` to read these attributes. Products whose snapshot has not been
+        populated yet fall back to the attribute values. Values already read or set through `attr`,
+        which may not have been saved yet, take precedence over the snapshot.
+
+        Returns:
+            FlatProductAttributes
+        """
+        if self.attribute_snapshot is None:
+            return FlatProductAttributes(
+                {code: getattr(self.attr, code) for code in FLAT_ATTRIBUTE_CODES if hasattr(self.attr, code)}
+            )
+
+        snapshot = dict(self.attribute_snapshot)
+        # The attribute container is only read through its __dict__, so that no attribute values are queried.
+        loaded = self.attr.__dict__
+        for code in FLAT_ATTRIBUTE_CODES:
+            if code in loaded:
+                # Like Oscar, empty values are treated as deleted.
+                if loaded[code] is None or loaded[code] == '':
+                    snapshot.pop(code, None)
+                else:
+                    snapshot[code] = loaded[code]
+        return FlatProductAttributes(snapshot)
+
 
 class ProductAttributeValue(AbstractProductAttributeValue):
     history = HistoricalRecords()
@@ -20,6 +140,31 @@ class Catalog(models.Model):
     name = models.CharField(max_length=255)
     partner = models.ForeignKey('partner.Partner', related_name='catalogs')
     stock_records = models.ManyToManyField('partner.StockRecord', blank=True, related_name='catalogs')
+    fingerprint = models.CharField(
+        max_length=32,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text=_('Hash of the partner and stock records of this catalog.')
+    )
+
+    @staticmethod
+    def compute_fingerprint(partner_id, stock_record_ids):
+        """ Returns the fingerprint of a catalog with the given partner and stock records. """
+        stock_record_ids = ','.join(str(stock_record_id) for stock_record_id in sorted(set(stock_record_ids)))
+        return md5('{}:{}'.format(partner_id, stock_record_ids)).hexdigest()
+
+    def save(self, *args, **kwargs):
+        stock_record_ids = self.stock_records.values_list('id', flat=True) if self.pk else []
+        self.fingerprint = self.compute_fingerprint(self.partner_id, stock_record_ids)
+        super(Catalog, self).save(*args, **kwargs)
+
+    def update_fingerprint(self):
+        """ Synchronizes the fingerprint with the stock records stored in the database. """
+        fingerprint = self.compute_fingerprint(self.partner_id, self.stock_records.values_list('id', flat=True))
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            Catalog.objects.filter(pk=self.pk).update(fingerprint=fingerprint)
 
     def __unicode__(self):
         return u'{id}: {partner_code}-{catalog_name}'.format(
@@ -0,0 +1,132 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from oscar.core.loading import get_model
+
+from ecommerce.core.version_stamps import bump_version_stamps
+from ecommerce.extensions.catalogue.models import FLAT_ATTRIBUTE_CODES, is_saving_product
+
+Benefit = get_model('offer', 'Benefit')
+Catalog = get_model('catalogue', 'Catalog')
+Course = get_model('courses', 'Course')
+Partner = get_model('partner', 'Partner')
+Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+StockRecord = get_model('partner', 'StockRecord')
+Voucher = get_model('voucher', 'Voucher')
+VoucherApplication = get_model('voucher', 'VoucherApplication')
+
+
+@receiver(post_save, sender=ProductAttributeValue, dispatch_uid='catalogue.update_attribute_snapshot_on_save')
+@receiver(post_delete, sender=ProductAttributeValue, dispatch_uid='catalogue.update_attribute_snapshot')
+def update_attribute_snapshot(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Keep the product's snapshot, and the seat summary of its course, in sync with attribute values saved on their
+    own, or deleted (e.g. when their attribute is deleted). Products update both once the values saved along with
+    them are saved.
+    """
+    if kwargs.get('raw') or is_saving_product() or instance.attribute.code not in FLAT_ATTRIBUTE_CODES:
+        return
+
+    try:
+        product = Product.objects.get(pk=instance.product_id)
+    except Product.DoesNotExist:
+        return
+
+    if product.update_attribute_snapshot():
+        product.update_course_seat_summary()
+    if product.course_id:
+        Course.invalidate_sibling_skus(product.course_id)
+
+
+@receiver(m2m_changed, sender=Catalog.stock_records.through, dispatch_uid='catalogue.update_catalog_fingerprint')
+def update_catalog_fingerprint(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=unused-argument
+    """ Keep the fingerprints of catalogs in sync with their stock records. """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.update_fingerprint()
+        return
+
+    # The instance is a stock record, whose catalogs are being changed.
+    if action == 'pre_clear':
+        instance._cleared_catalog_ids = list(instance.catalogs.values_list('id', flat=True))  # pylint: disable=protected-access
+        return
+    elif action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_catalog_ids', [])
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    for catalog in Catalog.objects.filter(id__in=pk_set):
+        catalog.update_fingerprint()
+
+
+@receiver(post_delete, sender=Product, dispatch_uid='catalogue.update_course_seat_summary_on_seat_delete')
+def update_course_seat_summary(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """ Remove deleted seats from the seat summary of their course. Saved seats update it themselves. """
+    if instance.course_id and instance.structure == Product.CHILD:
+        course = Course.objects.filter(id=instance.course_id).first()
+        if course:
+            course.update_seat_summary()
+
+
+@receiver(post_save, sender=StockRecord, dispatch_uid='catalogue.update_course_seat_summary_on_price_change')
+def update_course_seat_summary_on_price_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """ Keep the seat summary of courses in sync with the SKUs and prices of their seats. """
+    if kwargs.get('raw') or not instance.seat_summary_fields_changed():
+        return
+
+    # The product is usually cached, e.g. by the code creating the stock record, so it is rarely queried.
+    instance.product.update_course_seat_summary()
+
+
+@receiver(post_save, sender=Product, dispatch_uid='catalogue.invalidate_sibling_skus_on_product_save')
+@receiver(post_delete, sender=Product, dispatch_uid='catalogue.invalidate_sibling_skus_on_product_delete')
+@receiver(post_save, sender=StockRecord, dispatch_uid='catalogue.invalidate_sibling_skus_on_stock_record_save')
+@receiver(post_delete, sender=StockRecord, dispatch_uid='catalogue.invalidate_sibling_skus_on_stock_record_delete')
+def invalidate_sibling_skus(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """ Discard the cached sibling SKUs of the course of products, and of their stock records. """
+    if sender is Product:
+        product = instance
+    else:
+        try:
+            product = instance.product
+        except Product.DoesNotExist:
+            return
+
+    if product.course_id:
+        Course.invalidate_sibling_skus(product.course_id)
+
+
+# Models whose version stamps are bumped when instances of the sender are saved or deleted.
+VERSIONED_MODELS = {
+    Catalog: (Catalog,),
+    Course: (Course,),
+    Partner: (Partner,),
+    Product: (Product,),
+    ProductAttributeValue: (Product,),
+    StockRecord: (StockRecord,),
+    # Vouchers are served with their usage and benefit, and whether users have applied them.
+    Voucher: (Voucher,),
+    VoucherApplication: (Voucher,),
+    Benefit: (Voucher,),
+}
+
+
+def bump_sender_version_stamps(sender, **kwargs):  # pylint: disable=unused-argument
+    """ Keep the version stamps of the resources served by the API in sync with their instances. """
+    bump_version_stamps(*VERSIONED_MODELS[sender])
+
+
+for versioned_sender in VERSIONED_MODELS:
+    for event, signal in (('save', post_save), ('delete', post_delete)):
+        signal.connect(
+            bump_sender_version_stamps,
+            sender=versioned_sender,
+            dispatch_uid='catalogue.bump_version_stamps_on_{}.{}'.format(event, versioned_sender.__name__)
+        )
+
+
+@receiver(m2m_changed, sender=Catalog.stock_records.through, dispatch_uid='catalogue.bump_catalog_version_stamps')
+def bump_catalog_version_stamps(sender, action, **kwargs):  # pylint: disable=unused-argument
+    """ Bump the version stamps of catalogs and stock records when the stock records of catalogs change. """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version_stamps(Catalog, StockRecord)
@@ -4,6 +4,8 @@ import datetime
 from decimal import Decimal
 import json
 import logging
+import os
+import tempfile
 from urlparse import urljoin, urlparse
 
 from django.core.management import call_command
@@ -19,7 +21,7 @@ from ecommerce.core.tests import toggle_switch
 from ecommerce.courses.models import Course
 from ecommerce.courses.publishers import LMSPublisher
 from ecommerce.courses.utils import mode_for_seat
-from ecommerce.extensions.catalogue.management.commands.migrate_course import MigratedCourse
+from ecommerce.extensions.catalogue.management.commands.migrate_course import LMSCourseLoader, MigratedCourse
 from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.extensions.catalogue.utils import generate_sku
 from ecommerce.tests.testcases import TestCase
@@ -370,3 +372,58 @@ class CommandTests(CourseMigrationTestMixin, TestCase):
 
             # Verify that the migrated course was published back to the LMS
             self.assertFalse(mock_publish.called)
+
+    @httpretty.activate
+    def test_handle_in_parallel(self):
+        """ Verify courses can be migrated concurrently, and migrated courses are skipped when resuming. """
+        self._mock_lms_apis()
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.txt')
+
+        with mock.patch.object(LMSPublisher, 'publish'):
+            call_command(
+                'migrate_course',
+                self.course_id,
+                access_token=ACCESS_TOKEN,
+                commit=True,
+                site_domain=self.site.domain,
+                workers=2,
+                checkpoint=checkpoint
+            )
+
+        self.assert_course_migrated()
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+        with open(checkpoint) as checkpoint_file:
+            self.assertEqual(checkpoint_file.read(), '{}\n'.format(self.course_id))
+
+        with mock.patch.object(LMSPublisher, 'publish') as mock_publish:
+            call_command(
+                'migrate_course',
+                self.course_id,
+                access_token=ACCESS_TOKEN,
+                commit=True,
+                site_domain=self.site.domain,
+                workers=2,
+                checkpoint=checkpoint
+            )
+            self.assertFalse(mock_publish.called)
+
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+        os.remove(checkpoint)
+
+    def test_handle_in_parallel_failure(self):
+        """ Verify the traceback of courses that could not be retrieved concurrently is logged. """
+        with mock.patch.object(LMSCourseLoader, 'retrieve', side_effect=Exception('Retrieval failed.')), \
+                LogCapture(LOGGER_NAME, level=logging.ERROR) as l:
+            call_command(
+                'migrate_course',
+                self.course_id,
+                access_token=ACCESS_TOKEN,
+                commit=True,
+                site_domain=self.site.domain,
+                workers=2
+            )
+
+        message = l.records[0].getMessage()
+        self.assertTrue(message.startswith('Failed to migrate [{}]!\nTraceback'.format(self.course_id)))
+        self.assertIn('Exception: Retrieval failed.', message)
+        self.assertFalse(Course.objects.filter(id=self.course_id).exists())
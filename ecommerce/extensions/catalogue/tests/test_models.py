@@ -0,0 +1,151 @@
+from __future__ import unicode_literals
+
+from oscar.core.loading import get_model
+
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
+from ecommerce.tests.factories import PartnerFactory
+from ecommerce.tests.testcases import TestCase
+
+Catalog = get_model('catalogue', 'Catalog')
+Product = get_model('catalogue', 'Product')
+ProductAttribute = get_model('catalogue', 'ProductAttribute')
+
+
+class ProductTests(CourseCatalogTestMixin, TestCase):
+    """ Tests for the Product model. """
+
+    def setUp(self):
+        super(ProductTests, self).setUp()
+        self.course = CourseFactory()
+
+    def test_attribute_snapshot(self):
+        """ Verify the attribute snapshot is kept in sync with the attribute values when the product is saved. """
+        seat = self.course.create_or_update_seat('credit', True, 100, self.partner, credit_provider='MIT',
+                                                 credit_hours=2)
+        seat = Product.objects.get(id=seat.id)
+        self.assertEqual(seat.attribute_snapshot, {
+            'certificate_type': 'credit',
+            'course_key': self.course.id,
+            'credit_hours': 2,
+            'credit_provider': 'MIT',
+            'id_verification_required': True,
+        })
+
+        self.assertEqual(seat.attr.credit_provider, 'MIT')
+        seat.attr.credit_provider = 'Harvard'
+        seat.save()
+        self.assertEqual(Product.objects.get(id=seat.id).attribute_snapshot['credit_provider'], 'Harvard')
+
+    def test_flat_attr(self):
+        """ Verify the denormalized attributes are read without querying the attribute values. """
+        seat = self.course.create_or_update_seat('verified', False, 100, self.partner)
+        seat = Product.objects.get(id=seat.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(seat.flat_attr.certificate_type, 'verified')
+            self.assertEqual(seat.flat_attr.course_key, self.course.id)
+            self.assertFalse(seat.flat_attr.id_verification_required)
+            self.assertIsNone(getattr(seat.flat_attr, 'credit_provider', None))
+
+        with self.assertRaises(AttributeError):
+            seat.flat_attr.seat_type  # pylint: disable=pointless-statement
+
+    def test_flat_attr_unsaved(self):
+        """ Verify values set through the attribute container, but not saved yet, are returned. """
+        seat = self.course.create_or_update_seat('credit', True, 100, self.partner, credit_provider='MIT')
+        seat = Product.objects.get(id=seat.id)
+        seat.attr.credit_provider = 'Harvard'
+        seat.attr.credit_hours = None
+
+        with self.assertNumQueries(0):
+            self.assertEqual(seat.flat_attr.credit_provider, 'Harvard')
+            self.assertFalse(hasattr(seat.flat_attr, 'credit_hours'))
+            self.assertEqual(seat.flat_attr.certificate_type, 'credit')
+
+    def test_attribute_value_saved(self):
+        """ Verify attribute values saved on their own are synchronized with the snapshot. """
+        seat = self.course.create_or_update_seat('credit', True, 100, self.partner, credit_provider='MIT')
+        value = seat.attribute_values.get(attribute__code='credit_provider')
+        value.value = 'Harvard'
+        value.save()
+
+        self.assertEqual(Product.objects.get(id=seat.id).attribute_snapshot['credit_provider'], 'Harvard')
+
+    def test_flat_attr_without_snapshot(self):
+        """ Verify the attribute values are used if the snapshot has not been populated. """
+        seat = self.course.create_or_update_seat('verified', False, 100, self.partner)
+        Product.objects.filter(id=seat.id).update(attribute_snapshot=None)
+        seat = Product.objects.get(id=seat.id)
+
+        self.assertEqual(seat.flat_attr.certificate_type, 'verified')
+        self.assertEqual(seat.flat_attr.course_key, self.course.id)
+
+    def test_attribute_deletion(self):
+        """ Verify deleted attribute values are removed from the snapshot. """
+        seat = self.course.create_or_update_seat('verified', True, 100, self.partner)
+        ProductAttribute.objects.filter(code='id_verification_required').delete()
+
+        seat = Product.objects.get(id=seat.id)
+        self.assertNotIn('id_verification_required', seat.attribute_snapshot)
+        self.assertFalse(hasattr(seat.flat_attr, 'id_verification_required'))
+
+
+class CatalogTests(CourseCatalogTestMixin, TestCase):
+    """ Tests for the Catalog model. """
+
+    def setUp(self):
+        super(CatalogTests, self).setUp()
+        course = CourseFactory()
+        self.stock_records = [
+            course.create_or_update_seat(certificate_type, False, 100, self.partner).stockrecords.first()
+            for certificate_type in ('honor', 'verified')
+        ]
+        self.catalog = Catalog.objects.create(name='Test', partner=self.partner)
+
+    def assert_fingerprint(self, stock_records, partner=None):
+        """ Verify the stored fingerprint of the catalog matches the given partner and stock records. """
+        partner = partner or self.partner
+        expected = Catalog.compute_fingerprint(partner.id, [stock_record.id for stock_record in stock_records])
+        self.assertEqual(self.catalog.fingerprint, expected)
+        self.assertEqual(Catalog.objects.get(id=self.catalog.id).fingerprint, expected)
+
+    def test_compute_fingerprint(self):
+        """ Verify the fingerprint does not depend on the order of the stock records. """
+        self.assertEqual(Catalog.compute_fingerprint(1, [1, 2]), Catalog.compute_fingerprint(1, [2, 1]))
+        self.assertNotEqual(Catalog.compute_fingerprint(1, [1, 2]), Catalog.compute_fingerprint(2, [1, 2]))
+        self.assertNotEqual(Catalog.compute_fingerprint(1, [1, 2]), Catalog.compute_fingerprint(1, [1]))
+
+    def test_fingerprint(self):
+        """ Verify the fingerprint is updated when stock records are added to or removed from the catalog. """
+        self.assert_fingerprint([])
+
+        self.catalog.stock_records.add(*self.stock_records)
+        self.assert_fingerprint(self.stock_records)
+
+        self.catalog.stock_records.remove(self.stock_records[0])
+        self.assert_fingerprint(self.stock_records[1:])
+
+        self.catalog.stock_records.clear()
+        self.assert_fingerprint([])
+
+    def test_fingerprint_reverse(self):
+        """ Verify the fingerprint is updated when the catalogs of a stock record are changed. """
+        stock_record = self.stock_records[0]
+
+        stock_record.catalogs.add(self.catalog)
+        self.catalog.refresh_from_db()
+        self.assert_fingerprint([stock_record])
+
+        stock_record.catalogs.clear()
+        self.catalog.refresh_from_db()
+        self.assert_fingerprint([])
+
+    def test_fingerprint_partner(self):
+        """ Verify the fingerprint is updated when the partner of the catalog is changed. """
+        self.catalog.stock_records.add(*self.stock_records)
+        partner = PartnerFactory()
+
+        self.catalog.partner = partner
+        self.catalog.save()
+        self.assert_fingerprint(self.stock_records, partner=partner)
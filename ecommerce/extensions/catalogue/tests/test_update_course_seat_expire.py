@@ -3,6 +3,8 @@ from __future__ import unicode_literals
 import datetime
 import json
 import logging
+import os
+import tempfile
 import mock
 from pytz import UTC
 
@@ -13,8 +15,9 @@ from slumber.exceptions import HttpClientError
 from testfixtures import LogCapture
 
 from ecommerce.core.url_utils import get_lms_url
-from ecommerce.courses.models import Product
+from ecommerce.courses.models import Course, Product
 from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.catalogue.management.commands.update_course_seat_expire import Command
 from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.tests.testcases import TestCase
 
@@ -104,6 +107,16 @@ class UpdateSeatExpireDateTests(CourseCatalogTestMixin, TestCase):
         verified_seat = Product.objects.get(id=self.verified_seat.id)
         self.assertEqual(verified_seat.expires, self.verified_expire_date)
 
+    @httpretty.activate
+    def test_update_course_with_commit_up_to_date(self):
+        """ Verify no update is logged for courses whose seats already expire on their enrollment end date. """
+        self.mock_courses_api(status=200, body=self.course_info)
+        call_command('update_course_seat_expire', commit=True)
+
+        with LogCapture(LOGGER_NAME) as lc:
+            call_command('update_course_seat_expire', commit=True)
+            lc.check((LOGGER_NAME, 'INFO', '[1] courses found for update.'))
+
     @httpretty.activate
     def test_update_course_without_commit(self):
         """ Verify all course seats are not updated with commit option is not provided. """
@@ -215,3 +228,73 @@ class UpdateSeatExpireDateTests(CourseCatalogTestMixin, TestCase):
 
         self.assertEqual(mock_max_tries.call_count, 2)
         self.assertEqual(mock_pause_time.call_count, 2)
+
+    @httpretty.activate
+    def test_update_course_with_checkpoint(self):
+        """ Verify the pages saved to the checkpoint are not retrieved again, and the other pages are retrieved. """
+        second_course = CourseFactory()
+        second_seat = second_course.create_or_update_seat('honor', False, 0, self.partner)
+        second_expire_date = self.expire_date - datetime.timedelta(days=1)
+        self.mock_courses_api(status=200, body={
+            'pagination': {'num_pages': 2},
+            'results': [{'enrollment_end': unicode(second_expire_date), 'course_id': second_course.id}],
+        })
+
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        with open(checkpoint, 'w') as checkpoint_file:
+            json.dump({
+                'page_size': 100,
+                'num_pages': 2,
+                'next': True,
+                'pages': [1],
+                'courses': {self.course.id: unicode(self.expire_date)},
+            }, checkpoint_file)
+
+        call_command('update_course_seat_expire', commit=True, checkpoint=checkpoint)
+
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 1)
+        self.assertEqual(httpretty.last_request().querystring['page'], ['2'])
+        self.assertEqual(Product.objects.get(id=self.honor_seat.id).expires, self.expire_date)
+        self.assertEqual(Product.objects.get(id=second_seat.id).expires, second_expire_date)
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_update_seats(self):
+        """ Verify seats are updated in chunks, and seats whose expiration date is up to date are not updated. """
+        # pylint: disable=protected-access
+        command = Command()
+        command.update_chunk_size = 1
+
+        date_updated = Product.objects.get(id=self.honor_seat.id).date_updated
+        history_count = self.honor_seat.history.count()
+
+        # Read the seats, update the honor and professional seats, record their history, and update the seat
+        # summary of the course.
+        with self.assertNumQueries(6):
+            updated_seats = command._update_seats({self.course.id: self.expire_date})
+        self.assertEqual(sorted(updated_seats[self.course.id]), sorted([self.honor_seat.id, self.professional_seat.id]))
+        self.assertGreater(Product.objects.get(id=self.honor_seat.id).date_updated, date_updated)
+        self.assertEqual(self.honor_seat.history.count(), history_count + 1)
+        self.assertEqual(self.honor_seat.history.latest('history_id').expires, self.expire_date)
+        seat_summary = {seat['id']: seat for seat in Course.objects.get(id=self.course.id).seat_summary}
+        self.assertEqual(seat_summary[self.honor_seat.id]['expires'], self.expire_date.isoformat())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(command._update_seats({self.course.id: self.expire_date}), {})
+
+    def test_update_seats_seat_summaries(self):
+        """ Verify the seat summaries of the courses are updated in chunks. """
+        # pylint: disable=protected-access
+        command = Command()
+        command.update_chunk_size = 2
+        second_course = CourseFactory()
+        second_seat = second_course.create_or_update_seat('honor', False, 0, self.partner)
+        expires_by_course = {self.course.id: self.expire_date, second_course.id: self.expire_date}
+
+        # Read the seats, update the seats in two chunks and record their history, then read the courses and
+        # update their seat summaries in a single chunk.
+        with self.assertNumQueries(6):
+            command._update_seats(expires_by_course)
+
+        for course, seat in ((self.course, self.honor_seat), (second_course, second_seat)):
+            seat_summary = {seat['id']: seat for seat in Course.objects.get(id=course.id).seat_summary}
+            self.assertEqual(seat_summary[seat.id]['expires'], self.expire_date.isoformat())
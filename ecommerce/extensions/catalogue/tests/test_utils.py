@@ -63,14 +63,24 @@ class UtilsTests(CourseCatalogTestMixin, TestCase):
 
         self.assertEqual(self.catalog.id, 1)
 
+        with self.assertNumQueries(2):
+            existing_catalog, created = get_or_create_catalog(
+                name='Test',
+                partner=self.partner,
+                stock_record_ids=[stock_record.id]
+            )
+        self.assertFalse(created)
+        self.assertEqual(self.catalog, existing_catalog)
+        self.assertEqual(Catalog.objects.count(), 1)
+
+        # IDs given as strings, e.g. by API clients, identify the same catalog.
         existing_catalog, created = get_or_create_catalog(
             name='Test',
             partner=self.partner,
-            stock_record_ids=[stock_record.id]
+            stock_record_ids=[unicode(stock_record.id), stock_record.id]
         )
         self.assertFalse(created)
         self.assertEqual(self.catalog, existing_catalog)
-        self.assertEqual(Catalog.objects.count(), 1)
 
         course_id = 'sku/test2/course'
         course = Course.objects.create(id=course_id, name='Test Course 2')
@@ -85,6 +95,10 @@ class UtilsTests(CourseCatalogTestMixin, TestCase):
         self.assertTrue(created)
         self.assertNotEqual(self.catalog, new_catalog)
         self.assertEqual(Catalog.objects.count(), 2)
+        self.assertEqual(set(new_catalog.stock_records.all()), {stock_record, stock_record_2})
+
+        with self.assertRaises(StockRecord.DoesNotExist):
+            get_or_create_catalog(name='Test', partner=self.partner, stock_record_ids=[stock_record.id, 0])
 
 
 class CouponUtilsTests(CouponMixin, CourseCatalogTestMixin, TestCase):
@@ -132,17 +132,19 @@ def generate_sku(product, partner):
             str(partner.id)
         ))
     elif product_class.name == ENROLLMENT_CODE_PRODUCT_CLASS_NAME:
+        attributes = product.flat_attr
         _hash = ' '.join((
-            getattr(product.attr, 'course_key', ''),
-            getattr(product.attr, 'seat_type', ''),
+            getattr(attributes, 'course_key', ''),
+            getattr(attributes, 'seat_type', ''),
             unicode(partner.id)
         ))
     elif product_class.name == SEAT_PRODUCT_CLASS_NAME:
+        attributes = product.flat_attr
         _hash = ' '.join((
-            getattr(product.attr, 'certificate_type', ''),
-            product.attr.course_key,
-            unicode(product.attr.id_verification_required),
-            getattr(product.attr, 'credit_provider', ''),
+            getattr(attributes, 'certificate_type', ''),
+            attributes.course_key,
+            unicode(attributes.id_verification_required),
+            getattr(attributes, 'credit_provider', ''),
             str(partner.id)
         ))
     else:
@@ -158,16 +160,23 @@ def get_or_create_catalog(name, partner, stock_record_ids):
     """
     Returns the catalog which has the same name, partner and stock records.
     If there isn't one with that data, creates and returns a new one.
-    """
-    catalogs = Catalog.objects.all()
-    stock_records = [StockRecord.objects.get(id=id) for id in stock_record_ids]  # pylint: disable=redefined-builtin
 
-    for catalog in catalogs:
-        if catalog.name == name and catalog.partner == partner:
-            if set(catalog.stock_records.all()) == set(stock_records):
-                return catalog, False
+    Catalogs are looked up by their fingerprint, which identifies their partner and stock records.
+    """
+    # The IDs may be given as strings (e.g. from a request), which do not match the fingerprints of catalogs.
+    requested_ids = set(int(stock_record_id) for stock_record_id in stock_record_ids)
+    stock_records = list(StockRecord.objects.filter(id__in=requested_ids))
+    if len(stock_records) != len(requested_ids):
+        raise StockRecord.DoesNotExist('Stock records {} do not all exist.'.format(stock_record_ids))
+
+    catalog = Catalog.objects.filter(
+        name=name,
+        partner=partner,
+        fingerprint=Catalog.compute_fingerprint(partner.id, [stock_record.id for stock_record in stock_records])
+    ).order_by('id').first()
+    if catalog:
+        return catalog, False
 
     catalog = Catalog.objects.create(name=name, partner=partner)
-    for stock_record in stock_records:
-        catalog.stock_records.add(stock_record)
+    catalog.stock_records.add(*stock_records)
     return catalog, True
@@ -65,7 +65,7 @@ def send_course_purchase_email(sender, order=None, **kwargs):  # pylint: disable
         # We do not currently support email sending for orders with more than one item.
         if len(order.lines.all()) == ORDER_LINE_COUNT:
             product = order.lines.first().product
-            credit_provider_id = getattr(product.attr, 'credit_provider', None)
+            credit_provider_id = getattr(product.flat_attr, 'credit_provider', None)
             if not credit_provider_id:
                 logger.error(
                     'Failed to send credit receipt notification. Credit seat product [%s] has no provider.', product.id
@@ -90,7 +90,7 @@ def send_course_purchase_email(sender, order=None, **kwargs):  # pylint: disable
                         {
                             'course_title': product.title,
                             'receipt_page_url': receipt_page_url,
-                            'credit_hours': product.attr.credit_hours,
+                            'credit_hours': product.flat_attr.credit_hours,
                             'credit_provider': provider_data['display_name'],
                         },
                         order.site
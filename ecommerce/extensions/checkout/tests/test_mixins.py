@@ -12,7 +12,7 @@ from oscar.test.newfactories import BasketFactory, ProductFactory, UserFactory
 from testfixtures import LogCapture
 from waffle.models import Sample
 
-from ecommerce.core.models import SegmentClient
+from ecommerce.extensions.analytics.dispatcher import SegmentClient
 from ecommerce.extensions.checkout.exceptions import BasketNotFreeError
 from ecommerce.extensions.checkout.mixins import EdxOrderPlacementMixin
 from ecommerce.extensions.fulfillment.status import ORDER
@@ -21,7 +21,7 @@ from ecommerce.tests.factories import SiteConfigurationFactory
 from ecommerce.tests.mixins import BusinessIntelligenceMixin
 from ecommerce.tests.testcases import TestCase
 
-LOGGER_NAME = 'ecommerce.extensions.analytics.utils'
+LOGGER_NAME = 'ecommerce.audit'
 Basket = get_model('basket', 'Basket')
 
 
@@ -7,6 +7,8 @@ from edx_rest_api_client.client import EdxRestApiClient
 from requests.exceptions import ConnectionError, Timeout
 from slumber.exceptions import SlumberHttpBaseException
 
+from ecommerce.core.http_client import get_session
+
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +26,8 @@ def get_credit_provider_details(access_token, credit_provider_id, site_configura
     try:
         return EdxRestApiClient(
             site_configuration.build_lms_url('api/credit/v1/'),
-            oauth_access_token=access_token
+            oauth_access_token=access_token,
+            session=get_session()
         ).providers(credit_provider_id).get()
     except (ConnectionError, SlumberHttpBaseException, Timeout):
         logger.exception('Failed to retrieve credit provider details for provider [%s].', credit_provider_id)
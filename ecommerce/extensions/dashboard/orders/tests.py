@@ -3,6 +3,7 @@ import os
 from django.contrib.messages import constants as MSG
 from django.core.urlresolvers import reverse
 from django.test import override_settings
+import mock
 from nose.plugins.skip import SkipTest
 from oscar.core.loading import get_model
 from oscar.test import factories
@@ -10,7 +11,7 @@ from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.firefox.webdriver import WebDriver
 from selenium.webdriver.support.wait import WebDriverWait
 
-from ecommerce.extensions.dashboard.orders.views import queryset_orders_for_user
+from ecommerce.extensions.dashboard.orders.views import OrderListView, queryset_orders_for_user
 from ecommerce.extensions.dashboard.tests import DashboardViewTestMixin
 from ecommerce.extensions.fulfillment.signals import SHIPPING_EVENT_NAME
 from ecommerce.extensions.fulfillment.status import ORDER, LINE
@@ -168,6 +169,30 @@ class OrderListViewTests(OrderViewTestsMixin, RefundTestMixin, LiveServerTestCas
         self.assertNotIn('address', response.content)
 
 
+class OrderListViewKeysetPaginationTests(OrderViewTestsMixin, RefundTestMixin, TestCase):
+    path = reverse('dashboard:order-list')
+
+    def test_keyset_pagination(self):
+        """ Verify the view pages through orders by keyset, from the most recent, when a cursor is given. """
+        orders = [self.create_order(user=self.user) for __ in range(3)]
+        orders.reverse()
+        self.client.login(username=self.user.username, password=self.password)
+
+        with mock.patch.object(OrderListView, 'paginate_by', 2):
+            response = self.client.get('{path}?sort=number&dir=asc&cursor='.format(path=self.path))
+            self.assert_successful_response(response, orders[:2])
+            self.assertTrue(response.context['keyset_paginated'])
+
+            response = self.client.get('{path}?cursor={cursor}'.format(
+                path=self.path, cursor=response.context['next_cursor']
+            ))
+            self.assert_successful_response(response, orders[2:])
+            self.assertIsNone(response.context['next_cursor'])
+
+            response = self.client.get('{path}?cursor=invalid'.format(path=self.path))
+            self.assertEqual(response.status_code, 404)
+
+
 class OrderDetailViewTests(DashboardViewTestMixin, OrderViewTestsMixin, RefundTestMixin, TestCase):
     def _request_refund(self, order):
         """POST to the view."""
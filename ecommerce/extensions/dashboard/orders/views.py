@@ -7,7 +7,7 @@ from oscar.apps.dashboard.orders.views import (
 )
 from oscar.core.loading import get_model
 
-from ecommerce.extensions.dashboard.views import FilterFieldsMixin
+from ecommerce.extensions.dashboard.views import FilterFieldsMixin, KeysetPaginationMixin
 
 Order = get_model('order', 'Order')
 Partner = get_model('partner', 'Partner')
@@ -27,9 +27,10 @@ def queryset_orders_for_user(user):  # pylint: disable=unused-argument
     return Order._default_manager.select_related('user').prefetch_related('lines')  # pylint: disable=protected-access
 
 
-class OrderListView(FilterFieldsMixin, CoreOrderListView):
+class OrderListView(KeysetPaginationMixin, FilterFieldsMixin, CoreOrderListView):
     base_queryset = None
     form = None
+    keyset_ordering = ('-date_placed', '-id')
 
     def dispatch(self, request, *args, **kwargs):
         # NOTE: This method is overridden so that we can use our override of `queryset_orders_for_user`.
@@ -1,5 +1,7 @@
 from django.core.urlresolvers import reverse
+import mock
 
+from ecommerce.extensions.dashboard.refunds.views import RefundListView
 from ecommerce.extensions.refund.status import REFUND
 from ecommerce.extensions.refund.tests.factories import RefundFactory
 from ecommerce.tests.testcases import TestCase
@@ -103,6 +105,25 @@ class RefundListViewTests(RefundViewTestMixin, TestCase):
         response = self.client.get('{path}?sort=id&dir=desc'.format(path=self.path))
         self.assert_successful_response(response, list(reversed(refunds)))
 
+    def test_keyset_pagination(self):
+        """ The view should page through refunds by keyset, when a cursor is given. """
+        refunds = [RefundFactory(), RefundFactory(), RefundFactory()]
+        self.client.login(username=self.user.username, password=self.password)
+
+        with mock.patch.object(RefundListView, 'paginate_by', 2):
+            response = self.client.get('{path}?sort=id&dir=desc&cursor='.format(path=self.path))
+            self.assert_successful_response(response, refunds[:2])
+            self.assertTrue(response.context['keyset_paginated'])
+
+            response = self.client.get('{path}?cursor={cursor}'.format(
+                path=self.path, cursor=response.context['next_cursor']
+            ))
+            self.assert_successful_response(response, refunds[2:])
+            self.assertIsNone(response.context['next_cursor'])
+
+            response = self.client.get('{path}?cursor=invalid'.format(path=self.path))
+            self.assertEqual(response.status_code, 404)
+
 
 class RefundDetailViewTests(RefundViewTestMixin, TestCase):
     def setUp(self):
@@ -2,13 +2,13 @@ from django.views.generic import ListView, DetailView
 from oscar.core.loading import get_class, get_model
 from oscar.views import sort_queryset
 
-from ecommerce.extensions.dashboard.views import FilterFieldsMixin
+from ecommerce.extensions.dashboard.views import FilterFieldsMixin, KeysetPaginationMixin
 
 Refund = get_model('refund', 'Refund')
 RefundSearchForm = get_class('dashboard.refunds.forms', 'RefundSearchForm')
 
 
-class RefundListView(FilterFieldsMixin, ListView):
+class RefundListView(KeysetPaginationMixin, FilterFieldsMixin, ListView):
     """ Dashboard view to list refunds. """
     model = Refund
     context_object_name = 'refunds'
@@ -4,9 +4,9 @@ from django.conf import settings
 from django.contrib import messages
 from django.utils.translation import ugettext_lazy as _
 from oscar.apps.dashboard.users.views import UserDetailView as CoreUserDetailView
-import requests
 import waffle
 
+from ecommerce.core.http_client import get_session
 from ecommerce.core.url_utils import get_lms_enrollment_api_url
 
 
@@ -34,7 +34,7 @@ class UserDetailView(CoreUserDetailView):
                 'X-Edx-Api-Key': settings.EDX_API_KEY
             }
 
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = get_session().get(url, headers=headers, timeout=timeout)
 
             status_code = response.status_code
             if status_code == 200:
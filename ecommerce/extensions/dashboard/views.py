@@ -1,5 +1,12 @@
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.translation import ugettext_lazy as _
 from oscar.apps.dashboard.views import *  # pylint: disable=wildcard-import, unused-wildcard-import
 
+from ecommerce.extensions.api.pagination import (
+    decode_keyset_cursor, encode_keyset_cursor, get_keyset_position, get_keyset_position_filter
+)
+
 
 class ExtendedIndexView(IndexView):
     def get_stats(self):
@@ -39,3 +46,50 @@ class FilterFieldsMixin(object):
         context['exposed_field_ids'] = ['id_{}'.format(field) for field in self.exposed_fields().keys()]
 
         return context
+
+
+class KeysetPaginationMixin(object):
+    """
+    Page number pagination for list views, with opt-in keyset pagination.
+
+    As with the API's KeysetPagination, requests with a cursor parameter (empty for the first page) are paginated
+    by keyset: the results are ordered by keyset_ordering rather than by the selected sort column, each page starts
+    after the last result of the previous page, and the results are not counted. Such pages have no number; the
+    context holds the cursor of the next page instead.
+
+    keyset_ordering must identify the results uniquely, e.g. by ending with the primary key.
+    """
+    cursor_query_param = 'cursor'
+    keyset_ordering = ('id',)
+    next_cursor = None
+
+    def is_keyset_paginated(self):
+        return self.cursor_query_param in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.is_keyset_paginated():
+            return super(KeysetPaginationMixin, self).paginate_queryset(queryset, page_size)
+
+        ordering = self.keyset_ordering
+        queryset = queryset.order_by(*ordering)
+        try:
+            position = decode_keyset_cursor(self.request.GET[self.cursor_query_param], ordering)
+            if position:
+                queryset = queryset.filter(get_keyset_position_filter(ordering, position))
+        except (ValidationError, ValueError):
+            raise Http404(_('Invalid cursor.'))
+
+        # One more result is fetched, to find out whether there is a next page.
+        results = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_cursor = encode_keyset_cursor(get_keyset_position(results[-1], ordering))
+
+        return None, None, results, False
+
+    def get_context_data(self, **kwargs):
+        context = super(KeysetPaginationMixin, self).get_context_data(**kwargs)
+        context['keyset_paginated'] = self.is_keyset_paginated()
+        context['next_cursor'] = self.next_cursor
+        return context
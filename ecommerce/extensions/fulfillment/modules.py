@@ -12,10 +12,10 @@ from django.conf import settings
 from django.core.urlresolvers import reverse
 from oscar.core.loading import get_model
 from rest_framework import status
-import requests
 from requests.exceptions import ConnectionError, Timeout
 
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME
+from ecommerce.core.http_client import get_session
 from ecommerce.core.url_utils import get_lms_enrollment_api_url
 from ecommerce.courses.models import Course
 from ecommerce.courses.utils import mode_for_seat
@@ -122,7 +122,7 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
         if ip:
             headers['X-Forwarded-For'] = ip
 
-        return requests.post(enrollment_api_url, data=json.dumps(data), headers=headers, timeout=timeout)
+        return get_session().post(enrollment_api_url, data=json.dumps(data), headers=headers, timeout=timeout)
 
     def supports_line(self, line):
         return line.product.get_product_class().name == 'Seat'
@@ -174,13 +174,13 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
         for line in lines:
             try:
                 mode = mode_for_seat(line.product)
-                course_key = line.product.attr.course_key
+                course_key = line.product.flat_attr.course_key
             except AttributeError:
                 logger.error("Supported Seat Product does not have required attributes, [certificate_type, course_key]")
                 line.set_status(LINE.FULFILLMENT_CONFIGURATION_ERROR)
                 continue
             try:
-                provider = line.product.attr.credit_provider
+                provider = line.product.flat_attr.credit_provider
             except AttributeError:
                 logger.debug("Seat [%d] has no credit_provider attribute. Defaulted to None.", line.product.id)
                 provider = None
@@ -254,7 +254,7 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
             logger.info('Attempting to revoke fulfillment of Line [%d]...', line.id)
 
             mode = mode_for_seat(line.product)
-            course_key = line.product.attr.course_key
+            course_key = line.product.flat_attr.course_key
             data = {
                 'user': line.order.user.username,
                 'is_active': False,
@@ -273,7 +273,7 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
                     order_number=line.order.number,
                     product_class=line.product.get_product_class().name,
                     course_id=course_key,
-                    certificate_type=getattr(line.product.attr, 'certificate_type', ''),
+                    certificate_type=getattr(line.product.flat_attr, 'certificate_type', ''),
                     user_id=line.order.user.id
                 )
 
@@ -396,13 +396,14 @@ class EnrollmentCodeFulfillmentModule(BaseFulfillmentModule):
         logger.info(msg)
 
         for line in lines:
-            name = 'Enrollment Code Range for {}'.format(line.product.attr.course_key)
+            attributes = line.product.flat_attr
+            name = 'Enrollment Code Range for {}'.format(attributes.course_key)
             seat = Product.objects.filter(
                 attributes__name='course_key',
-                attribute_values__value_text=line.product.attr.course_key
+                attribute_values__value_text=attributes.course_key
             ).get(
                 attributes__name='certificate_type',
-                attribute_values__value_text=line.product.attr.seat_type
+                attribute_values__value_text=attributes.seat_type
             )
             _range, created = Range.objects.get_or_create(name=name)
             if created:
@@ -446,7 +447,7 @@ class EnrollmentCodeFulfillmentModule(BaseFulfillmentModule):
         """ Sends an email with enrollment code order information. """
         # Note (multi-courses): Change from a course_name to a list of course names.
         product = order.lines.first().product
-        course = Course.objects.get(id=product.attr.course_key)
+        course = Course.objects.get(id=product.flat_attr.course_key)
         receipt_page_url = get_receipt_page_url(
             order_number=order.number,
             site_configuration=order.site.siteconfiguration
@@ -30,7 +30,7 @@ from ecommerce.extensions.voucher.utils import create_vouchers
 from ecommerce.tests.testcases import TestCase
 
 JSON = 'application/json'
-LOGGER_NAME = 'ecommerce.extensions.analytics.utils'
+LOGGER_NAME = 'ecommerce.audit'
 
 Applicator = get_class('offer.utils', 'Applicator')
 Benefit = get_model('offer', 'Benefit')
@@ -156,13 +156,13 @@ class EnrollmentFulfillmentModuleTests(CourseCatalogTestMixin, FulfillmentTestMi
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_CONFIGURATION_ERROR, self.order.lines.all()[0].status)
 
-    @mock.patch('requests.post', mock.Mock(side_effect=ConnectionError))
+    @mock.patch('requests.Session.request', mock.Mock(side_effect=ConnectionError))
     def test_enrollment_module_network_error(self):
         """Test that lines receive a network error status if a fulfillment request experiences a network error."""
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_NETWORK_ERROR, self.order.lines.all()[0].status)
 
-    @mock.patch('requests.post', mock.Mock(side_effect=Timeout))
+    @mock.patch('requests.Session.request', mock.Mock(side_effect=Timeout))
     def test_enrollment_module_request_timeout(self):
         """Test that lines receive a timeout error status if a fulfillment request times out."""
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
@@ -3,12 +3,14 @@ import hashlib
 import re
 
 from django.conf import settings
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
 from oscar.apps.offer.abstract_models import AbstractConditionalOffer, AbstractRange
 from threadlocals.threadlocals import get_current_request
 
+from ecommerce.core.cache_utils import get_or_set_cached
+from ecommerce.courses.utils import get_course_runs_from_mirror, parse_course_run_keys_query
+
 
 class ConditionalOffer(AbstractConditionalOffer):
     email_domains = models.CharField(max_length=255, blank=True, null=True)
@@ -86,30 +88,43 @@ class Range(AbstractRange):
     def run_catalog_query(self, product):
         """
         Retrieve the results from running the query contained in catalog_query field.
+
+        Queries selecting course runs by key are evaluated locally, without contacting the Course Catalog service,
+        if the product's course run has been mirrored for the site's partner.
         """
+        # Stale results are refreshed on a background thread, which has no current request.
+        site = get_current_request().site
+        site_configuration = site.siteconfiguration
+        partner_code = site_configuration.partner.short_code
+
+        course_keys = parse_course_run_keys_query(self.catalog_query)
+        if course_keys is not None:
+            if product.course_id not in course_keys:
+                return {'course_runs': {product.course_id: False}}
+            if get_course_runs_from_mirror(site, [product.course_id]):
+                return {'course_runs': {product.course_id: True}}
+
         cache_key = 'catalog_query_contains [{}] [{}]'.format(self.catalog_query, product.course_id)
         cache_hash = hashlib.md5(cache_key).hexdigest()
-        response = cache.get(cache_hash)
-        if not response:  # pragma: no cover
-            request = get_current_request()
-            try:
-                response = request.site.siteconfiguration.course_catalog_api_client.course_runs.contains.get(
-                    query=self.catalog_query,
-                    course_run_ids=product.course_id,
-                    partner=request.site.siteconfiguration.partner.short_code
-                )
-                cache.set(cache_hash, response, settings.COURSES_API_CACHE_TIMEOUT)
-            except:  # pylint: disable=bare-except
-                raise Exception('Could not contact Course Catalog Service.')
-
-        return response
+
+        def _fetch():
+            return site_configuration.course_catalog_api_client.course_runs.contains.get(
+                query=self.catalog_query,
+                course_run_ids=product.course_id,
+                partner=partner_code
+            )
+
+        try:
+            return get_or_set_cached(cache_hash, _fetch, settings.COURSES_API_CACHE_TIMEOUT)
+        except:  # pylint: disable=bare-except
+            raise Exception('Could not contact Course Catalog Service.')
 
     def contains_product(self, product):
         """
         Assert if the range contains the product.
         """
         if self.catalog_query and self.course_seat_types:
-            if product.attr.certificate_type.lower() in self.course_seat_types:  # pylint: disable=unsupported-membership-test
+            if product.flat_attr.certificate_type.lower() in self.course_seat_types:  # pylint: disable=unsupported-membership-test
                 response = self.run_catalog_query(product)
                 # Range can have a catalog query and 'regular' products in it,
                 # therefor an OR is used to check for both possibilities.
@@ -7,9 +7,12 @@ from django.core.exceptions import ValidationError
 from django.test import RequestFactory
 from oscar.core.loading import get_model
 from oscar.test import factories
+from threadlocals.threadlocals import set_thread_variable
 
 from ecommerce.core.tests.decorators import mock_course_catalog_api_client
 from ecommerce.coupons.tests.mixins import CourseCatalogMockMixin, CouponMixin
+from ecommerce.courses.models import CatalogCourseRun
+from ecommerce.courses.tests.factories import CatalogCourseRunSyncFactory
 from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.extensions.offer.models import validate_credit_seat_type
 from ecommerce.tests.testcases import TestCase
@@ -106,6 +109,60 @@ class RangeTests(CouponMixin, CourseCatalogTestMixin, CourseCatalogMockMixin, Te
             cached_response = cache.get(cache_hash)
             self.assertEqual(response, cached_response)
 
+    @httpretty.activate
+    @mock_course_catalog_api_client
+    def test_run_catalog_query_refresh(self):
+        """
+        run_course_query() should return stale results, and refresh them in the background without a request.
+        """
+        course, seat = self.create_course_and_seat()
+        self.mock_dynamic_catalog_contains_api(query='key:*', course_run_ids=[course.id])
+        self.range.catalog_query = 'key:*'
+        cache_hash = hashlib.md5('catalog_query_contains [key:*] [{}]'.format(seat.course_id)).hexdigest()
+        stale_response = {'course_runs': {course.id: False}}
+        cache.set(cache_hash, stale_response)
+
+        def run_without_request(func):
+            set_thread_variable('request', None)
+            func()
+
+        self.addCleanup(set_thread_variable, 'request', self.request)
+        with mock.patch('ecommerce.core.cache_utils._run_in_background', side_effect=run_without_request):
+            self.assertEqual(self.range.run_catalog_query(seat), stale_response)
+        self.assertTrue(cache.get(cache_hash)['course_runs'][course.id])
+
+    @httpretty.activate
+    def test_run_catalog_query_course_run_keys(self):
+        """
+        run_course_query() should evaluate queries selecting mirrored course runs by key without contacting the
+        catalog.
+        """
+        course, seat = self.create_course_and_seat()
+        CatalogCourseRun.objects.create(partner=self.partner, key=course.id, data={'key': course.id})
+        CatalogCourseRunSyncFactory(partner=self.partner)
+
+        self.range.catalog_query = 'key:({} OR course-v1:other+course+run)'.format(course.id)
+        self.assertEqual(self.range.run_catalog_query(seat), {'course_runs': {course.id: True}})
+
+        self.range.catalog_query = 'key:course-v1:other+course+run'
+        self.assertEqual(self.range.run_catalog_query(seat), {'course_runs': {course.id: False}})
+        self.assertFalse(httpretty.has_request())
+
+    @httpretty.activate
+    @mock_course_catalog_api_client
+    def test_run_catalog_query_unmirrored_course_run_keys(self):
+        """
+        run_course_query() should contact the catalog for queries selecting course runs by key, if the course run
+        has not been mirrored for the partner.
+        """
+        course, seat = self.create_course_and_seat()
+        query = 'key:{}'.format(course.id)
+        self.mock_dynamic_catalog_contains_api(query=query, course_run_ids=[course.id])
+        self.range.catalog_query = query
+
+        self.assertEqual(self.range.run_catalog_query(seat), {'course_runs': {course.id: True}})
+        self.assertTrue(httpretty.has_request())
+
     @httpretty.activate
     @mock_course_catalog_api_client
     def test_query_range_contains_product(self):
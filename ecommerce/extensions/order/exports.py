@@ -0,0 +1,141 @@
+"""Export of orders, for reconciliation. """
+from __future__ import unicode_literals
+
+import csv
+import json
+
+from django.conf import settings
+from oscar.core.loading import get_model
+
+Order = get_model('order', 'Order')
+
+CSV_FIELD_NAMES = (
+    'order_number', 'date_placed', 'status', 'currency', 'total_excl_tax', 'total_incl_tax', 'username', 'email',
+    'payment_processors', 'payment_references', 'amount_debited', 'amount_refunded', 'discount', 'voucher_codes',
+    'line_id', 'partner_sku', 'title', 'quantity', 'unit_price_excl_tax', 'line_price_excl_tax', 'line_status',
+)
+_LINE_FIELD_COUNT = len(CSV_FIELD_NAMES) - CSV_FIELD_NAMES.index('line_id')
+
+
+def iter_orders(start=None, end=None, chunk_size=None):
+    """
+    Yields the orders placed in a date range, ordered by ID, with the relations they are exported with.
+
+    Orders are read in chunks, each selected by ID after the last order of the previous chunk, so that only
+    one chunk is held in memory at a time.
+
+    Arguments:
+        start (datetime): Only orders placed at or after this time are exported.
+        end (datetime): Only orders placed before this time are exported.
+        chunk_size (int): Number of orders read at once. Defaults to settings.ORDER_EXPORT_CHUNK_SIZE.
+    """
+    chunk_size = chunk_size or settings.ORDER_EXPORT_CHUNK_SIZE
+    queryset = Order.objects.select_related('basket', 'user').prefetch_related(
+        'lines', 'sources__source_type', 'discounts', 'basket__vouchers'
+    ).order_by('id')
+    if start:
+        queryset = queryset.filter(date_placed__gte=start)
+    if end:
+        queryset = queryset.filter(date_placed__lt=end)
+
+    last_id = 0
+    while True:
+        orders = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        for order in orders:
+            yield order
+
+        if len(orders) < chunk_size:
+            return
+        last_id = orders[-1].id
+
+
+def serialize_order(order):
+    """ Returns the order, with its lines, payment sources, discounts and vouchers, as a dict. """
+    user = order.user
+    return {
+        'number': order.number,
+        'date_placed': order.date_placed.isoformat(),
+        'status': order.status,
+        'currency': order.currency,
+        'total_excl_tax': str(order.total_excl_tax),
+        'total_incl_tax': str(order.total_incl_tax),
+        'user': {'username': user.username, 'email': user.email} if user else None,
+        'lines': [
+            {
+                'id': line.id,
+                'partner_sku': line.partner_sku,
+                'title': line.title,
+                'quantity': line.quantity,
+                'unit_price_excl_tax': str(line.unit_price_excl_tax),
+                'line_price_excl_tax': str(line.line_price_excl_tax),
+                'status': line.status,
+            } for line in order.lines.all()
+        ],
+        'payment_sources': [
+            {
+                'processor': source.source_type.name,
+                'reference': source.reference,
+                'amount_allocated': str(source.amount_allocated),
+                'amount_debited': str(source.amount_debited),
+                'amount_refunded': str(source.amount_refunded),
+            } for source in order.sources.all()
+        ],
+        'discounts': [
+            {
+                'offer_name': discount.offer_name,
+                'voucher_code': discount.voucher_code,
+                'amount': str(discount.amount),
+            } for discount in order.discounts.all()
+        ],
+        'vouchers': [voucher.code for voucher in order.basket.vouchers.all()] if order.basket else [],
+    }
+
+
+def export_ndjson(orders):
+    """ Yields the orders as newline-delimited JSON, one order per line. """
+    for order in orders:
+        yield json.dumps(serialize_order(order)) + '\n'
+
+
+class _Echo(object):
+    """ File-like object returning what is written to it, for csv writers to produce strings. """
+
+    def write(self, value):
+        return value
+
+
+def _encode(value):
+    return value.encode('utf-8') if isinstance(value, unicode) else value
+
+
+def export_csv(orders):
+    """
+    Yields the orders as CSV rows, one row per line, preceded by a header. Orders without lines are exported as
+    a single row, whose line columns are empty.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow([_encode(name) for name in CSV_FIELD_NAMES])
+
+    for order in orders:
+        data = serialize_order(order)
+        sources = data['payment_sources']
+        order_values = [
+            data['number'], data['date_placed'], data['status'], data['currency'], data['total_excl_tax'],
+            data['total_incl_tax'], data['user']['username'] if data['user'] else '',
+            data['user']['email'] if data['user'] else '',
+            ' '.join(source['processor'] for source in sources),
+            ' '.join(source['reference'] for source in sources),
+            str(sum(source.amount_debited for source in order.sources.all())),
+            str(sum(source.amount_refunded for source in order.sources.all())),
+            str(sum(discount.amount for discount in order.discounts.all())),
+            ' '.join(data['vouchers']),
+        ]
+
+        lines_values = [
+            [
+                line['id'], line['partner_sku'], line['title'], line['quantity'], line['unit_price_excl_tax'],
+                line['line_price_excl_tax'], line['status'],
+            ] for line in data['lines']
+        ] or [[''] * _LINE_FIELD_COUNT]
+        for line_values in lines_values:
+            yield writer.writerow([_encode(value) for value in order_values + line_values])
@@ -0,0 +1,49 @@
+""" Populates the course ID of the order lines placed before it was stored on them. """
+from __future__ import unicode_literals
+import logging
+from collections import defaultdict
+
+from django.core.management import BaseCommand
+from oscar.core.loading import get_model
+
+logger = logging.getLogger(__name__)
+Line = get_model('order', 'Line')
+
+
+class Command(BaseCommand):
+    help = 'Populate the course ID of order lines from the course key of their products.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size',
+                            action='store',
+                            dest='batch_size',
+                            type=int,
+                            default=1000,
+                            help='Number of order lines read, and updated, at a time.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        lines = Line.objects.filter(course_id__isnull=True, product__isnull=False)
+        lines = lines.select_related('product').order_by('id')
+
+        last_id = 0
+        updated = 0
+        while True:
+            batch = list(lines.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            line_ids = defaultdict(list)
+            for line in batch:
+                course_id = getattr(line.product.flat_attr, 'course_key', None)
+                if course_id:
+                    line_ids[course_id].append(line.id)
+
+            # Lines of the same course are updated together.
+            for course_id, ids in line_ids.items():
+                updated += Line.objects.filter(id__in=ids).update(course_id=course_id)
+
+            logger.info('Populated the course ID of order lines up to [%d].', last_id)
+
+        logger.info('Populated the course ID of [%d] order lines.', updated)
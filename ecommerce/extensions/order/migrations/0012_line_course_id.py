@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0011_auto_20161025_1446'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalline',
+            name='course_id',
+            field=models.CharField(help_text='Course key of the product, denormalized for the lookup of the lines of a course.', max_length=255, null=True, db_index=True, blank=True),
+        ),
+        migrations.AddField(
+            model_name='line',
+            name='course_id',
+            field=models.CharField(help_text='Course key of the product, denormalized for the lookup of the lines of a course.', max_length=255, null=True, db_index=True, blank=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def populate_line_course_ids(apps, schema_editor):
+    """ Populate the course ID of existing order lines from the course key of their products. """
+    Line = apps.get_model('order', 'Line')
+    ProductAttributeValue = apps.get_model('catalogue', 'ProductAttributeValue')
+
+    lines = Line.objects.filter(course_id__isnull=True, product__isnull=False)
+    course_product_ids = defaultdict(list)
+    for product_id, course_id in ProductAttributeValue.objects.filter(
+            attribute__code='course_key', product_id__in=lines.values('product_id')
+    ).values_list('product_id', 'value_text'):
+        if course_id:
+            course_product_ids[course_id].append(product_id)
+
+    # Lines of the same course are updated together.
+    for course_id, ids in course_product_ids.items():
+        Line.objects.filter(course_id__isnull=True, product_id__in=ids).update(course_id=course_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0022_catalog_fingerprint'),
+        ('order', '0012_line_course_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_line_course_ids, migrations.RunPython.noop),
+    ]
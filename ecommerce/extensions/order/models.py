@@ -27,6 +27,13 @@ class PaymentEvent(AbstractPaymentEvent):
 
 
 class Line(AbstractLine):
+    course_id = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text=_('Course key of the product, denormalized for the lookup of the lines of a course.')
+    )
     history = HistoricalRecords()
 
 
@@ -0,0 +1,78 @@
+import csv
+import datetime
+import json
+
+from django.utils import timezone
+from oscar.core.loading import get_model
+from oscar.test import factories
+
+from ecommerce.extensions.order.exports import CSV_FIELD_NAMES, export_csv, export_ndjson, iter_orders
+from ecommerce.tests.testcases import TestCase
+
+Order = get_model('order', 'Order')
+
+
+class OrderExportTests(TestCase):
+    """ Tests for the order export. """
+
+    def setUp(self):
+        super(OrderExportTests, self).setUp()
+        self.user = self.create_user()
+        self.orders = [factories.create_order(user=self.user) for __ in range(5)]
+
+    def test_iter_orders(self):
+        """ Verify all orders are read, a chunk at a time, with a fixed number of queries per chunk. """
+        # Each chunk is read with a query for the orders, and one each for their lines, payment sources, discounts
+        # and vouchers.
+        with self.assertNumQueries(3 * 5):
+            orders = list(iter_orders(chunk_size=2))
+        self.assertEqual([order.id for order in orders], sorted(order.id for order in self.orders))
+
+    def test_iter_orders_date_range(self):
+        """ Verify only the orders placed in the date range are read. """
+        now = timezone.now()
+        Order.objects.filter(id=self.orders[0].id).update(date_placed=now - datetime.timedelta(days=40))
+        Order.objects.filter(id=self.orders[1].id).update(date_placed=now + datetime.timedelta(days=1))
+
+        orders = list(iter_orders(start=now - datetime.timedelta(days=30), end=now + datetime.timedelta(hours=1)))
+        self.assertEqual([order.id for order in orders], [order.id for order in self.orders[2:]])
+
+    def test_export_ndjson(self):
+        """ Verify orders are exported as a JSON object per line. """
+        order = self.orders[0]
+        source = factories.SourceFactory(order=order, amount_debited=order.total_incl_tax)
+        lines = list(export_ndjson(iter_orders()))
+
+        self.assertEqual(len(lines), 5)
+        data = json.loads(lines[0])
+        self.assertEqual(data['number'], unicode(order.number))
+        self.assertEqual(data['user'], {'username': self.user.username, 'email': self.user.email})
+        self.assertEqual([line['id'] for line in data['lines']], [line.id for line in order.lines.all()])
+        self.assertEqual(data['payment_sources'][0]['processor'], source.source_type.name)
+        self.assertEqual(data['payment_sources'][0]['amount_debited'], str(order.total_incl_tax))
+        self.assertEqual(data['discounts'], [])
+
+    def test_export_csv(self):
+        """ Verify orders are exported as a CSV row per line, preceded by a header. """
+        rows = list(csv.reader(export_csv(iter_orders())))
+
+        self.assertEqual(rows[0], list(CSV_FIELD_NAMES))
+        self.assertEqual(len(rows), 1 + Order.objects.count())
+        order = self.orders[0]
+        row = dict(zip(CSV_FIELD_NAMES, rows[1]))
+        self.assertEqual(row['order_number'], str(order.number))
+        self.assertEqual(row['line_id'], str(order.lines.first().id))
+        self.assertEqual(row['email'], self.user.email)
+
+    def test_export_csv_order_without_lines(self):
+        """ Verify orders without lines are exported as a single row, with empty line columns. """
+        order = self.orders[0]
+        order.lines.all().delete()
+        rows = list(csv.reader(export_csv(iter_orders())))
+
+        self.assertEqual(len(rows), 1 + Order.objects.count())
+        row = dict(zip(CSV_FIELD_NAMES, rows[1]))
+        self.assertEqual(row['order_number'], str(order.number))
+        self.assertEqual(row['line_id'], '')
+        self.assertEqual(row['line_status'], '')
+        self.assertEqual(len(rows[1]), len(CSV_FIELD_NAMES))
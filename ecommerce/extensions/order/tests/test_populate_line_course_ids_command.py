@@ -0,0 +1,42 @@
+from django.core.management import call_command
+from oscar.core.loading import get_model
+from oscar.test.factories import create_order
+from oscar.test.newfactories import BasketFactory, ProductFactory
+
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
+from ecommerce.tests.testcases import TestCase
+
+Line = get_model('order', 'Line')
+
+
+class PopulateLineCourseIdsCommandTests(CourseCatalogTestMixin, TestCase):
+    def setUp(self):
+        super(PopulateLineCourseIdsCommandTests, self).setUp()
+        self.courses = [CourseFactory() for __ in range(3)]
+        basket = BasketFactory(owner=self.create_user(), site=self.site)
+        for course in self.courses:
+            basket.add_product(course.create_or_update_seat('verified', True, 50, self.partner))
+        basket.add_product(ProductFactory(stockrecords__price_currency='USD'))
+        self.order = create_order(basket=basket, user=basket.owner)
+
+        # The lines of orders placed before the course ID was stored on them have none.
+        Line.objects.update(course_id=None)
+
+    def test_handle(self):
+        """ Verify the command populates the course ID of the lines of course products, in batches. """
+        # Three batches are read (the last one empty), and the lines of each course are updated once.
+        with self.assertNumQueries(3 + 3):
+            call_command('populate_line_course_ids', batch_size=3)
+
+        for line in self.order.lines.all():
+            expected = line.product.attr.course_key if hasattr(line.product.attr, 'course_key') else None
+            self.assertEqual(line.course_id, expected)
+        self.assertEqual(Line.objects.filter(course_id__isnull=False).count(), len(self.courses))
+
+    def test_handle_populated_lines(self):
+        """ Verify lines whose course ID is populated are not updated. """
+        line = self.order.lines.first()
+        Line.objects.filter(id=line.id).update(course_id='other-course')
+        call_command('populate_line_course_ids')
+        self.assertEqual(Line.objects.get(id=line.id).course_id, 'other-course')
@@ -4,12 +4,15 @@ import mock
 
 from django.test.client import RequestFactory
 from oscar.core.loading import get_class
-from oscar.test.factories import create_basket as oscar_create_basket
-from oscar.test.newfactories import BasketFactory
+from oscar.test.factories import create_basket as oscar_create_basket, create_order
+from oscar.test.newfactories import BasketFactory, ProductFactory
 from testfixtures import LogCapture
 
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.catalogue.tests.mixins import CourseCatalogTestMixin
 from ecommerce.extensions.fulfillment.status import ORDER
 from ecommerce.referrals.models import Referral
+from ecommerce.referrals.utils import flush_referral_attributions, open_referral_attribution_buffer
 from ecommerce.tests.factories import SiteConfigurationFactory, PartnerFactory
 from ecommerce.tests.testcases import TestCase
 
@@ -64,7 +67,7 @@ class OrderNumberGeneratorTests(TestCase):
         self.assertEqual(self.generator.basket_id('ACME-101001'), 1001)
 
 
-class OrderCreatorTests(TestCase):
+class OrderCreatorTests(CourseCatalogTestMixin, TestCase):
     order_creator = OrderCreator()
 
     def setUp(self):
@@ -141,6 +144,26 @@ class OrderCreatorTests(TestCase):
         referral = Referral.objects.get(order_id=order.id)
         self.assertEqual(referral.affiliate_id, affiliate_id)
 
+    def test_create_order_model_basket_referral_buffered(self):
+        """
+        Verify the create_order_model method does not query referrals while a request is being processed, and the
+        referral is associated with the order when the request's attributions are flushed.
+        """
+        basket = self.create_basket(self.site)
+        self.create_referral(basket, 'test affiliate')
+        request = RequestFactory().get('/')
+        open_referral_attribution_buffer(request)
+
+        with mock.patch('ecommerce.referrals.utils.get_current_request', return_value=request), \
+                mock.patch.object(Referral.objects, 'get') as mock_get:
+            order = self.create_order_model(basket)
+
+        self.assertFalse(mock_get.called)
+        self.assertIsNone(Referral.objects.get(basket=basket).order)
+
+        flush_referral_attributions(request)
+        self.assertEqual(Referral.objects.get(basket=basket).order, order)
+
     def test_create_order_model_basket_no_referral(self):
         """ Verify the create_order_model method logs error if no referral."""
         # Create a site config to clean up log messages
@@ -162,10 +185,20 @@ class OrderCreatorTests(TestCase):
         # Create the basket WITHOUT an associated referral
         basket = self.create_basket(site)
 
-        with LogCapture(LOGGER_NAME, level=logging.ERROR) as l:
-            Referral.objects.get = mock.Mock()
-            Referral.objects.get.side_effect = Exception
-
+        with LogCapture(LOGGER_NAME, level=logging.ERROR) as l, \
+                mock.patch.object(Referral.objects, 'get', side_effect=Exception):
             order = self.create_order_model(basket)
             message = 'Referral for Order [{order_id}] failed to save.'.format(order_id=order.id)
             l.check((LOGGER_NAME, 'ERROR', message))
+
+    def test_create_line_models_course_id(self):
+        """ Verify the lines of orders are created with the course ID of their products. """
+        course = CourseFactory()
+        seat = course.create_or_update_seat('verified', True, 50, self.partner)
+        basket = BasketFactory(owner=self.user, site=self.site)
+        basket.add_product(seat)
+        basket.add_product(ProductFactory(stockrecords__price_currency='USD'))
+
+        order = create_order(basket=basket, user=self.user)
+        self.assertEqual(order.lines.get(product=seat).course_id, course.id)
+        self.assertIsNone(order.lines.exclude(product=seat).get().course_id)
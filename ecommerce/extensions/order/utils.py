@@ -7,6 +7,7 @@ from oscar.core.loading import get_model
 from threadlocals.threadlocals import get_current_request
 
 from ecommerce.referrals.models import Referral
+from ecommerce.referrals.utils import buffer_referral_order
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +71,10 @@ class OrderCreator(OscarOrderCreator):
 
         This override ensures the order's site is set to that of the basket. If the basket has no site, the default
         site is used. The site value can be overridden by setting the `site` kwarg.
+
+        When the order is placed while a request is being processed, the referral of its basket is associated with
+        it once the request's transaction has been committed, by ReferralAttributionMiddleware. Otherwise, it is
+        associated right away.
         """
 
         # If a site was not passed in with extra_order_fields,
@@ -102,8 +107,15 @@ class OrderCreator(OscarOrderCreator):
         order = Order(**order_data)
         order.save()
 
+        if not buffer_referral_order(order):
+            self._associate_referral(order)
+
+        return order
+
+    def _associate_referral(self, order):
+        """ Associates the referral of the order's basket, if any, with the order. """
         try:
-            referral = Referral.objects.get(basket=basket)
+            referral = Referral.objects.get(basket_id=order.basket_id)
             referral.order = order
             referral.save()
         except Referral.DoesNotExist:
@@ -111,4 +123,13 @@ class OrderCreator(OscarOrderCreator):
         except Exception:  # pylint: disable=broad-except
             logger.exception('Referral for Order [%d] failed to save.', order.id)
 
-        return order
+    def create_line_models(self, order, basket_line, extra_line_fields=None):
+        """
+        Create the line models.
+
+        This override stores the course key of the line's product on the line, for refunds to find the lines of
+        a course without reading the product's attribute values.
+        """
+        extra_line_fields = dict(extra_line_fields or {})
+        extra_line_fields.setdefault('course_id', getattr(basket_line.product.flat_attr, 'course_key', None))
+        return super(OrderCreator, self).create_line_models(order, basket_line, extra_line_fields=extra_line_fields)
@@ -8,6 +8,27 @@ from simple_history.models import HistoricalRecords
 class StockRecord(AbstractStockRecord):
     history = HistoricalRecords()
 
+    # Fields read by the seat summary of the course of the stock record's product.
+    SEAT_SUMMARY_FIELDS = ('product_id', 'partner_sku', 'price_excl_tax', 'price_currency')
+    # Values of SEAT_SUMMARY_FIELDS when the stock record was loaded or last saved. None for new stock records.
+    _seat_summary_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        stock_record = super(StockRecord, cls).from_db(db, field_names, values)  # pylint: disable=bad-super-call
+        if all(name in field_names for name in cls.SEAT_SUMMARY_FIELDS):
+            stock_record.seat_summary_fields_changed()
+        return stock_record
+
+    def seat_summary_fields_changed(self):
+        """
+        Returns whether SEAT_SUMMARY_FIELDS changed since the stock record was loaded, or since this was last called.
+        """
+        values = tuple(getattr(self, name) for name in self.SEAT_SUMMARY_FIELDS)
+        changed = values != self._seat_summary_values
+        self._seat_summary_values = values
+        return changed
+
 
 class Partner(AbstractPartner):
     # short_code is the unique identifier for the 'Partner'
@@ -1,3 +1,6 @@
+from ecommerce.core.models import get_site_configuration_snapshot
+
+
 def get_partner_for_site(request):
     """ Returns the Partner associated with the request. """
-    return request.site.siteconfiguration.partner
+    return get_site_configuration_snapshot(request.site).partner
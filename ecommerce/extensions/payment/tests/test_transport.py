@@ -1,5 +1,7 @@
 import uuid
 
+from django.test import override_settings
+import mock
 from suds.transport import Request
 
 from ecommerce.extensions.payment.transport import RequestsTransport
@@ -42,3 +44,14 @@ class RequestsTransportTests(TestCase):
             'content-type': CONTENT_TYPE
         })
         self.assertEqual(response.message, body)
+
+    @override_settings(PAYMENT_HTTP_CLIENT_TIMEOUT=60)
+    def test_session(self):
+        """ Verify requests are given the payment timeout, and 5xx responses (SOAP faults) are not failures. """
+        session = RequestsTransport().get_session()
+        self.assertEqual(session.timeout, 60)
+        self.assertFalse(session.server_errors_fail)
+
+        with mock.patch('requests.Session.request') as mock_request:
+            RequestsTransport().send(Request(API_URL))
+        self.assertEqual(mock_request.call_args[1]['timeout'], 60)
@@ -1,9 +1,11 @@
 import io
 
-import requests
+from django.conf import settings
 from suds.transport import Reply
 from suds.transport.http import HttpAuthenticated
 
+from ecommerce.core.http_client import get_session
+
 
 class RequestsTransport(HttpAuthenticated):
     """
@@ -12,17 +14,23 @@ class RequestsTransport(HttpAuthenticated):
     This class uses requests, instead of urllib2, to make HTTP requests. This allows us to properly
     verify SSL certificates. This has been adapted from
     http://stackoverflow.com/questions/6277027/suds-over-https-with-cert.
+
+    Requests are given settings.PAYMENT_HTTP_CLIENT_TIMEOUT to complete. SOAP faults, e.g. for declined payments, are
+    returned with a 500 status, so these responses do not count towards opening the circuit to the service.
     """
+    def get_session(self):
+        return get_session(timeout=settings.PAYMENT_HTTP_CLIENT_TIMEOUT, server_errors_fail=False)
+
     def open(self, request):
         """ Fetch the WSDL using requests. """
         self.addcredentials(request)
-        resp = requests.get(request.url, data=request.message, headers=request.headers)
+        resp = self.get_session().get(request.url, data=request.message, headers=request.headers)
         result = io.StringIO(resp.content.decode('utf-8'))
         return result
 
     def send(self, request):
         """ POST to the service using requests. """
         self.addcredentials(request)
-        resp = requests.post(request.url, data=request.message, headers=request.headers)
+        resp = self.get_session().post(request.url, data=request.message, headers=request.headers)
         result = Reply(resp.status_code, resp.headers, resp.content)
         return result
@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import Q
 from oscar.core.loading import get_model
 
 from ecommerce.extensions.fulfillment.status import ORDER
@@ -7,6 +9,20 @@ Refund = get_model('refund', 'Refund')
 RefundLine = get_model('refund', 'RefundLine')
 
 
+def _course_lines_query(course_id, prefix=''):
+    """
+    Returns a query matching the order lines of the given course.
+
+    Lines whose course ID has not been populated, e.g. those written by a release preceding the column, are
+    matched by the course key of their product.
+    """
+    return Q(**{prefix + 'course_id': course_id}) | Q(**{
+        prefix + 'course_id__isnull': True,
+        prefix + 'product__attribute_values__attribute__code': 'course_key',
+        prefix + 'product__attribute_values__value_text': course_id,
+    })
+
+
 def find_orders_associated_with_course(user, course_id):
     """
     Returns a list of orders associated with the given user and course.
@@ -30,16 +46,14 @@ def find_orders_associated_with_course(user, course_id):
         return []
 
     # Find all complete orders associated with the course.
-    orders = user.orders.filter(status=ORDER.COMPLETE,
-                                lines__product__attribute_values__attribute__code='course_key',
-                                lines__product__attribute_values__value_text=course_id)
+    orders = user.orders.filter(_course_lines_query(course_id, prefix='lines__'), status=ORDER.COMPLETE).distinct()
 
     return list(orders)
 
 
 def create_refunds(orders, course_id):
     """
-    Creates refunds for the given list of orders.
+    Creates refunds for the given list of orders, in a single transaction.
 
      Arguments:
         orders (list): orders for which refunds should be created
@@ -50,14 +64,13 @@ def create_refunds(orders, course_id):
     """
     refunds = []
 
-    for order in orders:
-        # Find lines associated with the course and not refunded.
-        lines = order.lines.filter(refund_lines__id__isnull=True,
-                                   product__attribute_values__attribute__code='course_key',
-                                   product__attribute_values__value_text=course_id)
+    with transaction.atomic():
+        for order in orders:
+            # Find lines associated with the course and not refunded.
+            lines = order.lines.filter(_course_lines_query(course_id), refund_lines__id__isnull=True).distinct()
 
-        refund = Refund.create_with_lines(order, lines)
-        if refund is not None:
-            refunds.append(refund)
+            refund = Refund.create_with_lines(order, lines)
+            if refund is not None:
+                refunds.append(refund)
 
     return refunds
@@ -0,0 +1,111 @@
+""" Approves the refunds matching a filter, e.g. those of a cancelled course. """
+from __future__ import unicode_literals
+from collections import Counter
+import logging
+
+from dateutil.parser import parse
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+
+from ecommerce.extensions.refund.processing import BulkRefundProcessor, DEFAULT_STATUSES, get_refunds
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Approve the refunds matching a course, creation date range and statuses. Refunds leave the statuses '
+            'selected as they are processed, so an interrupted run is resumed by running the command again.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course-id',
+                            action='store',
+                            dest='course_id',
+                            default=None,
+                            help='Only process the refunds of lines of this course.')
+        parser.add_argument('--start-date',
+                            action='store',
+                            dest='start_date',
+                            default=None,
+                            help='Only process the refunds created at or after this ISO 8601 date, in UTC unless '
+                                 'specified.')
+        parser.add_argument('--end-date',
+                            action='store',
+                            dest='end_date',
+                            default=None,
+                            help='Only process the refunds created before this ISO 8601 date, in UTC unless '
+                                 'specified.')
+        parser.add_argument('--status',
+                            action='append',
+                            dest='statuses',
+                            default=None,
+                            help='Only process the refunds in this status. May be repeated. Defaults to [{}].'.format(
+                                ', '.join(DEFAULT_STATUSES)))
+        parser.add_argument('--payment-only',
+                            action='store_true',
+                            dest='payment_only',
+                            default=False,
+                            help='Issue credits without revoking the fulfillment of the refunded lines.')
+        parser.add_argument('--workers',
+                            action='store',
+                            dest='workers',
+                            type=int,
+                            default=None,
+                            help='Number of refunds approved concurrently.')
+        parser.add_argument('--batch-size',
+                            action='store',
+                            dest='batch_size',
+                            type=int,
+                            default=100,
+                            help='Number of refunds read, and processed, at a time.')
+        parser.add_argument('--commit',
+                            action='store_true',
+                            dest='commit',
+                            default=False,
+                            help='Process the refunds. If this is not set, the refunds are only counted.')
+
+    def handle(self, *args, **options):
+        refunds = get_refunds(
+            course_id=options['course_id'],
+            start=self._parse_date(options['start_date']),
+            end=self._parse_date(options['end_date']),
+            statuses=options['statuses'] or DEFAULT_STATUSES
+        )
+
+        if not options['commit']:
+            logger.info('[%d] refunds would be processed. Use --commit to process them.', refunds.count())
+            return
+
+        processor = BulkRefundProcessor(revoke_fulfillment=not options['payment_only'], workers=options['workers'])
+        totals = Counter()
+        last_id = 0
+        while True:
+            batch = list(refunds.filter(id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            # Refunds are selected after the last one processed, so those which fail are not retried by this run.
+            last_id = batch[-1].id
+
+            for outcome in processor.process(batch):
+                if outcome['skipped']:
+                    totals['skipped'] += 1
+                elif outcome['succeeded']:
+                    totals['succeeded'] += 1
+                else:
+                    totals['failed'] += 1
+                    logger.warning('Refund [%d] was not processed. It is in status [%s].',
+                                   outcome['refund_id'], outcome['status'])
+
+            logger.info('Processed refunds up to [%d].', last_id)
+
+        logger.info('Processed [%d] refunds, of which [%d] failed. Skipped [%d] refunds processed by another run.',
+                    totals['succeeded'] + totals['failed'], totals['failed'], totals['skipped'])
+
+    def _parse_date(self, value):
+        if not value:
+            return None
+
+        try:
+            date = parse(value)
+        except (TypeError, ValueError):
+            raise CommandError('[{}] is not an ISO 8601 date.'.format(value))
+        return date if timezone.is_aware(date) else timezone.make_aware(date, timezone.utc)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('refund', '0002_auto_20151214_1017'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalrefund',
+            name='claimed',
+            field=models.DateTimeField(help_text='Time at which bulk refund processing started approving this refund, if it is being approved.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='refund',
+            name='claimed',
+            field=models.DateTimeField(help_text='Time at which bulk refund processing started approving this refund, if it is being approved.', null=True, editable=False, blank=True),
+        ),
+    ]
@@ -9,6 +9,7 @@ from oscar.core.loading import get_class
 from oscar.core.utils import get_default_currency
 from simple_history.models import HistoricalRecords
 
+from ecommerce.core.history import create_history
 from ecommerce.extensions.analytics.utils import audit_log
 from ecommerce.extensions.fulfillment.api import revoke_fulfillment_for_refund
 from ecommerce.extensions.payment.helpers import get_processor_class_by_name
@@ -74,6 +75,12 @@ class Refund(StatusMixin, TimeStampedModel):
             (REFUND.COMPLETE, REFUND.COMPLETE),
         ]
     )
+    claimed = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('Time at which bulk refund processing started approving this refund, if it is being approved.')
+    )
 
     history = HistoricalRecords()
     pipeline_setting = 'OSCAR_REFUND_STATUS_PIPELINE'
@@ -92,13 +99,18 @@ class Refund(StatusMixin, TimeStampedModel):
 
         Arguments:
             order (order.Order): The order to which the newly-created refund corresponds.
-            lines (list of order.Line): Order lines to be refunded.
+            lines (list or QuerySet of order.Line): Order lines to be refunded.
 
         Returns:
             None: If no unrefunded order lines have been provided.
             Refund: With RefundLines corresponding to each given unrefunded order line.
         """
-        unrefunded_lines = [line for line in lines if not line.refund_lines.exclude(status=REFUND_LINE.DENIED).exists()]
+        if not isinstance(lines, models.QuerySet):
+            lines = order.lines.filter(id__in=[line.id for line in lines])
+
+        # Lines are unrefunded if all their refund lines, if any, have been denied.
+        refunded_line_ids = RefundLine.objects.exclude(status=REFUND_LINE.DENIED).values('order_line_id')
+        unrefunded_lines = list(lines.exclude(id__in=refunded_line_ids).order_by('id'))
 
         if unrefunded_lines:
             status = getattr(settings, 'OSCAR_INITIAL_REFUND_STATUS', REFUND.OPEN)
@@ -120,14 +132,18 @@ class Refund(StatusMixin, TimeStampedModel):
             )
 
             status = getattr(settings, 'OSCAR_INITIAL_REFUND_LINE_STATUS', REFUND_LINE.OPEN)
-            for line in unrefunded_lines:
-                RefundLine.objects.create(
+            RefundLine.objects.bulk_create([
+                RefundLine(
                     refund=refund,
                     order_line=line,
                     line_credit_excl_tax=line.line_price_excl_tax,
                     quantity=line.quantity,
                     status=status
                 )
+                for line in unrefunded_lines
+            ])
+            # Some databases do not return the IDs of rows inserted in bulk, so the lines are read back.
+            create_history(list(refund.lines.all()), '+')
 
             if total_credit_excl_tax == 0:
                 refund.approve()
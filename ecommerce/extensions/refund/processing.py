@@ -0,0 +1,225 @@
+"""
+Bulk processing of refunds.
+
+Refunds are approved concurrently, by a pool of threads. Approving a refund issues a credit through the payment
+processor of its order, so the refunds of each processor are limited, by REFUND_PROCESSOR_LIMITS, to a number
+approved at once and a number started per second.
+
+Each refund is claimed, with a conditional update, before it is approved. A refund whose status changed since it
+was read, or which an overlapping run is approving, is skipped, so that its credit is not issued twice. No lock or
+transaction is held while the payment processor and the LMS are called: as when a refund is approved on its own,
+each status is saved as it is reached, and a failed approval is resumed from the step which failed.
+
+Processing only moves refunds out of the statuses it selects (open, by default), so a run which is interrupted
+is resumed by running it again with the same filter.
+
+Refunds are approved outside of the request of their site, if any, so the site of each refund's order is set as
+that of the current request, which fulfillment revocation and tracking build their LMS and Segment clients from.
+"""
+from __future__ import unicode_literals
+
+from contextlib import contextmanager
+import datetime
+import logging
+from multiprocessing.pool import ThreadPool
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db import connection
+from django.db.models import Q
+from django.http import HttpRequest
+from django.utils import timezone
+from oscar.core.loading import get_model
+from threadlocals.threadlocals import get_current_request, set_thread_variable
+
+from ecommerce.extensions.analytics.utils import audit_log
+from ecommerce.extensions.refund.status import REFUND
+
+logger = logging.getLogger(__name__)
+Refund = get_model('refund', 'Refund')
+
+DEFAULT_STATUSES = (REFUND.OPEN,)
+
+
+def get_refunds(course_id=None, start=None, end=None, statuses=DEFAULT_STATUSES):
+    """
+    Returns the refunds matching a filter, ordered by ID, with the relations read to process them.
+
+    Arguments:
+        course_id (str): Only refunds of lines of this course are returned.
+        start (datetime): Only refunds created at or after this time are returned.
+        end (datetime): Only refunds created before this time are returned.
+        statuses (iterable): Only refunds in these statuses are returned.
+
+    Returns:
+        QuerySet
+    """
+    refunds = Refund.objects.filter(status__in=statuses)
+    if course_id:
+        refunds = refunds.filter(lines__order_line__course_id=course_id).distinct()
+    if start:
+        refunds = refunds.filter(created__gte=start)
+    if end:
+        refunds = refunds.filter(created__lt=end)
+
+    return refunds.select_related('order__site', 'user').prefetch_related(
+        'order__sources__source_type'
+    ).order_by('id')
+
+
+class RateLimiter(object):
+    """ Spaces out calls to wait, so that at most `rate` of them return per second. """
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def wait(self):
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next)
+            self._next = start + self.interval
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class ProcessorLimit(object):
+    """ Limits the refunds of a payment processor approved at once, and per second. """
+
+    def __init__(self, concurrency=None, rate=None):
+        self.semaphore = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self.rate_limiter = RateLimiter(rate)
+
+    def __enter__(self):
+        if self.semaphore:
+            self.semaphore.acquire()
+        self.rate_limiter.wait()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.semaphore:
+            self.semaphore.release()
+
+
+class BulkRefundProcessor(object):
+    """ Approves refunds concurrently, within the limits of their payment processors. """
+
+    def __init__(self, revoke_fulfillment=True, workers=None):
+        """
+        Keyword Arguments:
+            revoke_fulfillment (bool): Whether the fulfillment of the refunded lines is revoked, in addition to
+                the credit being issued.
+            workers (int): Number of refunds approved concurrently. Defaults to settings.REFUND_PROCESSING_WORKERS.
+        """
+        self.revoke_fulfillment = revoke_fulfillment
+        self.workers = workers or settings.REFUND_PROCESSING_WORKERS
+        self._limits = {}
+        self._limits_lock = threading.Lock()
+
+    def get_limit(self, processor_name):
+        """ Returns the limit shared by the refunds of the given payment processor. """
+        with self._limits_lock:
+            if processor_name not in self._limits:
+                config = settings.REFUND_PROCESSOR_LIMITS.get(
+                    processor_name, settings.REFUND_PROCESSOR_DEFAULT_LIMITS
+                )
+                self._limits[processor_name] = ProcessorLimit(**config)
+            return self._limits[processor_name]
+
+    def get_processor_name(self, refund):
+        # Free orders have no payment source. Like _issue_credit, only the first source is considered.
+        sources = list(refund.order.sources.all())
+        return sources[0].source_type.name if sources else None
+
+    def process(self, refunds):
+        """
+        Approves the given refunds.
+
+        Arguments:
+            refunds (iterable of Refund): Refunds to approve, preferably read by get_refunds.
+
+        Returns:
+            list of dict: The outcome of each refund, in the order given.
+        """
+        refunds = list(refunds)
+        if self.workers == 1 or len(refunds) <= 1:
+            return [self.process_refund(refund) for refund in refunds]
+
+        pool = ThreadPool(min(self.workers, len(refunds)))
+        try:
+            return pool.map(self._process_refund_in_thread, refunds)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _process_refund_in_thread(self, refund):
+        try:
+            return self.process_refund(refund)
+        finally:
+            # Each thread of the pool opens its own database connection.
+            connection.close()
+
+    def process_refund(self, refund):
+        """ Approves a refund, within the limits of its payment processor, and records its outcome. """
+        processor_name = self.get_processor_name(refund)
+        with self.get_limit(processor_name), self._site_request(refund):
+            succeeded, skipped, error = self.approve_refund(refund)
+
+        outcome = {
+            'refund_id': refund.id,
+            'processor_name': processor_name,
+            'status': refund.status,
+            'succeeded': succeeded,
+            'skipped': skipped,
+            'error': error,
+        }
+        audit_log('refund_processed', **outcome)
+        return outcome
+
+    def approve_refund(self, refund):
+        """
+        Claims a refund and approves it, unless its status changed since it was read or another run claimed it.
+
+        Returns:
+            tuple: Whether the refund was approved, whether it was skipped, and the error raised by its approval.
+        """
+        claimed = timezone.now()
+        # Claims left by runs which were killed expire.
+        unclaimed = Q(claimed__isnull=True) | Q(
+            claimed__lt=claimed - datetime.timedelta(seconds=settings.REFUND_PROCESSING_CLAIM_TIMEOUT)
+        )
+        if not Refund.objects.filter(unclaimed, id=refund.id, status=refund.status).update(claimed=claimed):
+            status = Refund.objects.filter(id=refund.id).values_list('status', flat=True).first()
+            logger.info('Skipping refund [%d], whose status changed from [%s] to [%s], or which is being processed.',
+                        refund.id, refund.status, status)
+            refund.status = status
+            return False, True, None
+
+        # The refund is saved as its status changes, which must not release the claim.
+        refund.claimed = claimed
+        try:
+            return refund.approve(revoke_fulfillment=self.revoke_fulfillment), False, None
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception('Failed to process refund [%d].', refund.id)
+            return False, False, unicode(exc) or exc.__class__.__name__
+        finally:
+            refund.claimed = None
+            Refund.objects.filter(id=refund.id, claimed=claimed).update(claimed=None)
+
+    @contextmanager
+    def _site_request(self, refund):
+        """ Sets a request for the site of the refund's order as the current one, while the refund is approved. """
+        previous_request = get_current_request()
+        request = HttpRequest()
+        request.site = refund.order.site or Site.objects.get_current()
+        set_thread_variable('request', request)
+        try:
+            yield
+        finally:
+            set_thread_variable('request', previous_request)
@@ -1,5 +1,6 @@
 import ddt
 from django.test import override_settings
+import mock
 from oscar.core.loading import get_model
 from oscar.test.newfactories import UserFactory
 
@@ -9,6 +10,7 @@ from ecommerce.extensions.refund.tests.factories import RefundLineFactory
 from ecommerce.extensions.refund.tests.mixins import RefundTestMixin
 from ecommerce.tests.testcases import TestCase
 
+Line = get_model('order', 'Line')
 ProductAttribute = get_model("catalogue", "ProductAttribute")
 ProductClass = get_model("catalogue", "ProductClass")
 Refund = get_model('refund', 'Refund')
@@ -33,6 +35,14 @@ class ApiTests(RefundTestMixin, TestCase):
         actual = find_orders_associated_with_course(self.user, self.course.id)
         self.assertEqual(actual, [order])
 
+    def test_find_orders_associated_with_course_without_line_course_id(self):
+        """ Orders whose lines have no course ID should be found by the course key of their products. """
+        order = self.create_order()
+        Line.objects.filter(order=order).update(course_id=None)
+
+        actual = find_orders_associated_with_course(self.user, self.course.id)
+        self.assertEqual(actual, [order])
+
     @ddt.data('', ' ', None)
     def test_find_orders_associated_with_course_invalid_course_id(self, course_id):
         """ ValueError should be raised if course_id is invalid. """
@@ -70,6 +80,18 @@ class ApiTests(RefundTestMixin, TestCase):
         self.assertEqual(actual, [refund])
         self.assert_refund_matches_order(refund, order)
 
+    @override_settings(OSCAR_INITIAL_REFUND_STATUS=OSCAR_INITIAL_REFUND_STATUS,
+                       OSCAR_INITIAL_REFUND_LINE_STATUS=OSCAR_INITIAL_REFUND_LINE_STATUS)
+    def test_create_refunds_without_line_course_id(self):
+        """ The method should refund lines with no course ID, by the course key of their products. """
+        order = self.create_order()
+        Line.objects.filter(order=order).update(course_id=None)
+
+        actual = create_refunds([order], self.course.id)
+        refund = Refund.objects.get(order=order)
+        self.assertEqual(actual, [refund])
+        self.assert_refund_matches_order(refund, order)
+
     def test_create_refunds_with_existing_refund(self):
         """ The method should NOT create refunds for lines that have already been refunded. """
         order = self.create_order()
@@ -77,3 +99,19 @@ class ApiTests(RefundTestMixin, TestCase):
 
         actual = create_refunds([order], self.course.id)
         self.assertEqual(actual, [])
+
+    def test_create_refunds_atomic(self):
+        """ The method should create no refunds if the refund of any of the orders fails. """
+        orders = [self.create_order(), self.create_order()]
+        create_with_lines = Refund.create_with_lines
+
+        def side_effect(order, lines):
+            if order == orders[-1]:
+                raise ValueError
+            return create_with_lines(order, lines)
+
+        with mock.patch.object(Refund, 'create_with_lines', side_effect=side_effect):
+            with self.assertRaises(ValueError):
+                create_refunds(orders, self.course.id)
+
+        self.assertFalse(Refund.objects.exists())
@@ -18,7 +18,7 @@ from ecommerce.tests.testcases import TestCase
 post_refund = get_class('refund.signals', 'post_refund')
 Refund = get_model('refund', 'Refund')
 
-LOGGER_NAME = 'ecommerce.extensions.analytics.utils'
+LOGGER_NAME = 'ecommerce.audit'
 
 
 class StatusTestsMixin(object):
@@ -93,6 +93,27 @@ class RefundTests(RefundTestMixin, StatusTestsMixin, TestCase):
 
         self.assert_refund_matches_order(refund, order)
 
+    @ddt.data(False, True)
+    def test_create_with_lines_queries(self, multiple_lines):
+        """ Verify the number of queries made to create a refund does not depend on the number of lines. """
+        order = self.create_order(user=UserFactory(), multiple_lines=multiple_lines)
+        lines = order.lines.all()
+
+        # Lines, user, refund and its history, refund lines, read back, and their history.
+        with self.assertNumQueries(7):
+            refund = Refund.create_with_lines(order, lines)
+
+        self.assertEqual(refund.lines.count(), lines.count())
+
+    def test_create_with_lines_history(self):
+        """ Verify the creation of the refund lines is recorded in their history. """
+        order = self.create_order(user=UserFactory(), multiple_lines=True)
+        refund = Refund.create_with_lines(order, order.lines.all())
+
+        for line in refund.lines.all():
+            self.assertEqual([record.history_type for record in line.history.all()], ['+'])
+            self.assertEqual(line.history.first().status, line.status)
+
     def assert_refund_creation_logged(self, l, refund, order):
         """
         Asserts that refund creation is logged.
@@ -0,0 +1,62 @@
+from django.core.management import call_command, CommandError
+import mock
+from oscar.core.loading import get_model
+from testfixtures import LogCapture
+
+from ecommerce.extensions.refund.status import REFUND
+from ecommerce.extensions.refund.tests.mixins import RefundTestMixin
+from ecommerce.tests.testcases import TestCase
+
+Refund = get_model('refund', 'Refund')
+
+LOGGER_NAME = 'ecommerce.extensions.refund.management.commands.process_refunds'
+
+
+class ProcessRefundsCommandTests(RefundTestMixin, TestCase):
+    def setUp(self):
+        super(ProcessRefundsCommandTests, self).setUp()
+        self.refunds = [self.create_refund() for __ in range(3)]
+
+    def test_without_commit(self):
+        """ Verify the refunds are only counted if --commit is not set. """
+        with mock.patch.object(Refund, 'approve') as mock_approve:
+            with LogCapture(LOGGER_NAME) as log_capture:
+                call_command('process_refunds')
+
+        self.assertFalse(mock_approve.called)
+        log_capture.check(
+            (LOGGER_NAME, 'INFO', '[3] refunds would be processed. Use --commit to process them.')
+        )
+
+    def test_handle(self):
+        """ Verify the refunds are processed in batches, and the refunds which fail are reported. """
+        with mock.patch.object(Refund, 'approve', side_effect=[True, False, True]) as mock_approve:
+            with LogCapture(LOGGER_NAME) as log_capture:
+                call_command('process_refunds', commit=True, batch_size=2, workers=1, payment_only=True)
+
+        mock_approve.assert_called_with(revoke_fulfillment=False)
+        self.assertEqual(mock_approve.call_count, 3)
+        log_capture.check(
+            (LOGGER_NAME, 'WARNING',
+             'Refund [{}] was not processed. It is in status [{}].'.format(self.refunds[1].id, REFUND.OPEN)),
+            (LOGGER_NAME, 'INFO', 'Processed refunds up to [{}].'.format(self.refunds[1].id)),
+            (LOGGER_NAME, 'INFO', 'Processed refunds up to [{}].'.format(self.refunds[2].id)),
+            (LOGGER_NAME, 'INFO',
+             'Processed [3] refunds, of which [1] failed. Skipped [0] refunds processed by another run.'),
+        )
+
+    def test_filter(self):
+        """ Verify only the refunds matching the filter are processed. """
+        self.refunds[0].status = REFUND.PAYMENT_REFUND_ERROR
+        self.refunds[0].save()
+
+        with mock.patch.object(Refund, 'approve', return_value=True) as mock_approve:
+            call_command('process_refunds', commit=True, statuses=[REFUND.PAYMENT_REFUND_ERROR], workers=1)
+            call_command('process_refunds', commit=True, start_date='2100-01-01', workers=1)
+
+        self.assertEqual(mock_approve.call_count, 1)
+
+    def test_invalid_date(self):
+        """ Verify the command fails if a date is invalid. """
+        with self.assertRaises(CommandError):
+            call_command('process_refunds', end_date='not-a-date')
@@ -0,0 +1,260 @@
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+from django.test import override_settings
+from django.utils import timezone
+import httpretty
+import mock
+from oscar.core.loading import get_model
+from oscar.test.newfactories import UserFactory
+from testfixtures import LogCapture
+from threadlocals.threadlocals import get_current_request, set_thread_variable
+
+from ecommerce.extensions.payment.tests.processors import DummyProcessor
+from ecommerce.extensions.refund.processing import BulkRefundProcessor, get_refunds, RateLimiter
+from ecommerce.extensions.refund.status import REFUND, REFUND_LINE
+from ecommerce.extensions.refund.tests.mixins import RefundTestMixin
+from ecommerce.tests.testcases import TestCase
+
+Refund = get_model('refund', 'Refund')
+Source = get_model('payment', 'Source')
+SourceType = get_model('payment', 'SourceType')
+
+LOGGER_NAME = 'ecommerce.audit'
+
+
+class GetRefundsTests(RefundTestMixin, TestCase):
+    """ Tests for get_refunds. """
+
+    def test_filters(self):
+        """ Verify refunds are filtered by course, creation date and status. """
+        order = self.create_order(user=UserFactory())
+        course_refund = Refund.create_with_lines(order, order.lines.all())
+        other_refund = self.create_refund()
+        denied_refund = self.create_refund()
+        denied_refund.status = REFUND.DENIED
+        denied_refund.save()
+
+        self.assertEqual(list(get_refunds()), [course_refund, other_refund])
+        self.assertEqual(list(get_refunds(course_id=self.course.id)), [course_refund])
+        self.assertEqual(list(get_refunds(statuses=[REFUND.DENIED])), [denied_refund])
+
+        now = timezone.now()
+        self.assertEqual(list(get_refunds(start=now)), [])
+        self.assertEqual(list(get_refunds(end=now)), [course_refund, other_refund])
+        self.assertEqual(list(get_refunds(start=now - datetime.timedelta(days=1), end=now)),
+                         [course_refund, other_refund])
+
+
+class BulkRefundProcessorTests(RefundTestMixin, TestCase):
+    """ Tests for BulkRefundProcessor. """
+
+    def test_process(self):
+        """ Verify refunds are approved, and their outcomes returned in order and logged. """
+        refunds = [self.create_refund(), self.create_refund(processor_name='paypal')]
+
+        with mock.patch.object(Refund, 'approve', autospec=True, return_value=True) as mock_approve:
+            with LogCapture(LOGGER_NAME) as log_capture:
+                outcomes = BulkRefundProcessor(revoke_fulfillment=False, workers=1).process(get_refunds())
+
+        mock_approve.assert_has_calls([mock.call(refund, revoke_fulfillment=False) for refund in refunds])
+        self.assertEqual([outcome['refund_id'] for outcome in outcomes], [refund.id for refund in refunds])
+        self.assertEqual([outcome['processor_name'] for outcome in outcomes], ['dummy', 'paypal'])
+        self.assertTrue(all(outcome['succeeded'] for outcome in outcomes))
+        self.assertEqual(len(log_capture.records), 2)
+        self.assertEqual(log_capture.records[0].audit_event, 'refund_processed')
+
+    def test_process_error(self):
+        """ Verify refunds whose approval raises are recorded as failed, without stopping the others. """
+        self.create_refund()
+        self.create_refund()
+
+        with mock.patch.object(Refund, 'approve', side_effect=[Exception('Oops'), True]):
+            outcomes = BulkRefundProcessor(workers=1).process(get_refunds())
+
+        self.assertEqual([(outcome['succeeded'], outcome['error']) for outcome in outcomes],
+                         [(False, 'Oops'), (True, None)])
+        self.assertEqual([outcome['status'] for outcome in outcomes], [REFUND.OPEN] * 2)
+
+    def test_process_changed_status(self):
+        """ Verify refunds whose status changed since they were read, e.g. by another run, are skipped. """
+        refund = self.create_refund()
+        refunds = list(get_refunds())
+        Refund.objects.filter(id=refund.id).update(status=REFUND.COMPLETE)
+
+        with mock.patch.object(Refund, 'approve') as mock_approve:
+            outcomes = BulkRefundProcessor(workers=1).process(refunds)
+
+        self.assertFalse(mock_approve.called)
+        self.assertEqual(outcomes[0]['status'], REFUND.COMPLETE)
+        self.assertTrue(outcomes[0]['skipped'])
+        self.assertFalse(outcomes[0]['succeeded'])
+
+    def test_process_claimed(self):
+        """ Verify refunds claimed by another run are skipped, unless their claim expired. """
+        claimed_refund = self.create_refund()
+        expired_refund = self.create_refund()
+        now = timezone.now()
+        Refund.objects.filter(id=claimed_refund.id).update(claimed=now)
+        Refund.objects.filter(id=expired_refund.id).update(
+            claimed=now - datetime.timedelta(seconds=settings.REFUND_PROCESSING_CLAIM_TIMEOUT + 1)
+        )
+
+        with mock.patch.object(Refund, 'approve', autospec=True, return_value=True) as mock_approve:
+            outcomes = BulkRefundProcessor(workers=1).process(get_refunds())
+
+        mock_approve.assert_called_once_with(expired_refund, revoke_fulfillment=True)
+        self.assertEqual([outcome['skipped'] for outcome in outcomes], [True, False])
+        self.assertEqual(Refund.objects.get(id=claimed_refund.id).claimed, now)
+
+    def test_process_claim(self):
+        """ Verify refunds are claimed while they are approved, and released once they are, even if it fails. """
+        refund = self.create_refund()
+        claims = []
+
+        def approve(refund, revoke_fulfillment=True):  # pylint: disable=unused-argument
+            claims.append(Refund.objects.get(id=refund.id).claimed)
+            refund.save()
+            claims.append(Refund.objects.get(id=refund.id).claimed)
+            raise Exception('Oops')
+
+        with mock.patch.object(Refund, 'approve', autospec=True, side_effect=approve):
+            BulkRefundProcessor(workers=1).process(get_refunds())
+
+        self.assertEqual(len(claims), 2)
+        self.assertIsNotNone(claims[0])
+        self.assertEqual(claims[1], claims[0])
+        self.assertIsNone(Refund.objects.get(id=refund.id).claimed)
+
+    def test_process_site_request(self):
+        """ Verify refunds are approved with the site of their order set as that of the current request. """
+        refund = self.create_refund()
+        sites = []
+
+        def approve(refund, revoke_fulfillment=True):  # pylint: disable=unused-argument
+            sites.append(get_current_request().site)
+            return True
+
+        with mock.patch.object(Refund, 'approve', autospec=True, side_effect=approve):
+            BulkRefundProcessor(workers=1).process(get_refunds())
+
+        self.assertEqual(sites, [refund.order.site])
+        self.assertIs(get_current_request(), self.request)
+
+    @override_settings(REFUND_PROCESSOR_LIMITS={'paypal': {'concurrency': 1, 'rate': None}},
+                       REFUND_PROCESSOR_DEFAULT_LIMITS={'concurrency': 2, 'rate': None})
+    def test_concurrency_limits(self):
+        """ Verify refunds are approved concurrently, up to the limit of their payment processor. """
+        for __ in range(3):
+            self.create_refund()
+            self.create_refund(processor_name='paypal')
+
+        lock = threading.Lock()
+        running = {'dummy': 0, 'paypal': 0}
+        peaks = {'dummy': 0, 'paypal': 0}
+        processor = BulkRefundProcessor(workers=6)
+
+        def approve_refund(refund):
+            name = processor.get_processor_name(refund)
+            with lock:
+                running[name] += 1
+                peaks[name] = max(peaks[name], running[name])
+            time.sleep(0.05)
+            with lock:
+                running[name] -= 1
+            return True, False, None
+
+        refunds = list(get_refunds())
+        with mock.patch.object(processor, 'approve_refund', side_effect=approve_refund):
+            outcomes = processor.process(refunds)
+
+        self.assertEqual([outcome['refund_id'] for outcome in outcomes], [refund.id for refund in refunds])
+        self.assertEqual(peaks, {'dummy': 2, 'paypal': 1})
+
+
+class RateLimiterTests(TestCase):
+    """ Tests for RateLimiter. """
+
+    @mock.patch('ecommerce.extensions.refund.processing.time')
+    def test_wait(self, mock_time):
+        """ Verify calls are spaced out by the interval of the rate. """
+        mock_time.time.return_value = 100.0
+        limiter = RateLimiter(rate=4)
+        for __ in range(3):
+            limiter.wait()
+
+        self.assertEqual([call[0][0] for call in mock_time.sleep.call_args_list], [0.25, 0.5])
+
+    @mock.patch('ecommerce.extensions.refund.processing.time')
+    def test_no_rate(self, mock_time):
+        """ Verify calls are not delayed without a rate. """
+        limiter = RateLimiter()
+        limiter.wait()
+        self.assertFalse(mock_time.sleep.called)
+
+
+@override_settings(PAYMENT_PROCESSORS=['ecommerce.extensions.payment.tests.processors.DummyProcessor'])
+class BulkRefundApprovalTests(RefundTestMixin, TestCase):
+    """ Tests for the approval of refunds, by BulkRefundProcessor and process_refunds, in threads with no request. """
+
+    def setUp(self):
+        super(BulkRefundApprovalTests, self).setUp()
+        source_type, __ = SourceType.objects.get_or_create(name=DummyProcessor.NAME)
+        self.refunds = []
+        for __ in range(3):
+            order = self.create_order(user=UserFactory())
+            Source.objects.create(source_type=source_type, order=order, currency=order.currency,
+                                  amount_allocated=order.total_incl_tax, amount_debited=order.total_incl_tax)
+            self.refunds.append(Refund.create_with_lines(order, order.lines.all()))
+
+        httpretty.enable()
+        self.addCleanup(httpretty.reset)
+        self.addCleanup(httpretty.disable)
+        url = self.site.siteconfiguration.build_lms_url('/api/enrollment/v1/enrollment')
+        httpretty.register_uri(httpretty.POST, url, status=200, body='{}', content_type='application/json')
+        # The requests of earlier tests are not cleared by httpretty.reset.
+        self.request_count = len(httpretty.httpretty.latest_requests)
+
+        # The threads of the pool have no request, like those of the command and of the endpoint.
+        set_thread_variable('request', None)
+
+        # The in-memory test database is only visible to the connection of the test's thread, so the threads of the
+        # pool share it, one at a time.
+        test_connection = connections['default']
+        test_connection.allow_thread_sharing = True
+        self.addCleanup(setattr, test_connection, 'allow_thread_sharing', False)
+        lock = threading.Lock()
+        approve_refund = BulkRefundProcessor.approve_refund
+
+        def shared_connection_approve_refund(processor, refund):
+            connections['default'] = test_connection
+            with lock:
+                return approve_refund(processor, refund)
+
+        patcher = mock.patch.object(BulkRefundProcessor, 'approve_refund', autospec=True,
+                                    side_effect=shared_connection_approve_refund)
+        self.mock_approve_refund = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_refunds_completed(self):
+        self.assertEqual(self.mock_approve_refund.call_count, len(self.refunds))
+        for refund in Refund.objects.filter(id__in=[refund.id for refund in self.refunds]):
+            self.assertEqual(refund.status, REFUND.COMPLETE)
+            self.assertEqual(set(refund.lines.values_list('status', flat=True)), {REFUND_LINE.COMPLETE})
+        self.assertEqual(len(httpretty.httpretty.latest_requests) - self.request_count, len(self.refunds))
+
+    def test_process(self):
+        """ Verify refunds are credited, and their enrollments revoked, from the threads of the pool. """
+        outcomes = BulkRefundProcessor(workers=3).process(get_refunds())
+
+        self.assertTrue(all(outcome['succeeded'] for outcome in outcomes))
+        self.assert_refunds_completed()
+
+    def test_command(self):
+        """ Verify refunds are credited, and their enrollments revoked, by the command. """
+        call_command('process_refunds', commit=True, workers=2)
+        self.assert_refunds_completed()
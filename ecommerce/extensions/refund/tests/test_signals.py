@@ -1,7 +1,7 @@
 from mock import patch
 from oscar.test.newfactories import UserFactory
 
-from ecommerce.core.models import SegmentClient
+from ecommerce.extensions.analytics.dispatcher import SegmentClient
 from ecommerce.extensions.refund.api import create_refunds
 from ecommerce.extensions.refund.tests.mixins import RefundTestMixin
 from ecommerce.tests.mixins import BusinessIntelligenceMixin
@@ -94,7 +94,7 @@ def _get_info_for_coupon_report(coupon, voucher):
     invoiced_amount = currency(coupon_stockrecord.price_excl_tax)
     if offer.condition.range.catalog:
         seat_stockrecord = offer.condition.range.catalog.stock_records.first()
-        course_id = seat_stockrecord.product.attr.course_key
+        course_id = seat_stockrecord.product.flat_attr.course_key
         course_organization = CourseKey.from_string(course_id).org
         price = currency(seat_stockrecord.price_excl_tax)
         discount_data = get_voucher_discount_info(offer.benefit, seat_stockrecord.price_excl_tax)
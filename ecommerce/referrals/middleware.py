@@ -0,0 +1,27 @@
+"""
+Middleware for the referrals app
+
+Note:
+    With ATOMIC_REQUESTS enabled the view's transaction has been committed by the time process_response
+    is called, so buffered attributions are persisted outside of the checkout transaction. When the view raises
+    an exception, its transaction has been rolled back by the time process_exception is called; attributions for
+    baskets that no longer exist are discarded.
+"""
+
+from ecommerce.referrals.utils import flush_referral_attributions, open_referral_attribution_buffer
+
+
+class ReferralAttributionMiddleware(object):
+    """
+    Middleware that persists the referral attributions collected while processing the request.
+    """
+
+    def process_request(self, request):
+        open_referral_attribution_buffer(request)
+
+    def process_response(self, request, response):
+        flush_referral_attributions(request)
+        return response
+
+    def process_exception(self, request, exception):  # pylint: disable=unused-argument
+        flush_referral_attributions(request)
@@ -0,0 +1,37 @@
+from django.test import RequestFactory
+from oscar.test.newfactories import BasketFactory
+
+from ecommerce.referrals.middleware import ReferralAttributionMiddleware
+from ecommerce.referrals.models import Referral
+from ecommerce.referrals.utils import get_referral_attribution_buffer
+from ecommerce.tests.testcases import TestCase
+
+
+class ReferralAttributionMiddlewareTests(TestCase):
+    """ Tests for ReferralAttributionMiddleware. """
+
+    def setUp(self):
+        super(ReferralAttributionMiddlewareTests, self).setUp()
+        self.middleware = ReferralAttributionMiddleware()
+        self.request = RequestFactory().get('/')
+        self.middleware.process_request(self.request)
+
+    def buffer_attribution(self):
+        basket = BasketFactory(site=self.site)
+        attributes = dict.fromkeys(Referral.ATTRIBUTION_ATTRIBUTES, '')
+        attributes.update(utm_created_at=None, affiliate_id='test')
+        get_referral_attribution_buffer(self.request).add(basket, self.site, attributes)
+        return basket
+
+    def test_process_response(self):
+        """ Verify buffered attributions are persisted when the response is processed. """
+        basket = self.buffer_attribution()
+        response = object()
+        self.assertEqual(self.middleware.process_response(self.request, response), response)
+        self.assertEqual(Referral.objects.get(basket=basket).affiliate_id, 'test')
+
+    def test_process_exception(self):
+        """ Verify buffered attributions are persisted when the view raises an exception. """
+        basket = self.buffer_attribution()
+        self.assertIsNone(self.middleware.process_exception(self.request, Exception()))
+        self.assertEqual(Referral.objects.get(basket=basket).affiliate_id, 'test')
@@ -0,0 +1,104 @@
+from oscar.test.newfactories import BasketFactory
+
+from ecommerce.extensions.test.factories import create_order
+from ecommerce.referrals.models import Referral
+from ecommerce.referrals.utils import ReferralAttributionBuffer
+from ecommerce.tests.testcases import TestCase
+
+
+class ReferralAttributionBufferTests(TestCase):
+    """ Tests for ReferralAttributionBuffer. """
+
+    def setUp(self):
+        super(ReferralAttributionBufferTests, self).setUp()
+        self.attribution_buffer = ReferralAttributionBuffer()
+
+    def get_attributes(self, **kwargs):
+        attributes = dict.fromkeys(Referral.ATTRIBUTION_ATTRIBUTES, '')
+        attributes['utm_created_at'] = None
+        attributes.update(kwargs)
+        return attributes
+
+    def test_flush(self):
+        """ Verify buffered attributions are created, updated and deleted when the buffer is flushed. """
+        new_basket = BasketFactory(site=self.site)
+        updated_basket = BasketFactory(site=self.site)
+        deleted_basket = BasketFactory(site=self.site)
+        Referral.objects.create(basket=updated_basket, site=self.site, affiliate_id='old')
+        Referral.objects.create(basket=deleted_basket, site=self.site, affiliate_id='old')
+
+        self.attribution_buffer.add(new_basket, self.site, self.get_attributes(utm_source='test-source'))
+        self.attribution_buffer.add(updated_basket, self.site, self.get_attributes(affiliate_id='new'))
+        self.attribution_buffer.add(deleted_basket, self.site, self.get_attributes())
+        self.assertEqual(len(self.attribution_buffer), 3)
+        self.assertEqual(Referral.objects.count(), 2)
+
+        self.attribution_buffer.flush()
+
+        self.assertEqual(len(self.attribution_buffer), 0)
+        self.assertEqual(Referral.objects.get(basket=new_basket).utm_source, 'test-source')
+        self.assertEqual(Referral.objects.get(basket=updated_basket).affiliate_id, 'new')
+        self.assertFalse(Referral.objects.filter(basket=deleted_basket).exists())
+
+    def test_flush_latest_attribution(self):
+        """ Verify only the latest attribution for a basket is persisted. """
+        basket = BasketFactory(site=self.site)
+        self.attribution_buffer.add(basket, self.site, self.get_attributes(affiliate_id='first'))
+        self.attribution_buffer.add(basket, self.site, self.get_attributes(affiliate_id='second'))
+        self.attribution_buffer.flush()
+
+        self.assertEqual(Referral.objects.get(basket=basket).affiliate_id, 'second')
+
+    def test_flush_deleted_basket(self):
+        """ Verify attributions for baskets that no longer exist are discarded. """
+        basket = BasketFactory(site=self.site)
+        self.attribution_buffer.add(basket, self.site, self.get_attributes(affiliate_id='test'))
+        basket.delete()
+        self.attribution_buffer.flush()
+
+        self.assertFalse(Referral.objects.exists())
+
+    def test_flush_associates_order(self):
+        """ Verify referrals are associated with orders placed before the attribution was persisted. """
+        order = create_order(site=self.site)
+        self.attribution_buffer.add(order.basket, self.site, self.get_attributes(affiliate_id='test'))
+        self.attribution_buffer.flush()
+
+        self.assertEqual(Referral.objects.get(basket=order.basket).order, order)
+
+    def test_flush_buffered_order(self):
+        """ Verify buffered orders are associated with the referrals of their baskets. """
+        order = create_order(site=self.site)
+        Referral.objects.create(basket=order.basket, site=self.site, affiliate_id='test')
+        self.attribution_buffer.add_order(order)
+        self.assertEqual(len(self.attribution_buffer), 1)
+
+        self.attribution_buffer.flush()
+
+        self.assertEqual(len(self.attribution_buffer), 0)
+        self.assertEqual(Referral.objects.get(basket=order.basket).order, order)
+
+    def test_flush_buffered_orders(self):
+        """ Verify the referrals of several buffered orders are associated with a single query. """
+        orders = [create_order(site=self.site) for __ in range(3)]
+        for order in orders:
+            Referral.objects.create(basket=order.basket, site=self.site, affiliate_id='test')
+            self.attribution_buffer.add_order(order)
+
+        # One query to select the existing orders, and one to update the referrals.
+        with self.assertNumQueries(2):
+            self.attribution_buffer.flush()
+
+        for order in orders:
+            self.assertEqual(Referral.objects.get(basket=order.basket).order, order)
+
+    def test_flush_deleted_order(self):
+        """ Verify buffered orders that no longer exist are not associated with referrals. """
+        order = create_order(site=self.site)
+        referral = Referral.objects.create(basket=order.basket, site=self.site, affiliate_id='test')
+        self.attribution_buffer.add_order(order)
+        order.delete()
+
+        self.attribution_buffer.flush()
+
+        self.assertIsNone(Referral.objects.get(id=referral.id).order)
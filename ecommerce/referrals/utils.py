@@ -0,0 +1,181 @@
+""" Referral attribution utilities. """
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import logging
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from oscar.core.loading import get_model
+from threadlocals.threadlocals import get_current_request
+
+from ecommerce.referrals.models import Referral
+
+logger = logging.getLogger(__name__)
+Order = get_model('order', 'Order')
+
+REQUEST_ATTRIBUTE_NAME = '_referral_attribution_buffer'
+
+
+class ReferralAttributionBuffer(object):
+    """
+    Collects basket referral attributions so they can be persisted after the request has been processed.
+
+    Referral data is only used for reporting. Buffering the attributions keeps referral queries out of the
+    basket and checkout transactions; all buffered attributions are written with a handful of bulk queries
+    when the buffer is flushed.
+    """
+
+    def __init__(self):
+        # Keyed by basket ID, so that only the latest attribution for a basket is persisted.
+        self._attributions = OrderedDict()
+        # Order IDs keyed by basket ID, for the orders placed while the buffer was open.
+        self._orders = OrderedDict()
+
+    def __len__(self):
+        return len(self._attributions) + len(self._orders)
+
+    def add(self, basket, site, attributes):
+        """
+        Record the attribution attributes for a basket.
+
+        Arguments:
+            basket (Basket): Basket being attributed.
+            site (Site): Site on which the basket was attributed.
+            attributes (dict): Values keyed by the names in Referral.ATTRIBUTION_ATTRIBUTES.
+        """
+        self._attributions[basket.id] = (site.id, attributes)
+
+    def add_order(self, order):
+        """
+        Record an order, so that the referral of its basket is associated with it when the buffer is flushed.
+
+        Arguments:
+            order (Order): Order placed for a basket which may have a referral.
+        """
+        self._orders[order.basket_id] = order.id
+
+    def flush(self):
+        """
+        Persist the buffered attributions and empty the buffer.
+
+        Referrals with attribution attributes are created or updated; existing referrals whose attributes
+        have all been cleared are deleted. Attributions for baskets that no longer exist (e.g. because the
+        transaction that created them was rolled back) are discarded. Finally, the referrals of the baskets of
+        the buffered orders that still exist are associated with them.
+        """
+        attributions = self._attributions
+        orders = self._orders
+        self._attributions = OrderedDict()
+        self._orders = OrderedDict()
+
+        self._persist_attributions(attributions)
+        self._associate_orders(orders)
+
+    def _persist_attributions(self, attributions):
+        if not attributions:
+            return
+
+        try:
+            # The basket model is reached through the referral, since the basket models load the order utilities,
+            # which import this module.
+            baskets = Referral.basket.get_queryset().filter(id__in=attributions.keys())
+            basket_ids = set(baskets.values_list('id', flat=True))
+            existing = {
+                referral.basket_id: referral for referral in Referral.objects.filter(basket_id__in=basket_ids)
+            }
+            order_ids = dict(Order.objects.filter(basket_id__in=basket_ids).values_list('basket_id', 'id'))
+
+            to_create = []
+            to_delete = []
+
+            with transaction.atomic():
+                for basket_id, (site_id, attributes) in attributions.items():
+                    if basket_id not in basket_ids:
+                        continue
+
+                    referral = existing.get(basket_id)
+                    if any(attributes.values()):
+                        if referral:
+                            for name, value in attributes.items():
+                                setattr(referral, name, value)
+                            referral.save()
+                        else:
+                            to_create.append(
+                                Referral(basket_id=basket_id, site_id=site_id, order_id=order_ids.get(basket_id),
+                                         **attributes)
+                            )
+                    elif referral:
+                        to_delete.append(referral.id)
+
+                if to_create:
+                    Referral.objects.bulk_create(to_create)
+
+                if to_delete:
+                    Referral.objects.filter(id__in=to_delete).delete()
+        # Don't let attribution errors affect the response
+        except:  # pylint: disable=broad-except, bare-except
+            logger.exception('Error while persisting referral attributions for baskets %s.', attributions.keys())
+
+    def _associate_orders(self, orders):
+        if not orders:
+            return
+
+        try:
+            # Orders placed by a transaction that was rolled back no longer exist.
+            order_ids = set(Order.objects.filter(id__in=orders.values()).values_list('id', flat=True))
+            orders = {basket_id: order_id for basket_id, order_id in orders.items() if order_id in order_ids}
+            if not orders:
+                return
+
+            Referral.objects.filter(basket_id__in=orders.keys(), order__isnull=True).update(
+                order_id=Case(
+                    *[When(basket_id=basket_id, then=Value(order_id)) for basket_id, order_id in orders.items()],
+                    output_field=IntegerField()
+                )
+            )
+        # Don't let attribution errors affect the response
+        except:  # pylint: disable=broad-except, bare-except
+            logger.exception('Error while associating the referrals of baskets %s with their orders.', orders.keys())
+
+
+def get_referral_attribution_buffer(request):
+    """ Returns the referral attribution buffer for the given request, creating it if necessary. """
+    attribution_buffer = getattr(request, REQUEST_ATTRIBUTE_NAME, None)
+    if attribution_buffer is None:
+        attribution_buffer = ReferralAttributionBuffer()
+        setattr(request, REQUEST_ATTRIBUTE_NAME, attribution_buffer)
+    return attribution_buffer
+
+
+def open_referral_attribution_buffer(request):
+    """ Creates the referral attribution buffer of a request which is starting to be processed. """
+    setattr(request, REQUEST_ATTRIBUTE_NAME, ReferralAttributionBuffer())
+
+
+def buffer_referral_order(order):
+    """
+    Buffers the association of an order with the referral of its basket, if the order is placed while a request
+    is being processed.
+
+    The association is then persisted with the request's other referral attributions, after its transaction has
+    been committed, instead of being queried for while the order is placed.
+
+    Returns:
+        bool: True if the association was buffered; False if there is no request being processed.
+    """
+    attribution_buffer = getattr(get_current_request(), REQUEST_ATTRIBUTE_NAME, None)
+    if attribution_buffer is None:
+        return False
+
+    attribution_buffer.add_order(order)
+    return True
+
+
+def flush_referral_attributions(request):
+    """ Persists the referral attributions buffered for the given request, if any. """
+    attribution_buffer = getattr(request, REQUEST_ATTRIBUTE_NAME, None)
+    if attribution_buffer is not None:
+        # The request stays the current one of its thread until the next request, so the buffer is closed.
+        delattr(request, REQUEST_ATTRIBUTE_NAME)
+        attribution_buffer.flush()
@@ -163,6 +163,23 @@ OSCAR_REFUND_LINE_STATUS_PIPELINE = {
     REFUND_LINE.DENIED: (),
     REFUND_LINE.COMPLETE: ()
 }
+
+# Number of refunds approved concurrently by bulk refund processing
+REFUND_PROCESSING_WORKERS = 8
+
+# Seconds after which a refund claimed by bulk refund processing, e.g. by a run which was killed, may be claimed again
+REFUND_PROCESSING_CLAIM_TIMEOUT = 3600
+
+# Maximum number of refunds processed by a request to the bulk refund processing endpoint
+REFUND_BULK_PROCESSING_LIMIT = 100
+
+# Number of refunds of each payment processor approved at once (concurrency), and started per second (rate), by
+# bulk refund processing. Refunds of other processors, and of free orders, have the default limits.
+REFUND_PROCESSOR_LIMITS = {
+    'cybersource': {'concurrency': 4, 'rate': 5},
+    'paypal': {'concurrency': 2, 'rate': 2},
+}
+REFUND_PROCESSOR_DEFAULT_LIMITS = {'concurrency': 4, 'rate': None}
 # END REFUND PROCESSING
 
 # DASHBOARD NAVIGATION MENU
@@ -262,6 +279,9 @@ ENROLLMENT_FULFILLMENT_TIMEOUT = 7
 # Coupon code length
 VOUCHER_CODE_LENGTH = 16
 
+# Number of orders read from the database at once by the order export
+ORDER_EXPORT_CHUNK_SIZE = 500
+
 THUMBNAIL_DEBUG = False
 
 OSCAR_FROM_EMAIL = 'testing@example.com'
@@ -209,12 +209,15 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'ecommerce.core.middleware.SiteConfigurationMiddleware',
     'django_sites_extensions.middleware.CurrentSiteWithDefaultMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'waffle.middleware.WaffleMiddleware',
     # NOTE: The overridden BasketMiddleware relies on request.site. This middleware
     # MUST appear AFTER CurrentSiteMiddleware.
     'ecommerce.extensions.basket.middleware.BasketMiddleware',
+    'ecommerce.referrals.middleware.ReferralAttributionMiddleware',
+    'ecommerce.core.middleware.VersionStampMiddleware',
     'django.contrib.flatpages.middleware.FlatpageFallbackMiddleware',
     'social.apps.django_app.middleware.SocialAuthExceptionMiddleware',
     'simple_history.middleware.HistoryRequestMiddleware',
@@ -229,12 +232,58 @@ MIDDLEWARE_CLASSES = (
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#root-urlconf
 ROOT_URLCONF = '{}.urls'.format(SITE_NAME)
 
+# HTTP CLIENT CONFIGURATION
+# Default timeout of the requests sent to other services.
+HTTP_CLIENT_TIMEOUT = 5  # Value is in seconds
+
+# Number of hosts, and of keep-alive connections per host, for which connections are pooled.
+HTTP_CLIENT_POOL_CONNECTIONS = 10
+HTTP_CLIENT_POOL_SIZE = 10
+
+# Number of times requests with an idempotent method are retried after a connection error or a timeout, and
+# the delay before the first retry, which doubles with each retry.
+HTTP_CLIENT_MAX_RETRIES = 2
+HTTP_CLIENT_RETRY_BACKOFF = 0.5  # Value is in seconds
+
+# Number of consecutive failed requests after which requests to a service are rejected, and for how long.
+HTTP_CLIENT_CIRCUIT_BREAKER_THRESHOLD = 5
+HTTP_CLIENT_CIRCUIT_BREAKER_RESET_TIMEOUT = 30  # Value is in seconds
+
+# Timeout of the requests sent to payment processors, which may take longer than other services to respond.
+PAYMENT_HTTP_CLIENT_TIMEOUT = 30  # Value is in seconds
+# END HTTP CLIENT CONFIGURATION
+
 # Commerce API settings used for publishing information to LMS.
 COMMERCE_API_TIMEOUT = 7
 
 # Cache course info from course API.
 COURSES_API_CACHE_TIMEOUT = 3600  # Value is in seconds
 
+# Period after a cached remote service response has expired during which it is still served, while it is refreshed.
+CACHE_STALE_TIMEOUT = 3600  # Value is in seconds
+
+# Cache 404 responses from remote services.
+CACHE_NOT_FOUND_TIMEOUT = 60  # Value is in seconds
+
+# Period before an OAuth access token expires during which it is refreshed in the background.
+ACCESS_TOKEN_REFRESH_MARGIN = 300  # Value is in seconds
+
+# Timeout of the requests made to the LMS APIs on behalf of users.
+LMS_API_TIMEOUT = 5  # Value is in seconds
+
+# Cache the account details, enrollments and verification status of users retrieved from the LMS.
+LMS_USER_CACHE_TIMEOUT = 60  # Value is in seconds
+
+# Maximum number of concurrent requests made to the course API when retrieving several courses at once.
+COURSES_API_MAX_CONCURRENT_REQUESTS = 10
+
+# Age of the last completed synchronization of a partner's mirror of course runs after which the mirror is no longer
+# read, and course runs are retrieved from the Course Catalog service instead.
+COURSE_CATALOG_MIRROR_MAX_AGE = 86400  # Value is in seconds
+
+# Cache the SKUs linking course seats to their enrollment codes.
+COURSE_SIBLING_SKUS_CACHE_TIMEOUT = 86400  # Value is in seconds
+
 # PROVIDER DATA PROCESSING
 PROVIDER_DATA_PROCESSING_TIMEOUT = 15  # Value is in seconds.
 CREDIT_PROVIDER_CACHE_TIMEOUT = 600
@@ -242,6 +291,9 @@ CREDIT_PROVIDER_CACHE_TIMEOUT = 600
 
 VOUCHER_CACHE_TIMEOUT = 10  # Value is in seconds.
 
+# Cache API responses keyed on the version stamps of the resources they are built from.
+API_RESPONSE_CACHE_TIMEOUT = 3600  # Value is in seconds.
+
 # APP CONFIGURATION
 DJANGO_APPS = [
     'django.contrib.admin',
@@ -417,6 +469,21 @@ EXTRA_SCOPE = ['permissions']
 # Specify a key to emit events to the corresponding Segment project. `None` disables tracking.
 # See: https://segment.com/docs/libraries/python/
 SEGMENT_KEY = None
+
+SEGMENT_API_URL = 'https://api.segment.io/v1/batch'
+SEGMENT_API_TIMEOUT = 15  # Value is in seconds
+
+# Events are queued, and sent to Segment in batches by a background thread. Batches are sent once they hold
+# SEGMENT_EVENT_BATCH_SIZE events, or SEGMENT_EVENT_FLUSH_INTERVAL seconds after their first event was queued.
+SEGMENT_EVENT_QUEUE_SIZE = 10000
+SEGMENT_EVENT_BATCH_SIZE = 100
+SEGMENT_EVENT_FLUSH_INTERVAL = 5  # Value is in seconds
+
+# File to which events are spilled while the queue is full. `None` drops these events.
+SEGMENT_EVENT_SPILL_PATH = None
+
+# Maximum time spent sending the queued events when the process exits.
+SEGMENT_EVENT_SHUTDOWN_TIMEOUT = 10  # Value is in seconds
 # END ANALYTICS
 
 
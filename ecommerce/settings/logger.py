@@ -8,6 +8,7 @@ from logging.handlers import SysLogHandler
 def get_logger_config(log_dir='/var/tmp',
                       logging_env="no_env",
                       edx_filename="edx.log",
+                      audit_filename="audit.log",
                       dev_env=False,
                       debug=False,
                       local_loglevel='INFO',
@@ -21,6 +22,9 @@ def get_logger_config(log_dir='/var/tmp',
     instead, application logs will be dropped in log_dir.
 
     "edx_filename" is ignored unless dev_env is set to true since otherwise logging is handled by rsyslogd.
+
+    Audit events are written as JSON, off the request thread, to "audit_filename" in log_dir if dev_env is set
+    to true, and to rsyslogd otherwise.
     """
 
     # Revert to INFO if an invalid string is passed in
@@ -53,6 +57,7 @@ def get_logger_config(log_dir='/var/tmp',
             },
             'syslog_format': {'format': syslog_format},
             'raw': {'format': '%(message)s'},
+            'audit': {'()': 'ecommerce.extensions.analytics.audit.AuditEventFormatter'},
         },
         'handlers': {
             'console': {
@@ -88,6 +93,11 @@ def get_logger_config(log_dir='/var/tmp',
                 'propagate': True,
                 'level': 'WARNING'
             },
+            'ecommerce.audit': {
+                'handlers': ['audit'],
+                'level': 'INFO',
+                'propagate': False
+            },
             '': {
                 'handlers': handlers,
                 'level': 'DEBUG',
@@ -108,6 +118,12 @@ def get_logger_config(log_dir='/var/tmp',
                 'backupCount': 5,
             },
         })
+        audit_target = {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.path.join(log_dir, audit_filename),
+            'maxBytes': 1024 * 1024 * 2,
+            'backupCount': 5,
+        }
     else:
         logger_config['handlers'].update({
             'local': {
@@ -119,5 +135,18 @@ def get_logger_config(log_dir='/var/tmp',
                 'facility': SysLogHandler.LOG_LOCAL0,
             },
         })
+        audit_target = {
+            'class': 'logging.handlers.SysLogHandler',
+            'address': '/var/run/syslog' if sys.platform == "darwin" else '/dev/log',
+            'facility': SysLogHandler.LOG_LOCAL0,
+        }
+
+    # Audit events are written off the request thread, by the audit handler.
+    logger_config['handlers']['audit'] = {
+        'level': 'INFO',
+        'class': 'ecommerce.extensions.analytics.audit.AuditLogHandler',
+        'formatter': 'audit',
+        'target': audit_target,
+    }
 
     return logger_config
@@ -66,6 +66,11 @@ EDX_API_KEY = 'replace-me'
 # END ORDER PROCESSING
 
 
+# HTTP CLIENT CONFIGURATION
+HTTP_CLIENT_RETRY_BACKOFF = 0
+# END HTTP CLIENT CONFIGURATION
+
+
 # PAYMENT PROCESSING
 PAYMENT_PROCESSOR_CONFIG = {
     'edx': {
@@ -19,6 +19,7 @@ from oscar.test import factories
 from social.apps.django_app.default.models import UserSocialAuth
 from threadlocals.threadlocals import set_thread_variable
 
+from ecommerce.core import http_client
 from ecommerce.core.url_utils import get_lms_url
 from ecommerce.courses.utils import mode_for_seat
 from ecommerce.extensions.fulfillment.signals import SHIPPING_EVENT_NAME
@@ -243,6 +244,14 @@ class BusinessIntelligenceMixin(object):
             self.fail()
 
 
+class HttpClientMixin(object):
+    def setUp(self):
+        super(HttpClientMixin, self).setUp()
+
+        # Close the circuits opened by the failures simulated by other tests.
+        http_client.reset()
+
+
 class SiteMixin(object):
     def setUp(self):
         super(SiteMixin, self).setUp()